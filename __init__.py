@@ -161,12 +161,16 @@ else:
             UNIVERSALGTA_OT_smart_auto_detect,
             UNIVERSALGTA_OT_execute_conversion_no_autofix,
             UNIVERSALGTA_OT_auto_detect_bones,
+            UNIVERSALGTA_OT_clear_checkpoints,
+            UNIVERSALGTA_OT_toggle_pipeline_step,
         )
         CONVERSION_OPERATORS.extend([
             UNIVERSALGTA_OT_execute_conversion,
             UNIVERSALGTA_OT_smart_auto_detect,
             UNIVERSALGTA_OT_execute_conversion_no_autofix,
             UNIVERSALGTA_OT_auto_detect_bones,
+            UNIVERSALGTA_OT_clear_checkpoints,
+            UNIVERSALGTA_OT_toggle_pipeline_step,
         ])
     except ImportError:
         pass
@@ -260,6 +264,7 @@ else:
             UNIVERSALGTA_OT_export_textures_with_browser,
             UNIVERSALGTA_OT_quick_material_rgb_fix,
             UNIVERSALGTA_OT_manual_smart_baking,
+            UNIVERSALGTA_OT_clear_bake_cache,
         )
         TEXTURE_EXPORT_OPERATORS = [
             UNIVERSALGTA_OT_pre_conversion_rasterization,
@@ -268,6 +273,7 @@ else:
             UNIVERSALGTA_OT_export_textures_with_browser,
             UNIVERSALGTA_OT_quick_material_rgb_fix,
             UNIVERSALGTA_OT_manual_smart_baking,
+            UNIVERSALGTA_OT_clear_bake_cache,
         ]
     except ImportError:
         TEXTURE_EXPORT_OPERATORS = []
@@ -445,6 +451,7 @@ else:
             UNIVERSALGTA_PT_AdvancedMappingPanel,
             UNIVERSALGTA_PT_QuickActionsPanel,   
             UNIVERSALGTA_PT_UtilitiesPanel,      
+            UNIVERSALGTA_PT_PerformancePanel,
             UNIVERSALGTA_PT_InfoPanel,
             UNIVERSALGTA_PT_NameAuthorPanel,    
         )
@@ -454,7 +461,8 @@ else:
             UNIVERSALGTA_PT_AdvancedMappingPanel,# 3. Advanced (CORRECTO)  
             UNIVERSALGTA_PT_QuickActionsPanel,   # 4. Quick Actions (CORRECTO)
             UNIVERSALGTA_PT_UtilitiesPanel,      # 5. Utilities
-            UNIVERSALGTA_PT_InfoPanel,           # 6. Info
+            UNIVERSALGTA_PT_PerformancePanel,    # 6. Performance
+            UNIVERSALGTA_PT_InfoPanel,           # 7. Info
         ]
     except ImportError:
         MAIN_PANELS = []
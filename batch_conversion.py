@@ -0,0 +1,473 @@
+"""
+Conversión por lotes (headless) para Universal GTA Converter
+
+Permite convertir cientos de personajes sin abrir la interfaz de Blender.
+El script actúa en dos roles:
+
+- Coordinador: recorre un directorio o manifiesto de archivos fuente y reparte
+  los trabajos entre N procesos Blender en segundo plano mediante una cola acotada.
+
+      blender -b -P batch_conversion.py -- --input <dir|manifest> --output <dir> [--workers N]
+
+- Worker: se ejecuta dentro de cada proceso Blender lanzado por el coordinador,
+  ejecuta Smart Auto Detect + conversión y escribe un JSON de resultado por trabajo.
+
+      blender -b <archivo.blend> -P batch_conversion.py -- --worker --job <job.json>
+
+Formatos de manifiesto admitidos:
+- .json: lista de rutas, o {"template": "...", "jobs": [{"source": "...", "name": "..."}]}
+- .txt: una ruta por línea (las líneas vacías o que empiezan por '#' se ignoran)
+"""
+
+import argparse
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+try:
+    import bpy  # type: ignore
+    BPY_AVAILABLE = True
+except ImportError:
+    bpy = None
+    BPY_AVAILABLE = False
+
+
+ADDON_DIR = Path(__file__).resolve().parent
+ADDON_MODULE = ADDON_DIR.name
+
+SUPPORTED_EXTENSIONS = {'.blend', '.fbx', '.glb', '.gltf'}
+RESULT_SUFFIX = ".result.json"
+
+
+# ============================================================================
+# UTILIDADES COMUNES
+# ============================================================================
+
+def _script_args(argv=None):
+    """Devuelve solo los argumentos posteriores a '--' (convención de Blender)"""
+    argv = list(sys.argv if argv is None else argv)
+    if "--" in argv:
+        return argv[argv.index("--") + 1:]
+    return []
+
+
+def _write_json(path, data):
+    """Escribe JSON de forma atómica para que el coordinador nunca lea un archivo a medias"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+# ============================================================================
+# COORDINADOR
+# ============================================================================
+
+def iter_source_jobs(input_path, default_template=None):
+    """Genera los trabajos (dict) a partir de un directorio o manifiesto.
+
+    Es un generador para que el productor alimente la cola acotada sin
+    materializar listas enormes de archivos.
+    """
+    input_path = Path(input_path).expanduser().resolve()
+
+    if input_path.is_dir():
+        for path in sorted(input_path.rglob("*")):
+            if not path.is_file() or path.suffix.lower() not in SUPPORTED_EXTENSIONS:
+                continue
+            # Ignorar resultados de lotes anteriores si la salida está dentro de la entrada
+            if path.stem.endswith("_gta"):
+                continue
+            yield {"source": str(path), "template": default_template}
+        return
+
+    if input_path.suffix.lower() == '.json':
+        data = _read_json(input_path)
+        if data is None:
+            raise ValueError(f"Manifiesto JSON inválido: {input_path}")
+        if isinstance(data, dict):
+            template = data.get("template", default_template)
+            entries = data.get("jobs", [])
+        else:
+            template = default_template
+            entries = data
+        for entry in entries:
+            if isinstance(entry, str):
+                entry = {"source": entry}
+            source = Path(entry["source"]).expanduser()
+            if not source.is_absolute():
+                source = input_path.parent / source
+            job = dict(entry)
+            job["source"] = str(source.resolve())
+            job.setdefault("template", template)
+            yield job
+        return
+
+    # Manifiesto de texto plano
+    with open(input_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            source = Path(line).expanduser()
+            if not source.is_absolute():
+                source = input_path.parent / source
+            yield {"source": str(source.resolve()), "template": default_template}
+
+
+def _find_blender_binary(explicit=None):
+    if explicit:
+        return explicit
+    if BPY_AVAILABLE and getattr(bpy.app, 'binary_path', None):
+        return bpy.app.binary_path
+    return "blender"
+
+
+def _build_worker_command(blender_bin, job, job_file, threads):
+    """Construye la línea de comandos del worker Blender"""
+    source = job["source"]
+    is_blend = Path(source).suffix.lower() == '.blend'
+    cmd = [blender_bin, "-b"]
+
+    if is_blend:
+        cmd.append(source)
+    elif job.get("template"):
+        cmd.append(job["template"])
+    else:
+        cmd.append("--factory-startup")
+
+    if threads:
+        cmd += ["-t", str(threads)]
+
+    cmd += ["-P", str(Path(__file__).resolve()), "--", "--worker", "--job", str(job_file)]
+    return cmd
+
+
+def _run_job(job, index, args, blender_bin, threads):
+    """Ejecuta un trabajo en un proceso Blender y devuelve su resultado"""
+    source = Path(job["source"])
+    name = job.get("name") or source.stem
+    job_id = f"{index:04d}_{name}"
+    output_dir = Path(args.output).expanduser().resolve()
+    jobs_dir = output_dir / "jobs"
+    jobs_dir.mkdir(parents=True, exist_ok=True)
+
+    job_file = jobs_dir / f"{job_id}.job.json"
+    result_file = jobs_dir / f"{job_id}{RESULT_SUFFIX}"
+    log_file = jobs_dir / f"{job_id}.log"
+
+    job_data = dict(job)
+    job_data.update({
+        "job_id": job_id,
+        "name": name,
+        "output_blend": str(output_dir / f"{name}_gta.blend"),
+        "texture_dir": str(output_dir / f"{name}_textures") if args.export_textures else "",
+        "result_file": str(result_file),
+        "addon_module": ADDON_MODULE,
+        "addon_parent": str(ADDON_DIR.parent),
+    })
+    _write_json(job_file, job_data)
+
+    if result_file.exists():
+        result_file.unlink()
+
+    cmd = _build_worker_command(blender_bin, job, job_file, threads)
+    start = time.perf_counter()
+    returncode = None
+    status_override = None
+
+    try:
+        with open(log_file, 'w', encoding='utf-8', errors='replace') as log:
+            proc = subprocess.run(cmd, stdout=log, stderr=subprocess.STDOUT,
+                                  timeout=args.timeout or None)
+            returncode = proc.returncode
+    except subprocess.TimeoutExpired:
+        status_override = "timeout"
+    except Exception as e:
+        status_override = "failed"
+        print(f"❌ [BATCH] No se pudo lanzar Blender para {job_id}: {e}")
+
+    wall = time.perf_counter() - start
+    result = _read_json(result_file)
+
+    if result is None:
+        # El worker murió sin escribir resultado (crash, timeout, addon ausente...)
+        result = {
+            "job_id": job_id,
+            "source": str(source),
+            "status": status_override or "failed",
+            "error": "El worker terminó sin escribir resultado",
+            "timings": {},
+            "outputs": {},
+        }
+
+    result["returncode"] = returncode
+    result["log"] = str(log_file)
+    result.setdefault("timings", {})["process_wall"] = round(wall, 3)
+    _write_json(result_file, result)
+    return result
+
+
+def run_batch(args):
+    """Reparte los trabajos entre N workers Blender usando una cola acotada"""
+    output_dir = Path(args.output).expanduser().resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    cpu_count = os.cpu_count() or 1
+    workers = max(1, args.workers or cpu_count)
+    threads = args.threads if args.threads is not None else max(1, cpu_count // workers)
+    blender_bin = _find_blender_binary(args.blender)
+    queue_size = max(1, args.queue_size or workers * 2)
+
+    print("=" * 70)
+    print(f"🚀 [BATCH] Conversión por lotes: {workers} workers, {threads} hilos/worker, cola={queue_size}")
+    print(f"📂 [BATCH] Entrada: {args.input}")
+    print(f"📂 [BATCH] Salida:  {output_dir}")
+    print("=" * 70)
+
+    jobs_queue = queue.Queue(maxsize=queue_size)
+    results = []
+    results_lock = threading.Lock()
+    stop_token = object()
+    batch_start = time.perf_counter()
+
+    def producer():
+        try:
+            for index, job in enumerate(iter_source_jobs(args.input, args.template)):
+                jobs_queue.put((index, job))  # bloquea cuando la cola está llena
+        except Exception as e:
+            print(f"❌ [BATCH] Error leyendo trabajos: {e}")
+        finally:
+            for _ in range(workers):
+                jobs_queue.put(stop_token)
+
+    def consumer():
+        while True:
+            item = jobs_queue.get()
+            if item is stop_token:
+                break
+            index, job = item
+            print(f"▶️ [BATCH] Iniciando {index:04d}: {job['source']}")
+            result = _run_job(job, index, args, blender_bin, threads)
+            icon = "✅" if result.get("status") == "ok" else "❌"
+            print(f"{icon} [BATCH] {result.get('job_id')}: {result.get('status')} "
+                  f"({result['timings'].get('process_wall', 0):.1f}s)")
+            with results_lock:
+                results.append(result)
+
+    threads_list = [threading.Thread(target=producer, daemon=True)]
+    threads_list += [threading.Thread(target=consumer, daemon=True) for _ in range(workers)]
+    for thread in threads_list:
+        thread.start()
+    for thread in threads_list:
+        thread.join()
+
+    results.sort(key=lambda r: r.get("job_id", ""))
+    ok_count = sum(1 for r in results if r.get("status") == "ok")
+    summary = {
+        "workers": workers,
+        "threads_per_worker": threads,
+        "total": len(results),
+        "ok": ok_count,
+        "failed": len(results) - ok_count,
+        "wall_time": round(time.perf_counter() - batch_start, 3),
+        "jobs": results,
+    }
+    _write_json(output_dir / "batch_summary.json", summary)
+
+    print("=" * 70)
+    print(f"🎉 [BATCH] Completado: {ok_count}/{len(results)} OK en {summary['wall_time']:.1f}s")
+    print(f"📄 [BATCH] Resumen: {output_dir / 'batch_summary.json'}")
+    print("=" * 70)
+    return 0 if ok_count == len(results) else 1
+
+
+# ============================================================================
+# WORKER (se ejecuta dentro de Blender)
+# ============================================================================
+
+def _ensure_addon_registered(job):
+    """Garantiza que los operadores universalgta estén disponibles en el worker"""
+    if hasattr(bpy.types, "UNIVERSALGTA_OT_execute_conversion"):
+        return True
+
+    module_name = job.get("addon_module", ADDON_MODULE)
+    try:
+        import addon_utils  # type: ignore
+        addon_utils.enable(module_name, default_set=False)
+    except Exception as e:
+        print(f"⚠️ [BATCH] addon_utils no pudo habilitar '{module_name}': {e}")
+
+    if hasattr(bpy.types, "UNIVERSALGTA_OT_execute_conversion"):
+        return True
+
+    # Fallback: importar el addon directamente desde su carpeta (checkout de desarrollo)
+    try:
+        import importlib
+        addon_parent = job.get("addon_parent", str(ADDON_DIR.parent))
+        if addon_parent not in sys.path:
+            sys.path.insert(0, addon_parent)
+        module = importlib.import_module(module_name)
+        module.register()
+    except Exception as e:
+        print(f"❌ [BATCH] No se pudo registrar el addon: {e}")
+        return False
+
+    return hasattr(bpy.types, "UNIVERSALGTA_OT_execute_conversion")
+
+
+def _import_source(source):
+    """Importa un archivo no-.blend en la escena actual (plantilla o escena vacía)"""
+    suffix = Path(source).suffix.lower()
+    if suffix == '.fbx':
+        bpy.ops.import_scene.fbx(filepath=source)
+    elif suffix in {'.glb', '.gltf'}:
+        bpy.ops.import_scene.gltf(filepath=source)
+    else:
+        raise ValueError(f"Formato no soportado: {suffix}")
+
+
+def _export_job_textures(texture_dir):
+    """Exporta las texturas de la malla convertida usando el exportador del addon"""
+    import importlib
+    texture_export = importlib.import_module(f"{ADDON_MODULE}.operators.texture_export")
+
+    mesh_obj = bpy.data.objects.get("Mesh")
+    images = set()
+    if mesh_obj and mesh_obj.type == 'MESH':
+        for slot in mesh_obj.material_slots:
+            material = slot.material
+            if material and material.use_nodes and material.node_tree:
+                for node in material.node_tree.nodes:
+                    if node.type == 'TEX_IMAGE' and node.image:
+                        images.add(node.image)
+
+    os.makedirs(texture_dir, exist_ok=True)
+    exported, failed = texture_export._export_images(images, texture_dir, True, 'PNG')
+    return [os.path.join(texture_dir, name) for name in exported], failed
+
+
+def run_worker(job_file):
+    """Ejecuta un único trabajo dentro de Blender y escribe su JSON de resultado"""
+    job = _read_json(job_file) or {}
+    result = {
+        "job_id": job.get("job_id"),
+        "source": job.get("source"),
+        "status": "failed",
+        "error": None,
+        "timings": {},
+        "outputs": {},
+        "blender_version": bpy.app.version_string,
+    }
+    timings = result["timings"]
+    total_start = time.perf_counter()
+
+    def timed(name, func, *func_args):
+        start = time.perf_counter()
+        try:
+            return func(*func_args)
+        finally:
+            timings[name] = round(time.perf_counter() - start, 3)
+
+    try:
+        if not _ensure_addon_registered(job):
+            raise RuntimeError("Addon Universal GTA no disponible en el worker")
+
+        source = job["source"]
+        if Path(source).suffix.lower() != '.blend':
+            timed("import", _import_source, source)
+
+        timed("smart_auto_detect", bpy.ops.universalgta.smart_auto_detect)
+        settings = bpy.context.scene.universal_gta_settings
+        result["source_armature"] = settings.source_armature.name if settings.source_armature else None
+        result["target_armature"] = settings.target_armature.name if settings.target_armature else None
+        result["mappings"] = len(settings.bone_mappings)
+
+        op_result = timed("conversion", bpy.ops.universalgta.execute_conversion)
+        if 'FINISHED' not in op_result:
+            raise RuntimeError(f"La conversión terminó con estado {sorted(op_result)}")
+
+        output_blend = job["output_blend"]
+        os.makedirs(os.path.dirname(output_blend), exist_ok=True)
+        timed("save", lambda: bpy.ops.wm.save_as_mainfile(filepath=output_blend, copy=True))
+        result["outputs"]["blend"] = output_blend
+
+        if job.get("texture_dir"):
+            exported, failed = timed("texture_export", _export_job_textures, job["texture_dir"])
+            result["outputs"]["textures"] = exported
+            if failed:
+                result["outputs"]["textures_failed"] = failed
+
+        result["status"] = "ok"
+    except Exception as e:
+        result["error"] = str(e)
+        result["traceback"] = traceback.format_exc()
+        print(f"❌ [BATCH] Error en worker: {e}")
+    finally:
+        timings["total"] = round(time.perf_counter() - total_start, 3)
+        if job.get("result_file"):
+            _write_json(job["result_file"], result)
+
+    return 0 if result["status"] == "ok" else 1
+
+
+# ============================================================================
+# ENTRADA CLI
+# ============================================================================
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog="blender -b -P batch_conversion.py --",
+        description="Conversión por lotes a GTA SA con múltiples procesos Blender",
+    )
+    parser.add_argument("--input", help="Directorio de archivos fuente o manifiesto (.json/.txt)")
+    parser.add_argument("--output", help="Directorio de salida")
+    parser.add_argument("--workers", type=int, default=0, help="Número de procesos Blender (por defecto: núcleos)")
+    parser.add_argument("--threads", type=int, default=None, help="Hilos por worker (por defecto: núcleos / workers)")
+    parser.add_argument("--queue-size", type=int, default=0, help="Tamaño de la cola acotada (por defecto: 2 x workers)")
+    parser.add_argument("--template", default=None, help=".blend con el armature GTA SA para fuentes no-.blend")
+    parser.add_argument("--timeout", type=float, default=0, help="Tiempo máximo por trabajo en segundos (0 = sin límite)")
+    parser.add_argument("--blender", default=None, help="Ruta al ejecutable de Blender para los workers")
+    parser.add_argument("--export-textures", action="store_true", help="Exportar texturas PNG de cada resultado")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--job", default=None, help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    parser = build_arg_parser()
+    args = parser.parse_args(_script_args(argv) if argv is None else argv)
+
+    if args.worker:
+        if not BPY_AVAILABLE:
+            print("❌ [BATCH] El modo worker debe ejecutarse dentro de Blender")
+            return 2
+        return run_worker(args.job)
+
+    if not args.input or not args.output:
+        parser.print_help()
+        return 2
+    return run_batch(args)
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    if BPY_AVAILABLE and bpy.app.background:
+        # Salir explícitamente para que Blender devuelva el código al coordinador
+        sys.exit(exit_code)
@@ -117,6 +117,38 @@ class UniversalGTASettings(PropertyGroup):
         ],
         default='512'
     )
+    texture_budget_mode: EnumProperty(
+        name="Presupuesto de Texturas",
+        description="Repartir la resolución de cada material según un presupuesto total en lugar de usar la misma resolución para todos",
+        items=[
+            ('OFF', "Sin Presupuesto", "Usar la Resolución de Bake para todos los materiales"),
+            ('MEMORY', "Memoria", "Presupuesto de memoria de texturas sin comprimir (RGBA, 4 bytes por píxel)"),
+            ('TXD', "Tamaño TXD", "Presupuesto del TXD estimado en DXT1/DXT5 con mipmaps"),
+        ],
+        default='OFF'
+    )
+    texture_budget_mb: FloatProperty(
+        name="Presupuesto (MB)",
+        description="Total de MB para las texturas del personaje (se reparte por área, cobertura UV, importancia y tamaño de origen)",
+        default=4.0,
+        min=0.1,
+        max=256.0
+    )
+    use_texture_atlas: BoolProperty(
+        name="Atlas de Texturas",
+        description="Bakear todos los materiales de cada malla en una sola textura y un solo material (menos entradas en el TXD y menos draw calls)",
+        default=False
+    )
+    dedupe_datablocks: BoolProperty(
+        name="Fundir Duplicados",
+        description="Antes de rasterizar, fundir materiales e imágenes idénticos (Body, Body.001, ...) para bakear y exportar cada uno una sola vez",
+        default=True
+    )
+    use_cpu_shader_eval: BoolProperty(
+        name="Evaluar Shaders en CPU",
+        description="Rasterizar con NumPy los materiales cuyos nodos son sencillos (Image, Mix, Hue/Sat, ColorRamp, Invert, Bright/Contrast, RGB Curves) sin lanzar Cycles",
+        default=True
+    )
     debug_mode: BoolProperty(name="Debug Mode", default=False)
     auto_detect_mode: BoolProperty(name="Auto Detect", default=True)
     detection_threshold: FloatProperty(name="Detection Threshold", default=0.5)
@@ -255,6 +287,106 @@ class UniversalGTASettings(PropertyGroup):
         max=1.0
     )
 
+    # === RENDIMIENTO / PROFILER ===
+    profile_conversion: BoolProperty(
+        name="Perfilar Conversión",
+        description="Medir tiempo, CPU, memoria y datablocks de cada paso y guardar una traza Chrome (JSON)",
+        default=False
+    )
+
+    last_profile_summary: StringProperty(
+        name="Último Perfil",
+        description="Resumen JSON de los pasos más costosos de la última conversión perfilada",
+        default=""
+    )
+
+    last_profile_path: StringProperty(
+        name="Traza del Último Perfil",
+        description="Ruta del archivo de traza de la última conversión perfilada",
+        default="",
+        subtype='FILE_PATH'
+    )
+
+    lean_conversion: BoolProperty(
+        name="Modo Ligero",
+        description="Suspender el undo global, los shaders del viewport y las actualizaciones intermedias del depsgraph durante la conversión (un solo paso de deshacer al final). Modifica temporalmente la preferencia de undo global",
+        default=False
+    )
+
+    # === CACHÉ DE BAKES ===
+    use_bake_cache: BoolProperty(
+        name="Caché de Bakes",
+        description="Reutilizar bakes guardados en disco cuando el material, sus imágenes, las UVs y la resolución no han cambiado",
+        default=True
+    )
+
+    bake_cache_max_mb: IntProperty(
+        name="Tamaño Máx. (MB)",
+        description="Tamaño máximo de la caché de bakes; se eliminan primero los bakes usados hace más tiempo",
+        default=1024,
+        min=0,
+        max=65536
+    )
+
+    bake_alpha_strategy: EnumProperty(
+        name="Bake de Alpha",
+        description="Cómo se obtiene el canal alpha de los materiales bakeados",
+        items=[
+            ('AUTO', "Automático", "Una sola pasada RGBA cuando el alpha es constante u opaco; dos pasadas solo si el alpha varía por píxel"),
+            ('TWO_PASS', "Dos Pasadas", "Bakear siempre el color (DIFFUSE) y el alpha (EMIT) por separado"),
+        ],
+        default='AUTO'
+    )
+
+    # === GRANJA DE BAKES ===
+    use_bake_farm: BoolProperty(
+        name="Granja de Bakes",
+        description="Bakear los materiales complejos en varios procesos de Blender en segundo plano en lugar de uno tras otro en la interfaz",
+        default=False
+    )
+
+    bake_farm_processes: IntProperty(
+        name="Procesos",
+        description="Procesos de Blender simultáneos (0 = automático, un proceso por cada 4 núcleos)",
+        default=0,
+        min=0,
+        max=64
+    )
+
+    bake_farm_threads: IntProperty(
+        name="Hilos por Proceso",
+        description="Hilos de Cycles de cada proceso (0 = repartir los núcleos entre los procesos)",
+        default=0,
+        min=0,
+        max=256
+    )
+
+    # === PIPELINE ===
+    disabled_pipeline_steps: StringProperty(
+        name="Pasos Desactivados",
+        description="Nombres de pasos del pipeline de conversión que no se ejecutan (separados por comas)",
+        default=""
+    )
+
+    # === CHECKPOINTS ===
+    use_checkpoints: BoolProperty(
+        name="Checkpoints",
+        description="Guardar una instantánea tras los pasos costosos (unión, rasterización, pesos, pose) para poder reanudar si la conversión falla",
+        default=False
+    )
+
+    incremental_conversion: BoolProperty(
+        name="Conversión Incremental",
+        description="Guardar hashes de las entradas (mallas, mappings, materiales, imágenes, ajustes) con los checkpoints y, al reconvertir, reutilizar las etapas cuyas entradas no cambiaron",
+        default=False
+    )
+
+    last_checkpoint_info: StringProperty(
+        name="Último Checkpoint",
+        description="Etapa y fecha del último checkpoint guardado para este archivo",
+        default=""
+    )
+
 
 def register_validation():
     """
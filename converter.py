@@ -6,7 +6,7 @@ NUEVAS INTEGRACIONES AUTOMATICAS:
 - Materiales con Specular = 0 automático durante conversión
 - Color por defecto #E7E7E7FF integrado
 - DragonFF configuración automática
-- COPY_LOCATION Constraints automáticos aplicados
+- Posiciones de huesos (equivalente a COPY_LOCATION) aplicadas automáticamente
 """
 
 import bpy
@@ -14,6 +14,8 @@ import bmesh
 from mathutils import Vector, Matrix
 import time
 
+from .utils.retarget import retarget_rest_pose
+
 # Color por defecto optimizado para GTA SA
 DEFAULT_GTA_COLOR = (0.906, 0.906, 0.906, 1.0)  # #E7E7E7FF
 
@@ -114,10 +116,6 @@ class UniversalGTAConverter:
             
             self.log(f"Aplicando constraints a: {target_armature.name}")
             
-            # Activar armature y entrar en modo pose
-            bpy.context.view_layer.objects.active = target_armature
-            bpy.ops.object.mode_set(mode='POSE')
-            
             # CORREGIDO: Usar TODOS los mapeos válidos, no solo los que tienen mismo nombre
             constraint_mappings = {}
             
@@ -158,41 +156,9 @@ class UniversalGTAConverter:
                     'R Finger01': ' R Finger',
                 }
             
-            # Aplicar constraints - MEJORADO
-            for target_bone_name, source_bone_name in constraint_mappings.items():
-                if (target_bone_name in target_armature.pose.bones and 
-                    source_bone_name in target_armature.pose.bones):
-                    
-                    target_bone = target_armature.pose.bones[target_bone_name]
-                    
-                    # Limpiar constraints existentes
-                    for constraint in list(target_bone.constraints):
-                        if constraint.name.startswith("GTA_SA_COPY_LOC"):
-                            target_bone.constraints.remove(constraint)
-                    
-                    try:
-                        # Crear constraint COPY_LOCATION
-                        constraint = target_bone.constraints.new(type='COPY_LOCATION')
-                        constraint.name = f"GTA_SA_COPY_LOC_{source_bone_name.replace(' ', '_')}"
-                        constraint.target = target_armature
-                        constraint.subtarget = source_bone_name
-                        constraint.use_x = True
-                        constraint.use_y = True
-                        constraint.use_z = True
-                        constraint.influence = 1.0
-                        constraint.target_space = 'WORLD'
-                        constraint.owner_space = 'WORLD'
-                        
-                        constraints_applied += 1
-                        self.log(f"Constraint aplicado: {source_bone_name} -> {target_bone_name}")
-                        
-                    except Exception as e:
-                        self.log(f"Error aplicando constraint {target_bone_name}: {e}", "ERROR")
-                        continue
-                else:
-                    self.log(f"Huesos no encontrados en armature: {source_bone_name} -> {target_bone_name}", "WARNING")
+            # Posicionar huesos - MEJORADO: cálculo directo en lugar de COPY_LOCATION
+            constraints_applied = self.retarget_bone_positions(target_armature, constraint_mappings)
             
-            bpy.ops.object.mode_set(mode='OBJECT')
             self.constraints_applied = constraints_applied
             self.log(f"Constraints aplicados exitosamente: {constraints_applied}")
             return constraints_applied
@@ -205,6 +171,28 @@ class UniversalGTAConverter:
                 pass
             return 0
 
+    def retarget_bone_positions(self, target_armature, constraint_mappings):
+        """Mueve cada hueso target a la posición de su hueso source (mismo armature).
+
+        Equivale a COPY_LOCATION + Apply Pose, pero sin crear constraints.
+        """
+        # Limpiar constraints antiguos que hayan quedado de versiones anteriores
+        for pose_bone in target_armature.pose.bones:
+            for constraint in list(pose_bone.constraints):
+                if constraint.name.startswith("GTA_SA_COPY_LOC"):
+                    pose_bone.constraints.remove(constraint)
+        
+        pairs = []
+        for target_bone_name, source_bone_name in constraint_mappings.items():
+            if (target_bone_name in target_armature.pose.bones and 
+                source_bone_name in target_armature.pose.bones):
+                pairs.append((source_bone_name, target_bone_name))
+                self.log(f"Posición copiada: {source_bone_name} -> {target_bone_name}")
+            else:
+                self.log(f"Huesos no encontrados en armature: {source_bone_name} -> {target_bone_name}", "WARNING")
+        
+        return retarget_rest_pose(target_armature, target_armature, pairs, many_to_one='LAST')
+
     def execute_base_conversion(self):
         """Ejecutar conversión base (mantiene compatibilidad)"""
         # Aquí va la lógica de conversión existente
@@ -301,9 +289,6 @@ class UniversalGTAConverter:
         self.log("Aplicando constraints con mappings mejorados...")
         
         try:
-            bpy.context.view_layer.objects.active = target_armature
-            bpy.ops.object.mode_set(mode='POSE')
-            
             constraints_applied = 0
             
             # Usar mapeos del addon si están disponibles
@@ -340,41 +325,9 @@ class UniversalGTAConverter:
                     ' R Toe0': ' R Foot',
                 }
             
-            # Aplicar constraints
-            for target_bone_name, source_bone_name in constraint_mappings.items():
-                if (target_bone_name in target_armature.pose.bones and 
-                    source_bone_name in target_armature.pose.bones):
-                    
-                    target_bone = target_armature.pose.bones[target_bone_name]
-                    
-                    # Limpiar constraints existentes del tipo
-                    for constraint in list(target_bone.constraints):
-                        if constraint.name.startswith("GTA_SA_COPY_LOC"):
-                            target_bone.constraints.remove(constraint)
-                    
-                    try:
-                        # Crear nuevo constraint
-                        constraint = target_bone.constraints.new(type='COPY_LOCATION')
-                        constraint.name = f"GTA_SA_COPY_LOC_{source_bone_name.replace(' ', '_')}"
-                        constraint.target = target_armature
-                        constraint.subtarget = source_bone_name
-                        constraint.use_x = True
-                        constraint.use_y = True
-                        constraint.use_z = True
-                        constraint.influence = 1.0
-                        constraint.target_space = 'WORLD'
-                        constraint.owner_space = 'WORLD'
-                        
-                        constraints_applied += 1
-                        self.log(f"Constraint aplicado: {source_bone_name} -> {target_bone_name}")
-                        
-                    except Exception as e:
-                        self.log(f"Error aplicando constraint {target_bone_name}: {e}", "ERROR")
-                        continue
-                else:
-                    self.log(f"Huesos no encontrados: {source_bone_name} -> {target_bone_name}", "WARNING")
+            # Posicionar huesos
+            constraints_applied = self.retarget_bone_positions(target_armature, constraint_mappings)
             
-            bpy.ops.object.mode_set(mode='OBJECT')
             self.constraints_applied = constraints_applied
             self.log(f"Constraints aplicados: {constraints_applied}")
             return constraints_applied
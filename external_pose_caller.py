@@ -3,9 +3,8 @@ external_pose_caller.py - Mejorado con sistema de constraints
 Universal GTA SA Converter v4.1
 
 NUEVAS FUNCIONALIDADES:
-- Aplicación de constraints de posición usando bone mapping
+- Copia de posiciones usando bone mapping (cálculo directo, sin constraints temporales)
 - Promediado automático para huesos duplicados
-- Limpieza automática de constraints después de aplicación
 - Sistema mejorado de detección de armatures
 """
 
@@ -13,6 +12,8 @@ import bpy
 import mathutils
 from collections import defaultdict
 
+from .utils.retarget import retarget_rest_pose
+
 
 class ExternalPoseApplier:
 
@@ -333,11 +334,11 @@ class ExternalPoseApplier:
     
     def copy_pose_with_enhanced_constraints(self, source_armature, target_armature, bone_mappings=None):
         """
-        Copia pose usando constraints de posición con sistema mejorado
+        Copia pose calculando la posición de cada hueso destino desde el source
         Incluye promediado para huesos duplicados
         """
         try:
-            print(f"[EXTERNAL_POSE] Iniciando copia con constraints mejorados")
+            print(f"[EXTERNAL_POSE] Iniciando copia de posiciones")
             print(f"[EXTERNAL_POSE] Fuente: {source_armature.name}, Destino: {target_armature.name}")
             
             if not bone_mappings:
@@ -366,153 +367,26 @@ class ExternalPoseApplier:
             for target, sources in duplicate_targets.items():
                 print(f"[EXTERNAL_POSE]   {target} <- {sources}")
             
-            # Activar target armature y entrar en modo pose
-            bpy.context.view_layer.objects.active = target_armature
-            bpy.ops.object.mode_set(mode='POSE')
-            
-            # FASE 1: Aplicar constraints de posición
-            constraints_applied = []
-            
-            # 1.1: Aplicar constraints para huesos únicos (1:1 mapping)
-            for target_bone_name, source_bone_name in single_targets.items():
-                constraint_name = self.apply_position_constraint(
-                    source_armature, source_bone_name, 
-                    target_armature, target_bone_name
-                )
-                if constraint_name:
-                    constraints_applied.append((target_bone_name, constraint_name))
-            
-            # 1.2: Aplicar constraints promediados para huesos duplicados
-            for target_bone_name, source_bone_names in duplicate_targets.items():
-                constraint_name = self.apply_averaged_position_constraint(
-                    source_armature, source_bone_names,
-                    target_armature, target_bone_name
-                )
-                if constraint_name:
-                    constraints_applied.append((target_bone_name, constraint_name))
+            # Posiciones calculadas directamente desde la pose del source,
+            # promediando los huesos duplicados (sin constraints temporales)
+            bones_positioned = retarget_rest_pose(
+                source_armature, target_armature, bone_mappings,
+                many_to_one='AVERAGE', debug=self.debug
+            )
             
-            # FASE 2: Forzar actualización de constraints
-            bpy.context.view_layer.update()
-            
-            # FASE 3: Aplicar pose (constraints se evalúan automáticamente)
-            print(f"[EXTERNAL_POSE] Aplicando pose con {len(constraints_applied)} constraints")
-            
-            # FASE 4: Limpiar constraints después de aplicación
-            self.cleanup_applied_constraints(target_armature, constraints_applied)
-            
-            bpy.ops.object.mode_set(mode='OBJECT')
+            print(f"[EXTERNAL_POSE] Pose aplicada en {bones_positioned} huesos")
             print(f"[EXTERNAL_POSE] Proceso completado exitosamente")
             
-            return True
+            return bones_positioned > 0
             
         except Exception as e:
             print(f"[EXTERNAL_POSE] Error durante el proceso: {e}")
-            # Limpieza en caso de error
             try:
-                self.cleanup_applied_constraints(target_armature, constraints_applied)
                 bpy.ops.object.mode_set(mode='OBJECT')
             except:
                 pass
             return False
     
-    def apply_position_constraint(self, source_armature, source_bone_name, target_armature, target_bone_name):
-        """
-        Aplica constraint de posición de un source bone a un target bone
-        Retorna el nombre del constraint creado o None si falló
-        """
-        try:
-            if (source_bone_name not in source_armature.pose.bones or 
-                target_bone_name not in target_armature.pose.bones):
-                return None
-            
-            target_bone = target_armature.pose.bones[target_bone_name]
-            
-            # Crear constraint de copy location
-            constraint = target_bone.constraints.new(type='COPY_LOCATION')
-            constraint.name = f"ExtCopyLoc_{source_bone_name}"
-            constraint.target = source_armature
-            constraint.subtarget = source_bone_name
-            constraint.use_x = True
-            constraint.use_y = True
-            constraint.use_z = True
-            constraint.influence = 1.0
-            
-            if self.debug:
-                print(f"[EXTERNAL_POSE] Constraint aplicado: {source_bone_name} -> {target_bone_name}")
-            return constraint.name
-            
-        except Exception as e:
-            print(f"[EXTERNAL_POSE] Error aplicando constraint: {e}")
-            return None
-    
-    def apply_averaged_position_constraint(self, source_armature, source_bone_names, target_armature, target_bone_name):
-        """
-        Aplica constraints promediados para múltiples source bones a un target bone
-        Retorna el nombre del constraint principal o None si falló
-        """
-        try:
-            if target_bone_name not in target_armature.pose.bones:
-                return None
-            
-            target_bone = target_armature.pose.bones[target_bone_name]
-            valid_sources = [name for name in source_bone_names if name in source_armature.pose.bones]
-            
-            if not valid_sources:
-                return None
-            
-            # Si solo hay un source válido, usar constraint normal
-            if len(valid_sources) == 1:
-                return self.apply_position_constraint(source_armature, valid_sources[0], target_armature, target_bone_name)
-            
-            # Para múltiples sources, crear constraints con influencia dividida
-            influence_per_bone = 1.0 / len(valid_sources)
-            main_constraint_name = None
-            
-            for i, source_bone_name in enumerate(valid_sources):
-                constraint = target_bone.constraints.new(type='COPY_LOCATION')
-                constraint.name = f"ExtAvgLoc_{i}_{source_bone_name}"
-                constraint.target = source_armature
-                constraint.subtarget = source_bone_name
-                constraint.use_x = True
-                constraint.use_y = True
-                constraint.use_z = True
-                constraint.influence = influence_per_bone
-                
-                if i == 0:
-                    main_constraint_name = constraint.name
-                
-                if self.debug:
-                    print(f"[EXTERNAL_POSE] Constraint promediado ({influence_per_bone:.2f}): {source_bone_name} -> {target_bone_name}")
-            
-            return main_constraint_name
-            
-        except Exception as e:
-            print(f"[EXTERNAL_POSE] Error aplicando constraints promediados: {e}")
-            return None
-    
-    def cleanup_applied_constraints(self, target_armature, constraints_applied):
-        """
-        Limpia los constraints aplicados después de la copia de pose
-        """
-        try:
-            print(f"[EXTERNAL_POSE] Limpiando {len(constraints_applied)} constraints...")
-            
-            for bone_name, constraint_name in constraints_applied:
-                if bone_name in target_armature.pose.bones:
-                    bone = target_armature.pose.bones[bone_name]
-                    # Buscar y remover constraints que empiecen con "Ext"
-                    constraints_to_remove = [c for c in bone.constraints if c.name.startswith("Ext")]
-                    
-                    for constraint in constraints_to_remove:
-                        bone.constraints.remove(constraint)
-                        if self.debug:
-                            print(f"[EXTERNAL_POSE] Constraint removido: {constraint.name} de {bone_name}")
-            
-            print("[EXTERNAL_POSE] Limpieza de constraints completada")
-            
-        except Exception as e:
-            print(f"[EXTERNAL_POSE] Error durante limpieza: {e}")
-    
     def reset_armature_pose(self, armature):
         """
         Resetea la pose de un armature a su estado rest
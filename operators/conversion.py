@@ -1,8 +1,99 @@
 import bpy
 from bpy.types import Operator
+from bpy.props import BoolProperty, StringProperty
+import json
 import re
 from typing import List
 
+from ..utils.checkpoints import CheckpointStore, CHECKPOINT_STAGES, STAGE_LABELS, prune_checkpoint_stores
+from ..utils.lean_mode import lean_mode
+from ..utils.pipeline_graph import PipelineAbort, PipelineGraph, PipelineStep
+from ..utils.profiler import ConversionProfiler, profile_step
+from ..utils.retarget import compute_target_heads, compute_rest_matrices, write_rest_matrices
+from ..utils.solid_raster import clear_solid_buffers, fill_solid_pixels
+
+# === PIPELINE DE CONVERSIÓN ===
+# (nombre, etiqueta, método del operador, argumentos, opciones de PipelineStep)
+# Argumentos: 'context', 'settings' o el nombre de un recurso producido por un paso anterior.
+# Los antiguos PASO 3.5 / 4 (rasterización previa) viven ahora en 'rasterize' (PASO 8.5)
+# y la limpieza estricta de materiales en 'material_cleanup' (PASO 8.6).
+CONVERSION_PIPELINE = (
+    ("purge_orphans", "Purga de huérfanos inicial", "purge_orphans_initial", (),
+     {'stage': 'merge'}),
+    ("initial_transforms", "Transformaciones iniciales", "apply_initial_transforms", ('context',),
+     {'stage': 'merge'}),
+    ("vertex_colors", "Vertex colors", "clean_vertex_colors_step", ('settings',),
+     {'stage': 'merge'}),
+    ("require_armatures", "Comprobando armatures", "require_armatures", ('settings',),
+     {'required': True}),
+    ("custom_pose", "Custom Pose automática", "apply_auto_custom_pose", (),
+     {'stage': 'merge'}),
+    ("mmd_cleanup", "Limpieza jerarquía MMD", "clean_mmd_hierarchy", (),
+     {'stage': 'merge'}),
+    ("validate", "Validando escena", "validate_scene_step", ('settings',),
+     {'required': True}),
+    ("snapshot_mappings", "Leyendo bone mappings", "snapshot_mappings", ('settings',),
+     {'outputs': ('mapping_snapshot',), 'required': True}),
+    ("analyze_mappings", "Análisis de mappings", "analyze_mapping_snapshot", ('mapping_snapshot',),
+     {'inputs': ('mapping_snapshot',), 'outputs': ('weight_pairs', 'retarget_pairs'),
+      'cpu_only': True, 'required': True}),
+    ("apply_transforms", "PASO 2: Aplicando transformaciones", "apply_all_transforms_ultimate", (),
+     {'stage': 'merge', 'done_if': 'transforms_already_applied'}),
+    ("dedupe_datablocks", "PASO 2.5: Consolidando materiales e imágenes duplicados", "dedupe_datablocks_step", ('settings',),
+     {'stage': 'merge'}),
+    ("cleanup_texture_names", "PASO 3: Limpiando texturas", "cleanup_texture_names", (),
+     {'stage': 'merge', 'done_if': 'texture_names_already_clean'}),
+    ("save_pose", "PASO 5: Guardando pose", "save_current_pose", (),
+     {'stage': 'merge', 'outputs': ('saved_pose',)}),
+    ("rename_uv_maps", "PASO 6: Renombrando UV maps", "rename_uv_maps_to_float2", (),
+     {'stage': 'merge', 'done_if': 'uv_maps_already_float2'}),
+    ("apply_saved_pose", "PASO 7: Aplicando pose a mesh", "apply_saved_pose_to_mesh_ultimate", (),
+     {'stage': 'merge', 'inputs': ('saved_pose',)}),
+    ("merge_meshes", "PASO 8: Uniendo mallas", "merge_child_meshes_ultimate", (),
+     {'stage': 'merge', 'outputs': ('merged_mesh',), 'checkpoint': 'merge', 'required': True}),
+    ("rasterize", "PASO 8.5: Rasterización de materiales", "rasterize_merged_mesh", (),
+     {'stage': 'rasterize'}),
+    ("material_cleanup", "PASO 8.6: Limpieza Final de Materiales", "material_cleanup_step", ('settings',),
+     {'stage': 'rasterize', 'checkpoint': 'rasterize'}),
+    ("shapekeys_modifiers", "PASO 9: Procesando shapekeys y modificadores", "process_shapekeys_and_modifiers", (),
+     {'stage': 'weights', 'done_if': 'shapekeys_and_modifiers_already_applied'}),
+    ("weight_merge", "PASO 10: Fusionando pesos", "create_weight_mix_modifiers_ultimate", ('settings', 'weight_pairs'),
+     {'stage': 'weights', 'inputs': ('weight_pairs',), 'checkpoint': 'weights'}),
+    ("retarget_positions", "PASO 11: Calculando posiciones de huesos", "compute_retarget_positions_ultimate", ('settings', 'retarget_pairs'),
+     {'stage': 'pose', 'inputs': ('retarget_pairs',)}),
+    ("apply_rest_pose", "PASO 12: Aplicando rest pose", "apply_pose_and_cleanup_ultimate", (),
+     {'stage': 'pose'}),
+    ("spine_fix", "PASO 12.5: Corrección de columna (Spine Fix)", "fix_spine_separation", (),
+     {'stage': 'pose', 'checkpoint': 'pose'}),
+    ("update_vertex_groups", "PASO 13: Actualizando vertex groups", "update_vertex_groups_ultimate", ('settings',),
+     {}),
+    ("armature_modifier", "PASO 14: Configurando modificador", "setup_armature_modifier_ultimate", (),
+     {}),
+    ("remove_extra_uv_maps", "PASO 15: Limpieza Final de UV Maps", "remove_extra_uv_maps", (),
+     {}),
+    ("final_transforms", "PASO 15: Aplicando transformaciones finales", "apply_final_transforms", (),
+     {}),
+    ("cleanup_scene", "PASO 16: Limpiando escena", "cleanup_scene_ultimate", (),
+     {}),
+    ("post_parent_cleanup", "Post: limpieza final y root bone", "post_cleanup_parent_and_root_bone", ('context', 'settings'),
+     {}),
+    ("post_unnamed_purge", "Post: objetos 'unnamed' y purga de huérfanos", "post_remove_unnamed_and_purge", ('settings',),
+     {}),
+    ("post_source_root", "Post: Root del source armature", "post_move_source_root", ('settings',),
+     {'done_if': 'source_armature_removed'}),
+    ("post_skin_modifier", "Post: modificador GTASA_SKIN", "post_skin_modifier", ('settings',),
+     {'done_if': 'skin_modifier_already_set'}),
+    ("post_materials", "Post: ajustes de materiales de 'Mesh'", "post_adjust_mesh_materials", (),
+     {}),
+)
+
+
+def get_disabled_pipeline_steps(settings) -> set:
+    """Nombres de pasos desactivados en settings.disabled_pipeline_steps (separados por comas)"""
+    value = getattr(settings, 'disabled_pipeline_steps', "") or ""
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
 class UNIVERSALGTA_OT_execute_conversion(Operator):
     """Convertidor GTA SA Definitivo"""
     bl_idname = "universalgta.execute_conversion"
@@ -10,6 +101,13 @@ class UNIVERSALGTA_OT_execute_conversion(Operator):
     bl_description = "Conversión definitiva a GTA SA"
     bl_options = {'REGISTER', 'UNDO'}
 
+    resume: BoolProperty(
+        name="Reanudar",
+        description="Reanudar desde el último checkpoint válido en lugar de empezar de cero",
+        default=False,
+        options={'SKIP_SAVE'}
+    )
+
     def remove_extra_uv_maps(self):
         """Mantiene solo el UV map activo, elimina el resto para TODOS los objetos seleccionados."""
         # Detectar objetos a procesar (Activo + Seleccionados)
@@ -56,466 +154,605 @@ class UNIVERSALGTA_OT_execute_conversion(Operator):
                         print(f"   ⚠️ Error al borrar UV {name} en {obj.name}: {e}")
     
     def execute(self, context):
-        """Conversión a GTA SA"""
+        """Conversión a GTA SA (modo ligero y profiler opcionales)"""
+        settings = getattr(context.scene, 'universal_gta_settings', None)
+        lean = bool(settings and getattr(settings, 'lean_conversion', False))
+        with lean_mode(context, enabled=lean):
+            return self.execute_profiled(context, settings)
+
+    def execute_profiled(self, context, settings):
+        """Ejecuta la conversión, perfilada si está activado en los ajustes"""
+        if not settings or not getattr(settings, 'profile_conversion', False):
+            return self.run_conversion(context)
+
+        source = settings.source_armature.name if settings.source_armature else "conversion"
+        profiler = ConversionProfiler(label=source).start()
+        try:
+            # Sin paso envolvente: los PASOS del pipeline quedan como nivel superior
+            # (summary() y total_wall_ms() trabajan sobre ese nivel).
+            # Un error se propaga igual que sin profiler, tras guardar la traza.
+            return self.run_conversion(context)
+        finally:
+            profiler.stop()
+            self.store_profile_results(settings, profiler)
+
+    def store_profile_results(self, settings, profiler):
+        """Escribe la traza Chrome y guarda el resumen para el panel"""
+        try:
+            trace_path = profiler.write_trace(profiler.default_trace_path())
+            settings.last_profile_path = trace_path
+            print(f"📄 [PROFILER] Traza guardada: {trace_path}")
+        except Exception as e:
+            print(f"⚠️ [PROFILER] No se pudo escribir la traza: {e}")
+        try:
+            steps = profiler.summary()
+            settings.last_profile_summary = json.dumps({
+                "total_ms": round(profiler.total_wall_ms(), 1),
+                "steps": steps[:8],
+            })
+        except Exception as e:
+            print(f"⚠️ [PROFILER] No se pudo guardar el resumen: {e}")
+        profiler.print_summary()
+
+    def restore_latest_checkpoint(self, context, settings) -> bool:
+        """Restaura el último checkpoint válido y fija la etapa desde la que se reanuda"""
+        store = self.checkpoints or CheckpointStore()
+        stage, entry = store.latest()
+        if not stage:
+            self.report({'ERROR'}, "No hay checkpoints válidos para este archivo")
+            return False
+        
+        print(f"♻️ Reanudando desde checkpoint: {STAGE_LABELS.get(stage, stage)} ({entry.get('created', '?')})")
+        if not self.restore_checkpoint(context, settings, store, stage):
+            return False
+        # Conservar las claves de la conversión original para los siguientes checkpoints
+        self.stage_keys = entry.get("stage_keys", {})
+        return True
+    
+    def restore_reusable_checkpoint(self, context, settings) -> bool:
+        """Conversión incremental: reutiliza el último checkpoint cuyas entradas no cambiaron"""
+        if not self.checkpoints or not settings.source_armature:
+            return False
+        
+        with profile_step("Hashes de contenido", category="checkpoint"):
+            try:
+                from ..utils.content_hash import compute_stage_keys
+                meshes = self.get_child_meshes(settings.source_armature)
+                self.stage_keys = compute_stage_keys(settings, meshes)
+            except Exception as e:
+                print(f"⚠️ [INCREMENTAL] No se pudieron calcular los hashes: {e}")
+                self.stage_keys = {}
+                return False
+        
+        stage, entry = self.checkpoints.find_reusable(self.stage_keys)
+        if not stage:
+            print("ℹ️ [INCREMENTAL] Entradas modificadas o sin checkpoints: conversión completa")
+            return False
+        
+        print(f"♻️ [INCREMENTAL] Entradas sin cambios hasta '{STAGE_LABELS.get(stage, stage)}': reutilizando checkpoint")
+        return self.restore_checkpoint(context, settings, self.checkpoints, stage)
+    
+    def restore_checkpoint(self, context, settings, store, stage) -> bool:
+        """Sustituye los objetos actuales por los del checkpoint de la etapa"""
+        replace_objects = []
+        if settings:
+            replace_objects = [obj for obj in (settings.source_armature, settings.target_armature) if obj]
         
-        # Limpiar datos huérfanos antes de comenzar
-        print("🧹 Limpiando datos huérfanos antes de la conversión...")
+        try:
+            with profile_step(f"Restaurar checkpoint: {stage}", category="checkpoint"):
+                roles = store.restore(stage, context, replace_objects=replace_objects)
+        except Exception as e:
+            self.report({'ERROR'}, f"No se pudo restaurar el checkpoint: {e}")
+            print(f"❌ Error restaurando checkpoint: {e}")
+            return False
+        
+        if settings:
+            if roles.get('source_armature'):
+                settings.source_armature = roles['source_armature']
+            if roles.get('target_armature'):
+                settings.target_armature = roles['target_armature']
+        
+        self.checkpoints = store
+        self.resume_stage = stage
+        self.restored_roles = roles
+        return True
+    
+    def save_checkpoint(self, stage):
+        """Guarda un checkpoint tras una etapa costosa (si están activados)"""
+        if not self.checkpoints:
+            return
+        with profile_step(f"Checkpoint: {stage}", category="checkpoint"):
+            try:
+                self.checkpoints.save(stage, {
+                    'source_armature': self.source_armature,
+                    'target_armature': self.target_armature,
+                    'mesh': self.merged_mesh,
+                }, stage_keys=self.stage_keys)
+                settings = bpy.context.scene.universal_gta_settings
+                settings.last_checkpoint_info = self.checkpoints.describe()
+            except Exception as e:
+                # Un checkpoint fallido nunca debe detener la conversión
+                print(f"⚠️ [CHECKPOINT] No se pudo guardar '{stage}': {e}")
+
+    def build_pipeline(self, context, settings) -> PipelineGraph:
+        """Construye el grafo de pasos a partir de CONVERSION_PIPELINE"""
+        graph = PipelineGraph("conversion")
+        for name, label, method_name, args, options in CONVERSION_PIPELINE:
+            options = dict(options)
+            done_if = options.pop('done_if', None)
+            graph.add(PipelineStep(
+                name, label,
+                run=self._bind_step(getattr(self, method_name), args, context, settings),
+                done_if=getattr(self, done_if) if done_if else None,
+                **options
+            ))
+        return graph
+
+    @staticmethod
+    def _bind_step(method, args, context, settings):
+        """Adapta un método del operador a la firma run(resources) del grafo"""
+        def run(resources):
+            values = []
+            for arg in args:
+                if arg == 'context':
+                    values.append(context)
+                elif arg == 'settings':
+                    values.append(settings)
+                else:
+                    values.append(resources.get(arg))
+            result = method(*values)
+            return result if isinstance(result, dict) else None
+        return run
+
+    def run_conversion(self, context):
+        """Conversión a GTA SA (pasos declarados en CONVERSION_PIPELINE)"""
+
+        # Checkpoints: reanudar desde el último válido si se pidió
+        self.resume_stage = None
+        self.restored_roles = {}
+        self.stage_keys = {}
+        self.checkpoints = None
+        scene_settings = getattr(context.scene, 'universal_gta_settings', None)
+        if scene_settings and getattr(scene_settings, 'use_checkpoints', False):
+            self.checkpoints = CheckpointStore()
+        if self.resume:
+            if not self.restore_latest_checkpoint(context, scene_settings):
+                return {'CANCELLED'}
+        elif self.checkpoints and getattr(scene_settings, 'incremental_conversion', False):
+            # Reconversión: saltar las etapas cuyas entradas (hashes) no cambiaron
+            self.restore_reusable_checkpoint(context, scene_settings)
+
+        settings = context.scene.universal_gta_settings
+        self.source_armature = settings.source_armature
+        self.target_armature = settings.target_armature
+        self.merged_mesh = self.restored_roles.get('mesh')
+        self.original_pose_data = {}
+
+        graph = self.build_pipeline(context, settings)
+        try:
+            print("=" * 70)
+            print("🚀 INICIANDO CONVERSIÓN GTA SA DEFINITIVA (FLUJO PROBADO)")
+            print("=" * 70)
+
+            report = graph.run(
+                disabled=get_disabled_pipeline_steps(settings),
+                completed_stage=self.resume_stage,
+                stage_order=CHECKPOINT_STAGES,
+                on_checkpoint=self.save_checkpoint,
+            )
+            print(f"📋 Pipeline: {len(report['ran'])} pasos ejecutados, {len(report['skipped'])} omitidos")
+            print("🎉 === CONVERSIÓN GTA SA FINALIZADA ===")
+
+        except PipelineAbort as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+
+        except Exception as e:
+            error_msg = f"Error en conversión definitiva: {str(e)}"
+            self.report({'ERROR'}, error_msg)
+            print(f"❌ Error crítico: {e}")
+
+            # Cleanup de emergencia
+            try:
+                bpy.ops.object.mode_set(mode='OBJECT')
+                bpy.ops.object.select_all(action='DESELECT')
+            except:
+                pass
+
+            return {'CANCELLED'}
+
+        # La conversión terminó: los checkpoints solo se conservan como caché incremental
+        if self.checkpoints and not getattr(settings, 'incremental_conversion', False):
+            self.checkpoints.clear()
+            settings.last_checkpoint_info = ""
+        if self.checkpoints:
+            try:
+                prune_checkpoint_stores(keep_key=self.checkpoints.key)
+            except Exception as e:
+                print(f"⚠️ [CHECKPOINT] No se pudieron podar los checkpoints antiguos: {e}")
+
+        return {'FINISHED'}
+
+    # ------------------------------------------------------------------
+    # Pasos previos (antes de validar la escena)
+    # ------------------------------------------------------------------
+    def purge_orphans_initial(self) -> bool:
+        """Limpiar datos huérfanos antes de comenzar"""
         try:
             # Realizar múltiples pasadas para asegurar una limpieza completa
             for _ in range(3):  # 3 pasadas para estar seguros
                 bpy.ops.outliner.orphans_purge(do_recursive=True)
         except Exception as e:
             print(f"⚠️ Advertencia al limpiar datos huérfanos: {e}")
-        
-        # Aplicar todas las transformaciones a todos los objetos
-        print("🔧 Aplicando transformaciones a todos los objetos...")
+        return True
+
+    def apply_initial_transforms(self, context) -> bool:
+        """Aplicar todas las transformaciones a todos los objetos"""
         try:
             # Deseleccionar todo primero
             bpy.ops.object.select_all(action='DESELECT')
-            
+
             # Seleccionar todos los objetos
             for obj in bpy.data.objects:
                 obj.select_set(True)
-            
+
             # Hacer activo el último objeto seleccionado
             if len(bpy.data.objects) > 0:
                 context.view_layer.objects.active = bpy.data.objects[-1]
-            
+
             # Aplicar rotación y escala
             bpy.ops.object.transform_apply(location=True, rotation=True, scale=True)
-            
+
             # Deseleccionar todo de nuevo
             bpy.ops.object.select_all(action='DESELECT')
-            
+
             print("✅ Transformaciones aplicadas exitosamente")
         except Exception as e:
             print(f"⚠️ Error al aplicar transformaciones: {e}")
-            
-        # Limpiar o preservar vertex colors según configuración
+        return True
+
+    def clean_vertex_colors_step(self, settings) -> bool:
+        """Limpiar o preservar vertex colors según configuración"""
         try:
             from ..utils.vertex_colors import clean_vertex_colors_for_source
-            changed, msg = clean_vertex_colors_for_source(getattr(context.scene, 'universal_gta_settings', None))
+            changed, msg = clean_vertex_colors_for_source(settings)
             if changed:
                 print(f"✅ Vertex colors limpiados: {msg}")
             else:
                 print(f"ℹ️ Vertex colors: {msg}")
         except Exception as e:
             print(f"⚠️ No se pudo ejecutar limpieza de vertex colors: {e}")
+        return True
 
-        settings = context.scene.universal_gta_settings
-        
+    def require_armatures(self, settings) -> bool:
+        """Source y target son obligatorios"""
         if not settings.source_armature or not settings.target_armature:
-            self.report({'ERROR'}, "Selecciona source y target armature")
-            return {'CANCELLED'}
+            raise PipelineAbort("Selecciona source y target armature")
+        # clean_mmd_hierarchy trabaja sobre el source armature
+        self.source_armature = settings.source_armature
+        return True
 
-        # --- AUTO POSE START ---
-        # Aplicar pose personalizada automáticamente al inicio
-        print("🧘 Aplicando Custom Pose Automática...")
+    def apply_auto_custom_pose(self) -> bool:
+        """Aplicar pose personalizada automáticamente al inicio"""
         try:
             bpy.ops.universalgta.apply_custom_pose()
             print("✅ Custom Pose aplicada correctamemte.")
         except Exception as e:
             print(f"⚠️ No se pudo aplicar Custom Pose (Puede que no sea necesaria o falló): {e}")
-        # --- AUTO POSE END ---
-            
-        # --- MMD CLEANUP START ---
-        # Limpiar jerarquía MMD antes de validar o procesar nada
-        # (Desbloquear transforms, quitar Empty padre, borrar rigidbodies/joints)
+        return True
+
+    def validate_scene_step(self, settings) -> bool:
+        """Inicializar datos del convertidor y validar la escena"""
         self.source_armature = settings.source_armature
-        self.clean_mmd_hierarchy()
-        # --- MMD CLEANUP END ---
-        
+        self.target_armature = settings.target_armature
+        if not self.validate_scene():
+            raise PipelineAbort("Validación de escena falló")
+        return True
+
+    # ------------------------------------------------------------------
+    # Análisis de mappings (el análisis corre en un hilo de trabajo)
+    # ------------------------------------------------------------------
+    def snapshot_mappings(self, settings) -> dict:
+        """Copia los mappings y los nombres de huesos a datos Python puros"""
+        return {
+            'mapping_snapshot': {
+                'mappings': [
+                    (m.source_bone, m.target_bone, m.enabled)
+                    for m in settings.bone_mappings
+                ],
+                'source_bones': {bone.name for bone in self.source_armature.data.bones},
+                'target_bones': {bone.name for bone in self.target_armature.data.bones},
+            }
+        }
+
+    @staticmethod
+    def analyze_mapping_snapshot(snapshot) -> dict:
+        """Pares de pesos y de retarget a partir de la copia de los mappings (sin bpy).
+
+        - weight_pairs: (target, source) únicos y en orden (ver utils.weight_merge)
+        - retarget_pairs: (source, target) cuyos huesos existen en ambos armatures
+        """
+        weight_pairs = []
+        seen = set()
+        retarget_pairs = []
+        source_bones = snapshot['source_bones']
+        target_bones = snapshot['target_bones']
+
+        for source, target, enabled in snapshot['mappings']:
+            if not enabled or not source or not target:
+                continue
+            if (target, source) not in seen:
+                seen.add((target, source))
+                weight_pairs.append((target, source))
+            if source in source_bones and target in target_bones:
+                retarget_pairs.append((source, target))
+
+        return {'weight_pairs': weight_pairs, 'retarget_pairs': retarget_pairs}
+
+    def rasterize_merged_mesh(self) -> bool:
+        """Rasterización por slot de material sobre la malla unida"""
         try:
-            print("=" * 70)
-            print("🚀 INICIANDO CONVERSIÓN GTA SA DEFINITIVA (FLUJO PROBADO)")
-            print("=" * 70)
-            
-            # Inicializar datos del convertidor
-            self.source_armature = settings.source_armature
-            self.target_armature = settings.target_armature
-            self.merged_mesh = None
-            self.original_pose_data = {}
-            
-            if not self.validate_scene():
-                self.report({'ERROR'}, "Validación de escena falló")
-                return {'CANCELLED'}
-            
-            print("🔧 PASO 2: Aplicando transformaciones...")
-            self.apply_all_transforms_ultimate()
-            
-            print("🧹 PASO 3: Limpiando texturas...")
-            self.cleanup_texture_names()
-
-            print("🧹 PASO 3: Limpiando texturas...")
-            self.cleanup_texture_names()
-
-            # print("🎨 PASO 3.5: Rasterización PRE-conversión...")
-            # try:
-            #     from ..operators.texture_export import execute_pre_conversion_rasterization
-            #     rasterized_count, total_materials = execute_pre_conversion_rasterization()
-            #     print(f"✅ Rasterización completada: {rasterized_count}/{total_materials} materiales")
-            # except ImportError as ie:
-            #     print(f"⚠️ Módulo texture_export no disponible: {ie}")
-            # except Exception as e:
-            #     print(f"⚠️ Error en rasterización pre-conversión: {e}")
-            #     # No fallar la conversión por errores de rasterización
-            
-            print("⏭️ Paso 3.5 omitido (Movido a POST-UNION)")
-
-            # === CHECK 2: RASTERIZAR TEXTURAS (BAKE DIFUSO) ===
-            # NOTA: Este paso está DESACTIVADO porque el PASO 3.5 ya ejecuta
-            # execute_pre_conversion_rasterization() que hace todo el trabajo.
-            # Ejecutarlo dos veces causa errores de referencias inválidas.
-            # if bool(getattr(settings, 'rasterize_textures', False)):
-            #     print("🔥 PASO 4: RASTERIZAR TEXTURAS (Bake Difuso)...")
-            #     try:
-            #         # 1. Rasterizar colores sólidos (pre-pass)
-            #         print("  🧩 Sub-paso: Rasterizando colores sólidos...")
-            #         created_images = self.rasterize_solid_base_color_to_texture(size=256)
-            #         
-            #         # 2. Ejecutar Smart Baking (Lógica principal de bake)
-            #         print("  🔥 Sub-paso: Ejecutando Smart Baking...")
-            #         bpy.ops.universalgta.manual_smart_baking()
-            #         print("✅ Rasterización y Baking completados")
-            #     except Exception as e:
-            #         print(f"⚠️ Error en Rasterización/Bake: {e}")
-            # else:
-            #     print("⏭️ Paso 4 omitido (Rasterizar texturas desactivado)")
-            print("⏭️ Paso 4 omitido (Se ejecutará en Paso 8.5)")
-
-            # === CHECK 1: LIMPIAR MATERIALES (ESTRICTO) ===
-            # La limpieza debe ser DESPUES del Bake para no romper materiales complejos antes de tiempo.
-            print("⏭️ Paso 5 omitido (Movido tras Bake - Paso 8.6)")
-
-            print("💾 PASO 5: Guardando pose...")
-            self.save_current_pose()
-            
-            print("🗂️ PASO 6: Renombrando UV maps...")
-            self.rename_uv_maps_to_float2()
-            
-            print("🎭 PASO 7: Aplicando pose a mesh...")
-            self.apply_saved_pose_to_mesh_ultimate()
-            
-            print("🔗 PASO 8: Uniendo mallas...")
-            self.merge_child_meshes_ultimate()
-            
-            print("🎨 PASO 8.5: Rasterización 'Quirúrgica' (Separar -> Bake -> Unir)...")
-            try:
-                from ..operators.texture_export import execute_pre_conversion_rasterization
-                
-                # 1. Identificar objeto unido
-                united_obj = bpy.context.active_object
-                if not united_obj or united_obj.type != 'MESH':
-                    # Fallback si por alguna razón no hay objeto activo correcto
-                    print("⚠️ No se detectó objeto malla activo para separar. Buscando 'sackboy' o similar...")
-                    # Intento de recuperación simple, o continuar sin separar
-                
-                united_name = united_obj.name
-                
-                # 2. Separar por material
-                print(f"   ✂️ Separando '{united_name}' por materiales para bake limpio...")
-                bpy.ops.object.mode_set(mode='EDIT')
-                bpy.ops.mesh.select_all(action='SELECT')
-                bpy.ops.mesh.separate(type='MATERIAL')
-                bpy.ops.object.mode_set(mode='OBJECT')
-                
-                # Las partes quedan seleccionadas tras el separate
-                parts = [o for o in bpy.context.selected_objects if o.type == 'MESH']
-                print(f"   🧩 Sub-partes generadas: {len(parts)}")
-                
-                # 3. Ejecutar Rasterización (Ahora cada material tiene su propio objeto limpio)
-                rasterized_count, total_materials = execute_pre_conversion_rasterization()
-                print(f"✅ Rasterización completada: {rasterized_count}/{total_materials} materiales")
-                
-                # 4. Volver a unir
-                print(f"   🔗 Re-uniendo partes...")
-                # Deseleccionar todo primero
+            from ..operators.texture_export import execute_pre_conversion_rasterization
+
+            # El bake se restringe a las caras de cada slot (máscara de material),
+            # así que ya no hace falta separar por material y volver a unir:
+            # el orden de vértices y el nombre de 'Mesh' se mantienen estables.
+            rasterized_count, total_materials = execute_pre_conversion_rasterization()
+            print(f"✅ Rasterización completada: {rasterized_count}/{total_materials} materiales")
+
+            if self.merged_mesh:
                 bpy.ops.object.select_all(action='DESELECT')
-                
-                # Seleccionar partes
-                for part in parts:
-                    if part.name in bpy.context.scene.objects: # Verificar validez
-                         part.select_set(True)
-                
-                # Activar uno para ser el principal (intentar preservar el que tenga el nombre original si existe, o el primero)
-                # Al separar, Blender suele nombrar "Obj", "Obj.001".
-                # El original puede haber cambiado de nombre o ser uno de ellos.
-                if parts:
-                    bpy.context.view_layer.objects.active = parts[0]
-                    bpy.ops.object.join()
-                    
-                    # Restaurar nombre original
-                    bpy.context.active_object.name = united_name
-                    print(f"   ✅ Malla re-unida: {united_name}")
+                self.merged_mesh.select_set(True)
+                bpy.context.view_layer.objects.active = self.merged_mesh
+        except Exception as e:
+            print(f"⚠️ Error en rasterización por slot: {e}")
+            import traceback
+            traceback.print_exc()
+        return True
 
-            except Exception as e:
-                print(f"⚠️ Error en rasterización quirúrgica: {e}")
-                import traceback
-                traceback.print_exc()
-            
-            print("✨ PASO 8.6: Limpieza Final de Materiales...")
-            mode = getattr(settings, 'material_process_mode', 'CLEAN')
-            if mode != 'NONE':
-                self.perform_strict_material_cleanup()
-
-            print("🎭 PASO 9: Procesando shapekeys y modificadores...")
-            self.process_shapekeys_and_modifiers()
-            self.process_shapekeys_and_modifiers()
-            
-            print("⚖️ PASO 10: Creando weight mixing...")
-            self.create_weight_mix_modifiers_ultimate(settings)
-            
-            print("🔗 PASO 11: Creando constraints...")
-            constraints_count = self.create_copy_location_constraints_ultimate(settings)
-            
-            print("⚡ PASO 12: Aplicando y bakeando pose...")
-            self.apply_pose_and_cleanup_ultimate()
-            
-            print("🦴 PASO 12.5: Corrección de columna (Spine Fix)...")
-            self.fix_spine_separation()
-            
-            print("🦴 PASO 13: Actualizando vertex groups...")
-            self.update_vertex_groups_ultimate(settings)
-            
-            print("🔧 PASO 14: Configurando modificador...")
-            self.setup_armature_modifier_ultimate()
-            
-            print("🧹 PASO 15: Limpieza Final de UV Maps...")
-            self.remove_extra_uv_maps()
-            
-            print("📐 PASO 15: Aplicando transformaciones finales...")
-            self.apply_final_transforms()
-            
-            print("🧹 PASO 16: Limpiando escena...")
-            self.cleanup_scene_ultimate()
-            
-            print("=" * 70)
-            print("🎉 CONVERSIÓN GTA SA DEFINITIVA COMPLETADA")
-            print("=" * 70)
-            
-            self.report({'INFO'}, "✅ Conversión GTA SA definitiva completada exitosamente")
-            # === LIMPIEZA FINAL (deduplicada) ===
-            print("🧹 Ejecutando limpieza final: eliminando objeto padre del target_armature...")
-            try:
-                from ..gta_conversion_utils import GTAConversionUtils
-                utils = GTAConversionUtils(debug=True)
-                target_armature = settings.target_armature
-                if target_armature:
-                    cleanup_success = utils.auto_cleanup_post_conversion_with_parent(settings, target_armature)
-                    if cleanup_success:
-                        print("✅ Limpieza final completada exitosamente")
-                        self.report({'INFO'}, "Conversión completada y objeto padre eliminado")
-                    else:
-                        print("ℹ️ No se requirió limpieza adicional")
-                        self.report({'INFO'}, "Conversión completada")
+    def material_cleanup_step(self, settings) -> bool:
+        """Limpieza final de materiales (según material_process_mode)"""
+        mode = getattr(settings, 'material_process_mode', 'CLEAN')
+        if mode != 'NONE':
+            self.perform_strict_material_cleanup()
+        return True
+
+    # ------------------------------------------------------------------
+    # Precondiciones: True si el efecto del paso ya se cumple
+    # ------------------------------------------------------------------
+    def transforms_already_applied(self, resources) -> bool:
+        for obj in bpy.data.objects:
+            if obj.type in ['MESH', 'ARMATURE', 'EMPTY']:
+                if (any(abs(x) > 0.001 for x in obj.location) or
+                        any(abs(x) > 0.001 for x in obj.rotation_euler) or
+                        any(abs(x - 1.0) > 0.001 for x in obj.scale)):
+                    return False
+        return True
+
+    def texture_names_already_clean(self, resources) -> bool:
+        # Solo cuentan los sufijos que se pueden quitar sin colisión
+        pattern = re.compile(r"\.[0-9]+$")
+        return not any(
+            pattern.search(image.name) and bpy.data.images.get(pattern.sub("", image.name)) is None
+            for image in bpy.data.images
+        )
+
+    def uv_maps_already_float2(self, resources) -> bool:
+        return all(
+            uv_layer.name == "Float2"
+            for mesh_obj in self.get_child_meshes(self.source_armature)
+            for uv_layer in mesh_obj.data.uv_layers
+        )
+
+    def shapekeys_and_modifiers_already_applied(self, resources) -> bool:
+        if not self.merged_mesh:
+            return True
+        has_shape_keys = bool(self.merged_mesh.data.shape_keys)
+        has_armature_modifiers = any(m.type == 'ARMATURE' for m in self.merged_mesh.modifiers)
+        return not has_shape_keys and not has_armature_modifiers
+
+    def source_armature_removed(self, resources) -> bool:
+        source_armature = bpy.context.scene.universal_gta_settings.source_armature
+        return not source_armature or source_armature.type != 'ARMATURE'
+
+    def skin_modifier_already_set(self, resources) -> bool:
+        mesh_obj = bpy.data.objects.get("Mesh")
+        target_armature = bpy.context.scene.universal_gta_settings.target_armature
+        if not mesh_obj or not target_armature:
+            return False
+        modifier = mesh_obj.modifiers.get("GTASA_SKIN")
+        return bool(modifier and modifier.type == 'ARMATURE' and modifier.object == target_armature)
+
+    # ------------------------------------------------------------------
+    # Pasos posteriores a la conversión
+    # ------------------------------------------------------------------
+    def post_cleanup_parent_and_root_bone(self, context, settings) -> bool:
+        """Eliminar el objeto padre del target_armature y mover el root bone al origen"""
+        print("🎉 CONVERSIÓN GTA SA DEFINITIVA COMPLETADA")
+        self.report({'INFO'}, "✅ Conversión GTA SA definitiva completada exitosamente")
+
+        print("🧹 Ejecutando limpieza final: eliminando objeto padre del target_armature...")
+        try:
+            from ..gta_conversion_utils import GTAConversionUtils
+            utils = GTAConversionUtils(debug=True)
+            target_armature = settings.target_armature
+            if target_armature:
+                cleanup_success = utils.auto_cleanup_post_conversion_with_parent(settings, target_armature)
+                if cleanup_success:
+                    print("✅ Limpieza final completada exitosamente")
+                    self.report({'INFO'}, "Conversión completada y objeto padre eliminado")
                 else:
-                    print("⚠️ No se pudo acceder al target_armature para limpieza final")
-                    self.report({'WARNING'}, "Conversión completada pero no se pudo limpiar objeto padre")
-            except Exception as e:
-                print(f"❌ Error en limpieza final: {e}")
-                self.report({'WARNING'}, f"Conversión completada con advertencias: {e}")
+                    print("ℹ️ No se requirió limpieza adicional")
+                    self.report({'INFO'}, "Conversión completada")
+            else:
+                print("⚠️ No se pudo acceder al target_armature para limpieza final")
+                self.report({'WARNING'}, "Conversión completada pero no se pudo limpiar objeto padre")
+        except Exception as e:
+            print(f"❌ Error en limpieza final: {e}")
+            self.report({'WARNING'}, f"Conversión completada con advertencias: {e}")
 
-            try:
-                target_arm = settings.target_armature
-                if target_arm is not None and target_arm.type == 'ARMATURE':
-                    # buscar bone con custom property bone_id == 0
-                    root_name = None
-                    for b in target_arm.data.bones:
-                        if 'bone_id' in b and b['bone_id'] == 0:
-                            root_name = b.name
+        try:
+            target_arm = settings.target_armature
+            if target_arm is not None and target_arm.type == 'ARMATURE':
+                # buscar bone con custom property bone_id == 0
+                root_name = None
+                for b in target_arm.data.bones:
+                    if 'bone_id' in b and b['bone_id'] == 0:
+                        root_name = b.name
+                        break
+                if root_name is None:
+                    for pb in target_arm.pose.bones:
+                        if 'bone_id' in pb and pb['bone_id'] == 0:
+                            root_name = pb.name
                             break
-                    if root_name is None:
-                        for pb in target_arm.pose.bones:
-                            if 'bone_id' in pb and pb['bone_id'] == 0:
-                                root_name = pb.name
-                                break
-
-                    if root_name:
-                        # calcular longitud y dirección en mundo antes de mover
-                        try:
-                            pb = target_arm.pose.bones[root_name]
-                            head_w = target_arm.matrix_world @ pb.head
-                            tail_w = target_arm.matrix_world @ pb.tail
-                            vec = tail_w - head_w
-                            length_world = vec.length
-                            dir_world = vec.normalized() if length_world > 0 else None
-
-                            # entrar a modo edición y mover el edit bone
-                            bpy.ops.object.select_all(action='DESELECT')
-                            target_arm.select_set(True)
-                            context.view_layer.objects.active = target_arm
-                            bpy.ops.object.mode_set(mode='EDIT')
-                            eb = target_arm.data.edit_bones.get(root_name)
-                            if eb:
-                                # mover cabeza al origen global
-                                eb.head = (0.0, 0.0, 0.0)
-                                # si tenemos dirección/longitud, fijar tail para mantener longitud
-                                if dir_world is not None and length_world > 0:
-                                    dir_local = target_arm.matrix_world.inverted() @ dir_world
-                                    try:
-                                        dir_local = dir_local.normalized()
-                                        eb.tail = eb.head + dir_local * length_world
-                                    except Exception:
-                                        pass
-                            bpy.ops.object.mode_set(mode='OBJECT')
-                            print(f"✅ Root bone '{root_name}' movido a origen y longitud preservada.")
-                        except Exception as e:
-                            print(f"⚠️ Error moviendo root bone: {e}")
-                    else:
-                        print("ℹ️ No se encontró bone con property bone_id == 0 en target_armature")
-            except Exception as e:
-                print(f"⚠️ Error en el proceso post-conversión para mover root bone: {e}")
-            
-            print("🎉 === CONVERSIÓN GTA SA FINALIZADA ===")
 
-            # === ELIMINAR OBJETO MALLA PADRE DEL TARGET ARMATURE SI SE LLAMA 'unnamed' O SIMILAR ===
+                if root_name:
+                    # calcular longitud y dirección en mundo antes de mover
+                    try:
+                        pb = target_arm.pose.bones[root_name]
+                        head_w = target_arm.matrix_world @ pb.head
+                        tail_w = target_arm.matrix_world @ pb.tail
+                        vec = tail_w - head_w
+                        length_world = vec.length
+                        dir_world = vec.normalized() if length_world > 0 else None
+
+                        # entrar a modo edición y mover el edit bone
+                        bpy.ops.object.select_all(action='DESELECT')
+                        target_arm.select_set(True)
+                        context.view_layer.objects.active = target_arm
+                        bpy.ops.object.mode_set(mode='EDIT')
+                        eb = target_arm.data.edit_bones.get(root_name)
+                        if eb:
+                            # mover cabeza al origen global
+                            eb.head = (0.0, 0.0, 0.0)
+                            # si tenemos dirección/longitud, fijar tail para mantener longitud
+                            if dir_world is not None and length_world > 0:
+                                dir_local = target_arm.matrix_world.inverted() @ dir_world
+                                try:
+                                    dir_local = dir_local.normalized()
+                                    eb.tail = eb.head + dir_local * length_world
+                                except Exception:
+                                    pass
+                        bpy.ops.object.mode_set(mode='OBJECT')
+                        print(f"✅ Root bone '{root_name}' movido a origen y longitud preservada.")
+                    except Exception as e:
+                        print(f"⚠️ Error moviendo root bone: {e}")
+                else:
+                    print("ℹ️ No se encontró bone con property bone_id == 0 en target_armature")
+        except Exception as e:
+            print(f"⚠️ Error en el proceso post-conversión para mover root bone: {e}")
+        return True
+
+    def post_remove_unnamed_and_purge(self, settings) -> bool:
+        """Eliminar mallas 'unnamed' (padre del target incluido) y purgar huérfanos"""
+        # === ELIMINAR OBJETO MALLA PADRE DEL TARGET ARMATURE SI SE LLAMA 'unnamed' O SIMILAR ===
+        target_armature = settings.target_armature
+        if target_armature and target_armature.parent:
+            parent_obj = target_armature.parent
+            if parent_obj.type == 'MESH' and parent_obj.name.startswith('unnamed'):
+                print(f"🗑️ Eliminando objeto malla padre: {parent_obj.name}")
+                bpy.data.objects.remove(parent_obj, do_unlink=True)
+
+        # También eliminar cualquier objeto malla en la escena que se llame 'unnamed', 'unnamed.001', etc.
+        for obj in list(bpy.data.objects):
+            if obj.type == 'MESH' and re.match(r'^unnamed(\.\d+)?$', obj.name):
+                print(f"🗑️ Eliminando objeto malla: {obj.name}")
+                bpy.data.objects.remove(obj, do_unlink=True)
+
+        # === PURGA DE HUÉRFANOS ===
+        try:
+            bpy.ops.outliner.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
+            print('🧹 Orphans purgados')
+        except Exception as e:
+            print(f'⚠️ Error al purgar huérfanos: {e}')
+        return True
+
+    def post_move_source_root(self, settings) -> bool:
+        """Seleccionar el source armature y mover el hueso Root al origen"""
+        source_armature = settings.source_armature
+        bpy.ops.object.select_all(action='DESELECT')
+        source_armature.select_set(True)
+        bpy.context.view_layer.objects.active = source_armature
+        try:
+            bpy.ops.object.mode_set(mode='EDIT')
+            armature = source_armature.data
+            if "Root" in armature.edit_bones:
+                root_bone = armature.edit_bones["Root"]
+                root_bone.head = (0, 0, 0)
+                root_bone.tail = (0.04, 0, 0)
+                print("✅ Hueso 'Root' movido al origen.")
+            else:
+                print("No se encontró un hueso llamado 'Root' en el armature.")
+            bpy.ops.object.mode_set(mode='OBJECT')
+        except Exception as e:
+            print(f"Error moviendo el hueso Root: {e}")
+        return True
+
+    def post_skin_modifier(self, settings) -> bool:
+        """Añadir (o re-apuntar) el modificador 'GTASA_SKIN' de la malla 'Mesh'"""
+        print("🔧 Añadiendo modificador 'GTASA_SKIN' a la malla 'Mesh'...")
+        try:
+            mesh_obj = bpy.data.objects.get("Mesh")
             target_armature = settings.target_armature
-            if target_armature and target_armature.parent:
-                parent_obj = target_armature.parent
-                if parent_obj.type == 'MESH' and parent_obj.name.startswith('unnamed'):
-                    print(f"🗑️ Eliminando objeto malla padre: {parent_obj.name}")
-                    bpy.data.objects.remove(parent_obj, do_unlink=True)
-
-            # También eliminar cualquier objeto malla en la escena que se llame 'unnamed', 'unnamed.001', etc.
-            for obj in list(bpy.data.objects):
-                if obj.type == 'MESH' and re.match(r'^unnamed(\.\d+)?$', obj.name):
-                    print(f"🗑️ Eliminando objeto malla: {obj.name}")
-                    bpy.data.objects.remove(obj, do_unlink=True)
 
-            # === PURGA DE HUÉRFANOS ===
-            try:
-                bpy.ops.outliner.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
-                print('🧹 Orphans purgados')
-            except Exception as e:
-                print(f'⚠️ Error al purgar huérfanos: {e}')
+            if mesh_obj and target_armature:
+                # Verificar si ya existe un modificador con ese nombre
+                if "GTASA_SKIN" in mesh_obj.modifiers:
+                    modifier = mesh_obj.modifiers["GTASA_SKIN"]
+                    modifier.object = target_armature
+                    print(f"ℹ️ El modificador 'GTASA_SKIN' ya existía, se ha re-apuntado a '{target_armature.name}'.")
+                else:
+                    modifier = mesh_obj.modifiers.new(name="GTASA_SKIN", type='ARMATURE')
+                    modifier.object = target_armature
+                    print(f"✅ Modificador 'GTASA_SKIN' añadido a '{mesh_obj.name}' y apuntando a '{target_armature.name}'.")
 
-            # === Seleccionar el source armature y mover el hueso Root al origen ===
-            source_armature = settings.source_armature
-            if source_armature and source_armature.type == 'ARMATURE':
-                bpy.ops.object.select_all(action='DESELECT')
-                source_armature.select_set(True)
-                bpy.context.view_layer.objects.active = source_armature
-                try:
-                    bpy.ops.object.mode_set(mode='EDIT')
-                    armature = source_armature.data
-                    if "Root" in armature.edit_bones:
-                        root_bone = armature.edit_bones["Root"]
-                        root_bone.head = (0, 0, 0)
-                        root_bone.tail = (0.04, 0, 0)
-                        print("✅ Hueso 'Root' movido al origen.")
-                    else:
-                        print("No se encontró un hueso llamado 'Root' en el armature.")
-                    bpy.ops.object.mode_set(mode='OBJECT')
-                except Exception as e:
-                    print(f"Error moviendo el hueso Root: {e}")
+            elif not mesh_obj:
+                print("⚠️ No se encontró el objeto 'Mesh' para añadir el modificador.")
 
-            # === AÑADIR MODIFICADOR ARMATURE A MESH ===
-            print("🔧 Añadiendo modificador 'GTASA_SKIN' a la malla 'Mesh'...")
-            try:
-                mesh_obj = bpy.data.objects.get("Mesh")
-                target_armature = settings.target_armature
-
-                if mesh_obj and target_armature:
-                    # Verificar si ya existe un modificador con ese nombre
-                    if "GTASA_SKIN" in mesh_obj.modifiers:
-                        modifier = mesh_obj.modifiers["GTASA_SKIN"]
-                        modifier.object = target_armature
-                        print(f"ℹ️ El modificador 'GTASA_SKIN' ya existía, se ha re-apuntado a '{target_armature.name}'.")
-                    else:
-                        modifier = mesh_obj.modifiers.new(name="GTASA_SKIN", type='ARMATURE')
-                        modifier.object = target_armature
-                        print(f"✅ Modificador 'GTASA_SKIN' añadido a '{mesh_obj.name}' y apuntando a '{target_armature.name}'.")
-                
-                elif not mesh_obj:
-                    print("⚠️ No se encontró el objeto 'Mesh' para añadir el modificador.")
-                
-                elif not target_armature:
-                    print("⚠️ No se encontró el 'target_armature' para el modificador.")
+            elif not target_armature:
+                print("⚠️ No se encontró el 'target_armature' para el modificador.")
 
-            except Exception as e:
-                print(f"❌ Error al añadir el modificador de armature: {e}")
+        except Exception as e:
+            print(f"❌ Error al añadir el modificador de armature: {e}")
+        return True
 
-            # === AJUSTE ADICIONAL DE MATERIALES EN LA MALLA 'Mesh' ===
-            try:
-                mesh_obj = bpy.data.objects.get("Mesh")
-                if mesh_obj and hasattr(mesh_obj, 'data') and getattr(mesh_obj.data, 'materials', None) is not None:
-                    mats = [m for m in mesh_obj.data.materials if m]
-                    updated = 0
-                    for mat in mats:
-                        try:
-                            # Ajuste SOLO de 'Presentación en vistas' (Viewport Display)
-                            try:
-                                # Color #E9E9E9FF -> (0.9137, 0.9137, 0.9137, 1.0)
-                                mat.diffuse_color = (0.9137, 0.9137, 0.9137, 1.0)
-                            except Exception:
-                                pass
-                            try:
-                                mat.metallic = 0.0
-                            except Exception:
-                                pass
-                            try:
-                                mat.roughness = 1.0
-                            except Exception:
-                                pass
-                            updated += 1
-                        except Exception as e:
-                            print(f"⚠️ Error ajustando material {getattr(mat, 'name', str(mat))}: {e}")
+    def post_adjust_mesh_materials(self) -> bool:
+        """Viewport Display + Specular = 0 de los materiales de 'Mesh' en una sola pasada"""
+        mesh_obj = bpy.data.objects.get("Mesh")
+        if not mesh_obj or getattr(mesh_obj.data, 'materials', None) is None:
+            print("ℹ️ No se encontró la malla 'Mesh' o no tiene materiales para ajustar.")
+            return True
 
-                    print(f"✅ Ajustados {updated} materiales en la malla 'Mesh'.")
-                else:
-                    print("ℹ️ No se encontró la malla 'Mesh' o no tiene materiales para ajustar.")
+        updated = 0
+        specular_updated = 0
+        for mat in [m for m in mesh_obj.data.materials if m]:
+            try:
+                # Ajuste SOLO de 'Presentación en vistas' (Viewport Display)
+                # Color #E9E9E9FF -> (0.9137, 0.9137, 0.9137, 1.0)
+                mat.diffuse_color = (0.9137, 0.9137, 0.9137, 1.0)
+                mat.metallic = 0.0
+                mat.roughness = 1.0
+                updated += 1
             except Exception as e:
-                print(f"⚠️ Error al ajustar materiales de 'Mesh': {e}")
+                print(f"⚠️ Error ajustando material {getattr(mat, 'name', str(mat))}: {e}")
 
-            # === CONFIGURAR SPECULAR = 0 EN TODOS LOS MATERIALES DE LA MALLA 'Mesh' ===
-            print("🔧 Configurando Specular = 0 en todos los materiales de la malla 'Mesh'...")
             try:
-                mesh_obj = bpy.data.objects.get("Mesh")
-                if mesh_obj and hasattr(mesh_obj, 'data') and getattr(mesh_obj.data, 'materials', None) is not None:
-                    mats = [m for m in mesh_obj.data.materials if m]
-                    specular_updated = 0
-                    for mat in mats:
-                        try:
-                            if mat.use_nodes and mat.node_tree:
-                                for node in mat.node_tree.nodes:
-                                    if node.type == 'BSDF_PRINCIPLED':
-                                        # Blender 5.0+ puede usar 'Specular' o 'Specular IOR Level'
-                                        if 'Specular' in node.inputs:
-                                            node.inputs['Specular'].default_value = 0.0
-                                            specular_updated += 1
-                                            print(f"  ✅ Specular = 0 configurado en material '{mat.name}' (input 'Specular')")
-                                        elif 'Specular IOR Level' in node.inputs:
-                                            node.inputs['Specular IOR Level'].default_value = 0.0
-                                            specular_updated += 1
-                                            print(f"  ✅ Specular = 0 configurado en material '{mat.name}' (input 'Specular IOR Level')")
-                                        break
-                        except Exception as e:
-                            print(f"⚠️ Error configurando Specular en material {getattr(mat, 'name', str(mat))}: {e}")
-
-                    if specular_updated > 0:
-                        print(f"✅ Specular = 0 configurado en {specular_updated} materiales de la malla 'Mesh'.")
-                    else:
-                        print("ℹ️ No se encontraron nodos Principled BSDF para configurar Specular.")
-                else:
-                    print("ℹ️ No se encontró la malla 'Mesh' o no tiene materiales para configurar Specular.")
+                if mat.use_nodes and mat.node_tree:
+                    for node in mat.node_tree.nodes:
+                        if node.type == 'BSDF_PRINCIPLED':
+                            # Blender 5.0+ puede usar 'Specular' o 'Specular IOR Level'
+                            if 'Specular' in node.inputs:
+                                node.inputs['Specular'].default_value = 0.0
+                                specular_updated += 1
+                            elif 'Specular IOR Level' in node.inputs:
+                                node.inputs['Specular IOR Level'].default_value = 0.0
+                                specular_updated += 1
+                            break
             except Exception as e:
-                print(f"⚠️ Error al configurar Specular de materiales de 'Mesh': {e}")
+                print(f"⚠️ Error configurando Specular en material {getattr(mat, 'name', str(mat))}: {e}")
 
-            return {'FINISHED'}
-            
-        except Exception as e:
-            error_msg = f"Error en conversión definitiva: {str(e)}"
-            self.report({'ERROR'}, error_msg)
-            print(f"❌ Error crítico: {e}")
-            
-            # Cleanup de emergencia
-            try:
-                bpy.ops.object.mode_set(mode='OBJECT')
-                bpy.ops.object.select_all(action='DESELECT')
-            except:
-                pass
-            
-            return {'CANCELLED'}
+        print(f"✅ Ajustados {updated} materiales en la malla 'Mesh' (Specular = 0 en {specular_updated}).")
+        return True
     
     def validate_scene(self) -> bool:
         """Validar que los objetos requeridos existan"""
@@ -569,21 +806,32 @@ class UNIVERSALGTA_OT_execute_conversion(Operator):
         print(f"✅ {applied_count} objetos transformados")
         return True
     
+    def dedupe_datablocks_step(self, settings) -> bool:
+        """Fundir materiales e imágenes idénticos (cada material único se bakea y exporta una vez)"""
+        if getattr(settings, 'material_process_mode', 'CLEAN') == 'NONE' or \
+                not getattr(settings, 'dedupe_datablocks', True):
+            return True
+        try:
+            from ..utils.datablock_dedupe import dedupe_datablocks
+            merged_images, merged_materials = dedupe_datablocks()
+            for name, canonical in merged_materials.items():
+                print(f"   🔗 Material '{name}' -> '{canonical}'")
+            print(f"✅ Duplicados fundidos: {len(merged_images)} imágenes, {len(merged_materials)} materiales")
+        except Exception as e:
+            print(f"⚠️ No se pudieron consolidar los duplicados: {e}")
+        return True
+
     def cleanup_texture_names(self) -> bool:
         """Limpiar nombres de texturas (Mixamo)"""
         print("🧹 Limpiando nombres de texturas...")
-        pattern = re.compile(r"\.[0-9]+$")
-        renamed_count = 0
-        
-        for image in bpy.data.images:
-            original_name = image.name
-            new_name = re.sub(pattern, "", original_name)
-            
-            if original_name != new_name:
-                image.name = new_name
-                renamed_count += 1
+        from ..utils.datablock_dedupe import rename_without_suffix
+
+        # Si el nombre sin sufijo ya existe (imagen distinta) se conserva el sufijo
+        renamed_count, kept_count = rename_without_suffix(bpy.data.images)
         
         print(f"✅ {renamed_count} texturas renombradas")
+        if kept_count:
+            print(f"ℹ️ {kept_count} texturas conservan el sufijo (el nombre base ya está en uso)")
         return True
     
     def perform_strict_material_cleanup(self) -> bool:
@@ -595,23 +843,24 @@ class UNIVERSALGTA_OT_execute_conversion(Operator):
         """
         print("🧼 Iniciando Limpieza Estricta de Materiales (Segura)...")
         try:
-            from ..operators.texture_export import _simplify_to_nearest_image, _find_principled
+            from ..operators.texture_export import _simplify_to_nearest_image, build_material_profile_index
             
             materials_processed = 0
-            for material in bpy.data.materials:
-                if not material or not material.use_nodes:
-                    continue
+            # Perfiles compartidos con la pre-rasterización (clasificación en una pasada)
+            for profile in build_material_profile_index():
+                material = profile.material
                 
                 # Ignorar materiales de UI o internos de Blender si los hubiera
                 if material.name.startswith("Dots Stroke"): continue
                 
-                try:
-                    principled = _find_principled(material)
-                    if principled:
-                        if _simplify_to_nearest_image(material, principled):
-                            materials_processed += 1
-                except Exception as e:
-                    print(f"⚠️ Error limpiando material {material.name}: {e}")
+                with profile_step(f"Limpieza material: {material.name}", category="cleanup"):
+                    try:
+                        principled = profile.principled
+                        if principled:
+                            if _simplify_to_nearest_image(material, principled):
+                                materials_processed += 1
+                    except Exception as e:
+                        print(f"⚠️ Error limpiando material {material.name}: {e}")
                     
             print(f"✅ Limpieza completada: {materials_processed} materiales modificados.")
             return True
@@ -701,10 +950,9 @@ class UNIVERSALGTA_OT_execute_conversion(Operator):
                     except TypeError:
                         # Compatibilidad si generated_color no está disponible
                         image = bpy.data.images.new(name=img_name, width=size, height=size, alpha=True, float_buffer=False)
-                        # Rellenar píxeles manualmente
+                        # Rellenar píxeles con el buffer compartido por color
                         try:
-                            pixels = list(rgba) * (size * size)
-                            image.pixels = pixels
+                            fill_solid_pixels(image, rgba)
                             created_images_count += 1
                         except Exception:
                             pass
@@ -729,6 +977,7 @@ class UNIVERSALGTA_OT_execute_conversion(Operator):
             except Exception as e:
                 print(f"⚠️ Error procesando material '{getattr(material, 'name', 'Unknown')}': {e}")
 
+        clear_solid_buffers()
         return created_images_count
     
     def save_current_pose(self) -> bool:
@@ -816,18 +1065,35 @@ class UNIVERSALGTA_OT_execute_conversion(Operator):
             print("⚠️ No hay mallas hijo para unir")
             return False
         
+        merged_obj = None
+        try:
+            from ..utils.mesh_merge import can_merge_at_data_level, merge_mesh_objects
+            if can_merge_at_data_level(child_meshes):
+                merged_obj = merge_mesh_objects(child_meshes, name="Mesh")
+                print(f"  ⚡ Unión a nivel de datos (foreach_get/foreach_set)")
+            else:
+                print("  ℹ️ Hay shape keys: se usa join() para conservarlas")
+        except Exception as e:
+            print(f"⚠️ Unión a nivel de datos falló ({e}), usando join()")
+            merged_obj = None
+        
         # Deseleccionar todo y seleccionar mallas hijo
         bpy.ops.object.select_all(action='DESELECT')
-        for mesh in child_meshes:
-            mesh.select_set(True)
-            print(f"  Seleccionada: {mesh.name}")
-        
-        # Establecer objeto activo y unir
-        bpy.context.view_layer.objects.active = child_meshes[0]
-        bpy.ops.object.join()
+        if merged_obj is None:
+            for mesh in child_meshes:
+                mesh.select_set(True)
+                print(f"  Seleccionada: {mesh.name}")
+            
+            # Establecer objeto activo y unir
+            bpy.context.view_layer.objects.active = child_meshes[0]
+            bpy.ops.object.join()
+            merged_obj = bpy.context.active_object
+        else:
+            # Dejar el mismo estado de selección que join()
+            merged_obj.select_set(True)
+            bpy.context.view_layer.objects.active = merged_obj
         
         # Renombrar objeto unido
-        merged_obj = bpy.context.active_object
         merged_obj.name = "Mesh"
         merged_obj.data.name = "Mesh"
         
@@ -890,8 +1156,35 @@ class UNIVERSALGTA_OT_execute_conversion(Operator):
         print(f"✅ {modifiers_applied} modificadores aplicados")
         return True
     
-    def create_weight_mix_modifiers_ultimate(self, settings) -> bool:
-        """Crear weight mix modifiers usando bone mappings (Mixamo + Universal)"""
+    def create_weight_mix_modifiers_ultimate(self, settings, pairs=None) -> bool:
+        """Fusionar pesos source -> target usando bone mappings (Mixamo + Universal)
+
+        Usa el motor vectorizado (una lectura, una suma, una escritura por target).
+        Si NumPy no está disponible recurre a los modificadores VERTEX_WEIGHT_MIX.
+        - pairs: (target, source) ya calculados por el análisis de mappings (opcional)
+        """
+        print("⚖️ Fusionando pesos de vertex groups...")
+        
+        if not self.merged_mesh:
+            return False
+        
+        try:
+            from ..utils.weight_merge import collect_weight_pairs, merge_vertex_group_weights
+        except ImportError as e:
+            print(f"⚠️ Motor vectorizado no disponible ({e}), usando modificadores")
+            return self.create_weight_mix_modifiers_legacy(settings)
+        
+        if pairs is None:
+            pairs = collect_weight_pairs(settings.bone_mappings)
+        merged = merge_vertex_group_weights(self.merged_mesh, pairs)
+        if getattr(settings, 'debug_mode', False):
+            for target, source in pairs:
+                print(f"  Weight mix: {source} -> {target}")
+        print(f"✅ {merged} pares de pesos fusionados en una pasada")
+        return True
+    
+    def create_weight_mix_modifiers_legacy(self, settings) -> bool:
+        """Crear weight mix modifiers usando bone mappings (un modifier_apply por mapeo)"""
         print("⚖️ Creando weight mix modifiers...")
         
         if not self.merged_mesh:
@@ -941,82 +1234,48 @@ class UNIVERSALGTA_OT_execute_conversion(Operator):
         print(f"✅ {modifiers_created} weight mix modifiers aplicados")
         return True
     
-    def create_copy_location_constraints_ultimate(self, settings) -> int:
-        """Crear constraints COPY_LOCATION (Universal)"""
-        print("🔗 Creando constraints COPY_LOCATION...")
+    def compute_retarget_positions_ultimate(self, settings, pairs=None) -> int:
+        """Calcular la posición de cada hueso destino desde el armature source (Universal)
+
+        - pairs: (source, target) ya filtrados por el análisis de mappings (opcional)
+        """
+        print("🔗 Calculando posiciones de huesos desde el source...")
         
-        bpy.context.view_layer.objects.active = self.target_armature
-        bpy.ops.object.mode_set(mode='POSE')
+        if pairs is None:
+            pairs = []
+            for mapping in settings.bone_mappings:
+                if not mapping.enabled or not mapping.source_bone or not mapping.target_bone:
+                    continue
+                
+                # Verificar que ambos huesos existen
+                if (mapping.source_bone in self.source_armature.data.bones and 
+                    mapping.target_bone in self.target_armature.data.bones):
+                    pairs.append((mapping.source_bone, mapping.target_bone))
         
-        constraints_added = 0
+        for source_bone, target_bone in pairs:
+            print(f"  Retarget: {source_bone} -> {target_bone}")
         
-        for mapping in settings.bone_mappings:
-            if not mapping.enabled or not mapping.source_bone or not mapping.target_bone:
-                continue
-            
-            source_bone = mapping.source_bone
-            target_bone = mapping.target_bone
-            
-            # Verificar que ambos huesos existen
-            if (source_bone in self.source_armature.data.bones and 
-                target_bone in self.target_armature.data.bones):
-                
-                target_pose_bone = self.target_armature.pose.bones[target_bone]
-                
-                # Limpiar constraints existentes
-                for constraint in list(target_pose_bone.constraints):
-                    if constraint.type == 'COPY_LOCATION' and constraint.target == self.source_armature:
-                        target_pose_bone.constraints.remove(constraint)
-                
-                # Crear nuevo constraint
-                constraint = target_pose_bone.constraints.new('COPY_LOCATION')
-                constraint.target = self.source_armature
-                constraint.subtarget = source_bone
-                constraint.name = f"CopyLoc_{source_bone.replace(' ', '_')}"
-                
-                constraints_added += 1
-                print(f"  Constraint: {source_bone} -> {target_bone}")
+        # El último mapping de un target es el que "gana" (mismo orden que los antiguos constraints)
+        self.retarget_heads = compute_target_heads(
+            self.source_armature, self.target_armature, pairs, many_to_one='LAST'
+        )
         
-        bpy.ops.object.mode_set(mode='OBJECT')
-        print(f"✅ {constraints_added} constraints creados")
-        return constraints_added
+        print(f"✅ {len(self.retarget_heads)} posiciones calculadas")
+        return len(self.retarget_heads)
     
     def apply_pose_and_cleanup_ultimate(self) -> bool:
-        """Aplicar pose y limpiar constraints (Mixamo + Universal)"""
-        print("⚡ Aplicando pose y limpiando constraints...")
-        
-        bpy.context.view_layer.objects.active = self.target_armature
-        bpy.ops.object.mode_set(mode='POSE')
+        """Escribir las posiciones calculadas como rest pose (Mixamo + Universal)"""
+        print("⚡ Aplicando rest pose calculada...")
         
-        # Aplicar pose
-        bpy.ops.pose.armature_apply(selected=False)
+        heads = getattr(self, 'retarget_heads', None) or {}
+        if heads:
+            matrices = compute_rest_matrices(self.target_armature, heads)
+            write_rest_matrices(self.target_armature, matrices)
         
-        # Limpiar constraints de forma segura
-        constraints_removed = 0
-        for bone in self.target_armature.pose.bones:
-            constraints_to_remove = []
-            
-            for constraint in bone.constraints:
-                try:
-                    if (constraint.type == 'COPY_LOCATION' and 
-                        hasattr(constraint, 'target') and 
-                        constraint.target == self.source_armature):
-                        constraints_to_remove.append(constraint)
-                except:
-                    # Constraint corrupto, marcarlo para remoción
-                    constraints_to_remove.append(constraint)
-            
-            for constraint in constraints_to_remove:
-                try:
-                    bone.constraints.remove(constraint)
-                    constraints_removed += 1
-                except:
-                    pass
-        
-        bpy.ops.object.mode_set(mode='OBJECT')
+        bpy.context.view_layer.objects.active = self.target_armature
         self.target_armature.show_in_front = True
         
-        print(f"✅ Pose aplicada, {constraints_removed} constraints removidos")
+        print(f"✅ Rest pose aplicada en {len(heads)} huesos")
         return True
     
     def update_vertex_groups_ultimate(self, settings) -> bool:
@@ -1060,8 +1319,11 @@ class UNIVERSALGTA_OT_execute_conversion(Operator):
         if self.merged_mesh.parent:
             self.merged_mesh.parent = None
         
-        # Añadir modificador armature
-        arm_mod = self.merged_mesh.modifiers.new(name="Armature", type='ARMATURE')
+        # Añadir modificador armature (ya con el nombre final 'GTASA_SKIN' para que
+        # el paso posterior no cree un segundo modificador armature)
+        arm_mod = self.merged_mesh.modifiers.get("GTASA_SKIN")
+        if arm_mod is None or arm_mod.type != 'ARMATURE':
+            arm_mod = self.merged_mesh.modifiers.new(name="GTASA_SKIN", type='ARMATURE')
         arm_mod.object = self.target_armature
         
         print("✅ Modificador armature configurado")
@@ -1118,57 +1380,58 @@ class UNIVERSALGTA_OT_execute_conversion(Operator):
                 print("⚠️ Error removiendo source armature")
         
         # --- NEW: Delete all collections but keep content (HYPER AGGRESSIVE) ---
-        print("🧹 Aplanando jerarquía (MÉTODO DEFINITIVO)...")
-        try:
-            master_col = bpy.context.scene.collection
+        with profile_step("Limpieza: aplanar colecciones", category="cleanup"):
+            print("🧹 Aplanando jerarquía (MÉTODO DEFINITIVO)...")
+            try:
+                master_col = bpy.context.scene.collection
             
-            # 1. Asegurar que Mesh y Armature estén en la Master Collection
-            desired_objects = [self.merged_mesh, self.target_armature]
-            for obj in desired_objects:
-                if obj and obj.name not in master_col.objects:
-                    try:
-                        master_col.objects.link(obj)
-                        print(f"  ✅ {obj.name} movido a Master Collection")
-                    except Exception as e:
-                        print(f"  ⚠️ Error moviendo {obj.name}: {e}")
+                # 1. Asegurar que Mesh y Armature estén en la Master Collection
+                desired_objects = [self.merged_mesh, self.target_armature]
+                for obj in desired_objects:
+                    if obj and obj.name not in master_col.objects:
+                        try:
+                            master_col.objects.link(obj)
+                            print(f"  ✅ {obj.name} movido a Master Collection")
+                        except Exception as e:
+                            print(f"  ⚠️ Error moviendo {obj.name}: {e}")
             
-            # 2. Desvincular objetos de TODAS las otras colecciones
-            # Iteramos sobre todos los objetos de la escena para asegurar limpieza total
-            for obj in bpy.data.objects:
-                if not obj: continue
+                # 2. Desvincular objetos de TODAS las otras colecciones
+                # Iteramos sobre todos los objetos de la escena para asegurar limpieza total
+                for obj in bpy.data.objects:
+                    if not obj: continue
                 
-                # Para nuestros objetos clave, o cualquier objeto que ya esté en master
-                # forzamos su salida de otras colecciones
-                if obj in desired_objects or obj.name in master_col.objects:
-                    for col in list(obj.users_collection):
-                        if col != master_col:
-                            try:
-                                col.objects.unlink(obj)
-                            except Exception as e:
-                                pass
-
-            # 3. Desvincular colecciones hijas de la Scene Collection (Visual)
-            # Esto quita las "Carpetas" de la vista inmediatamente
-            for child_col in list(master_col.children):
-                try:
-                    master_col.children.unlink(child_col)
-                except Exception as e:
-                     print(f"  ⚠️ Error desvinculando colección {child_col.name}: {e}")
-
-            # 4. Eliminar todas las colecciones de la base de datos
-            # Ahora que están desvinculadas y vacías, no deberían resistirse
-            for col in list(bpy.data.collections):
-                if col != master_col:
+                    # Para nuestros objetos clave, o cualquier objeto que ya esté en master
+                    # forzamos su salida de otras colecciones
+                    if obj in desired_objects or obj.name in master_col.objects:
+                        for col in list(obj.users_collection):
+                            if col != master_col:
+                                try:
+                                    col.objects.unlink(obj)
+                                except Exception as e:
+                                    pass
+
+                # 3. Desvincular colecciones hijas de la Scene Collection (Visual)
+                # Esto quita las "Carpetas" de la vista inmediatamente
+                for child_col in list(master_col.children):
                     try:
-                        bpy.data.collections.remove(col, do_unlink=True)
-                        print(f"  🗑️ Colección purgada: {col.name}")
+                        master_col.children.unlink(child_col)
                     except Exception as e:
-                        print(f"  ⚠️ No se pudo purgar {col.name}: {e}")
+                         print(f"  ⚠️ Error desvinculando colección {child_col.name}: {e}")
+
+                # 4. Eliminar todas las colecciones de la base de datos
+                # Ahora que están desvinculadas y vacías, no deberían resistirse
+                for col in list(bpy.data.collections):
+                    if col != master_col:
+                        try:
+                            bpy.data.collections.remove(col, do_unlink=True)
+                            print(f"  🗑️ Colección purgada: {col.name}")
+                        except Exception as e:
+                            print(f"  ⚠️ No se pudo purgar {col.name}: {e}")
             
-            print("✅ Jerarquía completamente aplanada.")
+                print("✅ Jerarquía completamente aplanada.")
                     
-        except Exception as e:
-            print(f"⚠️ Error fatal gestionando colecciones: {e}")
+            except Exception as e:
+                print(f"⚠️ Error fatal gestionando colecciones: {e}")
         # ----------------------------------------------------
 
         # Limpiar selecciones
@@ -1556,6 +1819,54 @@ class UNIVERSALGTA_OT_smart_auto_detect(Operator):
             return {'CANCELLED'}
 
 
+class UNIVERSALGTA_OT_clear_checkpoints(Operator):
+    """Eliminar los checkpoints de conversión del archivo actual"""
+    bl_idname = "universalgta.clear_checkpoints"
+    bl_label = "Clear Checkpoints"
+    bl_description = "Eliminar los checkpoints guardados de la conversión de este archivo"
+    
+    def execute(self, context):
+        try:
+            CheckpointStore().clear()
+            context.scene.universal_gta_settings.last_checkpoint_info = ""
+        except Exception as e:
+            self.report({'ERROR'}, f"No se pudieron eliminar los checkpoints: {e}")
+            return {'CANCELLED'}
+        self.report({'INFO'}, "Checkpoints eliminados")
+        return {'FINISHED'}
+
+
+class UNIVERSALGTA_OT_toggle_pipeline_step(Operator):
+    """Activar/desactivar un paso del pipeline de conversión"""
+    bl_idname = "universalgta.toggle_pipeline_step"
+    bl_label = "Toggle Pipeline Step"
+    bl_description = "Activar o desactivar este paso en la conversión"
+    bl_options = {'INTERNAL'}
+    
+    step_name: StringProperty(name="Paso", default="")
+    
+    def execute(self, context):
+        settings = context.scene.universal_gta_settings
+        steps = {entry[0]: entry[4] for entry in CONVERSION_PIPELINE}
+        if self.step_name not in steps:
+            self.report({'ERROR'}, f"Paso desconocido: {self.step_name}")
+            return {'CANCELLED'}
+        if steps[self.step_name].get('required'):
+            self.report({'WARNING'}, f"El paso '{self.step_name}' es obligatorio")
+            return {'CANCELLED'}
+        
+        disabled = get_disabled_pipeline_steps(settings)
+        if self.step_name in disabled:
+            disabled.discard(self.step_name)
+        else:
+            disabled.add(self.step_name)
+        # Conservar el orden del pipeline en el texto guardado
+        settings.disabled_pipeline_steps = ",".join(
+            entry[0] for entry in CONVERSION_PIPELINE if entry[0] in disabled
+        )
+        return {'FINISHED'}
+
+
 # Otros operadores necesarios
 class UNIVERSALGTA_OT_execute_conversion_no_autofix(Operator):
     bl_idname = "universalgta.execute_conversion_no_autofix"
@@ -1581,8 +1892,12 @@ def register():
     bpy.utils.register_class(UNIVERSALGTA_OT_smart_auto_detect)
     bpy.utils.register_class(UNIVERSALGTA_OT_execute_conversion_no_autofix)
     bpy.utils.register_class(UNIVERSALGTA_OT_auto_detect_bones)
+    bpy.utils.register_class(UNIVERSALGTA_OT_clear_checkpoints)
+    bpy.utils.register_class(UNIVERSALGTA_OT_toggle_pipeline_step)
 
 def unregister():
+    bpy.utils.unregister_class(UNIVERSALGTA_OT_toggle_pipeline_step)
+    bpy.utils.unregister_class(UNIVERSALGTA_OT_clear_checkpoints)
     bpy.utils.unregister_class(UNIVERSALGTA_OT_execute_conversion)
     bpy.utils.unregister_class(UNIVERSALGTA_OT_smart_auto_detect)
     bpy.utils.unregister_class(UNIVERSALGTA_OT_execute_conversion_no_autofix)
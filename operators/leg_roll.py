@@ -5,6 +5,8 @@ from bpy.types import Operator  # type: ignore
 import math
 from mathutils import Matrix  # type: ignore
 
+from ..utils.lean_mode import update_view_layer
+
 class UNIVERSALGTA_OT_apply_leg_roll(Operator):
     """Aplicar ángulo de roll a las piernas en modo edición"""
     bl_idname = "universalgta.apply_leg_roll"
@@ -40,7 +42,7 @@ class UNIVERSALGTA_OT_apply_leg_roll(Operator):
         bones_modified = 0
 
         armature.data.update_tag()
-        context.view_layer.update()
+        update_view_layer(context)
 
         for name, roll_angle in bone_names.items():
             if name in edit_bones:
@@ -52,7 +54,7 @@ class UNIVERSALGTA_OT_apply_leg_roll(Operator):
                     print(f"[LEG ROLL] Error en {name}: {e}")
         
         armature.data.update_tag()
-        context.view_layer.update()
+        update_view_layer(context)
 
         # Activar visualización de ejes en el armature
         if armature.data:
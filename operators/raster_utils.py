@@ -1,3 +1,4 @@
+from ..utils.solid_raster import new_solid_image
 
 def _rasterize_direct_color(material, principled, base_socket, alpha_socket=None):
     """
@@ -19,19 +20,9 @@ def _rasterize_direct_color(material, principled, base_socket, alpha_socket=None
             else:
                 color = tuple(base_socket.default_value)
         
-        # Crear imagen solida
+        # Crear imagen solida (buffer de píxeles compartido por color)
         img_name = f"{material.name}_diffuse_solid"
-        if img_name in bpy.data.images:
-            bpy.data.images.remove(bpy.data.images[img_name])
-            
-        # Generar imagen
-        size = 256
-        image = bpy.data.images.new(img_name, width=size, height=size, alpha=True)
-        
-        # Llenar píxeles
-        pixels = [color[0], color[1], color[2], color[3]] * (size * size)
-        image.pixels = pixels
-        image.pack()
+        image = new_solid_image(img_name, color, 256)
         
         # Limpiar nodos y conectar
         nodes = material.node_tree.nodes
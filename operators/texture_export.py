@@ -15,8 +15,23 @@ from bpy_extras.io_utils import ExportHelper
 from mathutils import Color, Vector
 from mathutils import Color, Vector
 import array # Para manipulación eficiente de pixels
-import random # Z-Fight Jitter
-import random # Para Jitter Z-Fight
+import math
+from contextlib import contextmanager
+
+import numpy as np
+
+from ..utils.bake_cache import BakeCache, hash_material_graph, hash_material_uv_layout, make_bake_key
+from ..utils.bake_farm import MIN_FARM_JOBS, BakeFarm, is_farm_available
+from ..utils.bake_session import BakeSession, acquire_bake_session
+from ..utils.export_manifest import ExportManifest, hash_pixels, write_alias
+from ..utils.image_analysis import get_image_stats, read_pixels
+from ..utils.lean_mode import update_view_layer
+from ..utils.node_eval import UnsupportedGraph, evaluate_to_rgba
+from ..utils.profiler import profile_step
+from ..utils.solid_raster import clear_solid_buffers, new_solid_image
+from ..utils.texture_budget import collect_material_demands, describe_budget, solve_texture_budget
+from ..utils.texture_writer import can_write_threaded, extract_job, write_jobs
+from ..utils.uv_packing import ensure_uv_pack_plan
 
 
 FORMAT_EXTENSION_MAP = {
@@ -45,6 +60,14 @@ FORCED_FORMAT_ITEMS = [
     ('TARGA', "TGA", "Guardar como TGA"),
     ('BMP', "BMP", "Guardar como BMP"),
     ('HDR', "HDR", "Guardar como HDR (rango dinámico alto)"),
+    ('DDS', "DDS (DXT)", "Guardar como DDS comprimido en DXT con mipmaps, listo para el TXD"),
+]
+
+DDS_COMPRESSION_ITEMS = [
+    ('AUTO', "Automático", "DXT1 para texturas opacas o con alpha de 1 bit, DXT5 si el alpha tiene degradados"),
+    ('DXT1', "DXT1", "Sin alpha o alpha de 1 bit (4 bits por píxel)"),
+    ('DXT3', "DXT3", "Alpha explícito de 4 bits (8 bits por píxel)"),
+    ('DXT5', "DXT5", "Alpha interpolado (8 bits por píxel)"),
 ]
 
 EXPORT_MODE_ITEMS = [
@@ -88,11 +111,37 @@ class TextureExporterProperties(PropertyGroup):
         default='PNG'
     )
 
+    use_export_manifest: BoolProperty(
+        name="Omitir texturas sin cambios",
+        description="Guarda un manifiesto en la carpeta de exportación y no reescribe las texturas que no cambiaron (las idénticas se escriben una vez)",
+        default=True
+    )
+
+    dds_compression: EnumProperty(
+        name="Compresión DDS",
+        description="Compresión DXT usada al exportar en formato DDS",
+        items=DDS_COMPRESSION_ITEMS,
+        default='AUTO'
+    )
+
+    dds_mipmaps: BoolProperty(
+        name="Mipmaps",
+        description="Generar mipmaps (filtro de caja) en los DDS exportados",
+        default=True
+    )
+
 
 def _get_texture_exporter_props(context):
     return getattr(context.scene, "texture_exporter_props", None)
 
 
+def _get_dds_options(context):
+    props = _get_texture_exporter_props(context)
+    if props is None:
+        return {'compression': 'AUTO', 'mipmaps': True}
+    return {'compression': props.dds_compression, 'mipmaps': props.dds_mipmaps}
+
+
 def _collect_images_to_export(context, export_mode):
     images_to_export = set()
 
@@ -132,56 +181,166 @@ def _describe_export_mode(context, export_mode):
     return f"texturas de la selección ({num_sel} objeto(s))"
 
 
-def _export_images(images_to_export, export_path, force_format_enabled, forced_format):
-    exported = []
-    failed = []
+def _export_target(image, export_path, force_format_enabled, forced_format):
+    image_name = bpy.path.clean_name(image.name)
+    name_without_ext = os.path.splitext(image_name)[0]
 
-    for image in images_to_export:
-        if not image or not getattr(image, "size", None):
-            failed.append(getattr(image, "name", "desconocida"))
-            continue
+    for suffix in SUFFIXES_TO_REMOVE:
+        if name_without_ext.lower().endswith(suffix):
+            name_without_ext = name_without_ext[:-len(suffix)]
+            break
 
-        if image.size[0] <= 0 or image.size[1] <= 0:
-            print(f"⚠️ Imagen no válida para exportar: {image.name}")
-            failed.append(image.name)
-            continue
+    original_format_setting = getattr(image, 'file_format', None) or 'PNG'
+    target_format = forced_format if force_format_enabled and forced_format else original_format_setting or 'PNG'
+    extension = get_extension_for_format(target_format)
+    image_name = name_without_ext + extension
+    return image_name, os.path.join(export_path, image_name), target_format
 
-        image_name = bpy.path.clean_name(image.name)
-        name_without_ext = os.path.splitext(image_name)[0]
 
-        for suffix in SUFFIXES_TO_REMOVE:
-            if name_without_ext.lower().endswith(suffix):
-                name_without_ext = name_without_ext[:-len(suffix)]
-                break
+def _save_image_copy(image, export_file, target_format):
+    """Guardado clásico con image.save() (formatos no soportados por el escritor en segundo plano)"""
+    original_filepath = image.filepath_raw
+    previous_format_setting = getattr(image, 'file_format', None)
+    try:
+        image.filepath_raw = export_file
+        image.file_format = target_format
+        image.save()
+    finally:
+        image.filepath_raw = original_filepath
+        if previous_format_setting is not None:
+            image.file_format = previous_format_setting
+
+
+def _export_content_hash(image, job, target_format):
+    """Hash de lo que se va a escribir (None si no se pueden leer los píxeles)"""
+    if job is not None:
+        return hash_pixels(job.pixels, target_format, sorted(job.options.items()))
+    pixels = read_pixels(image)
+    if pixels is None:
+        return None
+    return hash_pixels(pixels, target_format, image.colorspace_settings.name)
 
-        original_format_setting = getattr(image, 'file_format', None) or 'PNG'
-        target_format = forced_format if force_format_enabled and forced_format else original_format_setting or 'PNG'
-        extension = get_extension_for_format(target_format)
-        image_name = name_without_ext + extension
-        export_file = os.path.join(export_path, image_name)
 
-        try:
-            original_filepath = image.filepath_raw
-            previous_format_setting = getattr(image, 'file_format', None)
+def _export_images(images_to_export, export_path, force_format_enabled, forced_format, use_manifest=False,
+                   dds_options=None):
+    """Exporta las imágenes: píxeles en el hilo principal, PNG/TGA/DDS en un pool de hilos.
+
+    Con use_manifest se omiten los archivos sin cambios desde la última
+    exportación y las imágenes idénticas se escriben una vez y se enlazan.
+    dds_options ({'compression', 'mipmaps'}) se aplica a las texturas DDS.
+    """
+    exported = []
+    failed = []
+    jobs = []
+    # nombre de archivo -> (hash, ancho, alto, formato)
+    records = {}
+    aliases = []
+    skipped = 0
+    manifest = ExportManifest(export_path) if use_manifest else None
+    written_hashes = {}
+
+    # Fase 1 (hilo principal): extraer píxeles; después no se vuelve a tocar ningún datablock
+    with profile_step("export_extract"):
+        for image in images_to_export:
+            if not image or not getattr(image, "size", None):
+                failed.append(getattr(image, "name", "desconocida"))
+                continue
 
+            if image.size[0] <= 0 or image.size[1] <= 0:
+                print(f"⚠️ Imagen no válida para exportar: {image.name}")
+                failed.append(image.name)
+                continue
+
+            image_name, export_file, target_format = _export_target(image, export_path, force_format_enabled, forced_format)
             image.use_fake_user = True
-            image.filepath_raw = export_file
-            image.file_format = target_format
-            image.save()
 
-            image.filepath_raw = original_filepath
-            if previous_format_setting is not None:
-                image.file_format = previous_format_setting
+            try:
+                job = None
+                if can_write_threaded(image, target_format):
+                    options = dds_options if target_format == 'DDS' else None
+                    job = extract_job(image, export_file, target_format, options)
+
+                if manifest is not None:
+                    content_hash = _export_content_hash(image, job, target_format)
+                    if content_hash is not None:
+                        records[image_name] = (content_hash, image.size[0], image.size[1], target_format)
+                        canonical = written_hashes.get(content_hash)
+                        if canonical is not None and canonical != image_name:
+                            aliases.append((image_name, canonical))
+                            continue
+                        written_hashes[content_hash] = image_name
+                        if manifest.is_current(image_name, content_hash):
+                            skipped += 1
+                            exported.append(image_name)
+                            continue
+
+                if job is not None:
+                    jobs.append((job, image_name))
+                    continue
 
-            print(f"✅ Exportada: {export_file}")
-            exported.append(image_name)
-        except Exception as e:
-            print(f"❌ Error exportando {image.name}: {e}")
-            failed.append(image.name)
-            image.filepath_raw = original_filepath
-            if previous_format_setting is not None:
-                image.file_format = previous_format_setting
+                _save_image_copy(image, export_file, target_format)
+                print(f"✅ Exportada: {export_file}")
+                exported.append(image_name)
+            except Exception as e:
+                print(f"❌ Error exportando {image.name}: {e}")
+                failed.append(image.name)
+                records.pop(image_name, None)
+
+    # Fase 2 (pool de hilos): codificar y escribir
+    if jobs:
+        file_names = {id(job): image_name for job, image_name in jobs}
+        window_manager = getattr(bpy.context, "window_manager", None)
+        if window_manager:
+            window_manager.progress_begin(0, len(jobs))
+
+        def report_progress(done, total, job):
+            if window_manager:
+                window_manager.progress_update(done)
+            print(f"   💾 [{done}/{total}] {job.name}")
 
+        try:
+            with profile_step("export_write"):
+                written, errors = write_jobs([job for job, _ in jobs], progress=report_progress)
+        finally:
+            if window_manager:
+                window_manager.progress_end()
+
+        for job in written:
+            print(f"✅ Exportada: {job.filepath}")
+            exported.append(file_names[id(job)])
+        for job, error in errors:
+            print(f"❌ Error exportando {job.name}: {error}")
+            failed.append(job.name)
+            records.pop(file_names[id(job)], None)
+
+    if manifest is None:
+        return exported, failed
+
+    # Alias: mismo contenido que otro archivo de esta exportación
+    for image_name, canonical in aliases:
+        if canonical not in records:
+            failed.append(image_name)
+            continue
+        content_hash = records[image_name][0]
+        try:
+            if manifest.is_current(image_name, content_hash):
+                skipped += 1
+            else:
+                write_alias(os.path.join(export_path, canonical), os.path.join(export_path, image_name))
+                print(f"🔗 Alias: {image_name} -> {canonical}")
+            exported.append(image_name)
+        except OSError as e:
+            print(f"❌ Error creando alias {image_name}: {e}")
+            failed.append(image_name)
+            records.pop(image_name, None)
+
+    alias_of = dict(aliases)
+    for image_name, (content_hash, width, height, file_format) in records.items():
+        manifest.record(image_name, content_hash, width, height, file_format, alias_of.get(image_name))
+    manifest.save()
+
+    if skipped or aliases:
+        print(f"📋 [MANIFEST] {skipped} sin cambios omitidas, {len(aliases)} alias de texturas idénticas")
     return exported, failed
 
 
@@ -363,52 +522,14 @@ def evaluate_node_chain_color(node, visited=None):
 
 def sample_image_color(image, sample_count=16):
     """
-    AVANZADO: Samplear color promedio de imagen de forma inteligente
-    Toma múltiples puntos para obtener color representativo
+    AVANZADO: Color promedio de la imagen (todos los píxeles, vectorizado)
+    sample_count se conserva por compatibilidad.
     """
     try:
-        if not image.pixels or len(image.pixels) == 0:
+        stats = get_image_stats(image)
+        if stats is None:
             return [0.906, 0.906, 0.906, 1.0]
-        
-        width, height = image.size
-        if width <= 0 or height <= 0:
-            return [0.906, 0.906, 0.906, 1.0]
-        
-        # Samplear múltiples puntos de la imagen
-        sample_points = []
-        step = max(1, min(width, height) // 4)  # Dividir en una grilla 4x4
-        
-        for y in range(step, height - step, step):
-            for x in range(step, width - step, step):
-                pixel_index = (y * width + x) * 4
-                if pixel_index + 3 < len(image.pixels):
-                    r = image.pixels[pixel_index]
-                    g = image.pixels[pixel_index + 1]
-                    b = image.pixels[pixel_index + 2]
-                    a = image.pixels[pixel_index + 3]
-                    sample_points.append([r, g, b, a])
-        
-        if not sample_points:
-            # Fallback: usar píxel central
-            center_x, center_y = width // 2, height // 2
-            pixel_index = (center_y * width + center_x) * 4
-            if pixel_index + 3 < len(image.pixels):
-                return [
-                    image.pixels[pixel_index],
-                    image.pixels[pixel_index + 1], 
-                    image.pixels[pixel_index + 2],
-                    image.pixels[pixel_index + 3]
-                ]
-        
-        # Promedio de todos los samples
-        avg_color = [0, 0, 0, 0]
-        for sample in sample_points:
-            for i in range(4):
-                avg_color[i] += sample[i]
-        
-        for i in range(4):
-            avg_color[i] /= len(sample_points)
-        
+        avg_color = list(stats.mean_color)
         print(f"✅ Color sampled: RGB({avg_color[0]:.3f}, {avg_color[1]:.3f}, {avg_color[2]:.3f})")
         return avg_color
         
@@ -444,48 +565,458 @@ def apply_hsv_transform(base_color, hue, saturation, value):
 def _is_image_basically_white_or_empty(image):
     """Checks if an image is completely white, transparent, or empty."""
     try:
-        if not image.pixels or len(image.pixels) == 0:
+        stats = get_image_stats(image)
+        if stats is None:
             return True
-        
-        # Samplear el centro y algunas esquinas para ser rápido
-        width, height = image.size
-        # Indices de sampleo: centro y esquinas
-        indices = [
-            0, # esq inf izq
-            (width - 1) * 4, # esq inf der
-            (height - 1) * width * 4, # esq sup izq
-            (width * height - 1) * 4, # esq sup der
-            ((height // 2) * width + (width // 2)) * 4 # centro
-        ]
-        
-        is_all_white = True
-        is_all_transparent = True
-        
-        for idx in indices:
-            if idx < len(image.pixels) - 4:
-                r = image.pixels[idx]
-                g = image.pixels[idx+1]
-                b = image.pixels[idx+2]
-                a = image.pixels[idx+3]
-                
-                # Check transparencia (si tiene algo opaco, no es empty)
-                if a > 0.05:
-                    is_all_transparent = False
-                
-                # Check blanco (si algo no es blanco puro, no es white)
-                if r < 0.95 or g < 0.95 or b < 0.95:
-                    is_all_white = False
-
-        if is_all_transparent: return True # Vacio
-        if is_all_white: return True # Blanco puro (fallo típico de bake)
-        
+        if stats.is_empty: return True # Vacio
+        if stats.is_all_white: return True # Blanco puro (fallo típico de bake)
         return False
     except:
         return True # Asumir fallo si error
 
-def perform_advanced_baking(material, resolution=None):
+
+def _constant_alpha_value(alpha_socket):
+    """Alpha constante que produce el socket, o None si varía por píxel.
+
+    - Sin socket: opaco (1.0)
+    - Nodo Value: su valor
+    - Alpha de una imagen sin canal alpha o con todos los píxeles opacos: 1.0
+    """
+    if alpha_socket is None:
+        return 1.0
+    node = alpha_socket.node
+    if node.type == 'VALUE':
+        return float(node.outputs[0].default_value)
+    if node.type != 'TEX_IMAGE' or alpha_socket.name != 'Alpha':
+        return None
+
+    image = node.image
+    if image is None:
+        return 1.0
+    if image.alpha_mode == 'NONE' or image.channels != 4:
+        return 1.0
+    stats = get_image_stats(image)
+    if stats is not None and stats.min_alpha >= 0.999:
+        return 1.0
+    return None
+
+
+def _saved_base_color_source(principled):
+    """(imagen, color) conectados al Base Color del Principled antes de bakear"""
+    base_color_socket = principled.inputs.get('Base Color')
+    saved_image = None
+    saved_color = None
+
+    if base_color_socket:
+        if base_color_socket.is_linked:
+            source_node = base_color_socket.links[0].from_node
+            if source_node.type == 'TEX_IMAGE' and source_node.image:
+                saved_image = source_node.image
+                print(f"   💾 Guardando referencia a imagen: {saved_image.name}")
+        else:
+            saved_color = tuple(base_color_socket.default_value)
+            # Check si el color es muy oscuro (casi negro)
+            if len(saved_color) >= 3 and (saved_color[0] + saved_color[1] + saved_color[2]) < 0.1:
+                print(f"   ⚠️ Base Color muy oscuro ({saved_color[:3]}), usando blanco")
+                saved_color = (0.8, 0.8, 0.8, 1.0)
+            else:
+                print(f"   💾 Guardando color: {saved_color[:3]}")
+    return saved_image, saved_color
+
+
+def _resolve_bake_sources(active_shader, nodes, links, saved_image=None, saved_color=None):
+    """Sockets de color y alpha a bakear para el shader conectado al Output.
+
+    Devuelve (source_color_socket, source_alpha_socket, fallback_color); el
+    color de respaldo se usa cuando no hay socket de color.
+    """
+    source_color_socket = None
+    source_alpha_socket = None
+    fallback_color = (1.0, 1.0, 1.0, 1.0)
+
+    if active_shader:
+        print(f"   🕵️ Analizando Shader: {active_shader.name} ({active_shader.type})")
+
+        # ESTRATEGIA 1: Principled BSDF
+        if active_shader.type == 'BSDF_PRINCIPLED':
+            # Color
+            if active_shader.inputs.get('Base Color') and active_shader.inputs['Base Color'].is_linked:
+                source_color_socket = active_shader.inputs['Base Color'].links[0].from_socket
+            else:
+                # Color solido del principled
+                fallback_color = tuple(active_shader.inputs['Base Color'].default_value)
+
+            # Alpha
+            if active_shader.inputs.get('Alpha') and active_shader.inputs['Alpha'].is_linked:
+                source_alpha_socket = active_shader.inputs['Alpha'].links[0].from_socket
+            elif active_shader.inputs.get('Alpha'):
+                 # Si es valor fijo, lo seteamos en el mix shader directamente abajo
+                 pass 
+
+        # ESTRATEGIA 2: Grupos/Shaders Complejos (MMD, Mix, etc.)
+        else:
+            print(f"   🕵️ Shader Complejo ({active_shader.type}): Analizando componentes...")
+
+            found_mmd_reconstruction = False
+
+            # PRIORITY 1: Reconstrucción Manual MMD (Base + Sphere)
+            # Esta es la única forma segura de recuperar el color "brillante" (Sphere Map) 
+            # ya que la salida del shader suele ser dependiente de la luz (Toon) y sale gris.
+            mmd_base = None
+            mmd_sphere = None
+
+            for inp in active_shader.inputs:
+                if inp.is_linked:
+                     src = inp.links[0].from_node
+                     if src.type == 'TEX_IMAGE':
+                         if 'Base Tex' in inp.name: mmd_base = src
+                         elif 'Sphere Tex' in inp.name: mmd_sphere = src
+
+            if mmd_base:
+                found_mmd_reconstruction = True
+                print(f"   🧬 Reconstrucción MMD: Base encontrada ({mmd_base.name})")
+
+                target_socket = mmd_base.outputs.get('Color')
+
+                # APLICAR TINTE AMBIENTAL (Ambient Color)
+                # Muchos mats MMD usan textura gris + Ambient Color para dar el color final.
+                ambient_color_val = (1.0, 1.0, 1.0, 1.0)
+                if 'Ambient Color' in active_shader.inputs:
+                     try:
+                         vals = active_shader.inputs['Ambient Color'].default_value
+                         if len(vals) >= 3: ambient_color_val = vals
+                     except: pass
+
+                # APLICAR TINTE AMBIENTAL (Solo si es Colorido)
+                # Filtro de Saturación: Evita oscurecer materiales con ambient gris/blanco.
+                # Solo aplicamos tinte si el color es realmente un color (ej: Azul de ojos).
+                r, g, b = ambient_color_val[:3]
+                saturation = max(r,g,b) - min(r,g,b)
+
+                if saturation > 0.05:
+                     print(f"   🎨 Ambient Color SATURADO ({saturation:.2f}) de {ambient_color_val[:3]} -> Aplicando Tinte MULTIPLY")
+                     mix_tint = nodes.new('ShaderNodeMixRGB')
+                     mix_tint.blend_type = 'MULTIPLY'
+                     mix_tint.inputs['Fac'].default_value = 1.0
+                     mix_tint.inputs[2].default_value = ambient_color_val
+
+                     links.new(target_socket, mix_tint.inputs[1])
+                     target_socket = mix_tint.outputs['Color']
+                else:
+                     print(f"   ⚪ Ambient Color DESATURADO ({saturation:.2f}) -> Ignorando (Evita oscurecer piel/ropa)")
+
+                # APLICAR ESFERA (Deshabilitado Temporalmente)
+                # Los matcaps de esfera producen manchas negras horribles si no se proyectan bien.
+                # En el bake esto es casi imposible de garantizar sin cámara.
+                # Priorizamos limpieza sobre brillos rotos.
+                if mmd_sphere:
+                     print(f"   🚫 Sphere Tex detectada ({mmd_sphere.name}) pero IGNORADA para evitar artefactos (manchas negras)")
+                     # Si en el futuro se quiere activar, usar ADD con factor muy bajo (0.1)
+                     # links.new(target_socket, mix_add.inputs[1]) ...
+
+                source_color_socket = target_socket
+
+                # Intentar recuperar Alpha de la base
+                if 'Alpha' in mmd_base.outputs:
+                     source_alpha_socket = mmd_base.outputs['Alpha']
+
+                source_color_socket = target_socket
+
+                # Intentar recuperar Alpha de la base
+                if 'Alpha' in mmd_base.outputs:
+                     source_alpha_socket = mmd_base.outputs['Alpha']
+
+            # PRIORITY 2: Usar la SALIDA del Grupo (si no pudimos reconstruir)
+            elif 'Color' in active_shader.outputs:
+                source_color_socket = active_shader.outputs['Color']
+                print(f"   🧬 Usando salida 'Color' del Grupo (Fallback)")
+                if 'Alpha' in active_shader.outputs:
+                     source_alpha_socket = active_shader.outputs['Alpha']
+
+            # PRIORITY 3: Rastrear inputs recursivamente (Último recurso)
+            else:
+                print(f"   ⚠️ Fallback: Rastreando texturas de entrada...")
+
+                def find_image_input(node, depth=0):
+                    if depth > 10: return None
+
+                    linked_inputs = [inp for inp in node.inputs if inp.is_linked]
+                    priority_keys = ['base', 'diff', 'col', 'tex', 'albedo', 'img']
+                    avoid_keys = ['norm', 'spec', 'rough', 'disp', 'bump', 'alpha', 'fac']
+
+                    # Paso 1: Buscar TEX_IMAGE directo en inputs PRIORITARIOS
+                    for inp in linked_inputs:
+                        name = inp.name.lower()
+                        if any(k in name for k in priority_keys) and not any(k in name for k in avoid_keys):
+                            src = inp.links[0].from_node
+                            if src.type == 'TEX_IMAGE':
+                                print(f"      ✅ Match directo prioritario: Input '{inp.name}' -> {src.name}")
+                                return src
+
+                    # Paso 2: Buscar standard
+                    for inp in linked_inputs:
+                        name = inp.name.lower()
+                        if not any(k in name for k in avoid_keys):
+                            src = inp.links[0].from_node
+                            if src.type == 'TEX_IMAGE':
+                                return src
+
+                    # Paso 3: Recursión
+                    for inp in linked_inputs:
+                        src = inp.links[0].from_node
+                        if src.type in ['GROUP', 'REROUTE', 'BSDF_PRINCIPLED', 'MIX_SHADER', 'ADD_SHADER']:
+                            res = find_image_input(src, depth+1)
+                            if res: return res
+
+                    return None
+
+                found_tex_node = find_image_input(active_shader)
+
+                if found_tex_node:
+                    print(f"   🎯 Textura seleccionada: {found_tex_node.name}")
+                    if 'Color' in found_tex_node.outputs:
+                        source_color_socket = found_tex_node.outputs['Color']
+                    if 'Alpha' in found_tex_node.outputs:
+                        source_alpha_socket = found_tex_node.outputs['Alpha']
+                else:
+                    print("   ❌ No se encontró textura visual válida.")
+                    # Ultimo recurso: nombre a ciegas
+                    for name in ['Base Tex', 'Base Color', 'Diffuse', 'Color']:
+                        if name in active_shader.inputs and active_shader.inputs[name].is_linked:
+                            source_color_socket = active_shader.inputs[name].links[0].from_socket
+                            break
+
+    # Fallback global
+    if not source_color_socket:
+         if saved_image:
+             tmp_img = nodes.new('ShaderNodeTexImage')
+             tmp_img.image = saved_image
+             source_color_socket = tmp_img.outputs['Color']
+             source_alpha_socket = tmp_img.outputs['Alpha']
+         elif saved_color:
+              fallback_color = saved_color
+         else:
+              print("   ⚠️ FALLBACK CRÍTICO: Usando MAGENTA por falta de datos.")
+              fallback_color = (1, 0, 1, 1)
+
+    return source_color_socket, source_alpha_socket, fallback_color
+
+
+def _assign_source_uvs_to_float2(obj, material, source_name):
+    """Copia las UVs de origen de las caras del material a 'Float2'.
+
+    La imagen evaluada en CPU está en el espacio de las UVs originales, así que
+    esas caras conservan su layout en lugar de empaquetarse.
+    """
+    uv_layers = obj.data.uv_layers
+    if 'original_uv_src' not in uv_layers:
+        uv_layers.new(name='original_uv_src')
+    if 'Float2' not in uv_layers:
+        uv_layers.new(name='Float2')
+
+    mesh = obj.data
+    slots = [i for i, slot in enumerate(obj.material_slots) if slot.material == material]
+    polygon_count = len(mesh.polygons)
+    if not slots or not polygon_count:
+        return False
+
+    material_index = np.empty(polygon_count, dtype=np.int32)
+    loop_total = np.empty(polygon_count, dtype=np.int32)
+    mesh.polygons.foreach_get('material_index', material_index)
+    mesh.polygons.foreach_get('loop_total', loop_total)
+    loop_mask = np.repeat(np.isin(material_index, slots), loop_total)
+
+    source = uv_layers[source_name]
+    target = uv_layers['Float2']
+    source_uvs = np.empty(len(source.data) * 2, dtype=np.float32)
+    target_uvs = np.empty(len(target.data) * 2, dtype=np.float32)
+    source.data.foreach_get('uv', source_uvs)
+    target.data.foreach_get('uv', target_uvs)
+    source_uvs = source_uvs.reshape(-1, 2)
+    target_uvs = target_uvs.reshape(-1, 2)
+    target_uvs[loop_mask] = source_uvs[loop_mask]
+    target.data.foreach_set('uv', target_uvs.ravel())
+
+    target.active = True
+    target.active_render = True
+    return True
+
+
+def _rasterize_material_on_cpu(material, resolution, bake_stats=None):
+    """Rasteriza el material con el evaluador NumPy (utils/node_eval.py), sin Cycles.
+
+    Usa las mismas fuentes de color/alpha que perform_advanced_baking.
+    Devuelve la imagen `_b_d` o None si el grafo necesita un bake real.
+    """
+    obj, _ = _find_object_with_material(material)
+    principled = _find_principled(material)
+    output_node = _get_output_node(material)
+    if not obj or not principled or not output_node:
+        return None
+
+    nodes = material.node_tree.nodes
+    links = material.node_tree.links
+    existing_names = {n.name for n in nodes}
+    original_output_connection = None
+    if output_node.inputs['Surface'].is_linked:
+        original_output_connection = output_node.inputs['Surface'].links[0].from_socket
+
+    try:
+        saved_image, saved_color = _saved_base_color_source(principled)
+        active_shader = original_output_connection.node if original_output_connection else None
+        color_socket, alpha_socket, fallback_color = _resolve_bake_sources(
+            active_shader, nodes, links, saved_image, saved_color)
+        with profile_step(f"Evaluación CPU: {material.name}", category="rasterize"):
+            pixels, uv_map = evaluate_to_rgba(color_socket, alpha_socket, resolution, fallback_color)
+    except UnsupportedGraph as e:
+        print(f"   ↪️ [CPU_EVAL] {material.name}: {e} -> Bake con Cycles")
+        return None
+    finally:
+        # Nodos auxiliares creados al resolver las fuentes (tinte MMD, imagen de respaldo)
+        for n in [n for n in nodes if n.name not in existing_names]:
+            nodes.remove(n)
+
+    uv_layers = obj.data.uv_layers
+    if uv_map:
+        if uv_map not in uv_layers:
+            print(f"   ↪️ [CPU_EVAL] {material.name}: UV map '{uv_map}' no existe -> Bake con Cycles")
+            return None
+        source_name = uv_map
+    elif 'original_uv_src' in uv_layers:
+        source_name = 'original_uv_src'
+    else:
+        source_name = next((l.name for l in uv_layers if l.active_render), None)
+        if source_name is None:
+            return None
+
+    baked_name = f"{material.name}_b_d"
+    if baked_name in bpy.data.images:
+        bpy.data.images.remove(bpy.data.images[baked_name])
+    baked_image = bpy.data.images.new(baked_name, width=resolution, height=resolution, alpha=True)
+    baked_image.pixels.foreach_set(pixels)
+    baked_image.pack()
+    baked_image.use_fake_user = True
+
+    _assign_source_uvs_to_float2(obj, material, source_name)
+
+    if bake_stats is not None:
+        bake_stats['cpu'] = bake_stats.get('cpu', 0) + 1
+    print(f"   ⚡ [CPU_EVAL] {material.name}: rasterizado sin Cycles ({resolution}x{resolution}, UV '{source_name}')")
+    return baked_image
+
+
+def _ensure_bake_uv_layers(obj):
+    """Crea (o reutiliza) 'original_uv_src' y 'Float2' y fija sus roles"""
+    # === GESTIÓN UV (FLOAT2 STABLE PIPELINE) ===
+    # Optimización Multi-Material: Si 'Float2' ya existe, lo reusamos para no invalidar bakes previos.
+    
+    print(f"   🗺️ UV Pipeline Stable: Check Float2...")
+    
+    # 1. Asegurar Source ('original_uv_src')
+    # Creamos una COPIA del estado actual para no perder nombre/datos del usuario.
+    if 'original_uv_src' in obj.data.uv_layers:
+         original_uv_layer = obj.data.uv_layers['original_uv_src']
+    else:
+         # Crear copia de seguridad dedicada para Input (Fuente de Apariencia)
+         if obj.data.uv_layers:
+              # .new() duplica la capa activa por defecto en Blender
+              original_uv_layer = obj.data.uv_layers.new(name='original_uv_src')
+         else:
+              original_uv_layer = obj.data.uv_layers.new(name='original_uv_src')
+    
+    # 2. Asegurar Target ('Float2')
+    if 'Float2' in obj.data.uv_layers:
+         uv_target_layer = obj.data.uv_layers['Float2']
+         print("   ♻️ Reusando UV 'Float2' existente")
+    else:
+         # Limpiar temporales antiguos
+         for uv in [l for l in obj.data.uv_layers if l.name in ['UV_TEMP', 'bake_temp']]:
+             obj.data.uv_layers.remove(uv)
+             
+         uv_target_layer = obj.data.uv_layers.new(name='Float2')
+    
+    # 3. Configurar Roles
+    original_uv_layer.active_render = True # Inputs
+    obj.data.uv_layers.active = uv_target_layer # Target
+
+
+def _prepare_bake_uv_layers(obj, material, pack_uvs=True):
+    """Capas UV del bake: 'original_uv_src' (entrada) y 'Float2' (destino).
+
+    Con pack_uvs=False se reutilizan ambas capas tal cual (las islas del
+    material ya se empaquetaron, p. ej. antes de enviar el bake a la granja).
+    El objeto debe estar activo, seleccionado y en modo objeto.
+    """
+    uv_layers = obj.data.uv_layers
+    if not pack_uvs and 'original_uv_src' in uv_layers and 'Float2' in uv_layers:
+        uv_layers['original_uv_src'].active_render = True
+        uv_layers.active = uv_layers['Float2']
+        return
+
+    _ensure_bake_uv_layers(obj)
+
+    # 4. Pack Islands (plan por malla)
+    # Las islas de cada material ocupan su propio 0-1 en 'Float2'. Si el plan
+    # de la malla ya empaquetó este slot (o está en la caché) no se entra en
+    # modo edición.
+    match_slots = [i for i, s in enumerate(obj.material_slots) if s.material == material]
+    if match_slots:
+        try:
+            packed, cached = ensure_uv_pack_plan(obj, match_slots)
+            if packed:
+                print(f"   ✅ Float2: Pack completado para material '{material.name}'")
+            elif cached:
+                print(f"   ♻️ Float2: Pack reutilizado de la caché para '{material.name}'")
+        except Exception as e:
+             print(f"⚠️ Pack/Offset Warning: {e}")
+    
+    # Force Update (agrupado en modo ligero: el bake evalúa el depsgraph por su cuenta)
+    update_view_layer()
+
+
+def _plan_bake_uv_packing(materials):
+    """Empaqueta de una vez, por malla, las UVs de todos los materiales a bakear.
+
+    Un solo modo edición y un solo pack_islands por malla (ver
+    utils/uv_packing.py); después perform_advanced_baking() encuentra cada
+    slot ya empaquetado.
+    """
+    slots_by_object = {}
+    for material in materials:
+        obj, _ = _find_object_with_material(material)
+        if obj is None or obj.type != 'MESH':
+            continue
+        slots = slots_by_object.setdefault(obj, [])
+        slots.extend(i for i, slot in enumerate(obj.material_slots) if slot.material == material)
+
+    for obj, slots in slots_by_object.items():
+        try:
+            if bpy.context.object and bpy.context.object.mode != 'OBJECT':
+                bpy.ops.object.mode_set(mode='OBJECT')
+            bpy.ops.object.select_all(action='DESELECT')
+            bpy.context.view_layer.objects.active = obj
+            obj.select_set(True)
+            _ensure_bake_uv_layers(obj)
+            packed, cached = ensure_uv_pack_plan(obj, slots)
+            print(f"   🗺️ [UV_PLAN] {obj.name}: {len(set(slots))} slots "
+                  f"({packed} empaquetados, {cached} de la caché)")
+        except Exception as e:
+            print(f"⚠️ [UV_PLAN] {obj.name}: {e}")
+
+
+def perform_advanced_baking(material, resolution=None, bake_cache=None, bake_stats=None, pack_uvs=True,
+                            alpha_strategy=None):
     """
     Bake usando estrategia SimpleBake SIMPLIFICADA.
+
+    - bake_cache: BakeCache compartida por una tanda de bakes (si es None se
+      crea una según los ajustes). Un acierto carga el `_b_d` guardado en
+      lugar de lanzar Cycles.
+    - bake_stats: dict opcional donde se acumulan 'bakes' (bakes de Cycles
+      lanzados) y 'avoided' (bakes de alpha evitados con la pasada única).
+    - pack_uvs: False reutiliza 'Float2' sin volver a empaquetar (granja de bakes).
+    - alpha_strategy: 'AUTO'/'TWO_PASS' (None = ajuste bake_alpha_strategy).
+    - bake_cache=False desactiva la caché.
     
     Estrategia segura (sin backup/restore complejo):
     1. Guardar referencia a imagen/color de Base Color
@@ -516,26 +1047,19 @@ def perform_advanced_baking(material, resolution=None):
         if not principled or not output_node:
             print(f"❌ Material {material.name} no tiene Principled BSDF o Output")
             return None
+
+        # Hash del grafo ANTES de modificarlo (nodos UV y de bake temporales)
+        if bake_cache is None:
+            bake_cache = BakeCache.from_settings()
+        graph_hash = None
+        if bake_cache:
+            try:
+                graph_hash = hash_material_graph(material)
+            except Exception as e:
+                print(f"⚠️ [BAKE_CACHE] No se pudo calcular el hash de {material.name}: {e}")
         
         # Guardar qué está en Base Color ANTES de modificar
-        base_color_socket = principled.inputs.get('Base Color')
-        saved_image = None
-        saved_color = None
-        
-        if base_color_socket:
-            if base_color_socket.is_linked:
-                source_node = base_color_socket.links[0].from_node
-                if source_node.type == 'TEX_IMAGE' and source_node.image:
-                    saved_image = source_node.image
-                    print(f"   💾 Guardando referencia a imagen: {saved_image.name}")
-            else:
-                saved_color = tuple(base_color_socket.default_value)
-                # Check si el color es muy oscuro (casi negro)
-                if len(saved_color) >= 3 and (saved_color[0] + saved_color[1] + saved_color[2]) < 0.1:
-                    print(f"   ⚠️ Base Color muy oscuro ({saved_color[:3]}), usando blanco")
-                    saved_color = (0.8, 0.8, 0.8, 1.0)
-                else:
-                    print(f"   💾 Guardando color: {saved_color[:3]}")
+        saved_image, saved_color = _saved_base_color_source(principled)
         
         # Guardar conexión original del Output
         original_output_connection = None
@@ -543,9 +1067,8 @@ def perform_advanced_baking(material, resolution=None):
             original_output_connection = output_node.inputs['Surface'].links[0].from_socket
         
         # === PREPARACIÓN DE ESCENA ===
-        original_visibility = {}
-        for o in bpy.data.objects:
-            original_visibility[o.name] = o.hide_render
+        # Cycles y visibilidad: una vez por tanda (sesión activa) o solo para este bake
+        session, owns_session = acquire_bake_session()
         
         original_auto_smooth = False
         if hasattr(obj.data, "use_auto_smooth"):
@@ -560,19 +1083,10 @@ def perform_advanced_baking(material, resolution=None):
         source_obj = None # Para Selected-to-Active
         
         try:
-            # Configurar Cycles
-            if bpy.context.scene.render.engine != 'CYCLES':
-                bpy.context.scene.render.engine = 'CYCLES'
-            bpy.context.scene.cycles.device = 'CPU'
-            bpy.context.scene.cycles.samples = 1
-            bpy.context.scene.cycles.max_bounces = 0
-
             # Aislar Objeto
             if bpy.context.object and bpy.context.object.mode != 'OBJECT':
                 bpy.ops.object.mode_set(mode='OBJECT')
-            for o in bpy.data.objects: 
-                o.hide_render = True
-            obj.hide_render = False
+            session.isolate(obj)
             if hasattr(obj.data, "use_auto_smooth"):
                 obj.data.use_auto_smooth = False
 
@@ -593,69 +1107,20 @@ def perform_advanced_baking(material, resolution=None):
             
             print(f"   🔌 Principled desconectado temporalmente")
             
-            # === GESTIÓN UV (FLOAT2 STABLE PIPELINE) ===
-            # Optimización Multi-Material: Si 'Float2' ya existe, lo reusamos para no invalidar bakes previos.
-            
-            print(f"   🗺️ UV Pipeline Stable: Check Float2...")
-            
-            # 1. Asegurar Source ('original_uv_src')
-            # Creamos una COPIA del estado actual para no perder nombre/datos del usuario.
-            if 'original_uv_src' in obj.data.uv_layers:
-                 original_uv_layer = obj.data.uv_layers['original_uv_src']
-            else:
-                 # Crear copia de seguridad dedicada para Input (Fuente de Apariencia)
-                 if obj.data.uv_layers:
-                      # .new() duplica la capa activa por defecto en Blender
-                      original_uv_layer = obj.data.uv_layers.new(name='original_uv_src')
-                 else:
-                      original_uv_layer = obj.data.uv_layers.new(name='original_uv_src')
-            
-            # 2. Asegurar Target ('Float2')
-            need_pack = False
-            if 'Float2' in obj.data.uv_layers:
-                 uv_target_layer = obj.data.uv_layers['Float2']
-                 print("   ♻️ Reusando UV 'Float2' existente")
-            else:
-                 # Limpiar temporales antiguos
-                 for uv in [l for l in obj.data.uv_layers if l.name in ['UV_TEMP', 'bake_temp']]:
-                     obj.data.uv_layers.remove(uv)
-                     
-                 uv_target_layer = obj.data.uv_layers.new(name='Float2')
-                 need_pack = True
-            
-            # 3. Configurar Roles
-            original_uv_layer.active_render = True # Inputs
-            obj.data.uv_layers.active = uv_target_layer # Target
-            
-            # 4. Pack Islands (POR MATERIAL)
-            # Siempre empacamos antes de bakear para asegurar 0-1 perfecto en este material.
-            # Al seleccionar solo el material actual, maximizamos su resolución y no rompemos otros.
-            bpy.ops.object.mode_set(mode='EDIT')
-            bpy.ops.mesh.select_all(action='DESELECT')
-            
-            # Seleccionar caras del material activo
-            match_slots = [i for i, s in enumerate(obj.material_slots) if s.material == material]
-            if match_slots:
-                obj.active_material_index = match_slots[0]
-                bpy.ops.object.material_slot_select()
-                
-                try:
-                    # Anti Z-Fighting Micro-Displacement
-                    # Desplaza infinitesimalmente las caras (según normales) para evitar que coincidan con otras superficies.
-                    offset = random.uniform(-0.00002, 0.00002)
-                    bpy.ops.transform.shrink_fatten(value=offset)
-                    print(f"   🤏 Z-Fight Fix: Offset {offset:.7f} aplicado a '{material.name}'")
-                    
-                    # Configuración estricta del usuario: Scale=ON, Rotate=OFF, Margin=0.001
-                    bpy.ops.uv.pack_islands(rotate=False, scale=True, margin=0.001)
-                    print(f"   ✅ Float2: Pack completado para material '{material.name}'")
-                except Exception as e:
-                     print(f"⚠️ Pack/Offset Warning: {e}")
-            
-            bpy.ops.object.mode_set(mode='OBJECT')
-            
-            # Force Update
-            bpy.context.view_layer.update()
+            _prepare_bake_uv_layers(obj, material, pack_uvs)
+
+            # === CACHÉ DE BAKES ===
+            # La clave necesita el layout 'Float2' ya empaquetado
+            cache_key = None
+            if graph_hash:
+                cache_key = make_bake_key(graph_hash, hash_material_uv_layout(obj, material),
+                                          resolution, extra="margin=16")
+                cached_image = bake_cache.load(cache_key, f"{material.name}_b_d")
+                if cached_image:
+                    baked_image = cached_image
+                    obj.data.uv_layers['Float2'].active = True
+                    obj.data.uv_layers['Float2'].active_render = True
+                    return baked_image
 
             # 5. FORZAR INPUTS A ORIGINAL UV
             if nodes:
@@ -709,184 +1174,32 @@ def perform_advanced_baking(material, resolution=None):
             # transparent = nodes.new('ShaderNodeBsdfTransparent') 
             # mix_shader = nodes.new('ShaderNodeMixShader')
             
-            # Identificar Fuentes (Color y Alpha)
-            source_color_socket = None
-            source_alpha_socket = None
-            
-            # Analizar el nodo conectado al Output Original (si existe)
-            active_shader = None
-            if original_output_connection:
-                active_shader = original_output_connection.node
-            
-            if active_shader:
-                print(f"   🕵️ Analizando Shader: {active_shader.name} ({active_shader.type})")
-                
-                # ESTRATEGIA 1: Principled BSDF
-                if active_shader.type == 'BSDF_PRINCIPLED':
-                    # Color
-                    if active_shader.inputs.get('Base Color') and active_shader.inputs['Base Color'].is_linked:
-                        source_color_socket = active_shader.inputs['Base Color'].links[0].from_socket
-                    else:
-                        # Color solido del principled
-                        emission.inputs['Color'].default_value = active_shader.inputs['Base Color'].default_value
-                    
-                    # Alpha
-                    if active_shader.inputs.get('Alpha') and active_shader.inputs['Alpha'].is_linked:
-                        source_alpha_socket = active_shader.inputs['Alpha'].links[0].from_socket
-                    elif active_shader.inputs.get('Alpha'):
-                         # Si es valor fijo, lo seteamos en el mix shader directamente abajo
-                         pass 
-
-                # ESTRATEGIA 2: Grupos/Shaders Complejos (MMD, Mix, etc.)
-                else:
-                    print(f"   🕵️ Shader Complejo ({active_shader.type}): Analizando componentes...")
-                    
-                    found_mmd_reconstruction = False
-                    
-                    # PRIORITY 1: Reconstrucción Manual MMD (Base + Sphere)
-                    # Esta es la única forma segura de recuperar el color "brillante" (Sphere Map) 
-                    # ya que la salida del shader suele ser dependiente de la luz (Toon) y sale gris.
-                    mmd_base = None
-                    mmd_sphere = None
-                    
-                    for inp in active_shader.inputs:
-                        if inp.is_linked:
-                             src = inp.links[0].from_node
-                             if src.type == 'TEX_IMAGE':
-                                 if 'Base Tex' in inp.name: mmd_base = src
-                                 elif 'Sphere Tex' in inp.name: mmd_sphere = src
-                    
-                    if mmd_base:
-                        found_mmd_reconstruction = True
-                        print(f"   🧬 Reconstrucción MMD: Base encontrada ({mmd_base.name})")
-                        
-                        target_socket = mmd_base.outputs.get('Color')
-                        
-                        # APLICAR TINTE AMBIENTAL (Ambient Color)
-                        # Muchos mats MMD usan textura gris + Ambient Color para dar el color final.
-                        ambient_color_val = (1.0, 1.0, 1.0, 1.0)
-                        if 'Ambient Color' in active_shader.inputs:
-                             try:
-                                 vals = active_shader.inputs['Ambient Color'].default_value
-                                 if len(vals) >= 3: ambient_color_val = vals
-                             except: pass
-                        
-                        # APLICAR TINTE AMBIENTAL (Solo si es Colorido)
-                        # Filtro de Saturación: Evita oscurecer materiales con ambient gris/blanco.
-                        # Solo aplicamos tinte si el color es realmente un color (ej: Azul de ojos).
-                        r, g, b = ambient_color_val[:3]
-                        saturation = max(r,g,b) - min(r,g,b)
-                        
-                        if saturation > 0.05:
-                             print(f"   🎨 Ambient Color SATURADO ({saturation:.2f}) de {ambient_color_val[:3]} -> Aplicando Tinte MULTIPLY")
-                             mix_tint = nodes.new('ShaderNodeMixRGB')
-                             mix_tint.blend_type = 'MULTIPLY'
-                             mix_tint.inputs['Fac'].default_value = 1.0
-                             mix_tint.inputs[2].default_value = ambient_color_val
-                             
-                             links.new(target_socket, mix_tint.inputs[1])
-                             target_socket = mix_tint.outputs['Color']
-                        else:
-                             print(f"   ⚪ Ambient Color DESATURADO ({saturation:.2f}) -> Ignorando (Evita oscurecer piel/ropa)")
-                        
-                        # APLICAR ESFERA (Deshabilitado Temporalmente)
-                        # Los matcaps de esfera producen manchas negras horribles si no se proyectan bien.
-                        # En el bake esto es casi imposible de garantizar sin cámara.
-                        # Priorizamos limpieza sobre brillos rotos.
-                        if mmd_sphere:
-                             print(f"   🚫 Sphere Tex detectada ({mmd_sphere.name}) pero IGNORADA para evitar artefactos (manchas negras)")
-                             # Si en el futuro se quiere activar, usar ADD con factor muy bajo (0.1)
-                             # links.new(target_socket, mix_add.inputs[1]) ...
-                        
-                        source_color_socket = target_socket
-                        
-                        # Intentar recuperar Alpha de la base
-                        if 'Alpha' in mmd_base.outputs:
-                             source_alpha_socket = mmd_base.outputs['Alpha']
-                        
-                        source_color_socket = target_socket
-                        
-                        # Intentar recuperar Alpha de la base
-                        if 'Alpha' in mmd_base.outputs:
-                             source_alpha_socket = mmd_base.outputs['Alpha']
-
-                    # PRIORITY 2: Usar la SALIDA del Grupo (si no pudimos reconstruir)
-                    elif 'Color' in active_shader.outputs:
-                        source_color_socket = active_shader.outputs['Color']
-                        print(f"   🧬 Usando salida 'Color' del Grupo (Fallback)")
-                        if 'Alpha' in active_shader.outputs:
-                             source_alpha_socket = active_shader.outputs['Alpha']
-                    
-                    # PRIORITY 3: Rastrear inputs recursivamente (Último recurso)
-                    else:
-                        print(f"   ⚠️ Fallback: Rastreando texturas de entrada...")
-                    
-                        def find_image_input(node, depth=0):
-                            if depth > 10: return None
-                            
-                            linked_inputs = [inp for inp in node.inputs if inp.is_linked]
-                            priority_keys = ['base', 'diff', 'col', 'tex', 'albedo', 'img']
-                            avoid_keys = ['norm', 'spec', 'rough', 'disp', 'bump', 'alpha', 'fac']
-
-                            # Paso 1: Buscar TEX_IMAGE directo en inputs PRIORITARIOS
-                            for inp in linked_inputs:
-                                name = inp.name.lower()
-                                if any(k in name for k in priority_keys) and not any(k in name for k in avoid_keys):
-                                    src = inp.links[0].from_node
-                                    if src.type == 'TEX_IMAGE':
-                                        print(f"      ✅ Match directo prioritario: Input '{inp.name}' -> {src.name}")
-                                        return src
-                            
-                            # Paso 2: Buscar standard
-                            for inp in linked_inputs:
-                                name = inp.name.lower()
-                                if not any(k in name for k in avoid_keys):
-                                    src = inp.links[0].from_node
-                                    if src.type == 'TEX_IMAGE':
-                                        return src
-
-                            # Paso 3: Recursión
-                            for inp in linked_inputs:
-                                src = inp.links[0].from_node
-                                if src.type in ['GROUP', 'REROUTE', 'BSDF_PRINCIPLED', 'MIX_SHADER', 'ADD_SHADER']:
-                                    res = find_image_input(src, depth+1)
-                                    if res: return res
-                                    
-                            return None
-
-                        found_tex_node = find_image_input(active_shader)
-                        
-                        if found_tex_node:
-                            print(f"   🎯 Textura seleccionada: {found_tex_node.name}")
-                            if 'Color' in found_tex_node.outputs:
-                                source_color_socket = found_tex_node.outputs['Color']
-                            if 'Alpha' in found_tex_node.outputs:
-                                source_alpha_socket = found_tex_node.outputs['Alpha']
-                        else:
-                            print("   ❌ No se encontró textura visual válida.")
-                            # Ultimo recurso: nombre a ciegas
-                            for name in ['Base Tex', 'Base Color', 'Diffuse', 'Color']:
-                                if name in active_shader.inputs and active_shader.inputs[name].is_linked:
-                                    source_color_socket = active_shader.inputs[name].links[0].from_socket
-                                    break
-            
-            # Fallback global
-            if not source_color_socket and not emission.inputs['Color'].is_linked:
-                 if saved_image:
-                     tmp_img = nodes.new('ShaderNodeTexImage')
-                     tmp_img.image = saved_image
-                     source_color_socket = tmp_img.outputs['Color']
-                     source_alpha_socket = tmp_img.outputs['Alpha']
-                 elif saved_color:
-                      emission.inputs['Color'].default_value = saved_color
-                 else:
-                      print("   ⚠️ FALLBACK CRÍTICO: Usando MAGENTA por falta de datos.")
-                      emission.inputs['Color'].default_value = (1, 0, 1, 1)
-
-            # === BAKE DUAL (RGB + ALPHA) ===
+            # Identificar Fuentes (Color y Alpha) del shader conectado al Output Original
+            active_shader = original_output_connection.node if original_output_connection else None
+            source_color_socket, source_alpha_socket, fallback_color = _resolve_bake_sources(
+                active_shader, nodes, links, saved_image, saved_color)
+            emission.inputs['Color'].default_value = fallback_color
+
+            # === ESTRATEGIA DE BAKE (RGBA EN UNA PASADA / DOS PASADAS) ===
+            # El bake DIFFUSE sobre una imagen RGBA ya escribe alpha 1 en los píxeles
+            # cubiertos y 0 en el resto (igual que la pasada EMIT con blanco). La
+            # pasada de alpha solo hace falta cuando el alpha varía por píxel.
+            constant_alpha = _constant_alpha_value(source_alpha_socket)
+            if alpha_strategy is None:
+                settings = getattr(bpy.context.scene, 'universal_gta_settings', None)
+                alpha_strategy = getattr(settings, 'bake_alpha_strategy', 'AUTO')
+            if alpha_strategy == 'TWO_PASS':
+                constant_alpha = None
+            single_pass = constant_alpha is not None
+            stats = bake_stats if bake_stats is not None else {}
+            stats.setdefault('bakes', 0)
+            stats.setdefault('avoided', 0)
 
             # 1️⃣ FASE 1: BAKE DEL COLOR (RGB)
-            print(f"   ⏳ Fase 1/2: Bakeando RGB (DIFFUSE Color)...")
+            if single_pass:
+                print(f"   ⏳ Pasada única: Bakeando RGBA (DIFFUSE Color, alpha constante {constant_alpha:.3f})...")
+            else:
+                print(f"   ⏳ Fase 1/2: Bakeando RGB (DIFFUSE Color)...")
             
             # Conexión para Diffuse
             if source_color_socket:
@@ -897,67 +1210,83 @@ def perform_advanced_baking(material, resolution=None):
 
             links.new(diffuse_node.outputs['BSDF'], output_node.inputs['Surface'])
             
-            # Configuración Bake Diffuse (Single Object)
-            bpy.context.scene.render.bake.use_selected_to_active = False # Single Object bake es más limpio para esto
-            bpy.context.scene.render.bake.margin = 16
-            bpy.context.scene.render.bake.use_clear = True 
-            bpy.context.scene.render.bake.target = 'IMAGE_TEXTURES'
+            # Configuración Bake (Single Object, margin 16, use_clear): la aplica la sesión
             
             # Bake solo Color (sin sombras ni luces)
-            bpy.ops.object.bake(type='DIFFUSE', pass_filter={'COLOR'})
-            
-            # 2️⃣ FASE 2: BAKE DEL ALPHA (EMIT)
-            print(f"   ⏳ Fase 2/2: Bakeando ALPHA (EMIT)...")
-            
-            # Imagen temporal para Alpha
-            alpha_image = bpy.data.images.new("temp_alpha_bake", width=resolution, height=resolution, alpha=False)
-            target_node.image = alpha_image # Desviar el bake a la temp
-            
-            if source_alpha_socket:
-                 links.new(source_alpha_socket, emission.inputs['Color'])
+            with profile_step(f"Bake DIFFUSE: {material.name}", category="bake"), \
+                    _material_slot_bake_mask(obj, material):
+                bpy.ops.object.bake(type='DIFFUSE', pass_filter={'COLOR'})
+            stats['bakes'] += 1
+            session.bake_count += 1
+
+            if single_pass:
+                stats['avoided'] += 1
+                if constant_alpha < 0.999:
+                    # Escalar la cobertura por el alpha constante
+                    pixels = np.empty(len(baked_image.pixels), dtype=np.float32)
+                    baked_image.pixels.foreach_get(pixels)
+                    pixels[3::4] *= constant_alpha
+                    baked_image.pixels.foreach_set(pixels)
+                    del pixels
             else:
-                 # Si no hay canal de alpha, es 100% opaco
-                 emission.inputs['Color'].default_value = (1, 1, 1, 1)
-            
-            links.new(emission.outputs['Emission'], output_node.inputs['Surface'])
-            
-            bpy.ops.object.bake(type='EMIT', use_clear=True)
-            
-            # 3️⃣ FUSIÓN DE CANALES (Optimized Merge)
-            print("   🤝 Combinando Canales (Array Buffer Fast Path)...")
-            target_node.image = baked_image # Volver a la imagen final
-            
-            # OPTIMIZACIÓN CRÍTICA: Usar 'array' y 'foreach' evita crear millones de objetos float en Python.
-            # Esto previene crasheos por Out Of Memory (OOM) en texturas grandes (2k/4k).
-            count = len(baked_image.pixels)
-            
-            # Buffer A: RGB Image (Destino)
-            rgb_arr = array.array('f', [0.0] * count)
-            baked_image.pixels.foreach_get(rgb_arr)
-            
-            # Buffer B: Alpha Image (Fuente de Máscara)
-            alpha_arr = array.array('f', [0.0] * count)
-            alpha_image.pixels.foreach_get(alpha_arr)
-            
-            # FUSIÓN: Canal A (Index 3, 7...) recibe Canal R (Index 0, 4...)
-            # Slice assignment es muy rápido en arrays
-            try:
-                rgb_arr[3::4] = alpha_arr[0::4]
-                baked_image.pixels.foreach_set(rgb_arr)
-            except Exception as e:
-                print(f"⚠️ Error en fusión de píxeles: {e}")
-                pass 
-            
-            # Limpieza inmediata de memoria
-            del alpha_arr
-            del rgb_arr
-            
-            # Limpieza de imagen temporal
-            bpy.data.images.remove(alpha_image) 
+                # 2️⃣ FASE 2: BAKE DEL ALPHA (EMIT)
+                print(f"   ⏳ Fase 2/2: Bakeando ALPHA (EMIT)...")
+                
+                # Imagen temporal para Alpha
+                alpha_image = bpy.data.images.new("temp_alpha_bake", width=resolution, height=resolution, alpha=False)
+                target_node.image = alpha_image # Desviar el bake a la temp
+                
+                if source_alpha_socket:
+                     links.new(source_alpha_socket, emission.inputs['Color'])
+                else:
+                     # Si no hay canal de alpha, es 100% opaco
+                     emission.inputs['Color'].default_value = (1, 1, 1, 1)
+                
+                links.new(emission.outputs['Emission'], output_node.inputs['Surface'])
+                
+                with profile_step(f"Bake EMIT (alpha): {material.name}", category="bake"), \
+                        _material_slot_bake_mask(obj, material):
+                    bpy.ops.object.bake(type='EMIT', use_clear=True)
+                stats['bakes'] += 1
+                session.bake_count += 1
+                
+                # 3️⃣ FUSIÓN DE CANALES (Optimized Merge)
+                print("   🤝 Combinando Canales (Array Buffer Fast Path)...")
+                target_node.image = baked_image # Volver a la imagen final
+                
+                # OPTIMIZACIÓN CRÍTICA: Usar 'array' y 'foreach' evita crear millones de objetos float en Python.
+                # Esto previene crasheos por Out Of Memory (OOM) en texturas grandes (2k/4k).
+                count = len(baked_image.pixels)
+                
+                # Buffer A: RGB Image (Destino)
+                rgb_arr = array.array('f', [0.0] * count)
+                baked_image.pixels.foreach_get(rgb_arr)
+                
+                # Buffer B: Alpha Image (Fuente de Máscara)
+                alpha_arr = array.array('f', [0.0] * count)
+                alpha_image.pixels.foreach_get(alpha_arr)
+                
+                # FUSIÓN: Canal A (Index 3, 7...) recibe Canal R (Index 0, 4...)
+                # Slice assignment es muy rápido en arrays
+                try:
+                    rgb_arr[3::4] = alpha_arr[0::4]
+                    baked_image.pixels.foreach_set(rgb_arr)
+                except Exception as e:
+                    print(f"⚠️ Error en fusión de píxeles: {e}")
+                    pass 
+                
+                # Limpieza inmediata de memoria
+                del alpha_arr
+                del rgb_arr
+                
+                # Limpieza de imagen temporal
+                bpy.data.images.remove(alpha_image)
             
             # Empaquetar el resultado final
             baked_image.pack()
             baked_image.use_fake_user = True
+            if cache_key:
+                bake_cache.store(cache_key, baked_image)
             
             print(f"   ✅ Bake RGBA completado: {baked_name}")
             
@@ -994,12 +1323,11 @@ def perform_advanced_baking(material, resolution=None):
                 except:
                     pass
             
-            # Restaurar visibilidad y auto-smooth
-            for n, h in original_visibility.items():
-                if n in bpy.data.objects: 
-                    bpy.data.objects[n].hide_render = h
+            # Restaurar auto-smooth (la visibilidad y Cycles los restaura la sesión)
             if obj and hasattr(obj.data, "use_auto_smooth"):
                 obj.data.use_auto_smooth = original_auto_smooth
+            if owns_session:
+                session.close()
         
         return baked_image
                 
@@ -1010,6 +1338,381 @@ def perform_advanced_baking(material, resolution=None):
         return None
 
 
+# ========================================================================================
+# GRANJA DE BAKES: CYCLES EN PROCESOS DE BLENDER EN SEGUNDO PLANO
+# ========================================================================================
+
+def _queue_farm_bake(farm, material, resolution, bake_cache=None, alpha_strategy='AUTO'):
+    """Prepara el bake de un material para la granja.
+
+    Devuelve ('cached', imagen) si la caché ya lo tiene, ('queued', trabajo)
+    si se escribió el trabajo o ('failed', None).
+    """
+    try:
+        obj, slot_index = _find_object_with_material(material)
+        if not obj or not _find_principled(material) or not _get_output_node(material):
+            return 'failed', None
+
+        graph_hash = None
+        if bake_cache:
+            try:
+                graph_hash = hash_material_graph(material)
+            except Exception as e:
+                print(f"⚠️ [BAKE_CACHE] No se pudo calcular el hash de {material.name}: {e}")
+
+        if bpy.context.object and bpy.context.object.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        bpy.ops.object.select_all(action='DESELECT')
+        bpy.context.view_layer.objects.active = obj
+        obj.select_set(True)
+        _prepare_bake_uv_layers(obj, material)
+
+        cache_key = None
+        if graph_hash:
+            cache_key = make_bake_key(graph_hash, hash_material_uv_layout(obj, material),
+                                      resolution, extra="margin=16")
+            cached_image = bake_cache.load(cache_key, f"{material.name}_b_d")
+            if cached_image:
+                obj.data.uv_layers['Float2'].active = True
+                obj.data.uv_layers['Float2'].active_render = True
+                return 'cached', cached_image
+
+        job = farm.write_job(obj, material.name, slot_index, resolution, alpha_strategy,
+                             extra={"cache_key": cache_key})
+        return 'queued', job
+    except Exception as e:
+        print(f"⚠️ [BAKE_FARM] No se pudo preparar {material.name}: {e}")
+        return 'failed', None
+
+
+def _load_farm_bake(material, job, png_path, bake_cache=None):
+    """Importa (y empaqueta) el PNG bakeado por la granja como `<material>_b_d`"""
+    baked_name = f"{material.name}_b_d"
+    try:
+        if baked_name in bpy.data.images:
+            bpy.data.images.remove(bpy.data.images[baked_name])
+        image = bpy.data.images.load(png_path, check_existing=False)
+        image.name = baked_name
+        image.alpha_mode = 'STRAIGHT'
+        image.pack()
+        image.use_fake_user = True
+    except Exception as e:
+        print(f"⚠️ [BAKE_FARM] No se pudo importar el bake de {material.name}: {e}")
+        return None
+
+    if bake_cache and job.get("cache_key"):
+        bake_cache.store(job["cache_key"], image)
+    obj = _find_object_with_material(material)[0]
+    if obj and 'Float2' in obj.data.uv_layers:
+        obj.data.uv_layers['Float2'].active = True
+        obj.data.uv_layers['Float2'].active_render = True
+    return image
+
+
+def run_farm_bake_job(job):
+    """Ejecuta un trabajo de la granja (dentro del proceso en segundo plano)"""
+    try:
+        with bpy.data.libraries.load(job["blend"], link=False) as (data_from, data_to):
+            data_to.objects = [job["object"]]
+        obj = data_to.objects[0] if data_to.objects else None
+        if obj is None:
+            print(f"❌ [BAKE_WORKER] Objeto '{job['object']}' no encontrado en {job['blend']}")
+            return False
+        bpy.context.scene.collection.objects.link(obj)
+
+        # Los nombres pueden cambiar al anexar (p. ej. 'Material' -> 'Material.001')
+        material = obj.material_slots[job["slot_index"]].material
+        baked_image = perform_advanced_baking(material, resolution=job["resolution"], bake_cache=False,
+                                              pack_uvs=False, alpha_strategy=job.get("alpha_strategy"))
+        if baked_image is None:
+            return False
+        baked_image.save(filepath=job["output"])
+        return True
+    except Exception as e:
+        print(f"❌ [BAKE_WORKER] Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+# ========================================================================================
+# MODO ATLAS: TODOS LOS MATERIALES DE LA MALLA EN UNA SOLA TEXTURA
+# ========================================================================================
+
+ATLAS_MAX_RESOLUTION = 2048
+
+
+def _atlas_resolution(resolution, material_count):
+    """Lado del atlas: cada material conserva aprox. su resolución de bake (máx. 2048)"""
+    tiles = max(1, math.ceil(math.sqrt(material_count)))
+    side = resolution * (1 << max(0, math.ceil(math.log2(tiles))))
+    return max(resolution, min(side, ATLAS_MAX_RESOLUTION))
+
+
+def _atlas_materials(obj):
+    """Materiales con nodos de la malla, en orden de slot y sin repetir"""
+    materials = []
+    for slot in obj.material_slots:
+        material = slot.material
+        if material and material.use_nodes and material.node_tree and material not in materials:
+            materials.append(material)
+    return materials
+
+
+@contextmanager
+def _isolated_bake_render(obj):
+    """Cycles mínimo y solo `obj` visible en render durante el bloque (sesión de bake)"""
+    session, owns_session = acquire_bake_session()
+    try:
+        session.isolate(obj)
+        bpy.ops.object.select_all(action='DESELECT')
+        bpy.context.view_layer.objects.active = obj
+        obj.select_set(True)
+        yield session
+    finally:
+        if owns_session:
+            session.close()
+
+
+def _pack_atlas_uvs(obj):
+    """'original_uv_src' (entradas) + 'Float2' con todas las islas empaquetadas juntas"""
+    uv_layers = obj.data.uv_layers
+    if 'original_uv_src' not in uv_layers:
+        uv_layers.new(name='original_uv_src')
+    if 'Float2' in uv_layers:
+        uv_target_layer = uv_layers['Float2']
+    else:
+        for uv in [l for l in uv_layers if l.name in ['UV_TEMP', 'bake_temp']]:
+            uv_layers.remove(uv)
+        uv_target_layer = uv_layers.new(name='Float2')
+
+    uv_layers['original_uv_src'].active_render = True
+    uv_layers.active = uv_target_layer
+
+    # Solo este objeto activo y seleccionado: el modo edición no debe incluir otras mallas
+    if bpy.context.object and bpy.context.object.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    bpy.ops.object.select_all(action='DESELECT')
+    bpy.context.view_layer.objects.active = obj
+    obj.select_set(True)
+
+    # Una sola sesión de edición para todas las islas de todos los materiales
+    bpy.ops.object.mode_set(mode='EDIT')
+    bpy.ops.mesh.select_all(action='SELECT')
+    try:
+        bpy.ops.uv.select_all(action='SELECT')
+        bpy.ops.uv.pack_islands(rotate=False, scale=True, margin=0.002)
+    finally:
+        bpy.ops.object.mode_set(mode='OBJECT')
+    update_view_layer()
+
+
+def _build_atlas_material(obj, atlas_image):
+    """Material único '<objeto>_atlas' (Principled + atlas RGBA) para toda la malla"""
+    material_name = f"{obj.name}_atlas"
+    material = bpy.data.materials.get(material_name) or bpy.data.materials.new(material_name)
+    material.use_nodes = True
+    nodes = material.node_tree.nodes
+    links = material.node_tree.links
+    nodes.clear()
+
+    output = nodes.new('ShaderNodeOutputMaterial')
+    output.location = (300, 0)
+    principled = nodes.new('ShaderNodeBsdfPrincipled')
+    principled.location = (0, 0)
+    image_node = nodes.new('ShaderNodeTexImage')
+    image_node.image = atlas_image
+    image_node.label = atlas_image.name
+    image_node.location = (-300, 0)
+
+    links.new(principled.outputs['BSDF'], output.inputs['Surface'])
+    links.new(image_node.outputs['Color'], principled.inputs['Base Color'])
+    links.new(image_node.outputs['Alpha'], principled.inputs['Alpha'])
+
+    material.blend_method = 'HASHED'
+    material.shadow_method = 'HASHED'
+    material.use_screen_refraction = False
+    try: material.show_transparent_back = False
+    except: pass
+
+    # Un solo slot: todas las caras pasan al índice 0
+    mesh = obj.data
+    mesh.materials.clear()
+    mesh.materials.append(material)
+    if mesh.polygons:
+        mesh.polygons.foreach_set('material_index', np.zeros(len(mesh.polygons), dtype=np.int32))
+    mesh.update()
+    return material
+
+
+def bake_material_atlas(obj, resolution, bake_cache=None, bake_stats=None):
+    """Bakea todos los materiales de `obj` en un atlas y deja un único material.
+
+    1. Empaqueta las islas UV de todos los materiales en 'Float2' una sola vez.
+    2. Cada material apunta su nodo activo al mismo atlas: un único bake DIFFUSE
+       cubre toda la malla (más un bake EMIT si algún alpha varía por píxel).
+    3. Sustituye los slots por el material '<objeto>_atlas'.
+    Devuelve la lista de materiales absorbidos (vacía si no se generó el atlas).
+    """
+    materials = _atlas_materials(obj)
+    if len(materials) < 2:
+        return []
+
+    atlas_resolution = _atlas_resolution(resolution, len(materials))
+    atlas_name = f"{obj.name}_atlas_b_d"
+    stats = bake_stats if bake_stats is not None else {}
+    stats.setdefault('bakes', 0)
+    stats.setdefault('avoided', 0)
+    print(f"🗺️ ATLAS: {len(materials)} materiales de '{obj.name}' -> {atlas_resolution}x{atlas_resolution}")
+
+    if bpy.context.object and bpy.context.object.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    # Hash de los grafos ANTES de añadir nodos temporales
+    graph_hashes = None
+    if bake_cache is not None:
+        try:
+            graph_hashes = [hash_material_graph(material) for material in materials]
+        except Exception as e:
+            print(f"⚠️ [BAKE_CACHE] No se pudo calcular el hash del atlas: {e}")
+
+    _pack_atlas_uvs(obj)
+
+    cache_key = None
+    atlas_image = None
+    if graph_hashes:
+        cache_key = make_bake_key("|".join(graph_hashes), hash_material_uv_layout(obj),
+                                  atlas_resolution, extra="atlas:margin=16")
+        atlas_image = bake_cache.load(cache_key, atlas_name)
+
+    if atlas_image is None:
+        if atlas_name in bpy.data.images:
+            bpy.data.images.remove(bpy.data.images[atlas_name])
+        atlas_image = bpy.data.images.new(atlas_name, width=atlas_resolution, height=atlas_resolution, alpha=True)
+
+        # Estado temporal por material: (material, nodos temporales, conexión original, output, fuentes)
+        bake_setups = []
+        try:
+            for material in materials:
+                nodes = material.node_tree.nodes
+                links = material.node_tree.links
+                output_node = _get_output_node(material)
+                principled = _find_principled(material)
+
+                # Entradas de imagen con las UVs originales
+                for n in list(nodes):
+                    if n.type == 'TEX_IMAGE' and not n.inputs['Vector'].is_linked:
+                        uv_node = nodes.new('ShaderNodeUVMap')
+                        uv_node.uv_map = 'original_uv_src'
+                        links.new(uv_node.outputs['UV'], n.inputs['Vector'])
+
+                original_output_connection = None
+                if output_node is None:
+                    output_node = nodes.new('ShaderNodeOutputMaterial')
+                elif output_node.inputs['Surface'].is_linked:
+                    original_output_connection = output_node.inputs['Surface'].links[0].from_socket
+                    links.remove(output_node.inputs['Surface'].links[0])
+
+                saved_image, saved_color = _saved_base_color_source(principled) if principled else (None, None)
+                active_shader = original_output_connection.node if original_output_connection else None
+                color_socket, alpha_socket, fallback_color = _resolve_bake_sources(
+                    active_shader, nodes, links, saved_image, saved_color)
+
+                target_node = nodes.new('ShaderNodeTexImage')
+                target_node.image = atlas_image
+                nodes.active = target_node
+                diffuse_node = nodes.new('ShaderNodeBsdfDiffuse')
+                diffuse_node.label = "Bake_RGB_Diffuse"
+                emission = nodes.new('ShaderNodeEmission')
+                emission.label = "Bake_Alpha_Emission"
+
+                if color_socket:
+                    links.new(color_socket, diffuse_node.inputs['Color'])
+                else:
+                    diffuse_node.inputs['Color'].default_value = fallback_color
+                links.new(diffuse_node.outputs['BSDF'], output_node.inputs['Surface'])
+
+                bake_setups.append({
+                    'material': material,
+                    'nodes': (target_node, diffuse_node, emission),
+                    'output': output_node,
+                    'original': original_output_connection,
+                    'alpha_socket': alpha_socket,
+                    'constant_alpha': _constant_alpha_value(alpha_socket),
+                })
+
+            # El bake DIFFUSE deja alpha 1 en todas las caras cubiertas: basta con una
+            # pasada si todos los materiales son opacos
+            settings = getattr(bpy.context.scene, 'universal_gta_settings', None)
+            single_pass = all(setup['constant_alpha'] is not None and setup['constant_alpha'] >= 0.999
+                              for setup in bake_setups)
+            if getattr(settings, 'bake_alpha_strategy', 'AUTO') == 'TWO_PASS':
+                single_pass = False
+
+            with _isolated_bake_render(obj):
+                print(f"   ⏳ ATLAS: Bakeando RGB de {len(bake_setups)} materiales en una pasada...")
+                with profile_step(f"Bake DIFFUSE atlas: {obj.name}", category="bake"):
+                    bpy.ops.object.bake(type='DIFFUSE', pass_filter={'COLOR'})
+                stats['bakes'] += 1
+
+                if single_pass:
+                    stats['avoided'] += 1
+                else:
+                    print(f"   ⏳ ATLAS: Bakeando ALPHA (EMIT)...")
+                    alpha_image = bpy.data.images.new("temp_alpha_bake", width=atlas_resolution,
+                                                      height=atlas_resolution, alpha=False)
+                    try:
+                        for setup in bake_setups:
+                            target_node, _, emission = setup['nodes']
+                            target_node.image = alpha_image
+                            links = setup['material'].node_tree.links
+                            if setup['alpha_socket'] is not None:
+                                links.new(setup['alpha_socket'], emission.inputs['Color'])
+                            else:
+                                emission.inputs['Color'].default_value = (1, 1, 1, 1)
+                            links.new(emission.outputs['Emission'], setup['output'].inputs['Surface'])
+
+                        with profile_step(f"Bake EMIT atlas (alpha): {obj.name}", category="bake"):
+                            bpy.ops.object.bake(type='EMIT', use_clear=True)
+                        stats['bakes'] += 1
+
+                        pixels = np.empty(len(atlas_image.pixels), dtype=np.float32)
+                        alpha_pixels = np.empty(len(alpha_image.pixels), dtype=np.float32)
+                        atlas_image.pixels.foreach_get(pixels)
+                        alpha_image.pixels.foreach_get(alpha_pixels)
+                        pixels[3::4] = alpha_pixels[0::4]
+                        atlas_image.pixels.foreach_set(pixels)
+                        del pixels, alpha_pixels
+                    finally:
+                        bpy.data.images.remove(alpha_image)
+
+            atlas_image.pack()
+            atlas_image.use_fake_user = True
+            if cache_key:
+                bake_cache.store(cache_key, atlas_image)
+        except Exception as e:
+            print(f"❌ ATLAS: Error bakeando '{obj.name}': {e}")
+            import traceback
+            traceback.print_exc()
+            return []
+        finally:
+            for setup in bake_setups:
+                nodes = setup['material'].node_tree.nodes
+                links = setup['material'].node_tree.links
+                for n in setup['nodes']:
+                    if n and n.name in nodes:
+                        nodes.remove(n)
+                if setup['original'] is not None:
+                    try:
+                        links.new(setup['original'], setup['output'].inputs['Surface'])
+                    except Exception:
+                        pass
+
+    _build_atlas_material(obj, atlas_image)
+    print(f"   ✅ ATLAS: '{obj.name}' usa ahora 1 material y 1 textura ({atlas_name})")
+    return materials
+
+
 def replace_material_with_baked(material, baked_image):
     """
     AVANZADO: Reemplazar material complejo con textura baked
@@ -1106,9 +1809,10 @@ def replace_material_with_baked(material, baked_image):
 def has_alpha_texture_connected(material):
     """
     Verifica si el material tiene Alpha conectado usando la lógica unificada
-    de revisión de píxeles (check_real_pixel_transparency).
+    de revisión de píxeles (check_real_pixel_transparency), memorizada en
+    el perfil del material.
     """
-    return check_real_pixel_transparency(material)
+    return get_material_profile(material).has_real_alpha
 
 
 # ========================================================================================
@@ -1215,11 +1919,9 @@ def _connect_alpha_if_available(material, image_node, principled):
             # Verificar si el alpha de la imagen tiene información útil
             effective = True
             try:
-                img = getattr(image_node, 'image', None)
-                if img and img.size[0] > 0 and img.size[1] > 0 and img.pixels:
-                    alphas = list(img.pixels[3::4])
-                    if sum(alphas) < 1e-3:
-                        effective = False
+                stats = get_image_stats(getattr(image_node, 'image', None))
+                if stats and stats.mean_color[3] * stats.width * stats.height < 1e-3:
+                    effective = False
             except Exception:
                 pass
             # Si el alpha no es efectivo, desconectar y fijar alpha=1.0
@@ -1469,26 +2171,66 @@ def _find_object_with_material(material):
     return None, -1
 
 
-def _enable_cycles_gpu_if_available():
-    """Activa GPU en Cycles si hay dispositivos disponibles.
-    Configura preferencias de CUDA/OPTIX/HIP según disponibilidad.
+BAKE_MASK_MATERIAL_NAME = "__ugta_bake_mask"
+
+
+@contextmanager
+def _material_slot_bake_mask(obj, material):
+    """Restringe un bake de Cycles a las caras de los slots de `material`.
+
+    Cycles hornea cada cara en el nodo de imagen activo de SU material, así que en
+    una malla unida los demás materiales recibirían (o romperían) el bake. Durante
+    el bloque, las caras de otros slots se reasignan a un material máscara cuyo nodo
+    activo es una imagen de 8x8 descartable. Los índices originales se restauran
+    con foreach_set al salir: topología, orden de vértices y nombres no cambian.
     """
-    prefs = bpy.context.preferences
-    cycles_prefs = getattr(prefs.addons.get('cycles'), 'preferences', None)
-    if not cycles_prefs:
-        return False
-    # Intentar OPTIX, luego CUDA, luego HIP
-    for backend in ['OPTIX', 'CUDA', 'HIP', 'METAL']:
+    mesh = obj.data if obj else None
+    if mesh is None or not any(slot.material != material for slot in obj.material_slots):
+        yield
+        return
+
+    target_slots = [i for i, slot in enumerate(obj.material_slots) if slot.material == material]
+    polygon_count = len(mesh.polygons)
+    original_indices = np.empty(polygon_count, dtype=np.int32)
+    mesh.polygons.foreach_get('material_index', original_indices)
+
+    mask_image = bpy.data.images.new(BAKE_MASK_MATERIAL_NAME, width=8, height=8, alpha=False)
+    mask_material = bpy.data.materials.new(BAKE_MASK_MATERIAL_NAME)
+    mask_material.use_nodes = True
+    mask_node = mask_material.node_tree.nodes.new('ShaderNodeTexImage')
+    mask_node.image = mask_image
+    mask_material.node_tree.nodes.active = mask_node
+
+    mesh.materials.append(mask_material)
+    mask_index = len(mesh.materials) - 1
+    try:
+        masked = np.where(np.isin(original_indices, target_slots), original_indices, mask_index).astype(np.int32)
+        mesh.polygons.foreach_set('material_index', masked)
+        mesh.update()
+        yield
+    finally:
+        mesh.polygons.foreach_set('material_index', original_indices)
         try:
-            cycles_prefs.compute_device_type = backend
-            # Habilitar todos los dispositivos GPU disponibles
-            for device in cycles_prefs.get_devices()[0]:
-                device.use = True
-            bpy.context.scene.cycles.device = 'GPU'
-            return True
-        except Exception:
-            continue
-    return False
+            mesh.materials.pop(index=mask_index)
+        except Exception as e:
+            print(f"⚠️ No se pudo retirar el slot máscara: {e}")
+        mesh.update()
+        bpy.data.materials.remove(mask_material)
+        bpy.data.images.remove(mask_image)
+
+
+def _consolidate_baked_uv_layers(obj):
+    """Deja solo 'Float2' (la capa empaquetada para los bakes) en el objeto"""
+    uv_layers = obj.data.uv_layers
+    if 'Float2' not in uv_layers and 'bake_temp' in uv_layers:
+        uv_layers['bake_temp'].name = 'Float2'
+    if 'Float2' not in uv_layers:
+        return False
+    for uv in [uv for uv in uv_layers if uv.name != 'Float2']:
+        uv_layers.remove(uv)
+    uv_layers['Float2'].active = True
+    uv_layers['Float2'].active_render = True
+    return True
 
 
 def _bake_visual_to_image(material, principled, target_name, width, height):
@@ -1503,23 +2245,6 @@ def _bake_visual_to_image(material, principled, target_name, width, height):
             bpy.data.images.remove(bpy.data.images[target_name])
         bake_img = bpy.data.images.new(target_name, width=width, height=height, alpha=True)
 
-        # Preparar escena para bake
-        prev_engine = bpy.context.scene.render.engine
-        bpy.context.scene.render.engine = 'CYCLES'
-        # Intentar GPU si está disponible; fallback a CPU
-        try:
-            _enable_cycles_gpu_if_available()
-        except Exception:
-            try:
-                bpy.context.scene.cycles.device = 'CPU'
-            except Exception:
-                pass
-        bpy.context.scene.render.bake.margin = 2
-        bpy.context.scene.render.bake.use_clear = True
-        bpy.context.scene.render.bake.use_pass_direct = False
-        bpy.context.scene.render.bake.use_pass_indirect = False
-        bpy.context.scene.render.bake.use_pass_color = True
-
         nodes = material.node_tree.nodes
         links = material.node_tree.links
 
@@ -1557,14 +2282,22 @@ def _bake_visual_to_image(material, principled, target_name, width, height):
         except Exception:
             pass
 
-        # Ejecutar bake DIFFUSE (solo color)
-        bpy.ops.object.bake(type='DIFFUSE')
-
-        # Limpiar nodo temporal
-        nodes.remove(temp_image_node)
-
-        # Restaurar engine
-        bpy.context.scene.render.engine = prev_engine
+        # Preparar escena para bake (sesión activa o una propia con GPU si está disponible)
+        session, owns_session = acquire_bake_session(use_gpu=True, margin=2)
+        # Ejecutar bake DIFFUSE (solo color), restringido a las caras del material
+        try:
+            bpy.context.scene.render.bake.use_pass_direct = False
+            bpy.context.scene.render.bake.use_pass_indirect = False
+            bpy.context.scene.render.bake.use_pass_color = True
+            session.isolate(obj)
+            with _material_slot_bake_mask(obj, material):
+                bpy.ops.object.bake(type='DIFFUSE')
+            session.bake_count += 1
+        finally:
+            # Limpiar nodo temporal y restaurar la escena (si la sesión es propia)
+            nodes.remove(temp_image_node)
+            if owns_session:
+                session.close()
 
         # Validar resultado; si viene vacío/transparente, fallback a duplicado
         try:
@@ -1642,51 +2375,210 @@ def check_real_pixel_transparency(material):
             print(f"   [ALPHA_CHECK] {material.name}: channels != 4 -> OPACO")
             return False
             
-        # Intentar acceder a píxeles
-        try:
-            if len(img.pixels) == 0:
-                print(f"   [ALPHA_CHECK] {material.name}: pixels vacío -> OPACO (asumiendo packed/no-loaded)")
-                return False
-        except:
-            print(f"   [ALPHA_CHECK] {material.name}: No se puede acceder a pixels -> OPACO")
+        # 3b. Estadísticas vectorizadas de todos los píxeles (memorizadas por imagen)
+        stats = get_image_stats(img)
+        if stats is None:
+            print(f"   [ALPHA_CHECK] {material.name}: pixels vacío -> OPACO (asumiendo packed/no-loaded)")
             return False
-            
-        w, h = img.size
-        total_pixels = w * h
         
-        # Si la imagen es pequeña, sampleamos todo el alpha channel
-        if total_pixels < 10000:
-            transparent_count = 0
-            for i in range(3, len(img.pixels), 4):
-                if img.pixels[i] < 0.99: 
-                    transparent_count += 1
-            
-            if transparent_count > 0:
-                print(f"   [ALPHA_CHECK] {material.name}: {transparent_count}/{total_pixels} píxeles transparentes -> TRANSPARENTE")
-                return True
-            else:
-                print(f"   [ALPHA_CHECK] {material.name}: 0/{total_pixels} píxeles transparentes -> OPACO")
-                return False
-        else:
-            # Sampleo disperso para imágenes grandes
-            indices = [0, (w-1)*4, (w*h-w)*4, (w*h-1)*4, ((h//2)*w + w//2)*4]
-            for idx in indices:
-                if idx+3 < len(img.pixels):
-                    if img.pixels[idx+3] < 0.99:
-                        print(f"   [ALPHA_CHECK] {material.name}: Encontrado pixel transparente en sample -> TRANSPARENTE")
-                        return True
-            
-            print(f"   [ALPHA_CHECK] {material.name}: Samples opacos -> OPACO")
-            return False
+        total_pixels = stats.width * stats.height
+        if stats.has_transparency:
+            print(f"   [ALPHA_CHECK] {material.name}: {stats.transparent_pixels}/{total_pixels} píxeles transparentes -> TRANSPARENTE")
+            return True
+        print(f"   [ALPHA_CHECK] {material.name}: 0/{total_pixels} píxeles transparentes -> OPACO")
+        return False
         
     except Exception as e:
         print(f"   [ALPHA_CHECK] {material.name}: Exception {e} -> OPACO (fallback)")
         return False
 
-def _rasterize_direct_color(material, principled, base_socket, alpha_socket=None):
+# ========================================================================================
+# ÍNDICE DE PERFILES DE MATERIAL
+# ========================================================================================
+# La clasificación de cada material (Principled, imagen base, alpha, número de
+# nodos, simple/complejo) se calcula una vez y la comparten la pre-rasterización,
+# la limpieza estricta de conversion.py y los operadores de baking. Una entrada
+# se invalida cuando cambia su node tree (handler de depsgraph) o cuando su
+# firma ya no coincide: identidad del material (as_pointer se puede reutilizar),
+# punteros de sus nodos y enlaces (cambios hechos por el propio addon).
+
+# Umbral de nodos para bakear un material con imagen directa
+# (Coord+Map+Img+BSDF+Out = 5 -> Simple)
+COMPLEX_NODE_THRESHOLD = 6
+
+_material_profiles = {}
+
+
+def _node_graph_signature(material):
+    """Firma barata del material: identidad, nodos y enlaces (punteros + sockets)"""
+    identity = (material.as_pointer(), getattr(material, 'session_uid', None), material.name_full)
+    tree = material.node_tree if material.use_nodes else None
+    if tree is None:
+        return identity, (), ()
+    nodes = tuple(node.as_pointer() for node in tree.nodes)
+    links = tuple(
+        (link.from_node.as_pointer(), link.from_socket.identifier,
+         link.to_node.as_pointer(), link.to_socket.identifier)
+        for link in tree.links
+    )
+    return identity, nodes, links
+
+
+class MaterialProfile:
+    """Clasificación de un material para rasterización y limpieza.
+
+    complexity:
+    - 'NONE': sin Principled (se ignora)
+    - 'SIMPLE': Imagen -> Principled -> Output estricto
+    - 'DIRECT_IMAGE': imagen directa en Base Color con pocos nodos
+    - 'DIRECT_IMAGE_COMPLEX': imagen directa con más de COMPLEX_NODE_THRESHOLD nodos
+    - 'SOLID': color sólido (sin enlace, RGB o Value)
+    - 'PROCEDURAL': Mix/Ramp/Noise o shader alternativo (MMD)
+
+    bake_decision (con limpieza y rasterizado activos): 'SKIP', 'CLEAN',
+    'RASTERIZE' (color sólido) o 'BAKE'.
+    """
+
+    __slots__ = ('material', 'principled', 'output_node', 'base_image_node', 'base_image',
+                 'alpha_linked', 'node_count', 'link_count', 'signature', 'complexity',
+                 '_has_real_alpha')
+
+    def __init__(self, material):
+        self.material = material
+        self.signature = _node_graph_signature(material)
+        self.principled = _find_principled(material)
+        self.output_node = _get_output_node(material) if self.principled else None
+        self.node_count = len(self.signature[1])
+        self.link_count = len(self.signature[2])
+        self.base_image_node = None
+        self.base_image = None
+        self.alpha_linked = False
+        self._has_real_alpha = None
+        self.complexity = self._classify()
+
+    def _classify(self):
+        principled = self.principled
+        if principled is None:
+            return 'NONE'
+        alpha_input = principled.inputs.get('Alpha')
+        self.alpha_linked = bool(alpha_input and alpha_input.is_linked)
+
+        base_input = principled.inputs.get('Base Color')
+        if base_input and base_input.is_linked:
+            input_node = base_input.links[0].from_node
+            if input_node.type == 'TEX_IMAGE':
+                self.base_image_node = input_node
+                self.base_image = input_node.image
+                if _material_is_simple(self.material, principled):
+                    return 'SIMPLE'
+                if self.node_count > COMPLEX_NODE_THRESHOLD:
+                    return 'DIRECT_IMAGE_COMPLEX'
+                return 'DIRECT_IMAGE'
+            if input_node.type in ['RGB', 'VALUE']:
+                return 'SOLID'
+            return 'PROCEDURAL'
+
+        # Principled sin nada conectado: ¿el Output usa otro shader? (Caso MMD)
+        output_node = self.output_node
+        if output_node and output_node.inputs['Surface'].is_linked:
+            if output_node.inputs['Surface'].links[0].from_node != principled:
+                return 'PROCEDURAL'
+        return 'SOLID'
+
+    @property
+    def has_direct_image(self):
+        return self.base_image_node is not None
+
+    @property
+    def has_real_alpha(self):
+        """Transparencia real en la imagen de Base Color (se evalúa una sola vez)"""
+        if self._has_real_alpha is None:
+            try:
+                self._has_real_alpha = check_real_pixel_transparency(self.material) if self.has_direct_image else False
+            except ReferenceError:
+                return False
+        return self._has_real_alpha
+
+    @property
+    def bake_decision(self):
+        if self.complexity == 'NONE':
+            return 'SKIP'
+        if self.complexity in ('SIMPLE', 'DIRECT_IMAGE') or self.has_real_alpha:
+            return 'CLEAN'
+        if self.complexity == 'SOLID':
+            return 'RASTERIZE'
+        return 'BAKE'
+
+    def is_current(self):
+        """False si el material, sus nodos, sus enlaces o la imagen base cambiaron"""
+        try:
+            if _node_graph_signature(self.material) != self.signature:
+                return False
+            if self.base_image_node is not None and self.base_image_node.image != self.base_image:
+                return False
+            return True
+        except ReferenceError:
+            return False
+
+
+def get_material_profile(material):
+    """Perfil del material (del índice o recién calculado)"""
+    key = material.as_pointer()
+    profile = _material_profiles.get(key)
+    if profile is None or not profile.is_current():
+        profile = MaterialProfile(material)
+        _material_profiles[key] = profile
+    return profile
+
+
+def build_material_profile_index(materials=None):
+    """Clasifica en una pasada todos los materiales con nodos. Devuelve [MaterialProfile]"""
+    if materials is None:
+        materials = [m for m in bpy.data.materials if m and m.use_nodes]
+    return [get_material_profile(material) for material in materials]
+
+
+def invalidate_material_profiles(material=None):
+    """Olvida el perfil de un material (o todos con material=None)"""
+    if material is None:
+        _material_profiles.clear()
+    else:
+        _material_profiles.pop(material.as_pointer(), None)
+
+
+@bpy.app.handlers.persistent
+def _invalidate_profiles_on_depsgraph_update(scene, depsgraph):
+    if not _material_profiles:
+        return
+    for update in depsgraph.updates:
+        data = update.id
+        if isinstance(data, bpy.types.Material):
+            _material_profiles.pop(data.original.as_pointer(), None)
+        elif isinstance(data, bpy.types.NodeTree):
+            # Grupo de nodos compartido: cualquier material puede usarlo
+            _material_profiles.clear()
+            return
+        elif isinstance(data, bpy.types.Image):
+            image = data.original
+            for key, profile in list(_material_profiles.items()):
+                try:
+                    stale = profile.base_image == image
+                except ReferenceError:
+                    stale = True
+                if stale:
+                    del _material_profiles[key]
+
+
+@bpy.app.handlers.persistent
+def _clear_profiles_on_load(*_args):
+    _material_profiles.clear()
+
+
+def _rasterize_direct_color(material, principled, base_socket, alpha_socket=None, size=None):
     """
-    Crea una textura sólida 256x256 del color base y la conecta.
+    Crea una textura sólida del color base y la conecta.
     Simplifica el material a Imagen -> Principled -> Output.
+    size: resolución (None = bake_resolution de los ajustes).
     """
     try:
         # Obtener color base
@@ -1705,27 +2597,21 @@ def _rasterize_direct_color(material, principled, base_socket, alpha_socket=None
                 
         # Crear imagen solida
         img_name = f"{material.name}_b_d"
-        if img_name in bpy.data.images:
-            bpy.data.images.remove(bpy.data.images[img_name])
             
         # Obtener resolución de settings
-        size = 256 # Default
-        try:
-            settings = bpy.context.scene.universal_gta_settings
-            if hasattr(settings, 'bake_resolution'):
-                 res_str = settings.bake_resolution
-                 if res_str and res_str.isdigit():
-                     size = int(res_str)
-        except:
-             pass
-            
-        # Generar imagen
-        image = bpy.data.images.new(img_name, width=size, height=size, alpha=True)
-        
-        # Llenar píxeles
-        pixels = [color[0], color[1], color[2], color[3]] * (size * size)
-        image.pixels = pixels
-        image.pack()
+        if size is None:
+            size = 256 # Default
+            try:
+                settings = bpy.context.scene.universal_gta_settings
+                if hasattr(settings, 'bake_resolution'):
+                     res_str = settings.bake_resolution
+                     if res_str and res_str.isdigit():
+                         size = int(res_str)
+            except:
+                 pass
+            
+        # Generar imagen (reemplaza la previa; buffer de píxeles compartido por color)
+        image = new_solid_image(img_name, color, size)
         
         # Conectar
         nodes = material.node_tree.nodes
@@ -1751,6 +2637,86 @@ def _rasterize_direct_color(material, principled, base_socket, alpha_socket=None
         return False
 
 
+def _finish_baked_material(mat, baked_img, has_direct_image, baked_objects):
+    """Reemplaza el material por su bake. Devuelve 1 si se procesó, 0 si no"""
+    principled = _find_principled(mat)
+    if baked_img:
+        # 6. Reemplazar Material
+        if replace_material_with_baked(mat, baked_img):
+            print(f"✅ {mat.name}: Rasterizado Exitosamente")
+        
+            # La consolidación de UVs se hace al final: varios materiales
+            # de la misma malla unida siguen necesitando 'original_uv_src'.
+            target_obj = _find_object_with_material(mat)[0]
+            if target_obj and target_obj not in baked_objects:
+                baked_objects.append(target_obj)
+            return 1
+        print(f"❌ Fallo al reemplazar material {mat.name}")
+    else:
+        print(f"❌ Fallo al generar imagen bakeada para {mat.name} (Intentando fallback a limpieza)")
+        # Si falla el bake, intentar al menos limpiar si tiene imagen
+        if has_direct_image and principled:
+            _simplify_to_nearest_image(mat, principled)
+    return 0
+
+
+def _bake_queue_on_farm(farm_queue, settings, bake_cache, bake_stats, baked_objects):
+    """Bakea la cola [(material, resolución, has_direct_image)] en la granja.
+
+    Las UVs se empaquetan aquí, material a material (la malla es compartida);
+    los bakes de Cycles se reparten entre procesos de Blender en segundo plano.
+    Los trabajos que fallan se repiten en este proceso.
+    """
+    if len(farm_queue) < MIN_FARM_JOBS:
+        processed = 0
+        for mat, resolution, has_direct_image in farm_queue:
+            baked_img = perform_advanced_baking(mat, resolution=resolution, bake_cache=bake_cache, bake_stats=bake_stats)
+            processed += _finish_baked_material(mat, baked_img, has_direct_image, baked_objects)
+        return processed
+
+    alpha_strategy = getattr(settings, 'bake_alpha_strategy', 'AUTO')
+    farm = BakeFarm(getattr(settings, 'bake_farm_processes', 0), getattr(settings, 'bake_farm_threads', 0))
+    results = {}
+    jobs = {}
+    try:
+        for mat, resolution, _ in farm_queue:
+            status, value = _queue_farm_bake(farm, mat, resolution, bake_cache, alpha_strategy)
+            if status == 'cached':
+                results[mat] = value
+            elif status == 'queued':
+                jobs[mat.name] = (mat, value)
+
+        window_manager = getattr(bpy.context, "window_manager", None)
+        if window_manager:
+            window_manager.progress_begin(0, len(farm.jobs))
+
+        def report_progress(done, total, job):
+            if window_manager:
+                window_manager.progress_update(done)
+
+        try:
+            outputs, errors = farm.run(progress=report_progress)
+        finally:
+            if window_manager:
+                window_manager.progress_end()
+
+        for material_name, png_path in outputs.items():
+            mat, job = jobs[material_name]
+            results[mat] = _load_farm_bake(mat, job, png_path, bake_cache)
+            bake_stats['bakes'] = bake_stats.get('bakes', 0) + 1
+    finally:
+        farm.cleanup()
+
+    processed = 0
+    for mat, resolution, has_direct_image in farm_queue:
+        baked_img = results.get(mat)
+        if baked_img is None:
+            # Trabajo fallido (o no encolado): bake normal en este proceso
+            baked_img = perform_advanced_baking(mat, resolution=resolution, bake_cache=bake_cache, bake_stats=bake_stats)
+        processed += _finish_baked_material(mat, baked_img, has_direct_image, baked_objects)
+    return processed
+
+
 def execute_pre_conversion_rasterization():
     """Aplica la regla solicitada durante la conversión:
     - Material simple: se omite.
@@ -1760,6 +2726,8 @@ def execute_pre_conversion_rasterization():
     """
     processed = 0
     total = 0
+    baked_objects = []
+    bake_session = None
     try:
         settings = getattr(bpy.context.scene, 'universal_gta_settings', None)
         materials = [m for m in bpy.data.materials if m and m.use_nodes]
@@ -1775,6 +2743,15 @@ def execute_pre_conversion_rasterization():
         # Configuración de flags
         global_do_clean = (mode in ['CLEAN', 'BAKE'])
         global_do_rasterize = (mode == 'BAKE')
+        bake_cache = BakeCache.from_settings(settings) if global_do_rasterize else None
+        bake_stats = {'bakes': 0, 'avoided': 0, 'cpu': 0}
+        use_cpu_eval = getattr(settings, 'use_cpu_shader_eval', True)
+        use_farm = global_do_rasterize and getattr(settings, 'use_bake_farm', False) and is_farm_available()
+        bake_queue = []
+        if global_do_rasterize:
+            # Cycles y visibilidad se configuran una vez para toda la tanda
+            bake_session = BakeSession()
+            bake_session.open()
 
         print(f"🔥 Ejecutando Rasterización/Limpieza (Modo: {mode})...")
         print(f"   Clean={global_do_clean}, Rasterize={global_do_rasterize}")
@@ -1782,163 +2759,194 @@ def execute_pre_conversion_rasterization():
         print("\n" + "="*60)
         print("🧠 PRE-RASTERIZACIÓN ROBUSTA (Universal GTA)")
         print("="*60)
+
+        # === MODO ATLAS ===
+        # Todos los materiales de cada malla en una sola textura: menos bakes,
+        # menos entradas en el TXD y un solo draw call por malla.
+        atlas_materials = set()
+        if global_do_rasterize and getattr(settings, 'use_texture_atlas', False):
+            bake_res_str = getattr(settings, 'bake_resolution', '512')
+            atlas_base_res = int(bake_res_str) if str(bake_res_str).isdigit() else 512
+            atlas_objects = [o for o in bpy.context.scene.objects
+                             if o.type == 'MESH' and len(_atlas_materials(o)) > 1]
+            for atlas_obj in atlas_objects:
+                with profile_step(f"Atlas: {atlas_obj.name}", category="rasterize"):
+                    absorbed = bake_material_atlas(atlas_obj, atlas_base_res,
+                                                   bake_cache=bake_cache, bake_stats=bake_stats)
+                if absorbed:
+                    atlas_materials.update(absorbed)
+                    processed += len(absorbed)
+                    baked_objects.append(atlas_obj)
+
+        # === PERFILES DE MATERIAL ===
+        # Una sola pasada de clasificación; el presupuesto y el bucle la reutilizan
+        with profile_step("Material profiles", category="rasterize"):
+            build_material_profile_index([m for m in materials if m not in atlas_materials])
+
+        # === PRESUPUESTO DE TEXTURAS ===
+        # Resolución por material según área, cobertura UV, importancia y tamaño de origen
+        budget_resolutions = {}
+        budget_mode = getattr(settings, 'texture_budget_mode', 'OFF')
+        if global_do_rasterize and budget_mode != 'OFF':
+            with profile_step("Texture budget", category="rasterize"):
+                budget_materials = [m for m in materials if m not in atlas_materials]
+                bake_res_str = getattr(settings, 'bake_resolution', '512')
+                demands = collect_material_demands(
+                    budget_materials,
+                    alpha_lookup=lambda material: get_material_profile(material).has_real_alpha,
+                    procedural_max=int(bake_res_str) if str(bake_res_str).isdigit() else 512,
+                )
+                budget_mb = getattr(settings, 'texture_budget_mb', 4.0)
+                budget_resolutions = solve_texture_budget(demands, budget_mb * 1024 * 1024, budget_mode)
+                estimated_mb, budget_lines = describe_budget(budget_resolutions, demands, budget_mode)
+            print(f"💰 [BUDGET] {budget_mode}: {estimated_mb:.2f} / {budget_mb:.2f} MB")
+            for line in budget_lines:
+                print(f"   {line}")
         
         for mat in materials:
-            try:
-                principled = _find_principled(mat)
-                if principled is None: continue
-
-                # 1. Simple -> Limpiar (no saltar)
-                if _material_is_simple(mat, principled):
-                    if global_do_clean:
-                        print(f"🧹 {mat.name}: Simple -> Limpieza")
-                        if _simplify_to_nearest_image(mat, principled):
-                            processed += 1
-                    else:
-                        print(f"ℹ️ {mat.name}: Simple (SKIP - clean desactivado)")
-                    continue
+            if mat in atlas_materials:
+                continue
+            with profile_step(f"Material: {mat.name}", category="rasterize"):
+                try:
+                    profile = get_material_profile(mat)
+                    principled = profile.principled
+                    if principled is None: continue
+
+                    # 1. Simple -> Limpiar (no saltar)
+                    if profile.complexity == 'SIMPLE':
+                        if global_do_clean:
+                            print(f"🧹 {mat.name}: Simple -> Limpieza")
+                            if _simplify_to_nearest_image(mat, principled):
+                                processed += 1
+                        else:
+                            print(f"ℹ️ {mat.name}: Simple (SKIP - clean desactivado)")
+                        continue
 
-                # 2. Análisis
-                base_input = principled.inputs.get('Base Color')
-                has_direct_image = bool(base_input and base_input.is_linked and base_input.links[0].from_node.type == 'TEX_IMAGE')
-                
-                # Check Alpha INTELIGENTE (Pixeles reales)
-                has_real_alpha = check_real_pixel_transparency(mat)
+                    # 2. Análisis
+                    has_direct_image = profile.has_direct_image
 
-                # 3. DECISIÓN: ¿BAKE O CLEAN?
-                should_bake = False
+                    # 3. DECISIÓN: ¿BAKE O CLEAN?
+                    should_bake = False
                 
-                # --- REGLA: SI TIENE ALPHA REAL -> PROHIBIDO BAKEAR ---
-                if has_real_alpha:
-                     print(f"ℹ️ {mat.name}: Transparencia Real detectada -> Solo Limpieza")
-                     if global_do_clean:
-                         if _simplify_to_nearest_image(mat, principled):
-                             processed += 1
-                     continue
-
-                # A) Si YA tiene imagen directa (y es opaca)
-                if has_direct_image:
-                    should_check_bake = False
-                    
-                    # 1. Prioridad: BAKE si es complejo (solo si rasterize actvado)
-                    if global_do_rasterize:
-                        node_count = len(mat.node_tree.nodes)
-                        # Umbral: 6 nodos (Coord+Map+Img+BSDF+Out = 5 -> Simple)
-                        if node_count > 6:
-                            print(f"⚡ {mat.name}: Imagen directa + Nodos complejos ({node_count} > 6) -> BAKE")
+                    # --- REGLA: SI TIENE ALPHA REAL -> PROHIBIDO BAKEAR ---
+                    # (Check Alpha INTELIGENTE: píxeles reales, evaluado una vez por perfil)
+                    if profile.has_real_alpha:
+                         print(f"ℹ️ {mat.name}: Transparencia Real detectada -> Solo Limpieza")
+                         if global_do_clean:
+                             if _simplify_to_nearest_image(mat, principled):
+                                 processed += 1
+                         continue
+
+                    # A) Si YA tiene imagen directa (y es opaca)
+                    if has_direct_image:
+                        # 1. Prioridad: BAKE si es complejo (solo si rasterize actvado)
+                        if global_do_rasterize and profile.complexity == 'DIRECT_IMAGE_COMPLEX':
+                            print(f"⚡ {mat.name}: Imagen directa + Nodos complejos "
+                                  f"({profile.node_count} > {COMPLEX_NODE_THRESHOLD}) -> BAKE")
                             should_bake = True
-                        else:
-                            should_check_bake = False # Es simple
                             
-                    # 2. Si NO se va a bakear (porque es simple o rasterize=False), intentar Limpiar
-                    if not should_bake and global_do_clean:
-                        print(f"🧹 {mat.name}: Tiene imagen directa (Simple) -> Limpieza")
-                        if _simplify_to_nearest_image(mat, principled):
-                            processed += 1
-                        continue
+                        # 2. Si NO se va a bakear (porque es simple o rasterize=False), intentar Limpiar
+                        if not should_bake and global_do_clean:
+                            print(f"🧹 {mat.name}: Tiene imagen directa (Simple) -> Limpieza")
+                            if _simplify_to_nearest_image(mat, principled):
+                                processed += 1
+                            continue
                     
-                    # Si decidimos bakear, salimos del if y el flag should_bake hará el trabajo abajo
-                    if should_bake:
-                        pass # Continua al bloque de ejecucion
-                    else:
-                        continue
+                        # Si decidimos bakear, el flag should_bake hará el trabajo abajo
+                        if not should_bake:
+                            continue
                 
-                # B) Si NO tiene imagen directa -> Decidir entre Rasterizar o Bakear
-                if not has_direct_image and global_do_rasterize:
-                    # Verificar qué hay conectado a Base Color
-                    base_socket = principled.inputs.get('Base Color')
-                    
-                    is_procedural_complex = False
-                    if base_socket and base_socket.is_linked:
-                        input_node = base_socket.links[0].from_node
-                        # Color/Valor -> Simple
-                        if input_node.type in ['RGB', 'VALUE']:
-                            is_procedural_complex = False
-                        # Imagen -> Complejo (si llegamos acá sin has_direct_image es raro, pero posible si pasa por un Mix)
-                        # Mix/Ramp/Noise -> Complejo
+                    # B) Si NO tiene imagen directa -> Decidir entre Rasterizar o Bakear
+                    if not has_direct_image and global_do_rasterize:
+                        if profile.complexity != 'PROCEDURAL':
+                            print(f"🎨 {mat.name}: Color sólido/simple -> Rasterizar")
+                            if _rasterize_direct_color(mat, principled, principled.inputs.get('Base Color'),
+                                                       principled.inputs.get('Alpha'),
+                                                       size=budget_resolutions.get(mat)):
+                                processed += 1
+                            continue
                         else:
-                            is_procedural_complex = True
-                    else:
-                        # Si Principled no tiene nada conectado, ¿quizás el Output usa otro shader? (Caso MMD)
-                        output_node = _get_output_node(mat)
-                        if output_node and output_node.inputs['Surface'].is_linked:
-                            shader_node = output_node.inputs['Surface'].links[0].from_node
-                            if shader_node != principled:
-                                is_procedural_complex = True
-                                print(f"   🕵️ Shader alternativo detectado ({shader_node.name}) -> COMPLEJO (MMD?)")
-                    
-                    if not is_procedural_complex:
-                        print(f"🎨 {mat.name}: Color sólido/simple -> Rasterizar")
-                        if _rasterize_direct_color(mat, principled, base_socket, principled.inputs.get('Alpha')):
-                            processed += 1
-                        continue
-                    else:
-                        # Material procedural complejo real -> Bakear
-                        should_bake = True
+                            # Material procedural complejo real -> Bakear
+                            should_bake = True
                 
-                # 4. EJECUCIÓN
-                if should_bake:
-                    print(f"⚡ {mat.name}: Requiere BAKE MANUAL (Procedural Complejo)")
+                    # 4. EJECUCIÓN
+                    if should_bake:
+                        print(f"⚡ {mat.name}: Requiere BAKE MANUAL (Procedural Complejo)")
                     
-                    # Obtener resolución de settings
-                    target_res = 512 # Default seguro
-                    try:
-                        settings = bpy.context.scene.universal_gta_settings
-                        if hasattr(settings, 'bake_resolution'):
-                            res_str = settings.bake_resolution
-                            # bake_resolution suele ser string '512', '1024', etc
-                            if res_str and res_str.isdigit():
-                                target_res = int(res_str)
-                    except:
-                        pass
+                        # Obtener resolución de settings
+                        target_res = 512 # Default seguro
+                        try:
+                            settings = bpy.context.scene.universal_gta_settings
+                            if hasattr(settings, 'bake_resolution'):
+                                res_str = settings.bake_resolution
+                                # bake_resolution suele ser string '512', '1024', etc
+                                if res_str and res_str.isdigit():
+                                    target_res = int(res_str)
+                        except:
+                            pass
                     
-                    # Opcional: Si el usuario quiere 'Auto', usar get_original (pero asumo que quiere forzar)
-                    # Si target_res es muy bajo, quizás fallback a get_original?
-                    # Pero el usuario dijo "no respeta la resolucion dada por settings". Así que fuerza settings.
-                    resolution = target_res
+                        # Opcional: Si el usuario quiere 'Auto', usar get_original (pero asumo que quiere forzar)
+                        # Si target_res es muy bajo, quizás fallback a get_original?
+                        # Pero el usuario dijo "no respeta la resolucion dada por settings". Así que fuerza settings.
+                        # Modo presupuesto: la resolución la decide el solver
+                        target_res = budget_resolutions.get(mat, target_res)
+                        resolution = target_res
                     
-                    print(f"   📏 Usando resolución: {resolution}x{resolution}")
-                    # 5. Ejecutar Bake
-                    baked_img = perform_advanced_baking(mat, resolution=target_res)
+                        print(f"   📏 Usando resolución: {resolution}x{resolution}")
+                        # 5. Ejecutar Bake
+                        baked_img = None
+                        if use_cpu_eval:
+                            baked_img = _rasterize_material_on_cpu(mat, target_res, bake_stats=bake_stats)
+                        if baked_img is None:
+                            # Cycles: el bake se lanza al final junto con el resto de la cola
+                            # (las UVs de cada malla se empaquetan una sola vez)
+                            bake_queue.append((mat, target_res, has_direct_image))
+                            continue
                     
-                    if baked_img:
-                        # 6. Reemplazar Material
-                        if replace_material_with_baked(mat, baked_img):
-                            processed += 1
-                            print(f"✅ {mat.name}: Rasterizado Exitosamente")
-                            
-                            # === LIMPIEZA FINAL DE UVs (CONSOLIDACIÓN) ===
-                            # Ahora que el material usa la textura bakeada (mapeada a bake_temp),
-                            # podemos borrar los UVs originales y renombrar bake_temp a Float2.
-                            found_obj_tuple = _find_object_with_material(mat)
-                            if found_obj_tuple:
-                                target_obj = found_obj_tuple[0]
-                                
-                                # Borrar todo lo que no sea 'bake_temp'
-                                # (Esto elimina 'original_uv_src' y cualquier otro residuo)
-                                uv_layers = target_obj.data.uv_layers
-                                to_remove = [uv for uv in uv_layers if uv.name != 'bake_temp']
-                                for uv in to_remove:
-                                    uv_layers.remove(uv)
-                                
-                                # Renombrar bake_temp -> Float2
-                                if 'bake_temp' in uv_layers:
-                                    uv_layers['bake_temp'].name = 'Float2'
-                                    
-                                print(f"   🧹 UV Cleanup: UVs unificados a 'Float2' en objeto '{target_obj.name}'")
-                        else:
-                             print(f"❌ Fallo al reemplazar material {mat.name}")
-                    else:
-                         print(f"❌ Fallo al generar imagen bakeada para {mat.name} (Intentando fallback a limpieza)")
-                         # Si falla el bake, intentar al menos limpiar si tiene imagen
-                         if has_direct_image:
-                             _simplify_to_nearest_image(mat, principled)
+                        processed += _finish_baked_material(mat, baked_img, has_direct_image, baked_objects)
 
-            except Exception as e:
-                print(f"❌ {mat.name}: Error procesando: {e}")
+                except Exception as e:
+                    print(f"❌ {mat.name}: Error procesando: {e}")
+
+        if bake_queue:
+            with profile_step("UV pack plan", category="rasterize"):
+                _plan_bake_uv_packing([mat for mat, _, _ in bake_queue])
+        if bake_queue and use_farm:
+            with profile_step("Bake farm", category="rasterize"):
+                processed += _bake_queue_on_farm(bake_queue, settings, bake_cache, bake_stats, baked_objects)
+        elif bake_queue:
+            for mat, target_res, has_direct_image in bake_queue:
+                with profile_step(f"Bake: {mat.name}", category="rasterize"):
+                    try:
+                        baked_img = perform_advanced_baking(mat, resolution=target_res, bake_cache=bake_cache,
+                                                            bake_stats=bake_stats)
+                        processed += _finish_baked_material(mat, baked_img, has_direct_image, baked_objects)
+                    except Exception as e:
+                        print(f"❌ {mat.name}: Error procesando: {e}")
+
+        if bake_cache is not None and (bake_cache.hits or bake_cache.misses):
+            print(f"♻️ [BAKE_CACHE] {bake_cache.hits} bakes reutilizados, {bake_cache.misses} nuevos")
+        if bake_stats['bakes'] or bake_stats['cpu']:
+            print(f"⚡ [BAKE] {bake_stats['bakes']} bakes de Cycles, {bake_stats['avoided']} pasadas de alpha evitadas, "
+                  f"{bake_stats['cpu']} materiales evaluados en CPU")
 
     except Exception:
         print("❌ Error global en pre-rasterización")
+    finally:
+        if bake_session is not None:
+            bake_session.close()
+        # Los buffers de color sólido solo sirven para esta pasada (hasta 64 MB cada uno)
+        clear_solid_buffers()
+
+    # === LIMPIEZA FINAL DE UVs (CONSOLIDACIÓN) ===
+    # Con todos los slots ya horneados, 'Float2' contiene el layout final:
+    # se elimina 'original_uv_src' y cualquier otro residuo.
+    for target_obj in baked_objects:
+        try:
+            if _consolidate_baked_uv_layers(target_obj):
+                print(f"   🧹 UV Cleanup: UVs unificados a 'Float2' en objeto '{target_obj.name}'")
+        except Exception as e:
+            print(f"⚠️ Error consolidando UVs en {target_obj.name}: {e}")
 
     # --- Renombrar Nodos (Label = Image Name) [Scripts Usuario] ---
     print("🏷️ Actualizando etiquetas de nodos de imagen (Scope: Selected Objects)...")
@@ -2005,38 +3013,54 @@ class UNIVERSALGTA_OT_pre_conversion_rasterization_advanced(Operator):
             print("="*60)
             
             materials = [mat for mat in bpy.data.materials if mat and mat.use_nodes]
+            build_material_profile_index(materials)
             processed_count = 0
             alpha_exceptions = 0
-            
-            for material in materials:
-                print(f"\n🔍 Analizando material: {material.name}")
+            settings = getattr(context.scene, 'universal_gta_settings', None)
+            bake_cache = BakeCache.from_settings(settings)
+            bake_stats = {'bakes': 0, 'avoided': 0, 'cpu': 0}
+            use_cpu_eval = getattr(settings, 'use_cpu_shader_eval', True)
+            
+            # Cycles y visibilidad una sola vez para todos los materiales
+            with BakeSession():
+                for material in materials:
+                    print(f"\n🔍 Analizando material: {material.name}")
                 
-                # Verificar excepción Alpha
-                if self.skip_alpha_materials and has_alpha_texture_connected(material):
-                    print(f"🚫 SALTANDO (Alpha detectado): {material.name}")
-                    alpha_exceptions += 1
-                    continue
+                    # Verificar excepción Alpha
+                    if self.skip_alpha_materials and has_alpha_texture_connected(material):
+                        print(f"🚫 SALTANDO (Alpha detectado): {material.name}")
+                        alpha_exceptions += 1
+                        continue
                 
-                # Determinar resolución
-                resolution = self.manual_resolution
-                if self.auto_resolution:
-                    resolution = get_original_texture_resolution(material)
+                    # Determinar resolución
+                    resolution = self.manual_resolution
+                    if self.auto_resolution:
+                        resolution = get_original_texture_resolution(material)
                 
-                # Realizar baking avanzado
-                baked_image = perform_advanced_baking(material, resolution)
-                if not baked_image:
-                    continue
+                    # Realizar baking avanzado
+                    baked_image = None
+                    if use_cpu_eval:
+                        baked_image = _rasterize_material_on_cpu(material, resolution, bake_stats=bake_stats)
+                    if baked_image is None:
+                        baked_image = perform_advanced_baking(material, resolution, bake_cache=bake_cache,
+                                                              bake_stats=bake_stats)
+                    if not baked_image:
+                        continue
                 
-                # Reemplazar material con versión baked
-                if replace_material_with_baked(material, baked_image):
-                    processed_count += 1
-                    print(f"✅ PROCESADO: {material.name}")
+                    # Reemplazar material con versión baked
+                    if replace_material_with_baked(material, baked_image):
+                        processed_count += 1
+                        print(f"✅ PROCESADO: {material.name}")
             
             # Reporte final
             print(f"\n📊 RESULTADO FINAL:")
             print(f"   ✅ Materiales procesados: {processed_count}")
             print(f"   🚫 Excepciones Alpha: {alpha_exceptions}")
             print(f"   📁 Total materiales: {len(materials)}")
+            if bake_cache is not None:
+                print(f"   ♻️ Bakes reutilizados: {bake_cache.hits}")
+            print(f"   ⚡ Pasadas de alpha evitadas: {bake_stats['avoided']} ({bake_stats['bakes']} bakes de Cycles)")
+            print(f"   ⚡ Evaluados en CPU (sin Cycles): {bake_stats['cpu']}")
             
             if processed_count > 0:
                 self.report({'INFO'}, f"✅ Rasterización avanzada: {processed_count}/{len(materials)} materiales")
@@ -2103,6 +3127,8 @@ class UNIVERSALGTA_OT_quick_texture_export(Operator):
             export_path,
             props.force_format_enabled,
             props.forced_format if props.force_format_enabled else None,
+            use_manifest=props.use_export_manifest,
+            dds_options=_get_dds_options(context),
         )
 
         props.export_path = export_path
@@ -2148,6 +3174,12 @@ class UNIVERSALGTA_OT_export_textures_enhanced(Operator, ExportHelper):
         default='PNG'
     )
 
+    use_export_manifest: BoolProperty(
+        name="Omitir texturas sin cambios",
+        description="Guarda un manifiesto en la carpeta de exportación y no reescribe las texturas que no cambiaron (las idénticas se escriben una vez)",
+        default=True
+    )
+
     def execute(self, context):
         if not self.directory:
             self.report({'ERROR'}, "Selecciona una carpeta válida")
@@ -2174,6 +3206,8 @@ class UNIVERSALGTA_OT_export_textures_enhanced(Operator, ExportHelper):
             export_path,
             self.force_format_enabled,
             self.forced_format if self.force_format_enabled else None,
+            use_manifest=self.use_export_manifest,
+            dds_options=_get_dds_options(context),
         )
 
         props = _get_texture_exporter_props(context)
@@ -2182,6 +3216,7 @@ class UNIVERSALGTA_OT_export_textures_enhanced(Operator, ExportHelper):
             props.export_mode = self.export_mode
             props.force_format_enabled = self.force_format_enabled
             props.forced_format = self.forced_format
+            props.use_export_manifest = self.use_export_manifest
 
         _report_export_summary(self, context, exported, failed, self.export_mode, self.force_format_enabled, self.forced_format)
         return {'FINISHED'}
@@ -2193,6 +3228,12 @@ class UNIVERSALGTA_OT_export_textures_enhanced(Operator, ExportHelper):
         row = layout.row()
         row.enabled = self.force_format_enabled
         row.prop(self, "forced_format", text="Formato")
+        props = _get_texture_exporter_props(context)
+        if props and self.force_format_enabled and self.forced_format == 'DDS':
+            dds_row = layout.row(align=True)
+            dds_row.prop(props, "dds_compression", text="")
+            dds_row.prop(props, "dds_mipmaps")
+        layout.prop(self, "use_export_manifest")
 
     def invoke(self, context, event):
         props = _get_texture_exporter_props(context)
@@ -2202,6 +3243,7 @@ class UNIVERSALGTA_OT_export_textures_enhanced(Operator, ExportHelper):
             self.export_mode = props.export_mode
             self.force_format_enabled = props.force_format_enabled
             self.forced_format = props.forced_format
+            self.use_export_manifest = props.use_export_manifest
 
         context.window_manager.fileselect_add(self)
         return {'RUNNING_MODAL'}
@@ -2255,6 +3297,8 @@ class UNIVERSALGTA_OT_export_textures_with_browser(Operator, ExportHelper):
             export_path,
             props.force_format_enabled,
             props.forced_format if props.force_format_enabled else None,
+            use_manifest=props.use_export_manifest,
+            dds_options=_get_dds_options(context),
         )
 
         props.export_path = export_path
@@ -2416,23 +3460,11 @@ class UNIVERSALGTA_OT_manual_smart_baking(Operator):
             if len(current_color) == 3:
                 current_color.append(1.0)  # Alpha = 1.0
             
-            # Crear nueva Image Texture de 256x256
+            # Crear nueva Image Texture de 256x256 (reemplaza la previa si existe)
             image_name = f"{material.name}_rasterized"
+            new_image = new_solid_image(image_name, current_color, 256)
             
-            # Remover imagen existente si ya existe
-            if image_name in bpy.data.images:
-                bpy.data.images.remove(bpy.data.images[image_name])
-            
-            # Crear nueva imagen
-            new_image = bpy.data.images.new(image_name, width=256, height=256, alpha=True)
-            
-            # Llenar con el color
-            pixel_count = 256 * 256
-            pixels = current_color * pixel_count
-            new_image.pixels = pixels
-            
-            # Empacar y proteger
-            new_image.pack()
+            # Proteger
             new_image.use_fake_user = True
             
             # Limpiar nodos y crear setup nuevo
@@ -2649,6 +3681,22 @@ class UNIVERSALGTA_OT_pre_conversion_rasterization(Operator):
         return bpy.ops.universalgta.pre_conversion_rasterization_advanced()
 
 
+class UNIVERSALGTA_OT_clear_bake_cache(Operator):
+    """Vaciar la caché persistente de bakes"""
+    bl_idname = "universalgta.clear_bake_cache"
+    bl_label = "Clear Bake Cache"
+    bl_description = "Eliminar todos los bakes guardados en la caché del addon"
+
+    def execute(self, context):
+        try:
+            removed = BakeCache().clear()
+        except Exception as e:
+            self.report({'ERROR'}, f"No se pudo vaciar la caché de bakes: {e}")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Caché de bakes vaciada ({removed} archivos)")
+        return {'FINISHED'}
+
+
 # ========================================================================================
 # REGISTRO DE CLASES
 # ========================================================================================
@@ -2662,6 +3710,7 @@ classes = [
     UNIVERSALGTA_OT_export_textures_with_browser,  # AGREGADO
     UNIVERSALGTA_OT_quick_material_rgb_fix,        # AGREGADO
     UNIVERSALGTA_OT_manual_smart_baking,
+    UNIVERSALGTA_OT_clear_bake_cache,
 ]
 
 
@@ -2676,11 +3725,20 @@ def register():
         bpy.types.Scene.texture_exporter_props = PointerProperty(
             type=TextureExporterProperties
         )
+    if _invalidate_profiles_on_depsgraph_update not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(_invalidate_profiles_on_depsgraph_update)
+    if _clear_profiles_on_load not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(_clear_profiles_on_load)
     print("[TEXTURE_EXPORT_ADVANCED] ✅ Todos los operadores avanzados registrados")
 
 
 def unregister():
     """Desregistrar operadores avanzados de texturas"""
+    if _invalidate_profiles_on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_invalidate_profiles_on_depsgraph_update)
+    if _clear_profiles_on_load in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_clear_profiles_on_load)
+    invalidate_material_profiles()
     if hasattr(bpy.types.Scene, "texture_exporter_props"):
         del bpy.types.Scene.texture_exporter_props
     for cls in reversed(classes):
@@ -3,6 +3,7 @@ Implementa la interfaz gráfica principal y los paneles secundarios del addon.
 """
 
 import bpy  # type: ignore
+import json
 import os
 from bpy.types import Panel  # type: ignore
 
@@ -123,6 +124,11 @@ def get_blender5_icon(icon_name):
         'VIEWZOOM': 'VIEWZOOM',
         'SCRIPT': 'SCRIPT',
         'CONSOLE': 'CONSOLE',
+        'TIME': 'TIME',
+        'FILE': 'FILE',
+        'NODETREE': 'NODETREE',
+        'CHECKBOX_HLT': 'CHECKBOX_HLT',
+        'CHECKBOX_DEHLT': 'CHECKBOX_DEHLT',
         'X': 'X'
     }
     return icon_mapping.get(icon_name, 'NONE')
@@ -175,8 +181,17 @@ class UNIVERSALGTA_PT_MainPanel(Panel):
              text="Preservar Vertex Colors / Atributos")
         raster_row = preserve_box.row()
         raster_row.prop(settings, "material_process_mode", expand=True)
+        if settings.material_process_mode != 'NONE':
+             preserve_box.prop(settings, "dedupe_datablocks")
         if settings.material_process_mode == 'BAKE':
              raster_row.prop(settings, "bake_resolution", text="")
+             budget_row = preserve_box.row(align=True)
+             budget_row.prop(settings, "texture_budget_mode", text="")
+             budget_sub = budget_row.row(align=True)
+             budget_sub.enabled = settings.texture_budget_mode != 'OFF'
+             budget_sub.prop(settings, "texture_budget_mb")
+             preserve_box.prop(settings, "use_texture_atlas")
+             preserve_box.prop(settings, "use_cpu_shader_eval")
 
 class UNIVERSALGTA_PT_AdvancedMappingPanel(Panel):
     """Panel de mapeo avanzado"""
@@ -476,6 +491,11 @@ class UNIVERSALGTA_PT_UtilitiesPanel(Panel):
             format_row = format_box.row()
             format_row.enabled = props.force_format_enabled
             format_row.prop(props, "forced_format", text="Formato")
+            if props.force_format_enabled and props.forced_format == 'DDS':
+                dds_row = format_box.row(align=True)
+                dds_row.prop(props, "dds_compression", text="")
+                dds_row.prop(props, "dds_mipmaps")
+            config_box.prop(props, "use_export_manifest")
 
             if props.export_path:
                 path_box = config_box.box()
@@ -507,6 +527,103 @@ class UNIVERSALGTA_PT_UtilitiesPanel(Panel):
         info_col.label(text="✅ Detección automática de resolución")
         info_col.label(text="✅ Soporte para Vector + Image + HSV")
 
+class UNIVERSALGTA_PT_PerformancePanel(Panel):
+    """Panel de rendimiento: checkpoints, pasos del pipeline y profiler de la conversión"""
+    bl_label = "Performance"
+    bl_idname = "UNIVERSALGTA_PT_performance_panel"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "Universal GTA"
+    bl_parent_id = "UNIVERSALGTA_PT_main_panel"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        settings = context.scene.universal_gta_settings
+
+        checkpoint_box = layout.box()
+        checkpoint_box.label(text="💾 Checkpoints", icon=get_blender5_icon('FILE'))
+        checkpoint_box.prop(settings, "use_checkpoints")
+        incremental_row = checkpoint_box.row()
+        incremental_row.enabled = settings.use_checkpoints
+        incremental_row.prop(settings, "incremental_conversion")
+        if settings.last_checkpoint_info:
+            checkpoint_box.label(text=settings.last_checkpoint_info)
+        checkpoint_row = checkpoint_box.row(align=True)
+        checkpoint_row.enabled = bool(settings.last_checkpoint_info)
+        resume_op = checkpoint_row.operator("universalgta.execute_conversion",
+                                            text="Reanudar", icon=get_blender5_icon('PLAY'))
+        resume_op.resume = True
+        checkpoint_row.operator("universalgta.clear_checkpoints", text="", icon=get_blender5_icon('TRASH'))
+
+        bake_cache_box = layout.box()
+        bake_cache_box.label(text="♻️ Caché de Bakes", icon=get_blender5_icon('TEXTURE'))
+        bake_cache_row = bake_cache_box.row(align=True)
+        bake_cache_row.prop(settings, "use_bake_cache")
+        bake_cache_row.operator("universalgta.clear_bake_cache", text="", icon=get_blender5_icon('TRASH'))
+        size_row = bake_cache_box.row()
+        size_row.enabled = settings.use_bake_cache
+        size_row.prop(settings, "bake_cache_max_mb")
+        bake_cache_box.prop(settings, "bake_alpha_strategy")
+
+        farm_box = layout.box()
+        farm_box.label(text="🏭 Granja de Bakes", icon=get_blender5_icon('RENDER_STILL'))
+        farm_box.prop(settings, "use_bake_farm")
+        farm_row = farm_box.row(align=True)
+        farm_row.enabled = settings.use_bake_farm
+        farm_row.prop(settings, "bake_farm_processes")
+        farm_row.prop(settings, "bake_farm_threads")
+
+        self.draw_pipeline_steps(layout, settings)
+
+        profile_box = layout.box()
+        profile_box.label(text="⏱️ Profiler", icon=get_blender5_icon('TIME'))
+        profile_box.prop(settings, "profile_conversion")
+        profile_box.prop(settings, "lean_conversion")
+
+        if not settings.last_profile_summary:
+            return
+
+        try:
+            profile = json.loads(settings.last_profile_summary)
+        except Exception:
+            return
+
+        summary_col = profile_box.column(align=True)
+        summary_col.scale_y = 0.8
+        summary_col.label(text=f"Total: {profile.get('total_ms', 0) / 1000.0:.2f} s")
+        for step in profile.get("steps", []):
+            row = summary_col.row()
+            row.label(text=step.get("name", "?"))
+            row.label(text=f"{step.get('wall_ms', 0) / 1000.0:.2f} s")
+        if settings.last_profile_path:
+            summary_col.label(text=os.path.basename(settings.last_profile_path), icon=get_blender5_icon('FILE'))
+
+
+    def draw_pipeline_steps(self, layout, settings):
+        """Lista de pasos del pipeline con su interruptor"""
+        try:
+            from ..operators.conversion import CONVERSION_PIPELINE, get_disabled_pipeline_steps
+        except ImportError:
+            return
+
+        pipeline_box = layout.box()
+        pipeline_box.label(text="🧩 Pipeline", icon=get_blender5_icon('NODETREE'))
+        disabled = get_disabled_pipeline_steps(settings)
+        steps_col = pipeline_box.column(align=True)
+        steps_col.scale_y = 0.8
+        for name, label, _method, _args, options in CONVERSION_PIPELINE:
+            if options.get('cpu_only'):
+                continue
+            row = steps_col.row()
+            row.enabled = not options.get('required', False)
+            enabled = name not in disabled
+            op = row.operator("universalgta.toggle_pipeline_step", text=label,
+                              icon=get_blender5_icon('CHECKBOX_HLT' if enabled else 'CHECKBOX_DEHLT'),
+                              emboss=False)
+            op.step_name = name
+
+
 class UNIVERSALGTA_PT_InfoPanel(Panel):
     """Panel de información y créditos"""
     bl_label = "Info"
@@ -622,6 +739,7 @@ classes = [
     UNIVERSALGTA_PT_QuickActionsPanel,
     UNIVERSALGTA_PT_NameAuthorPanel,
     UNIVERSALGTA_PT_UtilitiesPanel,
+    UNIVERSALGTA_PT_PerformancePanel,
     UNIVERSALGTA_PT_InfoPanel,
     UNIVERSALGTA_OT_apply_leg_roll,
 ]
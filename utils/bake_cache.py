@@ -0,0 +1,215 @@
+"""
+Caché persistente de bakes de materiales
+
+perform_advanced_baking() lanza Cycles para cada material complejo en cada
+conversión. Este módulo guarda el resultado (`<material>_b_d`) en disco con
+una clave que depende solo de lo que decide el bake:
+
+- El node tree del material (tipos, valores de entrada, enlaces y grupos)
+- El contenido de las imágenes referenciadas (utils/content_hash.hash_image)
+- La distribución UV de las caras del material (UV de origen y 'Float2')
+- La resolución y los parámetros del bake
+
+Reconvertir el mismo atuendo sobre otro cuerpo, o el mismo personaje tras
+cambiar un mapping, carga el PNG guardado en lugar de volver a bakear.
+
+El tamaño total se limita (ajuste bake_cache_max_mb); al superarlo se
+eliminan los archivos usados hace más tiempo (LRU por fecha de modificación,
+que se actualiza en cada acierto).
+"""
+
+import os
+from pathlib import Path
+
+import bpy  # type: ignore
+import numpy as np
+
+from .content_hash import _new_hasher, _update_text, hash_node_tree
+
+
+# Cambiar al modificar la forma de bakear (invalida la caché existente)
+BAKE_CACHE_VERSION = 1
+BAKE_CACHE_SUFFIX = ".png"
+DEFAULT_MAX_MB = 1024
+
+
+def get_bake_cache_root():
+    """Directorio de la caché de bakes del addon"""
+    root = Path(__file__).parent.parent / "config" / "bake_cache"
+    root.mkdir(parents=True, exist_ok=True)
+    return root
+
+
+def hash_material_graph(material, image_hashes=None):
+    """Hash del grafo del material sin depender del nombre del material"""
+    hasher = _new_hasher()
+    _update_text(hasher, f"{material.use_nodes}:{tuple(round(v, 6) for v in material.diffuse_color)}")
+    if material.use_nodes and material.node_tree:
+        hash_node_tree(material.node_tree, hasher, image_hashes)
+    return hasher.hexdigest()
+
+
+def hash_material_uv_layout(obj, material=None, uv_names=('original_uv_src', 'Float2')):
+    """Hash de las UVs de las caras que usan el material (capas indicadas).
+
+    Con material=None se incluyen todas las caras (atlas de la malla completa).
+    """
+    mesh = obj.data
+    hasher = _new_hasher()
+    slots = [i for i, slot in enumerate(obj.material_slots) if material is None or slot.material == material]
+    _update_text(hasher, f"slots:{len(slots)}")
+
+    polygon_count = len(mesh.polygons)
+    if not slots or not polygon_count:
+        return hasher.hexdigest()
+
+    material_index = np.empty(polygon_count, dtype=np.int32)
+    loop_total = np.empty(polygon_count, dtype=np.int32)
+    mesh.polygons.foreach_get('material_index', material_index)
+    mesh.polygons.foreach_get('loop_total', loop_total)
+    # Los loops se guardan en orden de polígono: máscara por loop con np.repeat
+    loop_mask = np.repeat(np.isin(material_index, slots), loop_total)
+    _update_text(hasher, f"loops:{int(loop_mask.sum())}")
+
+    for name in uv_names:
+        uv_layer = mesh.uv_layers.get(name)
+        if uv_layer is None:
+            _update_text(hasher, f"{name}:missing")
+            continue
+        uvs = np.empty(len(uv_layer.data) * 2, dtype=np.float32)
+        uv_layer.data.foreach_get('uv', uvs)
+        _update_text(hasher, name)
+        hasher.update(np.round(uvs.reshape(-1, 2)[loop_mask], 6).tobytes())
+    return hasher.hexdigest()
+
+
+def make_bake_key(graph_hash, uv_hash, resolution, extra=""):
+    """Clave final de un bake"""
+    hasher = _new_hasher()
+    _update_text(hasher, f"v{BAKE_CACHE_VERSION}")
+    _update_text(hasher, graph_hash)
+    _update_text(hasher, uv_hash)
+    _update_text(hasher, f"{resolution}:{extra}")
+    return hasher.hexdigest()
+
+
+class BakeCache:
+    """Bakes guardados como PNG en config/bake_cache (uno por clave)"""
+
+    def __init__(self, root=None, max_mb=DEFAULT_MAX_MB):
+        self.directory = Path(root or get_bake_cache_root())
+        self.max_bytes = max(0, int(max_mb)) * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_settings(cls, settings=None):
+        """Caché configurada según UniversalGTASettings (None si está desactivada)"""
+        if settings is None:
+            settings = getattr(bpy.context.scene, 'universal_gta_settings', None)
+        if settings is not None and not getattr(settings, 'use_bake_cache', True):
+            return None
+        max_mb = getattr(settings, 'bake_cache_max_mb', DEFAULT_MAX_MB) if settings else DEFAULT_MAX_MB
+        return cls(max_mb=max_mb)
+
+    def path_for(self, key):
+        return self.directory / f"{key}{BAKE_CACHE_SUFFIX}"
+
+    def load(self, key, image_name):
+        """Imagen empaquetada con el bake guardado o None si no está en caché"""
+        path = self.path_for(key)
+        if not path.is_file():
+            self.misses += 1
+            return None
+        try:
+            if image_name in bpy.data.images:
+                bpy.data.images.remove(bpy.data.images[image_name])
+            image = bpy.data.images.load(str(path), check_existing=False)
+            image.name = image_name
+            image.alpha_mode = 'STRAIGHT'
+            image.pack()
+            image.use_fake_user = True
+            # Actualizar la fecha de uso (LRU)
+            os.utime(path, None)
+            self.hits += 1
+            print(f"   ♻️ [BAKE_CACHE] Bake reutilizado: {image_name}")
+            return image
+        except Exception as e:
+            print(f"⚠️ [BAKE_CACHE] No se pudo cargar {path.name}: {e}")
+            self.misses += 1
+            return None
+
+    def store(self, key, image):
+        """Guarda el bake como PNG y aplica el límite de tamaño"""
+        if image is None or self.max_bytes == 0:
+            return None
+        path = self.path_for(key)
+        temp_path = path.with_name(f"{path.stem}.tmp{BAKE_CACHE_SUFFIX}")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            image.save(filepath=str(temp_path))
+            os.replace(temp_path, path)
+        except Exception as e:
+            print(f"⚠️ [BAKE_CACHE] No se pudo guardar '{image.name}': {e}")
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
+            return None
+        self.evict()
+        return str(path)
+
+    def entries(self):
+        """[(mtime, tamaño, ruta)] de los bakes en caché, del más antiguo al más reciente"""
+        entries = []
+        if not self.directory.is_dir():
+            return entries
+        for path in self.directory.glob(f"*{BAKE_CACHE_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort(key=lambda entry: entry[0])
+        return entries
+
+    def total_size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Elimina los bakes menos usados hasta quedar bajo el límite"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+                removed += 1
+            except OSError:
+                pass
+        if removed:
+            print(f"🧹 [BAKE_CACHE] {removed} bakes antiguos eliminados ({total / (1024 * 1024):.1f} MB en caché)")
+        return removed
+
+    def clear(self):
+        """Vacía la caché por completo"""
+        removed = 0
+        for _, _, path in self.entries():
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def describe(self):
+        """Texto corto para el panel"""
+        entries = self.entries()
+        if not entries:
+            return ""
+        total = sum(size for _, size, _ in entries)
+        return f"{len(entries)} bakes, {total / (1024 * 1024):.1f} MB"
+
@@ -0,0 +1,137 @@
+"""
+Granja de bakes en procesos de Blender en segundo plano
+
+perform_advanced_baking() bakea un material tras otro dentro del proceso de
+la interfaz; las fases de preparación de Cycles (sincronización de escena,
+BVH, compilación de shaders) son de un solo hilo y dejan la mayoría de
+núcleos ociosos en máquinas grandes.
+
+En modo granja, el proceso principal prepara cada bake (UVs empaquetadas,
+clave de caché) y escribe un trabajo:
+
+- `object_<n>.blend`: el objeto con su malla, materiales, node trees e
+  imágenes (bpy.data.libraries.write, rutas absolutas). Se escribe UNA vez
+  por objeto, al lanzar la granja (con las UVs de todos los slots ya
+  empaquetadas), y lo comparten todos sus trabajos.
+- `<job>.json`: material (slot), resolución, estrategia de alpha y PNG de salida.
+
+Un pool de procesos `blender -b --factory-startup -t N` ejecuta
+utils/bake_worker.py sobre cada trabajo, con N hilos por proceso para no
+sobresuscribir la CPU. El proceso principal vuelve a importar los PNG.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import bpy  # type: ignore
+
+
+ADDON_ROOT = Path(__file__).resolve().parent.parent
+WORKER_SCRIPT = Path(__file__).with_name("bake_worker.py")
+JOB_TIMEOUT_SECONDS = 1800
+MIN_FARM_JOBS = 2
+
+
+def get_farm_layout(processes=0, threads=0):
+    """(procesos, hilos por proceso); 0 = automático según los núcleos"""
+    cpu_count = os.cpu_count() or 2
+    if processes <= 0:
+        processes = max(1, min(8, cpu_count // 4))
+    if threads <= 0:
+        threads = max(1, cpu_count // processes)
+    return processes, threads
+
+
+def is_farm_available():
+    """True si se puede lanzar Blender en segundo plano desde este proceso"""
+    binary = bpy.app.binary_path
+    return bool(binary) and os.path.isfile(binary) and WORKER_SCRIPT.is_file()
+
+
+class BakeFarm:
+    """Directorio temporal de trabajos y pool de procesos de bake"""
+
+    def __init__(self, processes=0, threads=0):
+        self.processes, self.threads = get_farm_layout(processes, threads)
+        self.directory = Path(tempfile.mkdtemp(prefix="ugta_bake_farm_"))
+        self.jobs = []
+        # Nombre del objeto -> (ruta del .blend compartido, objeto)
+        self._object_blends = {}
+
+    def write_job(self, obj, material_name, slot_index, resolution, alpha_strategy, extra=None):
+        """Escribe el .json de un trabajo y lo añade a la cola.
+
+        El .blend del objeto se escribe una sola vez en run(), compartido por
+        todos los trabajos (slots) del mismo objeto.
+        """
+        index = len(self.jobs)
+        if obj.name not in self._object_blends:
+            object_path = self.directory / f"object_{len(self._object_blends):03d}.blend"
+            self._object_blends[obj.name] = (object_path, obj)
+        blend_path = self._object_blends[obj.name][0]
+        job = {
+            "blend": str(blend_path),
+            "object": obj.name,
+            "material": material_name,
+            "slot_index": slot_index,
+            "resolution": int(resolution),
+            "alpha_strategy": alpha_strategy,
+            "output": str(self.directory / f"job_{index:03d}.png"),
+            # El worker importa el addon por el nombre de su carpeta (sin registrarlo)
+            "addon_parent": str(ADDON_ROOT.parent),
+            "addon_package": ADDON_ROOT.name,
+        }
+        job.update(extra or {})
+        job_path = self.directory / f"job_{index:03d}.json"
+        with open(job_path, "w", encoding="utf-8") as handle:
+            json.dump(job, handle, indent=2)
+        job["json"] = str(job_path)
+        self.jobs.append(job)
+        return job
+
+    def _write_object_blends(self):
+        """Un .blend por objeto (malla, materiales e imágenes una sola vez en disco)"""
+        for blend_path, obj in self._object_blends.values():
+            if not blend_path.is_file():
+                bpy.data.libraries.write(str(blend_path), {obj}, path_remap='ABSOLUTE', fake_user=True)
+
+    def _run_job(self, job):
+        command = [
+            bpy.app.binary_path, "-b", "--factory-startup", "-t", str(self.threads),
+            "--python", str(WORKER_SCRIPT), "--", job["json"],
+        ]
+        result = subprocess.run(command, capture_output=True, text=True, timeout=JOB_TIMEOUT_SECONDS)
+        if result.returncode != 0 or not os.path.isfile(job["output"]):
+            tail = (result.stdout + result.stderr).strip().splitlines()[-5:]
+            raise RuntimeError(f"código {result.returncode}: " + " | ".join(tail))
+        return job["output"]
+
+    def run(self, progress=None):
+        """Bakea todos los trabajos. Devuelve ({material: png}, {material: error})"""
+        outputs = {}
+        errors = {}
+        if not self.jobs:
+            return outputs, errors
+        self._write_object_blends()
+        print(f"🏭 [BAKE_FARM] {len(self.jobs)} bakes ({len(self._object_blends)} objetos) en {self.processes} procesos x {self.threads} hilos")
+        with ThreadPoolExecutor(max_workers=self.processes) as pool:
+            futures = {pool.submit(self._run_job, job): job for job in self.jobs}
+            for done, future in enumerate(as_completed(futures), 1):
+                job = futures[future]
+                try:
+                    outputs[job["material"]] = future.result()
+                    print(f"   🏭 [{done}/{len(self.jobs)}] {job['material']} bakeado")
+                except Exception as e:
+                    errors[job["material"]] = str(e)
+                    print(f"⚠️ [BAKE_FARM] {job['material']}: {e}")
+                if progress is not None:
+                    progress(done, len(self.jobs), job)
+        return outputs, errors
+
+    def cleanup(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
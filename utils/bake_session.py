@@ -0,0 +1,163 @@
+"""
+Sesión de bake compartida por una tanda de materiales
+
+perform_advanced_baking(), el modo atlas y _bake_visual_to_image()
+configuraban Cycles (motor, dispositivo, samples, margen, pases) y
+guardaban/restauraban hide_render de TODOS los objetos de bpy.data en cada
+material. BakeSession lo hace una sola vez por tanda:
+
+- Al abrir: guarda el estado del render y la visibilidad, configura Cycles
+  y oculta en render todos los objetos.
+- isolate(obj): deja visible solo el objeto que se bakea (cambia dos
+  objetos como mucho, no recorre bpy.data.objects).
+- Al cerrar: restaura todo de una vez.
+
+Las funciones de bake usan la sesión activa si existe (get_active_bake_session)
+y, si no, abren una propia para ese único material.
+"""
+
+import bpy  # type: ignore
+
+
+_active_session = None
+
+_BAKE_FIELDS = (
+    'margin', 'use_clear', 'target', 'use_selected_to_active',
+    'use_pass_direct', 'use_pass_indirect', 'use_pass_color',
+)
+
+
+def get_active_bake_session():
+    """Sesión de bake abierta (None si no hay ninguna)"""
+    return _active_session
+
+
+def enable_cycles_gpu_if_available(scene=None):
+    """Activa GPU en Cycles si hay dispositivos disponibles.
+    Configura preferencias de CUDA/OPTIX/HIP según disponibilidad.
+    """
+    scene = scene or bpy.context.scene
+    prefs = bpy.context.preferences
+    cycles_prefs = getattr(prefs.addons.get('cycles'), 'preferences', None)
+    if not cycles_prefs:
+        return False
+    # Intentar OPTIX, luego CUDA, luego HIP
+    for backend in ['OPTIX', 'CUDA', 'HIP', 'METAL']:
+        try:
+            cycles_prefs.compute_device_type = backend
+            # Habilitar todos los dispositivos GPU disponibles
+            for device in cycles_prefs.get_devices()[0]:
+                device.use = True
+            scene.cycles.device = 'GPU'
+            return True
+        except Exception:
+            continue
+    return False
+
+
+class BakeSession:
+    """Configuración de Cycles y visibilidad para una tanda de bakes.
+
+    Uso: `with BakeSession():` o open()/close(). Anidable: si ya hay una
+    sesión activa, open() la reutiliza y close() no restaura nada.
+    """
+
+    def __init__(self, use_gpu=False, margin=16, samples=1, max_bounces=0):
+        self.use_gpu = use_gpu
+        self.margin = margin
+        self.samples = samples
+        self.max_bounces = max_bounces
+        self.scene = None
+        self._owner = False
+        self._saved = None
+        self._visible = None
+        self.bake_count = 0
+
+    # ------------------------------------------------------------------
+    def open(self):
+        global _active_session
+        if _active_session is not None:
+            return _active_session
+
+        scene = bpy.context.scene
+        self.scene = scene
+        bake = scene.render.bake
+        self._saved = {
+            "engine": scene.render.engine,
+            "cycles": {name: getattr(scene.cycles, name) for name in ('device', 'samples', 'max_bounces')},
+            "bake": {name: getattr(bake, name) for name in _BAKE_FIELDS if hasattr(bake, name)},
+            "hide_render": {o.name: o.hide_render for o in bpy.data.objects},
+        }
+
+        if scene.render.engine != 'CYCLES':
+            scene.render.engine = 'CYCLES'
+        scene.cycles.device = 'CPU'
+        if self.use_gpu:
+            try:
+                enable_cycles_gpu_if_available(scene)
+            except Exception:
+                scene.cycles.device = 'CPU'
+        scene.cycles.samples = self.samples
+        scene.cycles.max_bounces = self.max_bounces
+
+        bake.use_selected_to_active = False
+        bake.margin = self.margin
+        bake.use_clear = True
+        bake.target = 'IMAGE_TEXTURES'
+
+        for o in bpy.data.objects:
+            o.hide_render = True
+
+        self._owner = True
+        _active_session = self
+        print(f"🔧 [BAKE_SESSION] Cycles configurado para la tanda ({scene.cycles.device}, margin={self.margin})")
+        return self
+
+    def isolate(self, obj):
+        """Solo `obj` visible en render"""
+        if self._visible is not None and self._visible != obj:
+            try:
+                self._visible.hide_render = True
+            except ReferenceError:
+                pass
+        obj.hide_render = False
+        self._visible = obj
+
+    def close(self):
+        global _active_session
+        if not self._owner:
+            return
+        self._owner = False
+        _active_session = None
+        saved = self._saved
+        scene = self.scene
+        try:
+            for name, hidden in saved["hide_render"].items():
+                obj = bpy.data.objects.get(name)
+                if obj is not None:
+                    obj.hide_render = hidden
+            for name, value in saved["bake"].items():
+                setattr(scene.render.bake, name, value)
+            for name, value in saved["cycles"].items():
+                setattr(scene.cycles, name, value)
+            scene.render.engine = saved["engine"]
+        except Exception as e:
+            print(f"⚠️ [BAKE_SESSION] Error restaurando la escena: {e}")
+        print(f"🔧 [BAKE_SESSION] Escena restaurada ({self.bake_count} bakes en la tanda)")
+
+    # ------------------------------------------------------------------
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def acquire_bake_session(**kwargs):
+    """(sesión, es_propia): la sesión activa o una nueva abierta para un solo bake"""
+    if _active_session is not None:
+        return _active_session, False
+    session = BakeSession(**kwargs)
+    session.open()
+    return session, True
@@ -0,0 +1,32 @@
+"""
+Proceso de bake de la granja (ver utils/bake_farm.py)
+
+Se ejecuta dentro de Blender en segundo plano:
+
+    blender -b --factory-startup -t N --python bake_worker.py -- job.json
+
+Importa el addon desde su carpeta (sin registrarlo) y delega en
+operators.texture_export.run_farm_bake_job().
+"""
+
+import importlib
+import json
+import sys
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    if not argv:
+        print("❌ [BAKE_WORKER] Falta la ruta del trabajo")
+        return 2
+
+    with open(argv[0], "r", encoding="utf-8") as handle:
+        job = json.load(handle)
+
+    sys.path.insert(0, job["addon_parent"])
+    texture_export = importlib.import_module(f"{job['addon_package']}.operators.texture_export")
+    return 0 if texture_export.run_farm_bake_job(job) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
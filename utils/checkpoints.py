@@ -0,0 +1,413 @@
+"""
+Checkpoints de la conversión GTA SA
+
+Tras los pasos costosos (unión de mallas, rasterización, fusión de pesos y
+aplicación de pose) se guarda una instantánea ligera en disco con
+bpy.data.libraries.write(): solo los objetos implicados (armatures, malla
+unida y sus dependencias: mallas, materiales, imágenes empaquetadas...).
+
+Si la conversión falla más adelante, se puede reanudar desde el último
+checkpoint válido: los objetos actuales se sustituyen por los del checkpoint
+y el pipeline continúa en el paso siguiente.
+
+Cada checkpoint guarda también las claves de contenido de la conversión
+(utils/content_hash.py), de modo que una reconversión con las mismas
+entradas puede reutilizarlo sin repetir los pasos.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import bpy  # type: ignore
+import numpy as np
+
+
+# Orden de las etapas con checkpoint (una etapa incluye todos los pasos previos)
+CHECKPOINT_STAGES = ('merge', 'rasterize', 'weights', 'pose')
+
+STAGE_LABELS = {
+    'merge': "Mallas unidas",
+    'rasterize': "Rasterización",
+    'weights': "Pesos fusionados",
+    'pose': "Pose aplicada",
+}
+
+# Etapas sin entradas propias: se reutilizan con la clave de otra etapa
+REUSE_KEY_STAGE = {'pose': 'weights'}
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Poda de checkpoints de otros archivos tras una conversión correcta
+PRUNE_MAX_AGE_DAYS = 14
+PRUNE_MAX_STORES = 8
+
+
+def get_checkpoint_root():
+    """Directorio base de checkpoints del addon"""
+    root = Path(__file__).parent.parent / "config" / "checkpoints"
+    root.mkdir(parents=True, exist_ok=True)
+    return root
+
+
+def stage_index(stage):
+    """Posición de la etapa en el pipeline (-1 si no existe)"""
+    return CHECKPOINT_STAGES.index(stage) if stage in CHECKPOINT_STAGES else -1
+
+
+def _collect_hierarchy(objects):
+    """Objetos indicados + sus padres y todos sus descendientes"""
+    collected = []
+    seen = set()
+
+    def add(obj):
+        if obj is None or obj.name in seen:
+            return
+        seen.add(obj.name)
+        collected.append(obj)
+
+    for obj in objects:
+        if obj is None:
+            continue
+        parent = obj.parent
+        while parent is not None:
+            add(parent)
+            parent = parent.parent
+        add(obj)
+        for child in obj.children_recursive:
+            add(child)
+    return collected
+
+
+def _snapshot_image(image):
+    """Copia empaquetada de una imagen generada/modificada (el original no se toca)"""
+    copy = image.copy()
+    try:
+        if image.has_data and tuple(copy.size) == tuple(image.size) and len(image.pixels):
+            pixels = np.empty(len(image.pixels), dtype=np.float32)
+            image.pixels.foreach_get(pixels)
+            copy.pixels.foreach_set(pixels)
+        copy.pack()
+    except Exception:
+        bpy.data.images.remove(copy)
+        raise
+    return copy
+
+
+@contextmanager
+def _packed_image_copies(objects):
+    """Durante el bloque, los nodos apuntan a copias empaquetadas de las imágenes
+    generadas/modificadas, con el nombre original, para que viajen en el checkpoint.
+
+    Al salir se restauran los nodos y los nombres y se eliminan las copias: las
+    imágenes del usuario nunca se empaquetan.
+    """
+    copies = {}
+    swapped = []
+    try:
+        for obj in objects:
+            for slot in getattr(obj, 'material_slots', []):
+                material = slot.material
+                if not material or not material.use_nodes or not material.node_tree:
+                    continue
+                for node in material.node_tree.nodes:
+                    image = getattr(node, 'image', None) if node.type == 'TEX_IMAGE' else None
+                    if image is None or image.packed_file:
+                        continue
+                    if image.source != 'GENERATED' and not image.is_dirty:
+                        continue
+                    if image not in copies:
+                        try:
+                            copies[image] = _snapshot_image(image)
+                        except Exception as e:
+                            print(f"⚠️ [CHECKPOINT] No se pudo empaquetar '{image.name}': {e}")
+                            continue
+                    node.image = copies[image]
+                    swapped.append((node, image))
+
+        # La copia lleva el nombre original dentro del checkpoint
+        names = {}
+        for image, copy in copies.items():
+            names[image] = image.name
+            image.name = f"{image.name}.ugta_checkpoint"
+            copy.name = names[image]
+        try:
+            yield len(copies)
+        finally:
+            for image, name in names.items():
+                copies[image].name = f"{name}.ugta_snapshot"
+                image.name = name
+    finally:
+        for node, image in swapped:
+            try:
+                node.image = image
+            except ReferenceError:
+                pass
+        for copy in copies.values():
+            try:
+                bpy.data.images.remove(copy)
+            except ReferenceError:
+                pass
+
+
+def prune_checkpoint_stores(keep_key=None, max_age_days=PRUNE_MAX_AGE_DAYS, max_stores=PRUNE_MAX_STORES):
+    """Elimina los checkpoints de otros archivos: los más antiguos que max_age_days
+    y, del resto, los que excedan max_stores (por fecha del manifest).
+
+    Devuelve el número de directorios eliminados.
+    """
+    root = get_checkpoint_root()
+    stores = []
+    for directory in root.iterdir():
+        if not directory.is_dir() or directory.name == keep_key:
+            continue
+        manifest = directory / MANIFEST_NAME
+        try:
+            modified = (manifest if manifest.exists() else directory).stat().st_mtime
+        except OSError:
+            continue
+        stores.append((modified, directory))
+
+    stores.sort(reverse=True)
+    limit = time.time() - max_age_days * 86400
+    removed = 0
+    for position, (modified, directory) in enumerate(stores):
+        if modified >= limit and position < max_stores:
+            continue
+        shutil.rmtree(directory, ignore_errors=True)
+        removed += 1
+    if removed:
+        print(f"🧹 [CHECKPOINT] {removed} checkpoints antiguos eliminados")
+    return removed
+
+
+class CheckpointStore:
+    """Checkpoints de un .blend concreto (un manifest + un .blend por etapa)"""
+
+    def __init__(self, key=None, root=None):
+        self.key = key or self.default_key()
+        self.directory = Path(root or get_checkpoint_root()) / self.key
+        self.manifest_path = self.directory / MANIFEST_NAME
+
+    @staticmethod
+    def default_key():
+        """Clave estable para el archivo abierto (nombre + hash de la ruta)"""
+        filepath = bpy.data.filepath or "untitled"
+        stem = bpy.path.clean_name(Path(filepath).stem) or "untitled"
+        digest = hashlib.sha1(os.path.abspath(filepath).encode('utf-8')).hexdigest()[:8]
+        return f"{stem}_{digest}"
+
+    # ------------------------------------------------------------------
+    # Manifest
+    # ------------------------------------------------------------------
+    def load_manifest(self):
+        if not self.manifest_path.exists():
+            return {"version": MANIFEST_VERSION, "stages": {}}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get("version") != MANIFEST_VERSION:
+                return {"version": MANIFEST_VERSION, "stages": {}}
+            return manifest
+        except Exception as e:
+            print(f"⚠️ [CHECKPOINT] Manifest ilegible: {e}")
+            return {"version": MANIFEST_VERSION, "stages": {}}
+
+    def save_manifest(self, manifest):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temp_path = self.manifest_path.with_suffix(".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        os.replace(temp_path, self.manifest_path)
+
+    def is_valid(self, entry):
+        """Un checkpoint es válido si su archivo existe y es de esta versión de Blender"""
+        if not entry:
+            return False
+        if entry.get("blender") != bpy.app.version_string:
+            return False
+        return (self.directory / entry.get("file", "")).is_file()
+
+    def latest(self):
+        """(etapa, entrada) del último checkpoint válido o (None, None)"""
+        stages = self.load_manifest().get("stages", {})
+        for stage in reversed(CHECKPOINT_STAGES):
+            entry = stages.get(stage)
+            if self.is_valid(entry):
+                return stage, entry
+        return None, None
+
+    # ------------------------------------------------------------------
+    # Guardar / restaurar
+    # ------------------------------------------------------------------
+    def find_reusable(self, stage_keys):
+        """(etapa, entrada) del último checkpoint cuyas entradas no han cambiado.
+
+        - stage_keys: claves por etapa calculadas con utils.content_hash
+        """
+        if not stage_keys:
+            return None, None
+        stages = self.load_manifest().get("stages", {})
+        for stage in reversed(CHECKPOINT_STAGES):
+            entry = stages.get(stage)
+            if not self.is_valid(entry):
+                continue
+            key_stage = REUSE_KEY_STAGE.get(stage, stage)
+            stored_key = entry.get("stage_keys", {}).get(key_stage)
+            if stored_key and stored_key == stage_keys.get(key_stage):
+                return stage, entry
+        return None, None
+
+    def save(self, stage, roles, extra=None, stage_keys=None):
+        """Guarda un checkpoint de la etapa.
+
+        - roles: {'source_armature': obj, 'target_armature': obj, 'mesh': obj}
+        - extra: datos JSON adicionales que se guardan en el manifest
+        - stage_keys: claves de contenido de la conversión (para reutilizarlo al reconvertir)
+        Devuelve la ruta del .blend escrito o None si falló.
+        """
+        if stage not in CHECKPOINT_STAGES:
+            raise ValueError(f"Etapa de checkpoint desconocida: {stage}")
+
+        objects = _collect_hierarchy([obj for obj in roles.values() if obj is not None])
+        if not objects:
+            return None
+
+        start = time.perf_counter()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        filename = f"{stage}.blend"
+        filepath = self.directory / filename
+
+        with _packed_image_copies(objects):
+            bpy.data.libraries.write(
+                str(filepath), set(objects),
+                path_remap='ABSOLUTE', fake_user=False, compress=False
+            )
+
+        manifest = self.load_manifest()
+        stages = manifest.setdefault("stages", {})
+        # Las etapas posteriores quedan obsoletas
+        for later in CHECKPOINT_STAGES[stage_index(stage) + 1:]:
+            self._discard(stages, later)
+
+        stages[stage] = {
+            "file": filename,
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "blender": bpy.app.version_string,
+            "source_file": bpy.data.filepath,
+            "roles": {role: obj.name for role, obj in roles.items() if obj is not None},
+            "objects": [
+                {
+                    "name": obj.name,
+                    "collections": [c.name for c in obj.users_collection],
+                }
+                for obj in objects
+            ],
+            "stage_keys": stage_keys or {},
+            "extra": extra or {},
+        }
+        self.save_manifest(manifest)
+
+        elapsed = (time.perf_counter() - start) * 1000.0
+        print(f"💾 [CHECKPOINT] '{stage}' guardado ({len(objects)} objetos, {elapsed:.0f} ms): {filepath}")
+        return str(filepath)
+
+    def restore(self, stage, context, replace_objects=()):
+        """Sustituye los objetos actuales por los del checkpoint.
+
+        - replace_objects: objetos actuales a eliminar además de los que coinciden por nombre
+        Devuelve {rol: objeto restaurado}.
+        """
+        entry = self.load_manifest().get("stages", {}).get(stage)
+        if not self.is_valid(entry):
+            raise RuntimeError(f"No hay un checkpoint válido para '{stage}'")
+
+        filepath = str(self.directory / entry["file"])
+        names = [item["name"] for item in entry["objects"]]
+
+        if context.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+
+        # Eliminar los objetos actuales que el checkpoint reemplaza
+        to_remove = {obj.name: obj for obj in _collect_hierarchy(replace_objects)}
+        for name in names:
+            obj = bpy.data.objects.get(name)
+            if obj is not None:
+                to_remove[obj.name] = obj
+        for obj in to_remove.values():
+            bpy.data.objects.remove(obj, do_unlink=True)
+        try:
+            bpy.ops.outliner.orphans_purge(do_recursive=True)
+        except Exception as e:
+            print(f"⚠️ [CHECKPOINT] No se pudieron purgar huérfanos: {e}")
+
+        with bpy.data.libraries.load(filepath, link=False) as (data_from, data_to):
+            data_to.objects = [name for name in data_from.objects if name in names]
+
+        restored = {}
+        scene_collection = context.scene.collection
+        scene_collections = {c.name: c for c in scene_collection.children_recursive}
+        collections_by_object = {item["name"]: item["collections"] for item in entry["objects"]}
+
+        for obj in data_to.objects:
+            if obj is None:
+                continue
+            original_name = self._original_name(obj.name, names)
+            if original_name and obj.name != original_name:
+                obj.name = original_name
+            # Volver a enlazar en sus colecciones originales si siguen en la escena
+            targets = [scene_collections[name] for name in collections_by_object.get(original_name, [])
+                       if name in scene_collections]
+            for collection in targets or [scene_collection]:
+                collection.objects.link(obj)
+            restored[obj.name] = obj
+
+        roles = {
+            role: restored.get(name) or bpy.data.objects.get(name)
+            for role, name in entry.get("roles", {}).items()
+        }
+        print(f"♻️ [CHECKPOINT] '{stage}' restaurado ({len(restored)} objetos)")
+        return roles
+
+    @staticmethod
+    def _original_name(name, names):
+        """Nombre original de un objeto anexado (sin sufijo .001 si colisionó)"""
+        if name in names:
+            return name
+        base, _, suffix = name.rpartition('.')
+        if suffix.isdigit() and base in names:
+            return base
+        return None
+
+    def _discard(self, stages, stage):
+        entry = stages.pop(stage, None)
+        if entry:
+            try:
+                (self.directory / entry.get("file", "")).unlink()
+            except OSError:
+                pass
+
+    def clear(self):
+        """Elimina todos los checkpoints de este archivo"""
+        manifest = self.load_manifest()
+        stages = manifest.get("stages", {})
+        for stage in list(stages):
+            self._discard(stages, stage)
+        if self.manifest_path.exists():
+            self.manifest_path.unlink()
+        try:
+            self.directory.rmdir()
+        except OSError:
+            pass
+
+    def describe(self):
+        """Texto corto del último checkpoint válido (para el panel)"""
+        stage, entry = self.latest()
+        if not stage:
+            return ""
+        return f"{STAGE_LABELS.get(stage, stage)} ({entry.get('created', '?')})"
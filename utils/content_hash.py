@@ -0,0 +1,254 @@
+"""
+Hashes de contenido para la conversión incremental
+
+Cada etapa con checkpoint (ver utils/checkpoints.py) recibe una clave que
+depende de sus entradas y de la clave de la etapa anterior:
+
+    merge     = geometría + armatures + ajustes de preparación
+    rasterize = merge + materiales (node trees + píxeles) + ajustes de bake
+    weights   = rasterize + bone_mappings habilitados
+
+La etapa 'pose' no tiene entradas propias (solo los mappings y los armatures,
+ya incluidos): su checkpoint se reutiliza con la clave de 'weights'
+(ver utils/checkpoints.REUSE_KEY_STAGE).
+
+Al reconvertir, se reutiliza el último checkpoint cuya clave coincide, de modo
+que cambiar un mapping no repite los bakes y cambiar la resolución de bake
+no repite la unión de mallas.
+"""
+
+import hashlib
+import os
+import struct
+
+import bpy  # type: ignore
+import numpy as np
+
+from .weight_merge import read_vertex_weights
+
+
+# Campos de UniversalGTASettings que afectan a cada etapa
+MERGE_SETTINGS = (
+    'preserve_vertex_data', 'keep_vertex_colors', 'arm_spacing', 'leg_spacing',
+    'auto_apply_custom_pose', 'dedupe_datablocks',
+)
+RASTERIZE_SETTINGS = (
+    'material_process_mode', 'bake_resolution', 'use_texture_atlas', 'use_cpu_shader_eval',
+    'texture_budget_mode', 'texture_budget_mb',
+)
+
+
+def _new_hasher():
+    return hashlib.blake2b(digest_size=16)
+
+
+def _update_text(hasher, value):
+    hasher.update(str(value).encode('utf-8'))
+    hasher.update(b'\0')
+
+
+def _update_array(hasher, collection, attribute, dtype, components=1):
+    """Vuelca un atributo de una colección de bpy con foreach_get"""
+    count = len(collection)
+    _update_text(hasher, f"{attribute}:{count}")
+    if count == 0:
+        return
+    values = np.empty(count * components, dtype=dtype)
+    collection.foreach_get(attribute, values)
+    hasher.update(values.tobytes())
+
+
+def _update_matrix(hasher, matrix):
+    hasher.update(struct.pack(f"{len(matrix) * len(matrix[0])}f", *[v for row in matrix for v in row]))
+
+
+# ----------------------------------------------------------------------
+# Entradas individuales
+# ----------------------------------------------------------------------
+def hash_mesh_object(obj, hasher=None):
+    """Geometría, UVs, materiales asignados y pesos de un objeto malla"""
+    own = hasher is None
+    hasher = hasher or _new_hasher()
+    mesh = obj.data
+
+    _update_text(hasher, obj.name)
+    _update_matrix(hasher, obj.matrix_world)
+    _update_array(hasher, mesh.vertices, 'co', np.float32, 3)
+    _update_array(hasher, mesh.loops, 'vertex_index', np.int32)
+    _update_array(hasher, mesh.polygons, 'loop_start', np.int32)
+    _update_array(hasher, mesh.polygons, 'material_index', np.int32)
+    for uv_layer in mesh.uv_layers:
+        _update_text(hasher, uv_layer.name)
+        _update_array(hasher, uv_layer.data, 'uv', np.float32, 2)
+
+    _update_text(hasher, [slot.material.name if slot.material else "" for slot in obj.material_slots])
+    _update_text(hasher, [vg.name for vg in obj.vertex_groups])
+    if obj.vertex_groups:
+        verts, groups, weights = read_vertex_weights(obj)
+        _update_text(hasher, f"weights:{len(verts)}")
+        hasher.update(verts.tobytes())
+        hasher.update(groups.tobytes())
+        hasher.update(weights.tobytes())
+
+    shape_keys = mesh.shape_keys
+    if shape_keys:
+        for key_block in shape_keys.key_blocks:
+            _update_text(hasher, f"{key_block.name}:{key_block.value}")
+            _update_array(hasher, key_block.data, 'co', np.float32, 3)
+
+    _update_text(hasher, [(m.name, m.type) for m in obj.modifiers])
+    return hasher.hexdigest() if own else hasher
+
+
+def hash_armature(obj, hasher=None):
+    """Huesos (rest) y pose actual de un armature"""
+    own = hasher is None
+    hasher = hasher or _new_hasher()
+    _update_text(hasher, obj.name)
+    _update_matrix(hasher, obj.matrix_world)
+    for bone in obj.data.bones:
+        _update_text(hasher, f"{bone.name}:{bone.parent.name if bone.parent else ''}")
+        _update_matrix(hasher, bone.matrix_local)
+        _update_text(hasher, round(bone.length, 6))
+    for pose_bone in obj.pose.bones:
+        _update_matrix(hasher, pose_bone.matrix_basis)
+    return hasher.hexdigest() if own else hasher
+
+
+def hash_image(image):
+    """Contenido de una imagen: datos empaquetados, archivo en disco o píxeles"""
+    hasher = _new_hasher()
+    _update_text(hasher, f"{image.name}:{image.source}:{tuple(image.size)}")
+    _update_text(hasher, image.colorspace_settings.name)
+
+    if image.packed_file:
+        hasher.update(bytes(image.packed_file.data))
+        return hasher.hexdigest()
+
+    filepath = bpy.path.abspath(image.filepath) if image.filepath else ""
+    if filepath and os.path.isfile(filepath) and not image.is_dirty:
+        stat = os.stat(filepath)
+        _update_text(hasher, f"{os.path.normcase(filepath)}:{stat.st_size}:{stat.st_mtime_ns}")
+        return hasher.hexdigest()
+
+    if image.has_data or image.source == 'GENERATED':
+        pixel_count = len(image.pixels)
+        if pixel_count:
+            pixels = np.empty(pixel_count, dtype=np.float32)
+            image.pixels.foreach_get(pixels)
+            hasher.update(pixels.tobytes())
+    return hasher.hexdigest()
+
+
+def _socket_value(socket):
+    value = getattr(socket, 'default_value', None)
+    if value is None:
+        return None
+    try:
+        return tuple(round(v, 6) for v in value)
+    except TypeError:
+        return round(value, 6) if isinstance(value, float) else value
+
+
+def hash_node_tree(node_tree, hasher=None, image_hashes=None, _visited=None):
+    """Nodos, valores de entrada, enlaces, imágenes y grupos anidados"""
+    own = hasher is None
+    hasher = hasher or _new_hasher()
+    image_hashes = image_hashes if image_hashes is not None else {}
+    _visited = _visited if _visited is not None else set()
+
+    if node_tree is None or node_tree.name in _visited:
+        return hasher.hexdigest() if own else hasher
+    _visited.add(node_tree.name)
+
+    for node in sorted(node_tree.nodes, key=lambda n: n.name):
+        _update_text(hasher, f"{node.name}:{node.bl_idname}:{getattr(node, 'mute', False)}")
+        for attribute in ('blend_type', 'operation', 'interpolation', 'extension', 'data_type', 'use_clamp'):
+            if hasattr(node, attribute):
+                _update_text(hasher, f"{attribute}={getattr(node, attribute)}")
+        for socket in node.inputs:
+            if not socket.is_linked:
+                _update_text(hasher, f"{socket.identifier}={_socket_value(socket)}")
+
+        image = getattr(node, 'image', None) if node.type == 'TEX_IMAGE' else None
+        if image is not None:
+            if image.name not in image_hashes:
+                image_hashes[image.name] = hash_image(image)
+            _update_text(hasher, image_hashes[image.name])
+
+        if node.type == 'GROUP' and node.node_tree:
+            hash_node_tree(node.node_tree, hasher, image_hashes, _visited)
+
+    links = sorted(
+        f"{link.from_node.name}.{link.from_socket.identifier}>{link.to_node.name}.{link.to_socket.identifier}"
+        for link in node_tree.links
+    )
+    _update_text(hasher, links)
+    return hasher.hexdigest() if own else hasher
+
+
+def hash_material(material, image_hashes=None):
+    hasher = _new_hasher()
+    _update_text(hasher, f"{material.name}:{material.use_nodes}:{tuple(material.diffuse_color)}")
+    if material.use_nodes and material.node_tree:
+        hash_node_tree(material.node_tree, hasher, image_hashes)
+    return hasher.hexdigest()
+
+
+def hash_bone_mappings(bone_mappings):
+    """Mappings habilitados, en orden (el orden decide qué mapping 'gana')"""
+    hasher = _new_hasher()
+    for mapping in bone_mappings:
+        if mapping.enabled and mapping.source_bone and mapping.target_bone:
+            _update_text(hasher, f"{mapping.source_bone}>{mapping.target_bone}")
+    return hasher.hexdigest()
+
+
+def hash_settings(settings, fields):
+    hasher = _new_hasher()
+    for field in fields:
+        _update_text(hasher, f"{field}={getattr(settings, field, None)}")
+    return hasher.hexdigest()
+
+
+def _combine(*parts):
+    hasher = _new_hasher()
+    for part in parts:
+        _update_text(hasher, part)
+    return hasher.hexdigest()
+
+
+# ----------------------------------------------------------------------
+# Claves por etapa
+# ----------------------------------------------------------------------
+def compute_stage_keys(settings, meshes):
+    """Claves acumulativas de cada etapa con checkpoint.
+
+    - settings: UniversalGTASettings
+    - meshes: mallas que se van a unir (hijos del source armature)
+    Devuelve {'merge': ..., 'rasterize': ..., 'weights': ...}
+    """
+    geometry = _new_hasher()
+    for obj in sorted(meshes, key=lambda o: o.name):
+        hash_mesh_object(obj, geometry)
+    for armature in (settings.source_armature, settings.target_armature):
+        if armature is not None:
+            hash_armature(armature, geometry)
+
+    image_hashes = {}
+    materials = {}
+    for obj in meshes:
+        for slot in obj.material_slots:
+            if slot.material and slot.material.name not in materials:
+                materials[slot.material.name] = hash_material(slot.material, image_hashes)
+    material_part = _combine(*sorted(materials.items()))
+
+    merge_key = _combine("merge", geometry.hexdigest(), hash_settings(settings, MERGE_SETTINGS))
+    rasterize_key = _combine("rasterize", merge_key, material_part, hash_settings(settings, RASTERIZE_SETTINGS))
+    weights_key = _combine("weights", rasterize_key, hash_bone_mappings(settings.bone_mappings))
+
+    return {
+        'merge': merge_key,
+        'rasterize': rasterize_key,
+        'weights': weights_key,
+    }
@@ -0,0 +1,158 @@
+"""
+Consolidación de materiales e imágenes duplicados
+
+Los personajes de Mixamo/MMD suelen traer materiales idénticos (`Body`,
+`Body.001`, ...) y la misma imagen cargada varias veces. Cada copia se
+bakeaba y exportaba por separado, y cleanup_texture_names() chocaba al
+quitar los sufijos `.001`.
+
+Antes de la rasterización:
+
+1. Imágenes: se agrupan por contenido (datos empaquetados, bytes del
+   archivo o píxeles, más espacio de color y modo alpha) y cada grupo se
+   reduce a una sola imagen (ID.user_remap + remove).
+2. Materiales: con las imágenes ya unificadas, se agrupan por el hash del
+   grafo (hash_material_graph, independiente del nombre) y los ajustes de
+   superficie. Los slots de todas las mallas pasan a la copia canónica.
+
+La copia canónica es la de nombre sin sufijo numérico (o la más corta), así
+que `Body.001` se funde en `Body`.
+"""
+
+import os
+import re
+
+import bpy  # type: ignore
+import numpy as np
+
+from .bake_cache import hash_material_graph
+from .content_hash import _new_hasher, _update_text
+
+
+NUMERIC_SUFFIX = re.compile(r"\.[0-9]+$")
+FILE_CHUNK_SIZE = 1 << 20
+
+
+def strip_numeric_suffix(name):
+    return NUMERIC_SUFFIX.sub("", name)
+
+
+def _canonical_sort_key(datablock):
+    name = datablock.name
+    return (bool(NUMERIC_SUFFIX.search(name)), len(name), name)
+
+
+def hash_image_content(image):
+    """Hash del contenido de la imagen, sin depender de su nombre ni ruta (None si no hay datos)"""
+    hasher = _new_hasher()
+    _update_text(hasher, f"{image.source}:{image.colorspace_settings.name}:{image.alpha_mode}")
+
+    if image.packed_file:
+        hasher.update(bytes(image.packed_file.data))
+        return hasher.hexdigest()
+
+    filepath = bpy.path.abspath(image.filepath) if image.filepath else ""
+    if image.source == 'FILE' and filepath and os.path.isfile(filepath) and not image.is_dirty:
+        with open(filepath, "rb") as handle:
+            for chunk in iter(lambda: handle.read(FILE_CHUNK_SIZE), b""):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    if image.has_data or image.source == 'GENERATED':
+        pixel_count = len(image.pixels)
+        if pixel_count:
+            _update_text(hasher, f"{tuple(image.size)}:{image.channels}")
+            pixels = np.empty(pixel_count, dtype=np.float32)
+            image.pixels.foreach_get(pixels)
+            hasher.update(pixels.tobytes())
+            return hasher.hexdigest()
+    return None
+
+
+def hash_material_content(material, image_hashes=None):
+    """Hash del material sin su nombre: grafo de nodos y ajustes de superficie"""
+    hasher = _new_hasher()
+    _update_text(hasher, hash_material_graph(material, image_hashes))
+    for attribute in ('blend_method', 'alpha_threshold', 'use_backface_culling', 'surface_render_method'):
+        if hasattr(material, attribute):
+            _update_text(hasher, f"{attribute}={getattr(material, attribute)}")
+    return hasher.hexdigest()
+
+
+def _merge_groups(groups, collection, label):
+    """Funde cada grupo en su copia canónica. Devuelve {nombre eliminado: nombre canónico}"""
+    merged = {}
+    for datablocks in groups.values():
+        if len(datablocks) < 2:
+            continue
+        datablocks.sort(key=_canonical_sort_key)
+        canonical = datablocks[0]
+        for duplicate in datablocks[1:]:
+            name = duplicate.name
+            try:
+                duplicate.user_remap(canonical)
+                collection.remove(duplicate)
+                merged[name] = canonical.name
+            except Exception as e:
+                print(f"⚠️ [DEDUPE] No se pudo fundir {label} '{name}' en '{canonical.name}': {e}")
+    return merged
+
+
+def dedupe_images():
+    """Une las imágenes con el mismo contenido"""
+    groups = {}
+    for image in bpy.data.images:
+        if image.source not in {'FILE', 'GENERATED'} or image.type != 'IMAGE':
+            continue
+        try:
+            key = hash_image_content(image)
+        except Exception as e:
+            print(f"⚠️ [DEDUPE] No se pudo leer la imagen '{image.name}': {e}")
+            continue
+        if key is not None:
+            groups.setdefault(key, []).append(image)
+    return _merge_groups(groups, bpy.data.images, "imagen")
+
+
+def dedupe_materials():
+    """Une los materiales con el mismo grafo y remapea los slots de las mallas"""
+    groups = {}
+    image_hashes = {}
+    for material in bpy.data.materials:
+        if getattr(material, 'is_grease_pencil', False) or material.library is not None:
+            continue
+        try:
+            key = hash_material_content(material, image_hashes)
+        except Exception as e:
+            print(f"⚠️ [DEDUPE] No se pudo analizar el material '{material.name}': {e}")
+            continue
+        groups.setdefault(key, []).append(material)
+    return _merge_groups(groups, bpy.data.materials, "material")
+
+
+def dedupe_datablocks():
+    """Imágenes primero (los materiales que solo difieren en la copia de la imagen
+    pasan a ser idénticos) y después materiales. Devuelve (imágenes, materiales) fundidos."""
+    merged_images = dedupe_images()
+    merged_materials = dedupe_materials()
+    return merged_images, merged_materials
+
+
+def rename_without_suffix(collection):
+    """Quita los sufijos `.001` sin chocar con otro datablock del mismo nombre.
+
+    Devuelve (renombrados, conservados por colisión).
+    """
+    renamed = 0
+    kept = 0
+    for datablock in sorted(collection, key=_canonical_sort_key):
+        original_name = datablock.name
+        new_name = strip_numeric_suffix(original_name)
+        if new_name == original_name:
+            continue
+        if collection.get(new_name) is not None:
+            kept += 1
+            continue
+        datablock.name = new_name
+        renamed += 1
+    return renamed, kept
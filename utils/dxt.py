@@ -0,0 +1,242 @@
+"""
+Codificador DXT (BC1/BC2/BC3) y escritor DDS
+
+Las texturas de GTA SA se empaquetan en el TXD comprimidas en DXT. Antes la
+exportación dejaba PNG/TGA y una herramienta externa hacía la compresión;
+este módulo genera directamente el .dds listo para el TXD:
+
+- Tamaño forzado a potencia de dos dentro de los límites del juego
+  (GTA_MIN_SIZE..GTA_MAX_SIZE por lado).
+- Mipmaps con filtro de caja 2x2 hasta 1x1.
+- Compresión por bloques de 4x4 vectorizada con NumPy: todos los bloques
+  de un nivel se procesan a la vez (ajuste por rango mínimo/máximo, paletas
+  y elección de índices por distancia mínima).
+
+DXT1 se usa para texturas opacas (o con alpha de 1 bit), DXT3 para alpha
+explícito de 4 bits y DXT5 para alpha interpolado.
+"""
+
+import struct
+
+import numpy as np
+
+
+GTA_MIN_SIZE = 4
+GTA_MAX_SIZE = 2048
+
+DXT_FORMATS = ('DXT1', 'DXT3', 'DXT5')
+ALPHA_CUTOFF = 128
+
+_DDSD_FLAGS = 0x1 | 0x2 | 0x4 | 0x1000 | 0x80000  # CAPS | HEIGHT | WIDTH | PIXELFORMAT | LINEARSIZE
+_DDSD_MIPMAPCOUNT = 0x20000
+_DDPF_FOURCC = 0x4
+_DDSCAPS_TEXTURE = 0x1000
+_DDSCAPS_COMPLEX = 0x8
+_DDSCAPS_MIPMAP = 0x400000
+
+
+# ----------------------------------------------------------------------
+# Tamaños y mipmaps
+# ----------------------------------------------------------------------
+def power_of_two_size(value, min_size=GTA_MIN_SIZE, max_size=GTA_MAX_SIZE):
+    """Potencia de dos más cercana (en escala logarítmica) dentro de los límites"""
+    value = max(1, int(value))
+    power = 1 << int(round(np.log2(value)))
+    return int(min(max_size, max(min_size, power)))
+
+
+def resize_rgba(pixels, width, height):
+    """Remuestreo bilineal de una imagen (alto, ancho, 4) float32"""
+    src_height, src_width = pixels.shape[:2]
+    if (src_width, src_height) == (width, height):
+        return pixels
+
+    def sample_axis(src, dst):
+        coords = (np.arange(dst, dtype=np.float32) + 0.5) * (src / dst) - 0.5
+        coords = np.clip(coords, 0, src - 1)
+        low = np.floor(coords).astype(np.int64)
+        high = np.minimum(low + 1, src - 1)
+        return low, high, (coords - low).astype(np.float32)
+
+    y0, y1, fy = sample_axis(src_height, height)
+    x0, x1, fx = sample_axis(src_width, width)
+    top = pixels[y0][:, x0] * (1 - fx)[None, :, None] + pixels[y0][:, x1] * fx[None, :, None]
+    bottom = pixels[y1][:, x0] * (1 - fx)[None, :, None] + pixels[y1][:, x1] * fx[None, :, None]
+    return top * (1 - fy)[:, None, None] + bottom * fy[:, None, None]
+
+
+def downsample_box(pixels):
+    """Siguiente nivel de mipmap (filtro de caja 2x2)"""
+    height, width = pixels.shape[:2]
+    if height > 1:
+        pixels = (pixels[0::2] + pixels[1::2]) * 0.5
+    if width > 1:
+        pixels = (pixels[:, 0::2] + pixels[:, 1::2]) * 0.5
+    return pixels
+
+
+def build_mipmaps(pixels):
+    """[nivel0, nivel1, ...] hasta 1x1 (float32, orden de filas de arriba abajo)"""
+    levels = [pixels]
+    while max(levels[-1].shape[:2]) > 1:
+        levels.append(downsample_box(levels[-1]))
+    return levels
+
+
+# ----------------------------------------------------------------------
+# Compresión por bloques
+# ----------------------------------------------------------------------
+def _to_blocks(pixels):
+    """(alto, ancho, 4) uint8 -> (N, 16, 4) en orden de bloques DXT"""
+    height, width = pixels.shape[:2]
+    padded_height = max(4, (height + 3) // 4 * 4)
+    padded_width = max(4, (width + 3) // 4 * 4)
+    if (padded_height, padded_width) != (height, width):
+        pixels = np.pad(pixels, ((0, padded_height - height), (0, padded_width - width), (0, 0)), mode='edge')
+    blocks = pixels.reshape(padded_height // 4, 4, padded_width // 4, 4, 4).transpose(0, 2, 1, 3, 4)
+    return blocks.reshape(-1, 16, 4)
+
+
+def _pack_565(rgb):
+    quantized = np.rint(rgb * np.array([31.0, 63.0, 31.0]) / 255.0).astype(np.uint16)
+    return (quantized[..., 0] << 11) | (quantized[..., 1] << 5) | quantized[..., 2]
+
+
+def _unpack_565(packed):
+    r = (packed >> 11) & 0x1F
+    g = (packed >> 5) & 0x3F
+    b = packed & 0x1F
+    return np.stack(((r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)), axis=-1).astype(np.float32)
+
+
+def _pack_indices(indices, bits):
+    shifts = np.arange(indices.shape[1], dtype=np.uint64) * np.uint64(bits)
+    return np.bitwise_or.reduce(indices.astype(np.uint64) << shifts, axis=1)
+
+
+def _encode_color_blocks(blocks, punch_through=False):
+    """Bloques de color DXT (8 bytes cada uno).
+
+    punch_through=True (solo DXT1) usa el modo de 3 colores en los bloques
+    con píxeles transparentes (índice 3 = transparente).
+    """
+    rgb = blocks[..., :3].astype(np.float32)
+    low = rgb.min(axis=1)
+    high = rgb.max(axis=1)
+    inset = (high - low) / 16.0
+    color0 = _pack_565(high - inset)
+    color1 = _pack_565(low + inset)
+
+    transparent = blocks[..., 3] < ALPHA_CUTOFF if punch_through else np.zeros(blocks.shape[:2], dtype=bool)
+    three_color = transparent.any(axis=1)
+
+    # Modo de 4 colores: color0 > color1; modo de 3 colores: color0 <= color1
+    swap = np.where(three_color, color0 > color1, color0 < color1)
+    color0, color1 = np.where(swap, color1, color0), np.where(swap, color0, color1)
+
+    c0 = _unpack_565(color0)
+    c1 = _unpack_565(color1)
+    palette = np.stack((
+        c0,
+        c1,
+        np.where(three_color[:, None], (c0 + c1) / 2.0, (2.0 * c0 + c1) / 3.0),
+        np.where(three_color[:, None], 0.0, (c0 + 2.0 * c1) / 3.0),
+    ), axis=1)
+
+    distances = ((rgb[:, :, None, :] - palette[:, None, :, :]) ** 2).sum(axis=-1)
+    # En modo de 3 colores el índice 3 queda reservado para la transparencia
+    distances[:, :, 3] = np.where(three_color[:, None], np.inf, distances[:, :, 3])
+    indices = distances.argmin(axis=2)
+    indices[transparent] = 3
+    # Bloque de un solo color: índice 0 (válido en ambos modos)
+    indices[color0 == color1] = np.where(transparent[color0 == color1], 3, 0)
+
+    out = np.empty((len(blocks), 8), dtype=np.uint8)
+    out[:, 0:2] = color0.astype('<u2').view(np.uint8).reshape(-1, 2)
+    out[:, 2:4] = color1.astype('<u2').view(np.uint8).reshape(-1, 2)
+    out[:, 4:8] = _pack_indices(indices, 2).astype('<u4').view(np.uint8).reshape(-1, 4)
+    return out
+
+
+def _encode_explicit_alpha(blocks):
+    """Alpha DXT3: 4 bits por píxel"""
+    alpha = np.rint(blocks[..., 3].astype(np.float32) / 17.0).astype(np.uint64)
+    return _pack_indices(alpha, 4).astype('<u8').view(np.uint8).reshape(-1, 8)
+
+
+def _encode_interpolated_alpha(blocks):
+    """Alpha DXT5: dos extremos de 8 bits + índices de 3 bits (modo de 8 valores)"""
+    alpha = blocks[..., 3].astype(np.float32)
+    alpha0 = alpha.max(axis=1)
+    alpha1 = alpha.min(axis=1)
+    weights = np.array([0, 7, 1, 2, 3, 4, 5, 6], dtype=np.float32) / 7.0
+    palette = np.rint(alpha0[:, None] * (1.0 - weights) + alpha1[:, None] * weights)
+    indices = np.abs(alpha[:, :, None] - palette[:, None, :]).argmin(axis=2)
+    indices[alpha0 == alpha1] = 0
+
+    out = np.empty((len(blocks), 8), dtype=np.uint8)
+    out[:, 0] = alpha0.astype(np.uint8)
+    out[:, 1] = alpha1.astype(np.uint8)
+    out[:, 2:8] = _pack_indices(indices, 3).astype('<u8').view(np.uint8).reshape(-1, 8)[:, :6]
+    return out
+
+
+def compress_level(pixels, dxt_format):
+    """Comprime un nivel (alto, ancho, 4) uint8 de arriba abajo"""
+    blocks = _to_blocks(pixels)
+    if dxt_format == 'DXT1':
+        return _encode_color_blocks(blocks, punch_through=True).tobytes()
+    color = _encode_color_blocks(blocks)
+    if dxt_format == 'DXT3':
+        alpha = _encode_explicit_alpha(blocks)
+    else:
+        alpha = _encode_interpolated_alpha(blocks)
+    return np.hstack((alpha, color)).tobytes()
+
+
+def choose_dxt_format(pixels):
+    """DXT1 si el alpha es opaco o binario, DXT5 si tiene degradados"""
+    if pixels.shape[-1] < 4:
+        return 'DXT1'
+    alpha = pixels[..., 3]
+    if alpha.min() >= 255 - 1:
+        return 'DXT1'
+    if np.all((alpha <= 1) | (alpha >= 254)):
+        return 'DXT1'
+    return 'DXT5'
+
+
+# ----------------------------------------------------------------------
+# DDS
+# ----------------------------------------------------------------------
+def _dds_header(width, height, dxt_format, mip_count, top_level_size):
+    flags = _DDSD_FLAGS | (_DDSD_MIPMAPCOUNT if mip_count > 1 else 0)
+    caps = _DDSCAPS_TEXTURE | (_DDSCAPS_COMPLEX | _DDSCAPS_MIPMAP if mip_count > 1 else 0)
+    pixel_format = struct.pack("<II4sIIIII", 32, _DDPF_FOURCC, dxt_format.encode('ascii'), 0, 0, 0, 0, 0)
+    header = struct.pack("<7I", 124, flags, height, width, top_level_size, 0, mip_count)
+    header += b"\0" * (11 * 4) + pixel_format
+    header += struct.pack("<5I", caps, 0, 0, 0, 0)
+    return b"DDS " + header
+
+
+def encode_dds(pixels, dxt_format='AUTO', mipmaps=True, max_size=GTA_MAX_SIZE):
+    """DDS comprimido a partir de píxeles uint8 (alto, ancho, 3|4) en orden de Blender.
+
+    Devuelve (bytes, formato DXT usado, (ancho, alto)).
+    """
+    if pixels.shape[-1] == 3:
+        pixels = np.concatenate((pixels, np.full(pixels.shape[:2] + (1,), 255, dtype=np.uint8)), axis=-1)
+    # DDS empieza por la fila superior
+    pixels = pixels[::-1]
+    if dxt_format not in DXT_FORMATS:
+        dxt_format = choose_dxt_format(pixels)
+
+    height, width = pixels.shape[:2]
+    target_width = power_of_two_size(width, max_size=max_size)
+    target_height = power_of_two_size(height, max_size=max_size)
+    level = resize_rgba(pixels.astype(np.float32), target_width, target_height)
+
+    levels = build_mipmaps(level) if mipmaps else [level]
+    data = [compress_level(np.clip(np.rint(mip), 0, 255).astype(np.uint8), dxt_format) for mip in levels]
+    header = _dds_header(target_width, target_height, dxt_format, len(levels), len(data[0]))
+    return header + b"".join(data), dxt_format, (target_width, target_height)
@@ -0,0 +1,105 @@
+"""
+Manifiesto de exportación de texturas
+
+Cada exportación reescribía todas las texturas aunque no hubieran cambiado
+(lento en carpetas de red). El manifiesto (`.ugta_texture_manifest.json`
+dentro de la carpeta de exportación) guarda por archivo:
+
+- Hash del contenido exportado (píxeles + formato)
+- Dimensiones y formato
+- Tamaño y fecha del archivo escrito (para detectar cambios externos)
+- `alias_of`: archivo original si la textura es idéntica a otra
+
+En la siguiente exportación se omiten los archivos cuyo hash coincide y que
+siguen intactos en disco. Las imágenes con el mismo contenido y distinto
+nombre se codifican una sola vez; el resto se enlaza (hardlink) o se copia.
+"""
+
+import json
+import os
+import shutil
+
+from .content_hash import _new_hasher, _update_text
+
+
+MANIFEST_NAME = ".ugta_texture_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def hash_pixels(pixels, file_format, extra=""):
+    """Hash del contenido que se va a escribir (array de píxeles + formato)"""
+    hasher = _new_hasher()
+    _update_text(hasher, f"v{MANIFEST_VERSION}:{file_format}:{pixels.dtype}:{pixels.shape}:{extra}")
+    hasher.update(pixels.tobytes())
+    return hasher.hexdigest()
+
+
+def _file_state(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class ExportManifest:
+    """Estado de las texturas exportadas en una carpeta"""
+
+    def __init__(self, export_path):
+        self.export_path = export_path
+        self.path = os.path.join(export_path, MANIFEST_NAME)
+        self.files = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == MANIFEST_VERSION:
+            self.files = data.get("files", {})
+
+    def is_current(self, filename, content_hash):
+        """True si el archivo ya está exportado con ese contenido y no se tocó en disco"""
+        entry = self.files.get(filename)
+        if not entry or entry.get("hash") != content_hash:
+            return False
+        state = _file_state(os.path.join(self.export_path, filename))
+        return state is not None and list(state) == [entry.get("size"), entry.get("mtime_ns")]
+
+    def record(self, filename, content_hash, width, height, file_format, alias_of=None):
+        state = _file_state(os.path.join(self.export_path, filename))
+        if state is None:
+            self.files.pop(filename, None)
+            return
+        entry = {
+            "hash": content_hash,
+            "width": width,
+            "height": height,
+            "format": file_format,
+            "size": state[0],
+            "mtime_ns": state[1],
+        }
+        if alias_of:
+            entry["alias_of"] = alias_of
+        self.files[filename] = entry
+
+    def save(self):
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as handle:
+                json.dump({"version": MANIFEST_VERSION, "files": self.files}, handle, indent=2, sort_keys=True)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ [MANIFEST] No se pudo guardar el manifiesto: {e}")
+
+
+def write_alias(source_path, alias_path):
+    """Crea alias_path con el contenido de source_path (hardlink o copia)"""
+    if os.path.exists(alias_path):
+        os.remove(alias_path)
+    try:
+        os.link(source_path, alias_path)
+    except OSError:
+        shutil.copyfile(source_path, alias_path)
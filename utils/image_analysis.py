@@ -0,0 +1,155 @@
+"""
+Análisis vectorizado de imágenes
+
+Cada acceso `image.pixels[i]` desde Python materializa el buffer completo de
+la imagen, así que recorrer píxeles en un bucle cuesta segundos en una
+textura de 2K. Aquí los píxeles se leen UNA vez con foreach_get a un array
+NumPy y las estadísticas se calculan vectorizadas:
+
+- Color medio (RGBA)
+- Cobertura de alpha (fracción de píxeles opacos / transparentes, alpha mínimo)
+- Totalmente blanca / totalmente vacía
+- Número de colores únicos (cuantizados a 8 bits, bajo demanda)
+
+Los resultados se memorizan por imagen con una clave que incluye su estado
+de modificación (tamaño, origen, archivo y fecha, datos empaquetados). Las
+imágenes modificadas en memoria (is_dirty) no se memorizan: no hay forma
+fiable de saber si sus píxeles cambiaron desde la última lectura.
+"""
+
+import os
+
+import bpy  # type: ignore
+import numpy as np
+
+
+OPAQUE_THRESHOLD = 0.99
+EMPTY_ALPHA_THRESHOLD = 0.05
+WHITE_THRESHOLD = 0.95
+
+_stats_cache = {}
+_unique_cache = {}
+
+
+class ImageStats:
+    """Estadísticas de una imagen (calculadas una sola vez)"""
+
+    __slots__ = ('width', 'height', 'mean_color', 'min_alpha', 'opaque_fraction',
+                 'transparent_pixels', 'is_all_white', 'is_empty')
+
+    def __init__(self, width, height, mean_color, min_alpha, opaque_fraction,
+                 transparent_pixels, is_all_white, is_empty):
+        self.width = width
+        self.height = height
+        self.mean_color = mean_color
+        self.min_alpha = min_alpha
+        self.opaque_fraction = opaque_fraction
+        self.transparent_pixels = transparent_pixels
+        self.is_all_white = is_all_white
+        self.is_empty = is_empty
+
+    @property
+    def has_transparency(self):
+        return self.transparent_pixels > 0
+
+    def __repr__(self):
+        return (f"ImageStats({self.width}x{self.height}, mean={tuple(round(c, 3) for c in self.mean_color)}, "
+                f"opaque={self.opaque_fraction:.3f}, white={self.is_all_white}, empty={self.is_empty})")
+
+
+def image_state_key(image):
+    """Clave de memoización de la imagen o None si no se puede memorizar"""
+    if image.is_dirty:
+        return None
+    parts = [image.as_pointer(), image.name, image.source, tuple(image.size), image.alpha_mode]
+    if image.packed_file:
+        parts.append(("packed", image.packed_file.size))
+    filepath = bpy.path.abspath(image.filepath) if image.filepath else ""
+    if filepath and os.path.isfile(filepath):
+        stat = os.stat(filepath)
+        parts.append((filepath, stat.st_size, stat.st_mtime_ns))
+    elif image.source == 'GENERATED':
+        parts.append((tuple(image.generated_color), image.generated_type))
+    return tuple(parts)
+
+
+def read_pixels(image):
+    """Píxeles RGBA de la imagen como array (height, width, 4) o None si no tiene datos"""
+    try:
+        pixel_count = len(image.pixels)
+    except Exception:
+        return None
+    width, height = image.size
+    if pixel_count == 0 or width <= 0 or height <= 0 or pixel_count != width * height * 4:
+        return None
+    pixels = np.empty(pixel_count, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    return pixels.reshape(height, width, 4)
+
+
+def _memoized(cache, image, compute):
+    key = image_state_key(image)
+    if key is not None and key in cache:
+        return cache[key]
+    result = compute()
+    if key is not None:
+        cache[key] = result
+    return result
+
+
+def _compute_stats(image):
+    pixels = read_pixels(image)
+    if pixels is None:
+        return None
+    width, height = image.size
+    rgb = pixels[..., :3]
+    alpha = pixels[..., 3]
+    if image.alpha_mode == 'NONE' or image.channels < 4:
+        alpha = np.ones_like(alpha)
+
+    transparent_pixels = int(np.count_nonzero(alpha < OPAQUE_THRESHOLD))
+    return ImageStats(
+        width=width,
+        height=height,
+        mean_color=tuple(float(c) for c in pixels.reshape(-1, 4).mean(axis=0)),
+        min_alpha=float(alpha.min()),
+        opaque_fraction=1.0 - transparent_pixels / float(alpha.size),
+        transparent_pixels=transparent_pixels,
+        is_all_white=bool(rgb.min() >= WHITE_THRESHOLD),
+        is_empty=bool(alpha.max() <= EMPTY_ALPHA_THRESHOLD),
+    )
+
+
+def get_image_stats(image):
+    """ImageStats de la imagen (memorizado) o None si no tiene píxeles"""
+    if image is None:
+        return None
+    return _memoized(_stats_cache, image, lambda: _compute_stats(image))
+
+
+def unique_color_count(image):
+    """Número de colores RGBA distintos (cuantizados a 8 bits por canal)"""
+    if image is None:
+        return 0
+
+    def compute():
+        pixels = read_pixels(image)
+        if pixels is None:
+            return 0
+        quantized = np.clip(np.rint(pixels.reshape(-1, 4) * 255.0), 0, 255).astype(np.uint32)
+        packed = (quantized[:, 0] << 24) | (quantized[:, 1] << 16) | (quantized[:, 2] << 8) | quantized[:, 3]
+        return int(np.unique(packed).size)
+
+    return _memoized(_unique_cache, image, compute)
+
+
+def clear_image_stats(image=None):
+    """Olvida las estadísticas memorizadas (de una imagen o de todas)"""
+    if image is None:
+        _stats_cache.clear()
+        _unique_cache.clear()
+        return
+    pointer = image.as_pointer()
+    for cache in (_stats_cache, _unique_cache):
+        for key in [key for key in cache if key[0] == pointer]:
+            del cache[key]
@@ -0,0 +1,122 @@
+"""
+Modo ligero ("lean mode") para la conversión GTA SA
+
+Durante la conversión se encadenan cientos de mode_set, select_all,
+modifier_apply y bakes. Fuera de este modo cada uno de ellos puede dejar
+historial de deshacer (global undo en memoria), provocar recompilaciones de
+shaders en los viewports con sombreado Material/Rendered y forzar
+actualizaciones del depsgraph.
+
+Con el ajuste lean_conversion (desactivado por defecto: cambia temporalmente
+la preferencia de undo global del usuario), lean_mode() los suspende mientras
+dura la conversión:
+- Desactiva el global undo (no se guardan instantáneas de memoria intermedias).
+- Cambia los viewports Material/Rendered a Solid (sin recompilar shaders).
+- Agrupa en una sola al salir las actualizaciones del depsgraph: todo el
+  addon llama a update_view_layer() en lugar de view_layer.update().
+Al terminar restaura todo; el propio operador (bl_options 'UNDO') registra un
+único paso de deshacer para toda la conversión.
+"""
+
+from contextlib import contextmanager
+
+import bpy  # type: ignore
+
+
+_lean_state = None
+
+
+def is_lean_mode_active():
+    """True si hay una conversión en modo ligero en curso"""
+    return _lean_state is not None
+
+
+def update_view_layer(context=None):
+    """view_layer.update() que se agrupa mientras el modo ligero está activo.
+
+    Los operadores de bake evalúan el depsgraph por su cuenta, así que las
+    actualizaciones intermedias pueden esperar a la salida del modo ligero.
+    """
+    if _lean_state is not None:
+        _lean_state["pending_updates"] += 1
+        return
+    context = context or bpy.context
+    context.view_layer.update()
+
+
+def _iter_view3d_spaces():
+    window_manager = bpy.context.window_manager
+    if window_manager is None:
+        return
+    for window in window_manager.windows:
+        for area in window.screen.areas:
+            if area.type != 'VIEW_3D':
+                continue
+            for space in area.spaces:
+                if space.type == 'VIEW_3D':
+                    yield space
+
+
+def _suspend_viewports(state):
+    for space in _iter_view3d_spaces():
+        shading = space.shading
+        if shading.type in {'MATERIAL', 'RENDERED'}:
+            state["shading"].append((space, shading.type))
+            shading.type = 'SOLID'
+
+
+def _restore_viewports(state):
+    for space, shading_type in state["shading"]:
+        try:
+            space.shading.type = shading_type
+        except ReferenceError:
+            # El área se cerró durante la conversión
+            pass
+
+
+@contextmanager
+def lean_mode(context=None, enabled=True):
+    """Suspende undo global, shaders de viewport y actualizaciones intermedias.
+
+    Anidable: solo el contexto más externo guarda y restaura el estado.
+    """
+    global _lean_state
+    if not enabled or _lean_state is not None or bpy.app.background:
+        yield _lean_state
+        return
+
+    context = context or bpy.context
+    edit_prefs = context.preferences.edit
+    state = {
+        "use_global_undo": edit_prefs.use_global_undo,
+        "shading": [],
+        "pending_updates": 0,
+    }
+
+    try:
+        edit_prefs.use_global_undo = False
+        _suspend_viewports(state)
+        if context.window:
+            context.window.cursor_modal_set('WAIT')
+    except Exception as e:
+        print(f"⚠️ [LEAN] No se pudo activar completamente el modo ligero: {e}")
+
+    _lean_state = state
+    print("🪶 [LEAN] Modo ligero activado (undo global y shaders de viewport suspendidos)")
+    try:
+        yield state
+    finally:
+        _lean_state = None
+        try:
+            if state["pending_updates"]:
+                context.view_layer.update()
+        except Exception as e:
+            print(f"⚠️ [LEAN] Error en la actualización final del depsgraph: {e}")
+        try:
+            _restore_viewports(state)
+            if context.window:
+                context.window.cursor_modal_restore()
+        except Exception as e:
+            print(f"⚠️ [LEAN] Error restaurando viewports: {e}")
+        edit_prefs.use_global_undo = state["use_global_undo"]
+        print(f"🪶 [LEAN] Modo ligero desactivado ({state['pending_updates']} actualizaciones agrupadas)")
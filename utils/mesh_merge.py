@@ -0,0 +1,320 @@
+"""
+Unión de mallas a nivel de datos (sin bpy.ops.object.join)
+
+Concatena vértices, aristas, loops, polígonos, capas UV, índices de material,
+atributos genéricos, normales personalizadas y vertex groups de varias mallas
+usando foreach_get/foreach_set en bloque. No necesita objeto activo, selección
+ni modo de edición, por lo que funciona igual en modo headless (blender -b).
+
+Igual que join(), el resultado queda en el espacio local del primer objeto
+(el "activo"), que conserva su nombre, modificadores y padre.
+"""
+
+import bpy  # type: ignore
+import numpy as np
+
+from .weight_merge import read_vertex_weights
+
+
+# Atributos que el builder ya copia por su propia vía (o que Blender gestiona).
+# 'sharp_edge' (4.0+) se copia como atributo genérico; antes de 4.0 no existe
+# y se usa MeshEdge.use_edge_sharp.
+_BUILTIN_ATTRIBUTES = {
+    'position', 'material_index', 'sharp_face',
+    '.edge_verts', '.corner_vert', '.corner_edge', 'sculpt_face_set',
+}
+
+_ATTRIBUTE_VALUE_KEY = {
+    'FLOAT': ('value', 1, np.float32),
+    'INT': ('value', 1, np.int32),
+    'INT8': ('value', 1, np.int32),
+    'BOOLEAN': ('value', 1, bool),
+    'FLOAT_VECTOR': ('vector', 3, np.float32),
+    'FLOAT2': ('vector', 2, np.float32),
+    'FLOAT_COLOR': ('color', 4, np.float32),
+    'BYTE_COLOR': ('color', 4, np.float32),
+    'QUATERNION': ('value', 4, np.float32),
+}
+
+
+def can_merge_at_data_level(objects):
+    """El builder no reconstruye shape keys: en ese caso se usa join()"""
+    for obj in objects:
+        if obj.type != 'MESH':
+            return False
+        if obj.data.shape_keys is not None:
+            return False
+    return True
+
+
+def _get(collection, attr, count, components, dtype):
+    buffer = np.empty(count * components, dtype=dtype)
+    if count:
+        collection.foreach_get(attr, buffer)
+    return buffer
+
+
+def _domain_size(mesh, domain):
+    return {
+        'POINT': len(mesh.vertices),
+        'EDGE': len(mesh.edges),
+        'FACE': len(mesh.polygons),
+        'CORNER': len(mesh.loops),
+    }.get(domain, 0)
+
+
+def _corner_normals(mesh):
+    """Normales por loop (API 4.1+ con corner_normals; fallback a calc_normals_split)"""
+    count = len(mesh.loops)
+    if hasattr(mesh, 'corner_normals'):
+        return _get(mesh.corner_normals, 'vector', count, 3, np.float32).reshape(-1, 3)
+    mesh.calc_normals_split()
+    return _get(mesh.loops, 'normal', count, 3, np.float32).reshape(-1, 3)
+
+
+def _generic_attributes(mesh):
+    uv_names = {uv.name for uv in mesh.uv_layers}
+    result = []
+    for attribute in mesh.attributes:
+        name = attribute.name
+        if name.startswith('.') or name in _BUILTIN_ATTRIBUTES or name in uv_names:
+            continue
+        if attribute.data_type not in _ATTRIBUTE_VALUE_KEY:
+            continue
+        result.append(attribute)
+    return result
+
+
+def merge_mesh_objects(objects, name=None):
+    """Une los objetos malla en el primero de la lista y elimina el resto.
+
+    Devuelve el objeto resultante (el primero) o None si no se pudo unir.
+    """
+    objects = [obj for obj in objects if obj and obj.type == 'MESH']
+    if not objects:
+        return None
+    if len(objects) == 1:
+        return objects[0]
+
+    active = objects[0]
+    to_active = np.array(active.matrix_world.inverted(), dtype=np.float64)
+
+    # --- Tablas globales: materiales, UVs, vertex groups, atributos ---
+    material_list = []
+    material_lookup = {}
+    uv_names = []
+    group_names = []
+    attribute_specs = {}
+
+    for obj in objects:
+        for slot in obj.material_slots:
+            key = slot.material.name_full if slot.material else None
+            if key not in material_lookup:
+                material_lookup[key] = len(material_list)
+                material_list.append(slot.material)
+        for uv in obj.data.uv_layers:
+            if uv.name not in uv_names:
+                uv_names.append(uv.name)
+        for vg in obj.vertex_groups:
+            if vg.name not in group_names:
+                group_names.append(vg.name)
+        for attribute in _generic_attributes(obj.data):
+            attribute_specs.setdefault(attribute.name, (attribute.domain, attribute.data_type))
+
+    group_lookup = {group: i for i, group in enumerate(group_names)}
+    original_name = active.data.name
+    active_color = None
+    if hasattr(active.data, 'color_attributes') and active.data.color_attributes.active_color:
+        active_color = active.data.color_attributes.active_color.name
+    active_uv = active.data.uv_layers.active.name if active.data.uv_layers.active else None
+    active_render_uv = next((uv.name for uv in active.data.uv_layers if uv.active_render), None)
+    use_custom_normals = any(getattr(obj.data, 'has_custom_normals', False) for obj in objects)
+    # Auto smooth (Blender < 4.1): se conserva el del objeto activo, como join()
+    auto_smooth = None
+    if hasattr(active.data, 'use_auto_smooth'):
+        auto_smooth = (active.data.use_auto_smooth, active.data.auto_smooth_angle)
+    copy_edge_sharp = bpy.app.version < (4, 0, 0)
+
+    # --- Recolección por objeto ---
+    co_parts, edge_parts, loop_vert_parts, loop_edge_parts = [], [], [], []
+    loop_start_parts, loop_total_parts, mat_index_parts, smooth_parts = [], [], [], []
+    seam_parts, sharp_parts, normal_parts = [], [], []
+    uv_parts = {uv_name: [] for uv_name in uv_names}
+    attr_parts = {attr_name: [] for attr_name in attribute_specs}
+    weight_groups, weight_verts, weight_values = [], [], []
+
+    vert_offset = edge_offset = loop_offset = 0
+
+    for obj in objects:
+        mesh = obj.data
+        n_verts, n_edges = len(mesh.vertices), len(mesh.edges)
+        n_loops, n_polys = len(mesh.loops), len(mesh.polygons)
+
+        matrix = to_active @ np.array(obj.matrix_world, dtype=np.float64)
+        co = _get(mesh.vertices, 'co', n_verts, 3, np.float64).reshape(-1, 3)
+        co = co @ matrix[:3, :3].T + matrix[:3, 3]
+        co_parts.append(co.astype(np.float32))
+
+        edge_parts.append(_get(mesh.edges, 'vertices', n_edges, 2, np.int32) + vert_offset)
+        seam_parts.append(_get(mesh.edges, 'use_seam', n_edges, 1, bool))
+        if copy_edge_sharp:
+            sharp_parts.append(_get(mesh.edges, 'use_edge_sharp', n_edges, 1, bool))
+        loop_vert_parts.append(_get(mesh.loops, 'vertex_index', n_loops, 1, np.int32) + vert_offset)
+        loop_edge_parts.append(_get(mesh.loops, 'edge_index', n_loops, 1, np.int32) + edge_offset)
+        loop_start_parts.append(_get(mesh.polygons, 'loop_start', n_polys, 1, np.int32) + loop_offset)
+        loop_total_parts.append(_get(mesh.polygons, 'loop_total', n_polys, 1, np.int32))
+        smooth_parts.append(_get(mesh.polygons, 'use_smooth', n_polys, 1, bool))
+
+        # Remapear índices de material locales -> globales
+        local_indices = _get(mesh.polygons, 'material_index', n_polys, 1, np.int32)
+        slot_map = np.array(
+            [material_lookup[s.material.name_full if s.material else None] for s in obj.material_slots] or [0],
+            dtype=np.int32,
+        )
+        np.clip(local_indices, 0, len(slot_map) - 1, out=local_indices)
+        mat_index_parts.append(slot_map[local_indices])
+
+        for uv_name in uv_names:
+            layer = mesh.uv_layers.get(uv_name)
+            if layer is not None:
+                uv_parts[uv_name].append(_get(layer.data, 'uv', n_loops, 2, np.float32))
+            else:
+                uv_parts[uv_name].append(np.zeros(n_loops * 2, dtype=np.float32))
+
+        for attr_name, (domain, data_type) in attribute_specs.items():
+            key, components, dtype = _ATTRIBUTE_VALUE_KEY[data_type]
+            size = _domain_size(mesh, domain)
+            attribute = mesh.attributes.get(attr_name)
+            if attribute is not None and attribute.domain == domain and attribute.data_type == data_type:
+                attr_parts[attr_name].append(_get(attribute.data, key, size, components, dtype))
+            else:
+                attr_parts[attr_name].append(np.zeros(size * components, dtype=dtype))
+
+        if use_custom_normals:
+            normals = _corner_normals(mesh).astype(np.float64)
+            normal_matrix = np.linalg.inv(matrix[:3, :3]).T
+            normals = normals @ normal_matrix.T
+            lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+            lengths[lengths == 0] = 1.0
+            normal_parts.append((normals / lengths).astype(np.float32))
+
+        # Vertex groups: tripletas dispersas (grupo global, vértice global, peso)
+        # (lectura única compartida con la fusión de pesos)
+        if obj.vertex_groups:
+            local_to_global = np.full(max(vg.index for vg in obj.vertex_groups) + 1, -1, dtype=np.int32)
+            for vg in obj.vertex_groups:
+                local_to_global[vg.index] = group_lookup[vg.name]
+            verts, groups, values = read_vertex_weights(obj)
+            global_groups = local_to_global[groups]
+            valid = global_groups >= 0
+            weight_groups.append(global_groups[valid])
+            weight_verts.append(verts[valid] + vert_offset)
+            weight_values.append(values[valid])
+
+        vert_offset += n_verts
+        edge_offset += n_edges
+        loop_offset += n_loops
+
+    # --- Construcción de la malla nueva ---
+    new_mesh = bpy.data.meshes.new(name or original_name)
+    total_verts = vert_offset
+    total_edges = edge_offset
+    total_loops = loop_offset
+    total_polys = sum(len(part) for part in loop_start_parts)
+
+    new_mesh.vertices.add(total_verts)
+    new_mesh.vertices.foreach_set('co', np.concatenate(co_parts).ravel())
+    new_mesh.edges.add(total_edges)
+    new_mesh.edges.foreach_set('vertices', np.concatenate(edge_parts))
+    new_mesh.loops.add(total_loops)
+    new_mesh.loops.foreach_set('vertex_index', np.concatenate(loop_vert_parts))
+    new_mesh.loops.foreach_set('edge_index', np.concatenate(loop_edge_parts))
+    new_mesh.polygons.add(total_polys)
+    new_mesh.polygons.foreach_set('loop_start', np.concatenate(loop_start_parts))
+    try:
+        # Blender < 4.0 necesita loop_total explícito (en 4.0+ es de solo lectura)
+        new_mesh.polygons.foreach_set('loop_total', np.concatenate(loop_total_parts))
+    except (AttributeError, RuntimeError, TypeError):
+        pass
+
+    new_mesh.polygons.foreach_set('material_index', np.concatenate(mat_index_parts))
+    new_mesh.polygons.foreach_set('use_smooth', np.concatenate(smooth_parts))
+    try:
+        new_mesh.edges.foreach_set('use_seam', np.concatenate(seam_parts))
+        if sharp_parts:
+            new_mesh.edges.foreach_set('use_edge_sharp', np.concatenate(sharp_parts))
+    except Exception:
+        pass
+    if auto_smooth is not None:
+        # Sin auto smooth las normales personalizadas se ignoran (< 4.1)
+        new_mesh.use_auto_smooth = auto_smooth[0] or use_custom_normals
+        new_mesh.auto_smooth_angle = auto_smooth[1]
+
+    for uv_name in uv_names:
+        layer = new_mesh.uv_layers.new(name=uv_name)
+        layer.data.foreach_set('uv', np.concatenate(uv_parts[uv_name]))
+    if active_uv and active_uv in new_mesh.uv_layers:
+        new_mesh.uv_layers.active = new_mesh.uv_layers[active_uv]
+    if active_render_uv and active_render_uv in new_mesh.uv_layers:
+        new_mesh.uv_layers[active_render_uv].active_render = True
+
+    for attr_name, (domain, data_type) in attribute_specs.items():
+        key = _ATTRIBUTE_VALUE_KEY[data_type][0]
+        try:
+            attribute = new_mesh.attributes.new(name=attr_name, type=data_type, domain=domain)
+            attribute.data.foreach_set(key, np.concatenate(attr_parts[attr_name]))
+        except Exception as e:
+            print(f"⚠️ [MESH_MERGE] Atributo '{attr_name}' no copiado: {e}")
+
+    if active_color and active_color in new_mesh.color_attributes:
+        new_mesh.color_attributes.active_color = new_mesh.color_attributes[active_color]
+
+    for material in material_list:
+        new_mesh.materials.append(material)
+
+    new_mesh.update()
+
+    if use_custom_normals and normal_parts:
+        try:
+            new_mesh.normals_split_custom_set(np.concatenate(normal_parts))
+        except Exception as e:
+            print(f"⚠️ [MESH_MERGE] Normales personalizadas no copiadas: {e}")
+
+    # --- Sustituir la malla del objeto activo y eliminar el resto ---
+    old_meshes = [obj.data for obj in objects]
+    active.data = new_mesh
+
+    existing_groups = [vg.name for vg in active.vertex_groups]
+    for group_name in group_names:
+        if group_name not in existing_groups:
+            active.vertex_groups.new(name=group_name)
+
+    if sum(len(part) for part in weight_groups):
+        _assign_sparse_weights(active, group_names, np.concatenate(weight_groups),
+                               np.concatenate(weight_verts), np.concatenate(weight_values))
+
+    for obj in objects[1:]:
+        bpy.data.objects.remove(obj, do_unlink=True)
+    for mesh in old_meshes:
+        if mesh.users == 0:
+            bpy.data.meshes.remove(mesh)
+    new_mesh.name = name or original_name
+
+    return active
+
+
+def _assign_sparse_weights(obj, group_names, groups, verts, values):
+    """Escribe las tripletas agrupando por (grupo, peso) para minimizar vg.add()"""
+    groups = np.asarray(groups, dtype=np.int32)
+    verts = np.asarray(verts, dtype=np.int32)
+    values = np.asarray(values, dtype=np.float32)
+
+    order = np.lexsort((values, groups))
+    groups, verts, values = groups[order], verts[order], values[order]
+    changes = np.flatnonzero((np.diff(groups) != 0) | (np.diff(values) != 0)) + 1
+    starts = np.concatenate(([0], changes))
+    ends = np.concatenate((changes, [len(groups)]))
+
+    vertex_groups = [obj.vertex_groups[name] for name in group_names]
+    for start, end in zip(starts, ends):
+        vertex_groups[groups[start]].add(verts[start:end].tolist(), float(values[start]), 'REPLACE')
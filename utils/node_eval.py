@@ -0,0 +1,457 @@
+"""
+Evaluador NumPy de grafos de shader sencillos
+
+evaluate_node_chain_color() (operators/texture_export.py) recorre cadenas
+Image / Hue-Sat / ColorRamp / Mix para obtener UN color medio. Este módulo
+evalúa el grafo completo en espacio de textura: cada píxel de una rejilla
+UV de N x N se calcula con NumPy, de modo que el resultado puede escribirse
+directamente en la imagen `_b_d` sin lanzar Cycles.
+
+Nodos soportados:
+- Image Texture (a través de UV Map, Texture Coordinate o Mapping 2D)
+- Mix (RGBA) / MixRGB: Mix, Add, Multiply, Subtract, Screen, Divide,
+  Difference, Darken, Lighten, Overlay
+- Hue/Saturation/Value, ColorRamp (Linear/Constant), Invert,
+  Bright/Contrast, RGB Curves, RGB, Value y Reroute
+
+Las fórmulas son las de Cycles (svm_color_util). Los cálculos se hacen en
+espacio lineal y el resultado se codifica a sRGB al escribirlo. Cualquier
+nodo no soportado lanza UnsupportedGraph y el llamador vuelve al bake.
+"""
+
+import numpy as np
+
+from .image_analysis import read_pixels
+
+
+# Coeficientes de luminancia Rec.709 (conversión color -> float de Cycles)
+LUMINANCE = np.array([0.2126729, 0.7151522, 0.0721750], dtype=np.float32)
+
+CURVE_LUT_SIZE = 256
+
+class UnsupportedGraph(Exception):
+    """El grafo usa un nodo o configuración que el evaluador no reproduce"""
+
+
+# ----------------------------------------------------------------------
+# Conversión de color
+# ----------------------------------------------------------------------
+def srgb_to_linear(values):
+    values = np.asarray(values, dtype=np.float32)
+    return np.where(values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4).astype(np.float32)
+
+
+def linear_to_srgb(values):
+    values = np.clip(np.asarray(values, dtype=np.float32), 0.0, 1.0)
+    return np.where(values <= 0.0031308, values * 12.92, 1.055 * values ** (1.0 / 2.4) - 0.055).astype(np.float32)
+
+
+def rgb_to_hsv(rgb):
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    cmax = np.maximum(np.maximum(r, g), b)
+    cmin = np.minimum(np.minimum(r, g), b)
+    delta = cmax - cmin
+    safe_delta = np.where(delta > 0.0, delta, 1.0)
+
+    h = np.where(cmax == r, (g - b) / safe_delta,
+                 np.where(cmax == g, 2.0 + (b - r) / safe_delta, 4.0 + (r - g) / safe_delta))
+    h = np.where(delta > 0.0, (h / 6.0) % 1.0, 0.0)
+    s = np.where(cmax > 0.0, delta / np.where(cmax > 0.0, cmax, 1.0), 0.0)
+    return np.stack([h, s, cmax], axis=-1)
+
+
+def hsv_to_rgb(hsv):
+    h, s, v = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+    h6 = (h % 1.0) * 6.0
+    i = np.floor(h6).astype(np.int32) % 6
+    f = h6 - np.floor(h6)
+    p = v * (1.0 - s)
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+    r = np.choose(i, [v, q, p, p, t, v])
+    g = np.choose(i, [t, v, v, q, p, p])
+    b = np.choose(i, [p, p, t, v, v, q])
+    return np.stack([r, g, b], axis=-1)
+
+
+# ----------------------------------------------------------------------
+# Valores: color (..., 3) o float (...) con broadcasting
+# ----------------------------------------------------------------------
+def as_color(value):
+    value = np.asarray(value, dtype=np.float32)
+    if value.ndim >= 1 and value.shape[-1] == 3:
+        return value
+    if value.ndim >= 1 and value.shape[-1] == 4:
+        return value[..., :3]
+    # Float -> color gris
+    return np.repeat(value[..., None], 3, axis=-1)
+
+
+def as_float(value):
+    value = np.asarray(value, dtype=np.float32)
+    if value.ndim >= 1 and value.shape[-1] in (3, 4):
+        return value[..., :3] @ LUMINANCE
+    return value
+
+
+def _interp(a, b, t):
+    return a * (1.0 - t) + b * t
+
+
+def blend_colors(blend_type, t, col1, col2):
+    """ramp_blend de Cycles (svm_color_util.h)"""
+    if blend_type == 'MIX':
+        return _interp(col1, col2, t)
+    if blend_type == 'ADD':
+        return _interp(col1, col1 + col2, t)
+    if blend_type == 'MULTIPLY':
+        return _interp(col1, col1 * col2, t)
+    if blend_type == 'SUBTRACT':
+        return _interp(col1, col1 - col2, t)
+    if blend_type == 'SCREEN':
+        tm = 1.0 - t
+        return 1.0 - (tm + t * (1.0 - col2)) * (1.0 - col1)
+    if blend_type == 'DIVIDE':
+        safe = np.where(col2 != 0.0, col2, 1.0)
+        return np.where(col2 != 0.0, (1.0 - t) * col1 + t * col1 / safe, col1)
+    if blend_type == 'DIFFERENCE':
+        return _interp(col1, np.abs(col1 - col2), t)
+    if blend_type == 'DARKEN':
+        return _interp(col1, np.minimum(col1, col2), t)
+    if blend_type == 'LIGHTEN':
+        return _interp(col1, np.maximum(col1, col2), t)
+    if blend_type == 'OVERLAY':
+        tm = 1.0 - t
+        low = col1 * (tm + 2.0 * t * col2)
+        high = 1.0 - (tm + 2.0 * t * (1.0 - col2)) * (1.0 - col1)
+        return np.where(col1 < 0.5, low, high)
+    raise UnsupportedGraph(f"Modo de mezcla no soportado: {blend_type}")
+
+
+# ----------------------------------------------------------------------
+# Evaluador
+# ----------------------------------------------------------------------
+class NodeGraphEvaluator:
+    """Evalúa sockets de un node tree sobre una rejilla UV de resolution x resolution.
+
+    Tras evaluar, `uv_maps` contiene los UV maps referenciados por las texturas
+    (None = el UV por defecto del render).
+    """
+
+    def __init__(self, resolution):
+        # Con menos de 8 píxeles un color (..., 3) sería ambiguo con una rejilla de floats
+        self.resolution = max(8, int(resolution))
+        coords = (np.arange(self.resolution, dtype=np.float32) + 0.5) / self.resolution
+        # Filas de abajo a arriba, como image.pixels
+        self.u, self.v = np.meshgrid(coords, coords)
+        self.uv_maps = set()
+        self._image_cache = {}
+        self._memo = {}
+
+    # -- Sockets ----------------------------------------------------------
+    def socket_value(self, socket):
+        """Valor de un socket de ENTRADA (enlazado o su default_value)"""
+        if socket is None:
+            raise UnsupportedGraph("Socket inexistente")
+        if not socket.is_linked:
+            value = getattr(socket, 'default_value', None)
+            if value is None:
+                raise UnsupportedGraph(f"Socket sin valor: {socket.name}")
+            try:
+                return np.asarray(tuple(value), dtype=np.float32)
+            except TypeError:
+                return np.asarray(value, dtype=np.float32)
+        link = socket.links[0]
+        if not link.is_valid or getattr(link, 'is_muted', False):
+            raise UnsupportedGraph(f"Enlace inválido hacia {socket.name}")
+        return self.output_value(link.from_socket)
+
+    def output_value(self, socket):
+        """Valor de un socket de SALIDA (con memoización por nodo/salida)"""
+        node = socket.node
+        key = (node.name, socket.identifier)
+        if key not in self._memo:
+            self._memo[key] = self._evaluate_node_output(node, socket)
+        return self._memo[key]
+
+    def _input(self, node, *names):
+        """Primer input del nodo cuyo identificador o nombre coincide"""
+        for name in names:
+            for socket in node.inputs:
+                if socket.identifier == name and socket.enabled:
+                    return socket
+            socket = node.inputs.get(name)
+            if socket is not None and socket.enabled:
+                return socket
+        raise UnsupportedGraph(f"{node.name}: falta la entrada {names[0]}")
+
+    # -- Nodos ------------------------------------------------------------
+    def _evaluate_node_output(self, node, socket):
+        if getattr(node, 'mute', False):
+            raise UnsupportedGraph(f"Nodo silenciado: {node.name}")
+
+        node_type = node.type
+        if node_type == 'REROUTE':
+            return self.socket_value(node.inputs[0])
+        if node_type == 'RGB':
+            return np.asarray(tuple(node.outputs[0].default_value)[:3], dtype=np.float32)
+        if node_type == 'VALUE':
+            return np.asarray(node.outputs[0].default_value, dtype=np.float32)
+        if node_type == 'TEX_IMAGE':
+            return self._image_output(node, socket)
+        if node_type in ('MIX', 'MIX_RGB'):
+            return self._mix(node)
+        if node_type == 'HUE_SAT':
+            return self._hue_saturation(node)
+        if node_type == 'VALTORGB':
+            return self._color_ramp(node, socket)
+        if node_type == 'INVERT':
+            fac = as_float(self.socket_value(self._input(node, 'Fac')))[..., None]
+            color = as_color(self.socket_value(self._input(node, 'Color')))
+            return _interp(color, 1.0 - color, fac)
+        if node_type == 'BRIGHTCONTRAST':
+            color = as_color(self.socket_value(self._input(node, 'Color')))
+            bright = as_float(self.socket_value(self._input(node, 'Bright')))[..., None]
+            contrast = as_float(self.socket_value(self._input(node, 'Contrast')))[..., None]
+            a = 1.0 + contrast
+            b = bright - contrast * 0.5
+            return np.maximum(a * color + b, 0.0)
+        if node_type == 'CURVE_RGB':
+            return self._rgb_curves(node)
+        raise UnsupportedGraph(f"Nodo no soportado: {node.name} ({node_type})")
+
+    def _mix(self, node):
+        if node.type == 'MIX':
+            if node.data_type != 'RGBA':
+                raise UnsupportedGraph(f"{node.name}: Mix de tipo {node.data_type}")
+            fac_socket = self._input(node, 'Factor_Float', 'Factor')
+            col1_socket = self._input(node, 'A_Color', 'A')
+            col2_socket = self._input(node, 'B_Color', 'B')
+            clamp_factor = getattr(node, 'clamp_factor', True)
+            clamp_result = getattr(node, 'clamp_result', False)
+        else:
+            fac_socket = self._input(node, 'Fac')
+            col1_socket = self._input(node, 'Color1')
+            col2_socket = self._input(node, 'Color2')
+            clamp_factor = True
+            clamp_result = getattr(node, 'use_clamp', False)
+
+        fac = as_float(self.socket_value(fac_socket))
+        if clamp_factor:
+            fac = np.clip(fac, 0.0, 1.0)
+        col1 = as_color(self.socket_value(col1_socket))
+        col2 = as_color(self.socket_value(col2_socket))
+        result = blend_colors(node.blend_type, fac[..., None], col1, col2)
+        if clamp_result:
+            result = np.clip(result, 0.0, 1.0)
+        return result
+
+    def _hue_saturation(self, node):
+        """svm_node_hsv de Cycles"""
+        color = as_color(self.socket_value(self._input(node, 'Color')))
+        hue = as_float(self.socket_value(self._input(node, 'Hue')))
+        saturation = as_float(self.socket_value(self._input(node, 'Saturation')))
+        value = as_float(self.socket_value(self._input(node, 'Value')))
+        fac = as_float(self.socket_value(self._input(node, 'Fac')))[..., None]
+
+        hsv = rgb_to_hsv(color)
+        h = (hsv[..., 0] + hue + 0.5) % 1.0
+        s = np.clip(hsv[..., 1] * saturation, 0.0, 1.0)
+        v = hsv[..., 2] * value
+        adjusted = hsv_to_rgb(np.stack(np.broadcast_arrays(h, s, v), axis=-1))
+        return np.maximum(_interp(color, adjusted, fac), 0.0)
+
+    def _color_ramp(self, node, socket):
+        ramp = node.color_ramp
+        if ramp.color_mode != 'RGB' or ramp.interpolation not in ('LINEAR', 'CONSTANT'):
+            raise UnsupportedGraph(f"{node.name}: ColorRamp {ramp.color_mode}/{ramp.interpolation}")
+        fac = as_float(self.socket_value(self._input(node, 'Fac')))
+
+        elements = sorted(ramp.elements, key=lambda e: e.position)
+        positions = np.array([e.position for e in elements], dtype=np.float32)
+        colors = np.array([tuple(e.color) for e in elements], dtype=np.float32)
+
+        if ramp.interpolation == 'CONSTANT':
+            index = np.clip(np.searchsorted(positions, fac, side='right') - 1, 0, len(elements) - 1)
+            values = colors[index]
+        else:
+            values = np.stack([np.interp(fac, positions, colors[:, c]) for c in range(4)], axis=-1)
+
+        if socket.identifier == 'Alpha' or socket.name == 'Alpha':
+            return values[..., 3].astype(np.float32)
+        return values[..., :3].astype(np.float32)
+
+    def _rgb_curves(self, node):
+        """RGB Curves: canal(C(x)) con tablas de CURVE_LUT_SIZE muestras, mezclado por Fac"""
+        mapping = node.mapping
+        if tuple(mapping.black_level) != (0.0, 0.0, 0.0) or tuple(mapping.white_level) != (1.0, 1.0, 1.0):
+            raise UnsupportedGraph(f"{node.name}: niveles de negro/blanco personalizados")
+        mapping.initialize()
+        positions = np.linspace(0.0, 1.0, CURVE_LUT_SIZE, dtype=np.float32)
+        combined_curve = mapping.curves[3]
+        tables = []
+        for channel in range(3):
+            curve = mapping.curves[channel]
+            tables.append(np.array([
+                mapping.evaluate(curve, mapping.evaluate(combined_curve, float(x))) for x in positions
+            ], dtype=np.float32))
+
+        color = as_color(self.socket_value(self._input(node, 'Color')))
+        fac = as_float(self.socket_value(self._input(node, 'Fac')))[..., None]
+        curved = np.stack([np.interp(color[..., c], positions, tables[c]) for c in range(3)], axis=-1)
+        return _interp(color, curved, fac)
+
+    # -- Texturas ---------------------------------------------------------
+    def _texture_coordinates(self, vector_socket):
+        """(u, v) de muestreo según lo conectado al Vector de una textura"""
+        if not vector_socket.is_linked:
+            self.uv_maps.add(None)
+            return self.u, self.v
+
+        node = vector_socket.links[0].from_node
+        from_socket = vector_socket.links[0].from_socket
+        if node.type == 'REROUTE':
+            return self._texture_coordinates(node.inputs[0])
+        if node.type == 'UVMAP':
+            self.uv_maps.add(node.uv_map or None)
+            return self.u, self.v
+        if node.type == 'TEX_COORD' and from_socket.name == 'UV':
+            self.uv_maps.add(None)
+            return self.u, self.v
+        if node.type == 'MAPPING':
+            return self._mapping(node)
+        raise UnsupportedGraph(f"Coordenadas no soportadas: {node.name} ({node.type})")
+
+    def _mapping(self, node):
+        """Nodo Mapping 2D (POINT/TEXTURE) con rotación solo en Z"""
+        if node.vector_type not in ('POINT', 'TEXTURE'):
+            raise UnsupportedGraph(f"{node.name}: Mapping {node.vector_type}")
+        for name in ('Location', 'Rotation', 'Scale'):
+            socket = node.inputs.get(name)
+            if socket is not None and socket.is_linked:
+                raise UnsupportedGraph(f"{node.name}: {name} enlazado")
+        # Sin enlace, el Vector de Mapping es (0, 0, 0), no el UV implícito de la textura
+        if not node.inputs['Vector'].is_linked:
+            raise UnsupportedGraph(f"{node.name}: Vector sin enlazar")
+        u, v = self._texture_coordinates(node.inputs['Vector'])
+        location = tuple(node.inputs['Location'].default_value)
+        rotation = tuple(node.inputs['Rotation'].default_value)
+        scale = tuple(node.inputs['Scale'].default_value)
+        if abs(rotation[0]) > 1e-6 or abs(rotation[1]) > 1e-6:
+            raise UnsupportedGraph(f"{node.name}: rotación fuera del plano UV")
+
+        cos_z, sin_z = np.cos(rotation[2]), np.sin(rotation[2])
+        if node.vector_type == 'POINT':
+            su, sv = u * scale[0], v * scale[1]
+            return cos_z * su - sin_z * sv + location[0], sin_z * su + cos_z * sv + location[1]
+
+        # TEXTURE: transformación inversa
+        if abs(scale[0]) < 1e-8 or abs(scale[1]) < 1e-8:
+            raise UnsupportedGraph(f"{node.name}: escala nula")
+        du, dv = u - location[0], v - location[1]
+        ru, rv = cos_z * du + sin_z * dv, -sin_z * du + cos_z * dv
+        return ru / scale[0], rv / scale[1]
+
+    def _image_pixels(self, image):
+        """Píxeles (h, w, 4) en espacio lineal (o crudos si son Non-Color)"""
+        if image.name in self._image_cache:
+            return self._image_cache[image.name]
+        pixels = read_pixels(image)
+        if pixels is None:
+            raise UnsupportedGraph(f"Imagen sin datos: {image.name}")
+
+        colorspace = image.colorspace_settings.name
+        if not image.is_float:
+            if colorspace == 'sRGB':
+                pixels[..., :3] = srgb_to_linear(pixels[..., :3])
+            elif colorspace not in ('Non-Color', 'Raw') and 'Linear' not in colorspace:
+                raise UnsupportedGraph(f"{image.name}: espacio de color {colorspace}")
+        if image.alpha_mode == 'NONE' or image.channels < 4:
+            pixels[..., 3] = 1.0
+
+        self._image_cache[image.name] = pixels
+        return pixels
+
+    def _image_output(self, node, socket):
+        image = node.image
+        if image is None:
+            raise UnsupportedGraph(f"{node.name}: sin imagen")
+        if image.source not in ('FILE', 'GENERATED'):
+            raise UnsupportedGraph(f"{node.name}: imagen {image.source}")
+        if node.projection != 'FLAT':
+            raise UnsupportedGraph(f"{node.name}: proyección {node.projection}")
+
+        u, v = self._texture_coordinates(node.inputs['Vector'])
+        sample = self._sample(self._image_pixels(image), u, v, node.interpolation, node.extension)
+        if socket.identifier == 'Alpha' or socket.name == 'Alpha':
+            return sample[..., 3]
+        return sample[..., :3]
+
+    @staticmethod
+    def _wrap_indices(index, size, extension):
+        if extension == 'REPEAT':
+            return index % size
+        if extension == 'MIRROR':
+            period = index % (2 * size)
+            return np.where(period < size, period, 2 * size - 1 - period)
+        return np.clip(index, 0, size - 1)
+
+    def _sample(self, pixels, u, v, interpolation, extension):
+        height, width = pixels.shape[:2]
+        x = np.asarray(u, dtype=np.float32) * width
+        y = np.asarray(v, dtype=np.float32) * height
+
+        if interpolation == 'Closest':
+            xi = self._wrap_indices(np.floor(x).astype(np.int64), width, extension)
+            yi = self._wrap_indices(np.floor(y).astype(np.int64), height, extension)
+            result = pixels[yi, xi]
+        else:
+            # Bilineal (Linear/Cubic/Smart se aproximan con bilineal)
+            x -= 0.5
+            y -= 0.5
+            x0 = np.floor(x).astype(np.int64)
+            y0 = np.floor(y).astype(np.int64)
+            fx = (x - x0)[..., None]
+            fy = (y - y0)[..., None]
+            x0w, x1w = self._wrap_indices(x0, width, extension), self._wrap_indices(x0 + 1, width, extension)
+            y0w, y1w = self._wrap_indices(y0, height, extension), self._wrap_indices(y0 + 1, height, extension)
+            top = _interp(pixels[y0w, x0w], pixels[y0w, x1w], fx)
+            bottom = _interp(pixels[y1w, x0w], pixels[y1w, x1w], fx)
+            result = _interp(top, bottom, fy)
+
+        if extension == 'CLIP':
+            inside = (u >= 0.0) & (u < 1.0) & (v >= 0.0) & (v < 1.0)
+            result = np.where(inside[..., None], result, 0.0)
+        return result.astype(np.float32)
+
+
+def evaluate_to_rgba(color_socket, alpha_socket, resolution, fallback_color=(1.0, 1.0, 1.0, 1.0)):
+    """Evalúa color y alpha y devuelve (píxeles RGBA sRGB aplanados, uv_maps usados).
+
+    - color_socket / alpha_socket: sockets de SALIDA (los que se bakearían)
+    - fallback_color: color lineal si no hay socket de color
+    Lanza UnsupportedGraph si algún nodo no se puede evaluar.
+    """
+    evaluator = NodeGraphEvaluator(resolution)
+    size = (evaluator.resolution, evaluator.resolution)
+
+    if color_socket is not None:
+        color = as_color(evaluator.output_value(color_socket))
+    else:
+        color = np.asarray(tuple(fallback_color)[:3], dtype=np.float32)
+    color = np.broadcast_to(color, size + (3,))
+
+    if alpha_socket is not None:
+        alpha = as_float(evaluator.output_value(alpha_socket))
+    else:
+        alpha = np.asarray(1.0, dtype=np.float32)
+    alpha = np.clip(np.broadcast_to(alpha, size), 0.0, 1.0)
+
+    if len(evaluator.uv_maps) > 1:
+        raise UnsupportedGraph(f"Varios UV maps en el grafo: {sorted(str(m) for m in evaluator.uv_maps)}")
+
+    rgba = np.empty(size + (4,), dtype=np.float32)
+    rgba[..., :3] = linear_to_srgb(color)
+    rgba[..., 3] = alpha
+    uv_map = next(iter(evaluator.uv_maps)) if evaluator.uv_maps else None
+    return rgba.ravel(), uv_map
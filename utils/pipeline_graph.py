@@ -0,0 +1,206 @@
+"""
+Grafo declarativo de pasos para la conversión GTA SA
+
+Cada paso declara su nombre, sus entradas y salidas (recursos con nombre) y
+si toca bpy o es solo análisis en CPU. El motor:
+
+- Ignora pasos duplicados (mismo nombre registrado dos veces).
+- Ejecuta los pasos bpy en el orden declarado, en el hilo principal (todos
+  modifican la misma escena).
+- Lanza los pasos de CPU en un hilo de trabajo en cuanto sus entradas están
+  listas, por delante de los pasos bpy; solo se espera su resultado cuando un
+  paso posterior lo necesita.
+- Omite los pasos desactivados desde los ajustes, los cubiertos por un
+  checkpoint restaurado y aquellos cuya precondición ya se cumple.
+- Mide cada paso con el profiler activo y guarda checkpoints tras las etapas
+  que lo declaran.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .profiler import profile_step
+
+
+class PipelineAbort(Exception):
+    """Detiene el pipeline (p. ej. validación fallida) con un mensaje para el usuario"""
+
+
+class PipelineStep:
+    """Paso con nombre del pipeline.
+
+    - run: callable(resources) -> dict de salidas (o None)
+    - inputs / outputs: nombres de recursos que consume / produce
+    - cpu_only: no toca bpy; puede ejecutarse en un hilo de trabajo
+    - done_if: callable(resources) -> True si el efecto del paso ya se cumple
+    - stage: etapa de checkpoint a la que pertenece el paso
+    - checkpoint: etapa cuyo checkpoint se guarda al terminar este paso
+    - required: no se puede desactivar desde los ajustes
+    """
+
+    def __init__(self, name, label, run, inputs=(), outputs=(), cpu_only=False,
+                 done_if=None, stage=None, checkpoint=None, required=False):
+        self.name = name
+        self.label = label
+        self.run = run
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.cpu_only = cpu_only
+        self.done_if = done_if
+        self.stage = stage
+        self.checkpoint = checkpoint
+        self.required = required
+
+    def __repr__(self):
+        return f"PipelineStep({self.name!r})"
+
+
+class PipelineGraph:
+    """Conjunto ordenado de pasos con dependencias por recursos"""
+
+    def __init__(self, name="pipeline"):
+        self.name = name
+        self.steps = []
+        self._by_name = {}
+
+    def add(self, step):
+        """Registra un paso; un nombre repetido se ignora (deduplicación)"""
+        if step.name in self._by_name:
+            print(f"ℹ️ [PIPELINE] Paso duplicado ignorado: {step.name}")
+            return self._by_name[step.name]
+        self.steps.append(step)
+        self._by_name[step.name] = step
+        return step
+
+    def get(self, name):
+        return self._by_name.get(name)
+
+    def producers(self):
+        """{recurso: nombre del primer paso que lo produce}"""
+        produced = {}
+        for step in self.steps:
+            for output in step.outputs:
+                produced.setdefault(output, step.name)
+        return produced
+
+    def validate(self, external_inputs=()):
+        """Comprueba que cada entrada la produce un paso anterior o es externa"""
+        available = set(external_inputs)
+        problems = []
+        for step in self.steps:
+            missing = [name for name in step.inputs if name not in available]
+            if missing:
+                problems.append(f"{step.name}: entradas sin productor previo {missing}")
+            available.update(step.outputs)
+        return problems
+
+    def run(self, resources=None, disabled=(), completed_stage=None, stage_order=(),
+            on_checkpoint=None):
+        """Ejecuta el grafo.
+
+        - resources: dict inicial de recursos (entradas externas)
+        - disabled: nombres de pasos desactivados por el usuario
+        - completed_stage / stage_order: los pasos de etapas hasta completed_stage se omiten
+        - on_checkpoint: callable(stage) tras los pasos con checkpoint
+        Devuelve el informe {'ran': [...], 'skipped': {nombre: motivo}}.
+        """
+        resources = dict(resources or {})
+        disabled = set(disabled)
+        report = {"ran": [], "skipped": {}}
+
+        completed_index = stage_order.index(completed_stage) if completed_stage in stage_order else -1
+        producer_of = self.producers()
+        pending_futures = {}
+
+        def stage_done(step):
+            return step.stage in stage_order and stage_order.index(step.stage) <= completed_index
+
+        def should_skip(step):
+            if stage_done(step):
+                return "checkpoint"
+            if step.name in disabled and not step.required:
+                return "desactivado"
+            return None
+
+        def collect(step_name):
+            """Espera un paso de CPU lanzado y fusiona sus salidas"""
+            future = pending_futures.pop(step_name, None)
+            if future is None:
+                return
+            outputs = future.result()
+            if outputs:
+                resources.update(outputs)
+            report["ran"].append(step_name)
+
+        def ensure_inputs(step):
+            for name in step.inputs:
+                producer = producer_of.get(name)
+                if producer in pending_futures:
+                    with profile_step(f"Esperando: {self._by_name[producer].label}", category="cpu"):
+                        collect(producer)
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="gta_pipeline") as pool:
+
+            def launch_ready_cpu_steps():
+                for candidate in self.steps:
+                    if not candidate.cpu_only or candidate.name in pending_futures:
+                        continue
+                    if candidate.name in report["ran"] or candidate.name in report["skipped"]:
+                        continue
+                    if not all(name in resources for name in candidate.inputs):
+                        continue
+                    reason = should_skip(candidate)
+                    if reason:
+                        report["skipped"][candidate.name] = reason
+                        continue
+                    inputs = {name: resources[name] for name in candidate.inputs}
+                    pending_futures[candidate.name] = pool.submit(candidate.run, inputs)
+
+            for step in self.steps:
+                launch_ready_cpu_steps()
+
+                if step.cpu_only:
+                    # Ya lanzado en segundo plano: se espera solo cuando alguien lo necesite
+                    continue
+
+                reason = should_skip(step)
+                if reason:
+                    report["skipped"][step.name] = reason
+                    print(f"⏭️ {step.label} omitido ({reason})")
+                    continue
+
+                ensure_inputs(step)
+
+                if step.done_if is not None:
+                    try:
+                        already_done = step.done_if(resources)
+                    except Exception as e:
+                        print(f"⚠️ [PIPELINE] Precondición de '{step.name}' falló: {e}")
+                        already_done = False
+                    if already_done:
+                        report["skipped"][step.name] = "ya cumplido"
+                        print(f"⏭️ {step.label} omitido (ya cumplido)")
+                        continue
+
+                print(f"▶️ {step.label}...")
+                with profile_step(step.label):
+                    outputs = step.run(resources) or {}
+                resources.update(outputs)
+                # Las salidas que el paso no devuelve explícitamente (cambios en la
+                # escena) quedan registradas como producidas
+                for name in step.outputs:
+                    if name not in outputs:
+                        resources[name] = True
+                report["ran"].append(step.name)
+
+                if step.checkpoint and on_checkpoint is not None:
+                    on_checkpoint(step.checkpoint)
+
+            # Pasos de CPU que ningún paso bpy llegó a esperar
+            for name in list(pending_futures):
+                collect(name)
+            for step in self.steps:
+                if step.cpu_only and step.name not in report["ran"] and step.name not in report["skipped"]:
+                    report["skipped"][step.name] = "sin entradas"
+
+        report["resources"] = resources
+        return report
@@ -0,0 +1,237 @@
+"""
+Profiler de la conversión GTA SA
+
+Mide cada PASO del pipeline (y las fases anidadas de rasterización y limpieza):
+tiempo real, tiempo de CPU, asignaciones de Python (tracemalloc) y el número de
+datablocks de bpy.data antes/después. La traza se exporta en formato Chrome Trace
+(chrome://tracing o https://ui.perfetto.dev) y se resume en el panel.
+"""
+
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import bpy  # type: ignore
+
+
+# Colecciones de bpy.data que se contabilizan en cada paso
+TRACKED_DATABLOCKS = (
+    'objects', 'meshes', 'materials', 'images', 'node_groups', 'armatures', 'actions',
+)
+
+_active_profiler = None
+
+
+def get_active_profiler():
+    """Profiler de la conversión en curso (None si no se está perfilando)"""
+    return _active_profiler
+
+
+@contextmanager
+def profile_step(name, category="phase"):
+    """Mide una fase anidada si hay un profiler activo; si no, no hace nada.
+
+    Pensado para módulos que no conocen al operador (rasterización, limpieza...).
+    """
+    profiler = _active_profiler
+    if profiler is None:
+        yield None
+        return
+    with profiler.step(name, category) as record:
+        yield record
+
+
+def _count_datablocks():
+    counts = {}
+    for attr in TRACKED_DATABLOCKS:
+        try:
+            counts[attr] = len(getattr(bpy.data, attr))
+        except Exception:
+            counts[attr] = 0
+    return counts
+
+
+class ConversionProfiler:
+    """Registra tiempos y memoria por paso y genera la traza Chrome"""
+
+    def __init__(self, label="conversion"):
+        self.label = label
+        self.records = []
+        self._stack = []
+        self._origin = time.perf_counter()
+        self._started_tracemalloc = False
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+    def start(self):
+        """Activa el profiler globalmente para que las fases anidadas se registren"""
+        global _active_profiler
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._origin = time.perf_counter()
+        _active_profiler = self
+        return self
+
+    def stop(self):
+        global _active_profiler
+        if _active_profiler is self:
+            _active_profiler = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    # ------------------------------------------------------------------
+    # Medición
+    # ------------------------------------------------------------------
+    @contextmanager
+    def step(self, name, category="step"):
+        """Mide un paso. Los pasos pueden anidarse (el padre incluye a los hijos)."""
+        record = {
+            "name": name,
+            "category": category,
+            "depth": len(self._stack),
+            "status": "ok",
+        }
+        record["datablocks_before"] = _count_datablocks()
+
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            mem_before, _ = tracemalloc.get_traced_memory()
+            # Conservar el pico observado por el padre antes de reiniciarlo
+            if self._stack:
+                parent = self._stack[-1]
+                parent["_peak"] = max(parent.get("_peak", 0), tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        else:
+            mem_before = 0
+
+        self._stack.append(record)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        except Exception as e:
+            record["status"] = "error"
+            record["error"] = str(e)
+            raise
+        finally:
+            record["wall_ms"] = (time.perf_counter() - wall_start) * 1000.0
+            record["cpu_ms"] = (time.process_time() - cpu_start) * 1000.0
+            record["start_us"] = (wall_start - self._origin) * 1e6
+
+            if tracing and tracemalloc.is_tracing():
+                mem_after, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, record.pop("_peak", 0))
+                record["alloc_kb"] = (mem_after - mem_before) / 1024.0
+                record["peak_kb"] = max(0, peak - mem_before) / 1024.0
+            else:
+                record.pop("_peak", None)
+                record["alloc_kb"] = 0.0
+                record["peak_kb"] = 0.0
+
+            after = _count_datablocks()
+            before = record["datablocks_before"]
+            record["datablocks_after"] = after
+            record["datablocks_delta"] = {
+                key: after[key] - before.get(key, 0)
+                for key in after if after[key] != before.get(key, 0)
+            }
+
+            self._stack.pop()
+            if self._stack and tracing and tracemalloc.is_tracing():
+                parent = self._stack[-1]
+                parent["_peak"] = max(parent.get("_peak", 0), tracemalloc.get_traced_memory()[1])
+            self.records.append(record)
+
+    # ------------------------------------------------------------------
+    # Resultados
+    # ------------------------------------------------------------------
+    def summary(self, limit=None, top_level_only=True):
+        """Pasos ordenados por tiempo real descendente"""
+        records = [r for r in self.records if r["depth"] == 0 or not top_level_only]
+        records = sorted(records, key=lambda r: r["wall_ms"], reverse=True)
+        if limit:
+            records = records[:limit]
+        return [
+            {
+                "name": r["name"],
+                "wall_ms": round(r["wall_ms"], 1),
+                "cpu_ms": round(r["cpu_ms"], 1),
+                "alloc_kb": round(r["alloc_kb"], 1),
+                "peak_kb": round(r["peak_kb"], 1),
+                "datablocks_delta": r["datablocks_delta"],
+                "status": r["status"],
+            }
+            for r in records
+        ]
+
+    def total_wall_ms(self):
+        return sum(r["wall_ms"] for r in self.records if r["depth"] == 0)
+
+    def to_chrome_trace(self):
+        """Eventos 'X' (complete) del formato Chrome Trace"""
+        pid = os.getpid()
+        events = []
+        for r in sorted(self.records, key=lambda r: r["start_us"]):
+            events.append({
+                "name": r["name"],
+                "cat": r["category"],
+                "ph": "X",
+                "ts": round(r["start_us"], 1),
+                "dur": round(r["wall_ms"] * 1000.0, 1),
+                "pid": pid,
+                "tid": 1,
+                "args": {
+                    "cpu_ms": round(r["cpu_ms"], 2),
+                    "alloc_kb": round(r["alloc_kb"], 1),
+                    "peak_kb": round(r["peak_kb"], 1),
+                    "datablocks_before": r["datablocks_before"],
+                    "datablocks_after": r["datablocks_after"],
+                    "status": r["status"],
+                },
+            })
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "label": self.label,
+                "blender": bpy.app.version_string,
+                "total_wall_ms": round(self.total_wall_ms(), 1),
+            },
+        }
+
+    def write_trace(self, filepath):
+        """Escribe la traza en disco y devuelve la ruta"""
+        os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, indent=2, ensure_ascii=False)
+        return filepath
+
+    def default_trace_path(self):
+        """Junto al .blend si está guardado; si no, en el directorio temporal de Blender"""
+        safe_label = bpy.path.clean_name(self.label) or "conversion"
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        if bpy.data.filepath:
+            base_dir = os.path.dirname(bpy.path.abspath(bpy.data.filepath))
+        else:
+            base_dir = bpy.app.tempdir or os.getcwd()
+        return os.path.join(base_dir, f"gta_trace_{safe_label}_{stamp}.json")
+
+    def print_summary(self, limit=10):
+        print("⏱️ [PROFILER] Pasos más costosos:")
+        for item in self.summary(limit=limit):
+            delta = ", ".join(f"{k}{v:+d}" for k, v in item["datablocks_delta"].items())
+            print(f"   {item['wall_ms']:>9.1f} ms | CPU {item['cpu_ms']:>9.1f} ms | "
+                  f"{item['alloc_kb']:>9.1f} KB | {item['name']}" + (f" [{delta}]" if delta else ""))
+        print(f"⏱️ [PROFILER] Total: {self.total_wall_ms() / 1000.0:.2f} s")
@@ -0,0 +1,173 @@
+"""
+Retarget analítico de la rest pose
+
+Sustituye el ciclo de constraints COPY_LOCATION (crear un constraint por mapeo,
+forzar la evaluación del depsgraph, bpy.ops.pose.armature_apply y borrar los
+constraints) por un cálculo directo:
+
+1. La cabeza de cada hueso destino se obtiene de la matriz de pose del hueso
+   source (espacio mundo -> espacio del armature destino).
+2. Para mapeos muchos-a-uno se promedian las posiciones ('AVERAGE') o se usa
+   el último mapeo de la lista ('LAST', igual que el orden de constraints).
+3. Las matrices resultantes se calculan en orden jerárquico (los huesos sin
+   mapeo heredan el desplazamiento del padre, como con los constraints) y se
+   escriben en una única sesión de edición.
+"""
+
+from collections import OrderedDict
+
+import bpy  # type: ignore
+from mathutils import Matrix, Vector  # type: ignore
+
+
+CONNECT_EPSILON = 1e-5
+
+
+def group_sources_by_target(pairs):
+    """Agrupa pares (source, target) en {target: [sources]} conservando el orden"""
+    groups = OrderedDict()
+    for source, target in pairs:
+        if not source or not target:
+            continue
+        sources = groups.setdefault(target, [])
+        if source in sources:
+            # Un mapeo repetido pasa a ser el último (el que "gana")
+            sources.remove(source)
+        sources.append(source)
+    return groups
+
+
+def compute_target_heads(source_armature, target_armature, pairs, many_to_one='AVERAGE'):
+    """Posición deseada de la cabeza de cada hueso destino (espacio del armature destino).
+
+    - pairs: lista ordenada de (source_bone, target_bone)
+    - many_to_one: 'AVERAGE' promedia los sources, 'LAST' usa el último mapeo
+    Devuelve {target_bone: Vector}.
+    """
+    to_target_space = target_armature.matrix_world.inverted() @ source_armature.matrix_world
+    source_pose = source_armature.pose.bones
+    target_bones = target_armature.data.bones
+
+    heads = {}
+    for target, sources in group_sources_by_target(pairs).items():
+        if target not in target_bones:
+            continue
+        valid = [name for name in sources if name in source_pose]
+        if not valid:
+            continue
+        if many_to_one == 'LAST':
+            valid = valid[-1:]
+
+        accumulated = Vector((0.0, 0.0, 0.0))
+        for name in valid:
+            accumulated += to_target_space @ source_pose[name].head
+        heads[target] = accumulated / len(valid)
+    return heads
+
+
+def _hierarchy_order(armature):
+    """Huesos de padres a hijos"""
+    ordered = []
+    stack = [bone for bone in armature.data.bones if bone.parent is None]
+    stack.reverse()
+    while stack:
+        bone = stack.pop()
+        ordered.append(bone)
+        stack.extend(reversed(bone.children))
+    return ordered
+
+
+def compute_rest_matrices(target_armature, heads):
+    """Matrices de rest nuevas para todos los huesos del armature destino.
+
+    Reproduce lo que producía COPY_LOCATION + armature_apply: la orientación
+    del hueso no cambia, solo su posición, y los hijos sin mapeo siguen al padre.
+    """
+    pose_bones = target_armature.pose.bones
+    matrices = OrderedDict()
+
+    for bone in _hierarchy_order(target_armature):
+        pose_bone = pose_bones.get(bone.name)
+        basis = pose_bone.matrix_basis if pose_bone else Matrix.Identity(4)
+
+        if bone.parent and bone.parent.name in matrices:
+            local = bone.parent.matrix_local.inverted() @ bone.matrix_local @ basis
+            matrix = matrices[bone.parent.name] @ local
+        else:
+            matrix = bone.matrix_local @ basis
+
+        head = heads.get(bone.name)
+        if head is not None:
+            matrix = matrix.copy()
+            matrix.translation = head
+
+        matrices[bone.name] = matrix
+    return matrices
+
+
+def write_rest_matrices(target_armature, matrices):
+    """Escribe las matrices en los edit bones en una sola sesión de edición.
+
+    Las conexiones padre-hijo se conservan solo si la cabeza del hijo sigue
+    coincidiendo con la cola del padre.
+    """
+    view_layer = bpy.context.view_layer
+    previous_active = view_layer.objects.active
+    if bpy.context.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    view_layer.objects.active = target_armature
+    bpy.ops.object.mode_set(mode='EDIT')
+    try:
+        edit_bones = target_armature.data.edit_bones
+
+        # Desconectar antes de mover: mover la cabeza de un hijo conectado
+        # arrastraría la cola del padre
+        connected = [eb.name for eb in edit_bones if eb.use_connect]
+        for name in connected:
+            edit_bones[name].use_connect = False
+
+        for name, matrix in matrices.items():
+            edit_bone = edit_bones.get(name)
+            if edit_bone is None:
+                continue
+            length = edit_bone.length * matrix.col[1].xyz.length
+            edit_bone.matrix = matrix
+            if length > 0.0:
+                edit_bone.length = length
+
+        for name in connected:
+            edit_bone = edit_bones[name]
+            if edit_bone.parent and (edit_bone.head - edit_bone.parent.tail).length <= CONNECT_EPSILON:
+                edit_bone.use_connect = True
+    finally:
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    # La pose pasa a ser la nueva rest pose
+    for pose_bone in target_armature.pose.bones:
+        pose_bone.matrix_basis = Matrix.Identity(4)
+
+    if previous_active is not None:
+        view_layer.objects.active = previous_active
+
+
+def retarget_rest_pose(source_armature, target_armature, pairs, many_to_one='AVERAGE', debug=False):
+    """Coloca la rest pose del armature destino según los huesos source.
+
+    - pairs: lista ordenada de (source_bone, target_bone)
+    - many_to_one: 'AVERAGE' o 'LAST'
+    Devuelve el número de huesos destino posicionados.
+    """
+    if not source_armature or not target_armature:
+        return 0
+
+    heads = compute_target_heads(source_armature, target_armature, pairs, many_to_one)
+    if not heads:
+        return 0
+
+    if debug:
+        for target, head in heads.items():
+            print(f"  Retarget: {target} -> ({head.x:.4f}, {head.y:.4f}, {head.z:.4f})")
+
+    write_rest_matrices(target_armature, compute_rest_matrices(target_armature, heads))
+    return len(heads)
@@ -0,0 +1,74 @@
+"""
+Rasterización de colores sólidos
+
+Los materiales de color plano se convierten en una textura para el TXD.
+Antes se construía una lista Python `[r, g, b, a] * size * size` por
+material (millones de floats a 1024/2048). Aquí:
+
+- El buffer se rellena en un array float32 preasignado y se escribe con
+  pixels.foreach_set.
+- Los materiales con el mismo color y tamaño comparten ESE buffer (se
+  rellena una sola vez), pero cada material conserva su propia imagen con
+  el nombre de siempre (`<material>_d`, `<material>_b_d`, ...): es el
+  nombre que termina en el TXD exportado.
+"""
+
+import bpy  # type: ignore
+import numpy as np
+
+
+# Buffers en caché (a 2048x2048 cada uno ocupa 64 MB)
+MAX_CACHED_BUFFERS = 4
+
+# (color RGBA, ancho, alto) -> píxeles float32 ya rellenos
+_SOLID_BUFFERS = {}
+
+
+def clear_solid_buffers():
+    _SOLID_BUFFERS.clear()
+
+
+def _normalize_rgba(color):
+    values = [float(v) for v in tuple(color)[:4]]
+    while len(values) < 3:
+        values.append(values[-1] if values else 1.0)
+    if len(values) == 3:
+        values.append(1.0)
+    return tuple(min(1.0, max(0.0, v)) for v in values)
+
+
+def solid_pixel_buffer(color, width, height):
+    """Buffer plano float32 de width*height píxeles del color (compartido, no modificar)"""
+    key = (_normalize_rgba(color), int(width), int(height))
+    pixels = _SOLID_BUFFERS.get(key)
+    if pixels is None:
+        if len(_SOLID_BUFFERS) >= MAX_CACHED_BUFFERS:
+            _SOLID_BUFFERS.pop(next(iter(_SOLID_BUFFERS)))
+        pixels = np.empty((key[1] * key[2], 4), dtype=np.float32)
+        pixels[:] = key[0]
+        pixels = pixels.ravel()
+        _SOLID_BUFFERS[key] = pixels
+    return pixels
+
+
+def fill_solid_pixels(image, color):
+    """Rellena toda la imagen con un color usando el buffer compartido"""
+    width, height = image.size
+    image.pixels.foreach_set(solid_pixel_buffer(color, width, height))
+    return image
+
+
+def new_solid_image(name, color, size=256):
+    """Imagen `name` (empaquetada) rellena con un color sólido.
+
+    Si ya existe una imagen con ese nombre se reemplaza, como hacía cada
+    rasterizador por material.
+    """
+    size = max(1, int(size))
+    existing = bpy.data.images.get(name)
+    if existing is not None:
+        bpy.data.images.remove(existing)
+    image = bpy.data.images.new(name, width=size, height=size, alpha=True)
+    fill_solid_pixels(image, color)
+    image.pack()
+    return image
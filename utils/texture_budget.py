@@ -0,0 +1,213 @@
+"""
+Presupuesto de texturas por personaje
+
+bake_resolution aplica el mismo tamaño a todos los materiales, así que un
+personaje con 12 materiales puede generar decenas de MB de bakes. En modo
+presupuesto el usuario fija un total (memoria RGBA o tamaño estimado del TXD
+en DXT) y el solver reparte resoluciones por material:
+
+- Densidad de texels: cada material recibe texels en proporción a su área
+  en el mundo, corregida por la fracción del espacio UV que ocupa
+  (un material que solo usa una esquina del UV necesita más resolución).
+- Importancia en pantalla: el área en el mundo aproxima el tamaño en
+  pantalla; la propiedad personalizada `ugta_texture_importance` del
+  material la multiplica (p. ej. 2.0 para la cara).
+- Tamaño de origen: no se supera la resolución de las texturas de origen
+  (no tiene sentido bakear a 2K una textura de 256). Los materiales sin
+  imágenes (procedurales, colores sólidos) no superan bake_resolution.
+
+Las resoluciones son potencias de dos entre BUDGET_MIN_RESOLUTION y
+GTA_MAX_SIZE. Primero se busca (bisección) la escala continua que llena el
+presupuesto, se redondea hacia abajo y se reparte el sobrante duplicando los
+materiales que quedaron por debajo de su resolución ideal.
+"""
+
+import math
+
+import bpy  # type: ignore
+import numpy as np
+
+from .dxt import GTA_MAX_SIZE
+
+
+BUDGET_MIN_RESOLUTION = 64
+IMPORTANCE_PROPERTY = "ugta_texture_importance"
+MIPMAP_FACTOR = 4.0 / 3.0
+
+# Bytes por píxel según el modo de presupuesto
+BYTES_PER_PIXEL = {
+    'MEMORY': {False: 4.0, True: 4.0},
+    'TXD': {False: 0.5 * MIPMAP_FACTOR, True: 1.0 * MIPMAP_FACTOR},  # DXT1 / DXT5 con mipmaps
+}
+
+
+class MaterialTextureDemand:
+    """Datos de un material para el solver de presupuesto"""
+
+    __slots__ = ('material', 'world_area', 'uv_area', 'source_size', 'importance', 'has_alpha',
+                 'procedural_max')
+
+    def __init__(self, material, world_area=0.0, uv_area=0.0, source_size=0, importance=1.0, has_alpha=False,
+                 procedural_max=GTA_MAX_SIZE):
+        self.material = material
+        self.world_area = world_area
+        self.uv_area = uv_area
+        self.source_size = source_size
+        self.importance = importance
+        self.has_alpha = has_alpha
+        # Límite de los materiales sin imágenes de origen
+        self.procedural_max = procedural_max
+
+    @property
+    def max_resolution(self):
+        if self.source_size <= 0:
+            return int(min(GTA_MAX_SIZE, max(BUDGET_MIN_RESOLUTION, self.procedural_max)))
+        size = 1 << max(0, math.ceil(math.log2(self.source_size)))
+        return int(min(GTA_MAX_SIZE, max(BUDGET_MIN_RESOLUTION, size)))
+
+    @property
+    def weight(self):
+        """Texels por unidad de resolución² deseados (área / cobertura UV)"""
+        uv_area = self.uv_area if self.uv_area > 1e-6 else 1.0
+        return max(self.world_area, 1e-8) * max(self.importance, 0.0) / min(uv_area, 1.0)
+
+
+def _mesh_material_areas(obj, uv_name='original_uv_src'):
+    """{índice de slot: (área en el mundo, área UV)} de un objeto malla"""
+    mesh = obj.data
+    polygon_count = len(mesh.polygons)
+    if not polygon_count:
+        return {}
+
+    areas = np.empty(polygon_count, dtype=np.float64)
+    material_index = np.empty(polygon_count, dtype=np.int32)
+    mesh.polygons.foreach_get('area', areas)
+    mesh.polygons.foreach_get('material_index', material_index)
+    # Escala del objeto (las áreas de polígono son locales)
+    scale = obj.matrix_world.to_scale()
+    areas *= abs(scale.x * scale.y * scale.z) ** (2.0 / 3.0)
+
+    uv_areas = np.zeros(polygon_count, dtype=np.float64)
+    uv_layer = mesh.uv_layers.get(uv_name) or mesh.uv_layers.active
+    if uv_layer is not None and len(uv_layer.data):
+        loop_start = np.empty(polygon_count, dtype=np.int64)
+        loop_total = np.empty(polygon_count, dtype=np.int64)
+        mesh.polygons.foreach_get('loop_start', loop_start)
+        mesh.polygons.foreach_get('loop_total', loop_total)
+        uvs = np.empty(len(uv_layer.data) * 2, dtype=np.float64)
+        uv_layer.data.foreach_get('uv', uvs)
+        uvs = uvs.reshape(-1, 2)
+        # Fórmula del polígono (shoelace): siguiente loop dentro de cada polígono
+        following = np.arange(1, len(uvs) + 1)
+        following[loop_start + loop_total - 1] = loop_start
+        cross = uvs[:, 0] * uvs[following, 1] - uvs[following, 0] * uvs[:, 1]
+        uv_areas = 0.5 * np.abs(np.add.reduceat(cross, loop_start))
+
+    result = {}
+    for index in np.unique(material_index):
+        mask = material_index == index
+        result[int(index)] = (float(areas[mask].sum()), float(uv_areas[mask].sum()))
+    return result
+
+
+def _material_source_size(material):
+    size = 0
+    if material.use_nodes and material.node_tree:
+        for node in material.node_tree.nodes:
+            if node.type == 'TEX_IMAGE' and node.image:
+                size = max(size, *node.image.size)
+    return size
+
+
+def collect_material_demands(materials, alpha_lookup=None, procedural_max=GTA_MAX_SIZE):
+    """MaterialTextureDemand de cada material a partir de las mallas de la escena"""
+    demands = {material: MaterialTextureDemand(material, procedural_max=procedural_max) for material in materials}
+    for obj in bpy.context.scene.objects:
+        if obj.type != 'MESH' or not obj.material_slots:
+            continue
+        for index, (world_area, uv_area) in _mesh_material_areas(obj).items():
+            if index >= len(obj.material_slots):
+                continue
+            demand = demands.get(obj.material_slots[index].material)
+            if demand is not None:
+                demand.world_area += world_area
+                demand.uv_area += uv_area
+
+    for material, demand in demands.items():
+        demand.source_size = _material_source_size(material)
+        demand.importance = float(material.get(IMPORTANCE_PROPERTY, 1.0))
+        if alpha_lookup is not None:
+            demand.has_alpha = bool(alpha_lookup(material))
+    return list(demands.values())
+
+
+def _floor_power_of_two(value):
+    if value < 1:
+        return 1
+    return 1 << int(math.floor(math.log2(value)))
+
+
+def solve_texture_budget(demands, budget_bytes, mode='TXD'):
+    """{material: resolución} cuyo coste total no supera budget_bytes (si es posible)"""
+    if not demands:
+        return {}
+    bytes_per_pixel = BYTES_PER_PIXEL.get(mode, BYTES_PER_PIXEL['TXD'])
+    costs = [bytes_per_pixel[d.has_alpha] for d in demands]
+    weights = [d.weight for d in demands]
+    limits = [d.max_resolution for d in demands]
+
+    def ideal(scale, i):
+        return min(limits[i], max(BUDGET_MIN_RESOLUTION, math.sqrt(scale * weights[i])))
+
+    def total(resolutions):
+        return sum(res * res * cost for res, cost in zip(resolutions, costs))
+
+    # Bisección (en escala logarítmica) de la escala continua que llena el presupuesto
+    low, high = 1e-12, 1e12
+    for _ in range(100):
+        middle = math.sqrt(low * high)
+        if total([ideal(middle, i) for i in range(len(demands))]) > budget_bytes:
+            high = middle
+        else:
+            low = middle
+    targets = [ideal(low, i) for i in range(len(demands))]
+    resolutions = [max(BUDGET_MIN_RESOLUTION, min(limits[i], _floor_power_of_two(targets[i])))
+                   for i in range(len(demands))]
+
+    # Repartir el sobrante: duplicar primero el material más por debajo de su ideal
+    spent = total(resolutions)
+    while True:
+        best = None
+        for i, res in enumerate(resolutions):
+            if res * 2 > limits[i]:
+                continue
+            extra = 3 * res * res * costs[i]
+            if spent + extra > budget_bytes:
+                continue
+            deficit = targets[i] / res
+            if deficit <= 1.0:
+                continue
+            if best is None or deficit > best[0]:
+                best = (deficit, i, extra)
+        if best is None:
+            break
+        _, i, extra = best
+        resolutions[i] *= 2
+        spent += extra
+
+    return {demand.material: resolution for demand, resolution in zip(demands, resolutions)}
+
+
+def describe_budget(resolutions, demands, mode='TXD'):
+    """Resumen (MB estimados, líneas por material) para el log"""
+    bytes_per_pixel = BYTES_PER_PIXEL.get(mode, BYTES_PER_PIXEL['TXD'])
+    lines = []
+    total = 0.0
+    for demand in demands:
+        res = resolutions.get(demand.material)
+        if res is None:
+            continue
+        size = res * res * bytes_per_pixel[demand.has_alpha]
+        total += size
+        lines.append(f"{demand.material.name}: {res}x{res} ({size / (1024 * 1024):.2f} MB)")
+    return total / (1024 * 1024), lines
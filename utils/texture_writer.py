@@ -0,0 +1,158 @@
+"""
+Escritura de texturas en segundo plano
+
+image.save() codifica y escribe cada textura en el hilo principal, una tras
+otra. Aquí el trabajo se divide en dos fases:
+
+1. Hilo principal: se leen los píxeles de cada imagen (foreach_get) a un
+   array uint8 independiente. Es lo único que toca el datablock.
+2. Pool de hilos: se codifica PNG/TGA/DDS y se escribe el archivo. zlib y la
+   escritura en disco liberan el GIL, así que las texturas se procesan en
+   paralelo. Los trabajos solo contienen arrays y rutas, nunca imágenes de bpy.
+
+DDS se comprime en DXT con utils/dxt.py (Blender no puede guardar DDS).
+Las imágenes float (EXR/HDR) y los formatos que no se codifican aquí siguen
+usando image.save() en el hilo principal, salvo en DDS: ahí no hay otra vía y
+los píxeles lineales se pasan a sRGB antes de cuantizar a 8 bits.
+"""
+
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+from .dxt import encode_dds
+from .image_analysis import read_pixels
+
+
+THREADED_FORMATS = {'PNG', 'TARGA', 'TARGA_RAW', 'DDS'}
+PNG_COMPRESSION_LEVEL = 6
+# Espacios de color de datos: sus píxeles float no se convierten a sRGB
+NON_COLOR_SPACES = {'Non-Color', 'Raw', 'Generic Data'}
+
+
+def default_worker_count():
+    return max(1, min(8, (os.cpu_count() or 2) - 1))
+
+
+class TextureWriteJob:
+    """Píxeles ya extraídos de una imagen y destino del archivo"""
+
+    __slots__ = ('name', 'filepath', 'file_format', 'pixels', 'options')
+
+    def __init__(self, name, filepath, file_format, pixels, options=None):
+        self.name = name
+        self.filepath = filepath
+        self.file_format = file_format
+        # uint8 (height, width, 3|4), fila 0 = fila inferior (orden de Blender)
+        self.pixels = pixels
+        # Opciones del codificador (DDS: 'compression', 'mipmaps')
+        self.options = options or {}
+
+
+def can_write_threaded(image, file_format):
+    """True si la imagen puede exportarse con el escritor en segundo plano"""
+    if file_format == 'DDS':
+        return True
+    return file_format in THREADED_FORMATS and not image.is_float
+
+
+def linear_to_srgb(values):
+    """Curva sRGB estándar sobre valores lineales (se recortan a 0-1)"""
+    values = np.clip(values, 0.0, 1.0)
+    return np.where(values <= 0.0031308, values * 12.92, 1.055 * np.power(values, 1.0 / 2.4) - 0.055)
+
+
+def extract_job(image, filepath, file_format, options=None):
+    """Lee los píxeles de la imagen (hilo principal) o None si no tiene datos"""
+    pixels = read_pixels(image)
+    if pixels is None:
+        return None
+    channels = 4 if image.channels >= 4 and image.alpha_mode != 'NONE' else 3
+    if image.is_float and image.colorspace_settings.name not in NON_COLOR_SPACES:
+        # Buffer float lineal: a sRGB como hace save_render (el alpha no se toca)
+        pixels[..., :3] = linear_to_srgb(pixels[..., :3])
+    data = np.clip(np.rint(pixels[..., :channels] * 255.0), 0, 255).astype(np.uint8)
+    return TextureWriteJob(image.name, filepath, file_format, data, options)
+
+
+def _png_chunk(tag, data):
+    chunk = tag + data
+    return struct.pack(">I", len(data)) + chunk + struct.pack(">I", zlib.crc32(chunk) & 0xFFFFFFFF)
+
+
+def encode_png(pixels, level=PNG_COMPRESSION_LEVEL):
+    """PNG de 8 bits (RGB o RGBA) a partir de píxeles en orden de Blender"""
+    height, width, channels = pixels.shape
+    # PNG empieza por la fila superior; cada fila lleva el byte de filtro 0
+    rows = np.ascontiguousarray(pixels[::-1]).reshape(height, width * channels)
+    raw = np.hstack((np.zeros((height, 1), dtype=np.uint8), rows)).tobytes()
+    color_type = 6 if channels == 4 else 2
+    header = struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)
+    return b"".join((
+        b"\x89PNG\r\n\x1a\n",
+        _png_chunk(b"IHDR", header),
+        _png_chunk(b"IDAT", zlib.compress(raw, level)),
+        _png_chunk(b"IEND", b""),
+    ))
+
+
+def encode_tga(pixels):
+    """TGA sin comprimir (BGR/BGRA) con origen abajo a la izquierda"""
+    height, width, channels = pixels.shape
+    alpha_bits = 8 if channels == 4 else 0
+    header = struct.pack("<BBBHHBHHHHBB", 0, 0, 2, 0, 0, 0, 0, 0, width, height, channels * 8, alpha_bits)
+    bgr = pixels.copy()
+    bgr[..., [0, 2]] = pixels[..., [2, 0]]
+    return header + bgr.tobytes()
+
+
+def write_job(job):
+    """Codifica y escribe un trabajo (se ejecuta en el pool)"""
+    if job.file_format == 'PNG':
+        data = encode_png(job.pixels)
+    elif job.file_format == 'DDS':
+        data, _, _ = encode_dds(
+            job.pixels,
+            job.options.get('compression', 'AUTO'),
+            job.options.get('mipmaps', True),
+        )
+    else:
+        data = encode_tga(job.pixels)
+    temp_path = f"{job.filepath}.tmp"
+    with open(temp_path, "wb") as handle:
+        handle.write(data)
+    os.replace(temp_path, job.filepath)
+    return job.filepath
+
+
+def write_jobs(jobs, max_workers=None, progress=None):
+    """Escribe los trabajos en paralelo.
+
+    progress(done, total, job) se llama en el hilo que espera (el principal)
+    al terminar cada archivo. Devuelve (escritos, [(trabajo, error)]).
+    """
+    written = []
+    errors = []
+    total = len(jobs)
+    if not total:
+        return written, errors
+
+    with ThreadPoolExecutor(max_workers=max_workers or default_worker_count()) as pool:
+        futures = {pool.submit(write_job, job): job for job in jobs}
+        for done, future in enumerate(as_completed(futures), 1):
+            job = futures[future]
+            try:
+                future.result()
+                written.append(job)
+            except Exception as e:
+                errors.append((job, e))
+                try:
+                    os.remove(f"{job.filepath}.tmp")
+                except OSError:
+                    pass
+            if progress is not None:
+                progress(done, total, job)
+    return written, errors
@@ -0,0 +1,212 @@
+"""
+Plan de empaquetado UV por malla
+
+Cada material bakeado necesita sus islas en un 0-1 propio dentro de 'Float2'
+(cada material bakea a su propia imagen). Antes, perform_advanced_baking()
+entraba en modo edición por cada material, seleccionaba sus caras y lanzaba
+shrink_fatten + uv.pack_islands. Aquí se hace una sola pasada por malla:
+
+- Un solo modo edición por malla: dentro, cada slot a bakear se selecciona
+  y se empaqueta por separado en el 0-1 (igual que antes por material,
+  sin entrar y salir de modo edición en cada bake).
+- El resultado de cada slot se guarda en memoria con una clave que depende
+  de la topología de sus caras y de sus UVs de origen: un re-bake de la
+  misma malla copia las UVs guardadas sin entrar en modo edición.
+- La propiedad PACK_PROPERTY de la malla guarda el hash del 'Float2' ya
+  empaquetado de cada slot, así que un slot que ya está listo no se toca.
+"""
+
+import random
+
+import bpy  # type: ignore
+import numpy as np
+
+from .content_hash import _new_hasher, _update_text
+
+
+PACK_PROPERTY = "ugta_uv_pack"
+PACK_MARGIN = 0.001
+# Cambiar al modificar la forma de empaquetar (invalida los planes guardados)
+PACK_VERSION = 2
+# Tolerancia al comprobar que cada slot quedó dentro del 0-1
+BOUNDS_EPSILON = 1e-4
+# Desplazamiento anti z-fighting por slot (según normales)
+ZFIGHT_OFFSET = 0.00002
+
+# Clave de origen del slot -> UVs empaquetadas (float32, loops del slot)
+_PACK_CACHE = {}
+
+
+def clear_uv_pack_cache():
+    _PACK_CACHE.clear()
+
+
+def _hash_uvs(uvs):
+    hasher = _new_hasher()
+    hasher.update(np.round(uvs, 6).tobytes())
+    return hasher.hexdigest()
+
+
+def _slot_source_key(loop_verts, source_uvs):
+    hasher = _new_hasher()
+    _update_text(hasher, f"v{PACK_VERSION}:margin={PACK_MARGIN}:loops={len(loop_verts)}")
+    hasher.update(loop_verts.tobytes())
+    hasher.update(np.round(source_uvs, 6).tobytes())
+    return hasher.hexdigest()
+
+
+def _read_uvs(uv_layer):
+    uvs = np.empty(len(uv_layer.data) * 2, dtype=np.float32)
+    uv_layer.data.foreach_get('uv', uvs)
+    return uvs.reshape(-1, 2)
+
+
+def _recorded_slots(mesh):
+    recorded = mesh.get(PACK_PROPERTY)
+    if recorded is None:
+        return {}
+    recorded = dict(recorded.to_dict() if hasattr(recorded, 'to_dict') else recorded)
+    # Planes de otra versión (p. ej. empaquetados por tiles) no se reutilizan
+    if recorded.get("version") != PACK_VERSION:
+        return {}
+    return recorded
+
+
+def _fit_to_unit(uvs):
+    """Escala uniforme de las UVs del slot dentro del 0-1 (el pack reescala después).
+
+    pack_islands empaqueta en el tile UDIM más cercano: con las UVs ya en el
+    0-1 el resultado nunca cae en otro tile.
+    """
+    low = uvs.min(axis=0)
+    extent = float((uvs.max(axis=0) - low).max())
+    scale = 0.98 / extent if extent > 1e-8 else 1.0
+    return (uvs - low) * scale + 0.01
+
+
+def _inside_unit(uvs):
+    return bool(len(uvs)) and uvs.min() >= -BOUNDS_EPSILON and uvs.max() <= 1.0 + BOUNDS_EPSILON
+
+
+def _offset_slot_vertices(mesh, loop_slots, loop_verts, slots):
+    """Anti z-fighting: desplaza los vértices de cada slot a lo largo de la normal"""
+    vertex_count = len(mesh.vertices)
+    if not vertex_count:
+        return
+    coords = np.empty(vertex_count * 3, dtype=np.float32)
+    normals = np.empty(vertex_count * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', coords)
+    if hasattr(mesh, 'vertex_normals'):
+        mesh.vertex_normals.foreach_get('vector', normals)
+    else:
+        mesh.vertices.foreach_get('normal', normals)
+    coords = coords.reshape(-1, 3)
+    normals = normals.reshape(-1, 3)
+    for slot in slots:
+        verts = np.unique(loop_verts[loop_slots == slot])
+        coords[verts] += normals[verts] * random.uniform(-ZFIGHT_OFFSET, ZFIGHT_OFFSET)
+    mesh.vertices.foreach_set('co', coords.ravel())
+    mesh.update()
+
+
+def _pack_slots(obj, slots):
+    """Empaqueta cada slot en su propio 0-1 (una pasada de selección por slot).
+
+    Todo ocurre en un único modo edición. El objeto debe estar activo.
+    """
+    bpy.ops.object.mode_set(mode='EDIT')
+    try:
+        for slot in slots:
+            bpy.ops.mesh.select_all(action='DESELECT')
+            obj.active_material_index = slot
+            bpy.ops.object.material_slot_select()
+            try:
+                bpy.ops.uv.select_all(action='SELECT')
+            except Exception:
+                pass
+            # Configuración estricta del usuario: Scale=ON, Rotate=OFF, Margin=0.001
+            bpy.ops.uv.pack_islands(rotate=False, scale=True, margin=PACK_MARGIN)
+        bpy.ops.mesh.select_all(action='DESELECT')
+    finally:
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+
+def ensure_uv_pack_plan(obj, slots, source_name='original_uv_src', target_name='Float2'):
+    """Deja empaquetadas en target_name las islas de los slots indicados.
+
+    Cada slot ocupa su propio 0-1. Las capas deben existir y el objeto debe
+    estar activo, seleccionado y en modo objeto. Devuelve
+    (slots empaquetados con Blender, slots copiados de la caché).
+    """
+    mesh = obj.data
+    uv_layers = mesh.uv_layers
+    source_layer = uv_layers.get(source_name)
+    target_layer = uv_layers.get(target_name)
+    polygon_count = len(mesh.polygons)
+    if source_layer is None or target_layer is None or not polygon_count:
+        return 0, 0
+
+    material_index = np.empty(polygon_count, dtype=np.int32)
+    loop_total = np.empty(polygon_count, dtype=np.int32)
+    mesh.polygons.foreach_get('material_index', material_index)
+    mesh.polygons.foreach_get('loop_total', loop_total)
+    loop_slots = np.repeat(material_index, loop_total)
+    loop_verts = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', loop_verts)
+    source_uvs = _read_uvs(source_layer)
+    target_uvs = _read_uvs(target_layer)
+
+    recorded = _recorded_slots(mesh)
+    prepared = []
+    to_pack = []
+    keys = {}
+    from_cache = 0
+    for slot in sorted(set(slots)):
+        mask = loop_slots == slot
+        if not mask.any():
+            continue
+        if recorded.get(str(slot)) == _hash_uvs(target_uvs[mask]):
+            continue
+        key = _slot_source_key(loop_verts[mask], source_uvs[mask])
+        keys[slot] = key
+        cached = _PACK_CACHE.get(key)
+        if cached is not None and len(cached) == int(mask.sum()):
+            target_uvs[mask] = cached
+            from_cache += 1
+        else:
+            to_pack.append(slot)
+        prepared.append(slot)
+
+    if not prepared:
+        return 0, 0
+
+    invalid = set()
+    if to_pack:
+        for slot in to_pack:
+            mask = loop_slots == slot
+            target_uvs[mask] = _fit_to_unit(source_uvs[mask])
+        target_layer.data.foreach_set('uv', target_uvs.ravel())
+        _pack_slots(obj, to_pack)
+        # Tras el cambio de modo las capas se vuelven a leer
+        target_layer = mesh.uv_layers[target_name]
+        target_uvs = _read_uvs(target_layer)
+        for slot in to_pack:
+            slot_uvs = target_uvs[loop_slots == slot]
+            if _inside_unit(slot_uvs):
+                _PACK_CACHE[keys[slot]] = slot_uvs.copy()
+            else:
+                # No se guarda: el siguiente bake vuelve a empaquetar el slot
+                invalid.add(slot)
+                print(f"⚠️ [UV_PLAN] {obj.name}: slot {slot} fuera del 0-1 tras el pack")
+
+    target_layer.data.foreach_set('uv', target_uvs.ravel())
+    _offset_slot_vertices(mesh, loop_slots, loop_verts, prepared)
+
+    for slot in prepared:
+        if slot in invalid:
+            recorded.pop(str(slot), None)
+        else:
+            recorded[str(slot)] = _hash_uvs(target_uvs[loop_slots == slot])
+    recorded["version"] = PACK_VERSION
+    mesh[PACK_PROPERTY] = recorded
+    return len(to_pack), from_cache
@@ -0,0 +1,137 @@
+"""
+Fusión vectorizada de pesos de vertex groups
+
+Sustituye la cadena de modificadores VERTEX_WEIGHT_MIX (uno por mapeo, cada uno
+aplicado con bpy.ops.object.modifier_apply) por una única lectura de pesos,
+una suma vectorizada en NumPy y una escritura solo de los vértices que cambian.
+
+- read_vertex_weights(): lectura única de TODOS los vertex groups de la malla
+  como tripletas (vértice, grupo, peso). Blender no ofrece foreach_get para
+  los pesos de deformación, así que es la única pasada por los vértices; la
+  reutilizan también la unión de mallas y los hashes de contenido.
+- Los mapeos se aplican en orden (un source puede ser target de un mapeo posterior).
+- Cada suma se limita al rango [0, 1].
+- Solo se escriben los vértices cuyo peso destino cambió (los del source con
+  peso > 0); el resto de la malla no se toca.
+"""
+
+import numpy as np
+
+
+def collect_weight_pairs(bone_mappings):
+    """Pares (target, source) únicos y en orden a partir de los bone mappings habilitados"""
+    pairs = []
+    processed = set()
+    for mapping in bone_mappings:
+        if not mapping.enabled or not mapping.source_bone or not mapping.target_bone:
+            continue
+        pair = (mapping.target_bone, mapping.source_bone)
+        if pair in processed:
+            continue
+        processed.add(pair)
+        pairs.append(pair)
+    return pairs
+
+
+def read_vertex_weights(obj):
+    """Pesos de todos los vertex groups en una sola lectura.
+
+    Devuelve (vértices int32, grupos int32, pesos float32), arrays paralelos.
+    """
+    mesh = obj.data
+    vertex_count = len(mesh.vertices)
+    if not obj.vertex_groups or not vertex_count:
+        empty = np.empty(0, dtype=np.int32)
+        return empty, empty.copy(), np.empty(0, dtype=np.float32)
+
+    counts = np.empty(vertex_count, dtype=np.int32)
+    groups = []
+    weights = []
+    add_group = groups.append
+    add_weight = weights.append
+    for index, vertex in enumerate(mesh.vertices):
+        elements = vertex.groups
+        counts[index] = len(elements)
+        for element in elements:
+            add_group(element.group)
+            add_weight(element.weight)
+
+    verts = np.repeat(np.arange(vertex_count, dtype=np.int32), counts)
+    return verts, np.asarray(groups, dtype=np.int32), np.asarray(weights, dtype=np.float32)
+
+
+def read_group_weights(obj, group_names):
+    """Pesos densos de los grupos indicados a partir de una sola lectura.
+
+    Devuelve {nombre: np.ndarray(float32, n_vertices)}.
+    """
+    vertex_count = len(obj.data.vertices)
+    weights = {name: np.zeros(vertex_count, dtype=np.float32) for name in group_names}
+    index_to_name = {}
+    for name in group_names:
+        vg = obj.vertex_groups.get(name)
+        if vg is not None:
+            index_to_name[vg.index] = name
+    if not index_to_name:
+        return weights
+
+    verts, groups, values = read_vertex_weights(obj)
+    for group_index, name in index_to_name.items():
+        mask = groups == group_index
+        weights[name][verts[mask]] = values[mask]
+    return weights
+
+
+def write_group_weights(obj, name, weights, indices):
+    """Escribe en un vertex group solo los vértices indicados con peso > 0.
+
+    Los vértices con el mismo peso comparten una llamada a vg.add().
+    """
+    vg = obj.vertex_groups.get(name) or obj.vertex_groups.new(name=name)
+    indices = np.asarray(indices, dtype=np.int64)
+    indices = indices[weights[indices] > 0.0]
+    if indices.size == 0:
+        return 0
+
+    values = weights[indices]
+    unique_values, inverse = np.unique(values, return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    boundaries = np.flatnonzero(np.diff(inverse[order])) + 1
+    for group_indices, value in zip(np.split(indices[order], boundaries), unique_values):
+        vg.add(group_indices.tolist(), float(value), 'REPLACE')
+    return int(indices.size)
+
+
+def merge_vertex_group_weights(obj, pairs):
+    """Suma los pesos source -> target para todos los pares en una sola pasada.
+
+    - obj: objeto malla con los vertex groups
+    - pairs: lista ordenada de (target, source)
+    Devuelve el número de pares fusionados.
+    """
+    if not obj or obj.type != 'MESH' or not pairs:
+        return 0
+
+    # Crear grupos inexistentes (igual que el flujo con modificadores)
+    for target, source in pairs:
+        for name in (target, source):
+            if obj.vertex_groups.find(name) == -1:
+                obj.vertex_groups.new(name=name)
+
+    names = {name for pair in pairs for name in pair}
+    weights = read_group_weights(obj, names)
+
+    original = {name: values.copy() for name, values in weights.items()}
+    targets = []
+    for target, source in pairs:
+        merged = weights[target] + weights[source]
+        np.clip(merged, 0.0, 1.0, out=merged)
+        weights[target] = merged
+        if target not in targets:
+            targets.append(target)
+
+    for target in targets:
+        changed = np.flatnonzero(weights[target] != original[target])
+        write_group_weights(obj, target, weights[target], changed)
+
+    return len(pairs)